@@ -99,7 +99,7 @@ async def lifespan(app: FastAPI):
         )
         
         if result.returncode == 0:
-            logging.info("✅ Footage AutoLog Part B workers started (11 workers)")
+            logging.info("✅ Footage AutoLog Part B workers started")
         else:
             logging.warning(f"⚠️ Failed to start workers: {result.stderr[:200]}")
     except Exception as e:
@@ -172,14 +172,16 @@ async def lifespan(app: FastAPI):
     # This prevents stale jobs from persisting across API restarts
     logging.info("🧹 Clearing RQ queues...")
     try:
-        from jobs.ftg_autolog_B_queue_jobs import q_step1, q_step2, q_step3, q_step4
+        from jobs.ftg_autolog_B_queue_jobs import q_step1, q_step2, q_step3, q_step4, q_prefetch, q_transcribe
         
         total_cleared = 0
         for queue, name in [
             (q_step1, "Step 1"),
             (q_step2, "Step 2"),
             (q_step3, "Step 3"),
-            (q_step4, "Step 4")
+            (q_step4, "Step 4"),
+            (q_prefetch, "Prefetch"),
+            (q_transcribe, "Transcribe")
         ]:
             count = len(queue)
             if count > 0:
@@ -615,15 +617,17 @@ def run_job_with_tracking(job_id: str, cmd: List[str]):
 
 @app.get("/openai/usage")
 def get_openai_usage():
-    """Get OpenAI API usage statistics across all configured keys."""
+    """Get OpenAI API usage statistics across all configured keys, plus LLM response cache savings."""
     try:
         from utils.openai_client import global_openai_client
+        from utils.llm_response_cache import global_llm_cache
         
         if not global_openai_client.api_keys:
             return {
                 "status": "no_keys_configured",
                 "message": "No OpenAI API keys configured",
-                "keys": []
+                "keys": [],
+                "response_cache": global_llm_cache.get_usage()
             }
         
         stats = global_openai_client.get_usage_stats()
@@ -631,7 +635,8 @@ def get_openai_usage():
         return {
             "status": "success",
             "timestamp": datetime.now().isoformat(),
-            "openai_keys": stats
+            "openai_keys": stats,
+            "response_cache": global_llm_cache.get_usage()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting OpenAI usage: {str(e)}")
@@ -1681,7 +1686,7 @@ def run_ftg_autolog_B_workflow(background_tasks: BackgroundTasks):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/run/ftg_ai_batch_ready", dependencies=[Depends(check_key)])
-def set_batch_ready_for_ai(footage_ids: list[str]):
+def set_batch_ready_for_ai(footage_ids: list[str], refresh_llm_cache: bool = False):
     """
     Set multiple footage items to "3 - Ready for AI" and queue them for processing.
     
@@ -1689,6 +1694,7 @@ def set_batch_ready_for_ai(footage_ids: list[str]):
     
     Args:
         footage_ids: List of footage IDs to set ready (e.g., ["FTG001", "FTG002"])
+        refresh_llm_cache: Reprocessing - make fresh Gemini calls instead of serving cached responses
     
     Returns:
         Summary of items updated and queued
@@ -1737,7 +1743,7 @@ def set_batch_ready_for_ai(footage_ids: list[str]):
             
             # Only queue items that were successfully updated
             successful_ids = [fid for fid in footage_ids if not any(f["id"] == fid for f in failed_items)]
-            job_ids = queue_ftg_ai_batch(successful_ids, token)
+            job_ids = queue_ftg_ai_batch(successful_ids, token, refresh_llm_cache)
             
             logging.info(f"📥 Queued {len(job_ids)} items for AI processing")
             
@@ -1781,6 +1787,48 @@ def get_ftg_autolog_B_queue_status():
         logging.error(f"❌ Failed to get queue status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/workspace/usage")
+def get_workspace_usage():
+    """Get Footage AutoLog Part B temp workspace usage (quota, pinned items, evictions)."""
+    try:
+        from utils.workspace_manager import global_workspace_manager
+        
+        return {
+            "status": "success",
+            "timestamp": datetime.now().isoformat(),
+            "workspace": global_workspace_manager.get_usage()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting workspace usage: {str(e)}")
+
+@app.get("/footage_cache/usage")
+def get_footage_cache_usage():
+    """Get local footage cache usage (size, hit rate, staging latency)."""
+    try:
+        from utils.footage_cache import global_footage_cache
+        
+        return {
+            "status": "success",
+            "timestamp": datetime.now().isoformat(),
+            "footage_cache": global_footage_cache.get_usage()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting footage cache usage: {str(e)}")
+
+@app.get("/llm/usage")
+def get_llm_usage(days: int = 7):
+    """Get LLM tokens, latency and cost per step and per day (all processes, from the local usage log)."""
+    try:
+        from utils.llm_usage import global_llm_usage
+        
+        return {
+            "status": "success",
+            "timestamp": datetime.now().isoformat(),
+            "llm_usage": global_llm_usage.get_usage(days=days)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting LLM usage: {str(e)}")
+
 # ============================================================================
 # Metadata Bridge Endpoints for Avid Media Composer Integration
 
@@ -2238,7 +2286,7 @@ def get_dashboard_data(request: Request):
     def get_redis_queue_data():
         """Get Redis queue data for Footage AutoLog Part B."""
         try:
-            from jobs.ftg_autolog_B_queue_jobs import q_step1, q_step2, q_step3, q_step4
+            from jobs.ftg_autolog_B_queue_jobs import q_step1, q_step2, q_step3, q_step4, q_transcribe
             from rq.registry import StartedJobRegistry
             from rq.job import Job
             
@@ -2282,7 +2330,8 @@ def get_dashboard_data(request: Request):
                 (q_step1, 'step1_assess'),
                 (q_step2, 'step2_gemini'),
                 (q_step3, 'step3_frames'),
-                (q_step4, 'step4_audio')
+                (q_step4, 'step4_audio'),
+                (q_transcribe, 'transcribe_whisper')
             ]:
                 queued, processing = get_queue_items(queue)
                 queues_data[step_name] = {
@@ -2344,6 +2393,30 @@ def get_dashboard_data(request: Request):
         # Get Redis queue data
         redis_queues, total_queued, total_processing = get_redis_queue_data()
         
+        # Part B workspace usage (temp artifacts under quota)
+        try:
+            from utils.workspace_manager import global_workspace_manager
+            workspace = global_workspace_manager.get_usage()
+        except Exception as e:
+            logging.warning(f"⚠️ Could not get workspace usage: {e}")
+            workspace = {}
+        
+        # Local footage cache (SMB read-ahead)
+        try:
+            from utils.footage_cache import global_footage_cache
+            footage_cache = global_footage_cache.get_usage()
+        except Exception as e:
+            logging.warning(f"⚠️ Could not get footage cache usage: {e}")
+            footage_cache = {}
+        
+        # LLM tokens, latency and cost per step per day
+        try:
+            from utils.llm_usage import global_llm_usage
+            llm_usage = global_llm_usage.get_usage(days=7)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not get LLM usage: {e}")
+            llm_usage = {}
+        
         # Count statuses
         running_count = sum(1 for j in api_jobs if j['status'] == 'running')
         failed_count = sum(1 for j in api_jobs if j['status'] == 'failed')
@@ -2353,6 +2426,9 @@ def get_dashboard_data(request: Request):
             'api_status': 'healthy',
             'api_jobs': api_jobs[:100],  # Limit to last 100 jobs
             'redis_queues': redis_queues,
+            'workspace': workspace,
+            'footage_cache': footage_cache,
+            'llm_usage': llm_usage,
             'stats': {
                 'total_api_jobs': stats['total_submitted'],
                 'api_running': running_count,
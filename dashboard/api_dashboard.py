@@ -258,6 +258,18 @@ HTML_TEMPLATE = """
             color: #787774;
         }
         
+        .section-title {
+            margin: 32px 0 12px;
+            font-size: 14px;
+            font-weight: 600;
+            color: #37352f;
+        }
+        
+        .llm-usage td {
+            padding: 8px 16px;
+            font-size: 13px;
+        }
+        
         .table-container {
             border: 1px solid #e9e9e7;
             border-radius: 3px;
@@ -509,7 +521,7 @@ HTML_TEMPLATE = """
         
         function applyFilters() {
             const searchValue = document.getElementById('search').value.toLowerCase().trim();
-            const rows = document.querySelectorAll('tbody tr:not(.empty-state)');
+            const rows = document.querySelectorAll('#jobs-table tbody tr:not(.empty-state)');
             let visibleCount = 0;
             
             rows.forEach(row => {
@@ -540,7 +552,7 @@ HTML_TEMPLATE = """
             });
             
             // Show/hide empty state
-            const emptyState = document.querySelector('.empty-state');
+            const emptyState = document.querySelector('#jobs-table .empty-state');
             if (emptyState) {
                 emptyState.style.display = visibleCount === 0 ? 'table-row' : 'none';
             }
@@ -557,9 +569,9 @@ HTML_TEMPLATE = """
         let currentSort = { column: null, direction: 'asc' };
         
         function sortTable(columnIndex) {
-            const table = document.querySelector('table tbody');
+            const table = document.querySelector('#jobs-table tbody');
             const rows = Array.from(table.querySelectorAll('tr:not(.empty-state)'));
-            const header = document.querySelectorAll('th')[columnIndex];
+            const header = document.querySelectorAll('#jobs-table th')[columnIndex];
             
             // Determine sort direction
             if (currentSort.column === columnIndex) {
@@ -718,7 +730,7 @@ HTML_TEMPLATE = """
     </div>
     
     <div class="table-container">
-        <table>
+        <table id="jobs-table">
             <thead>
                 <tr>
                     <th class="sortable" onclick="sortTable(0)" title="Click to sort">FileMaker ID</th>
@@ -785,6 +797,42 @@ HTML_TEMPLATE = """
         </table>
     </div>
     
+    {% if llm_usage.by_step_day %}
+    <div class="section-title">LLM usage (last {{ llm_usage.days }} days)</div>
+    <div class="table-container">
+        <table class="llm-usage">
+            <thead>
+                <tr>
+                    <th>Day</th>
+                    <th>Step</th>
+                    <th>Calls</th>
+                    <th>Cache hits</th>
+                    <th>Failed</th>
+                    <th>Tokens in / out</th>
+                    <th>Avg / max latency</th>
+                    <th>Cost</th>
+                    <th>Per item</th>
+                </tr>
+            </thead>
+            <tbody>
+                {% for row in llm_usage.by_step_day|reverse %}
+                <tr>
+                    <td>{{ row.day }}</td>
+                    <td class="filemaker-id">{{ row.step }}</td>
+                    <td>{{ row.calls }}</td>
+                    <td>{{ row.cache_hits }}</td>
+                    <td>{{ row.failures }}</td>
+                    <td>{{ "{:,}".format(row.input_tokens) }} / {{ "{:,}".format(row.output_tokens) }}</td>
+                    <td>{% if row.avg_latency_seconds is not none %}{{ row.avg_latency_seconds }}s / {{ row.max_latency_seconds }}s{% else %}-{% endif %}</td>
+                    <td>${{ "%.2f"|format(row.cost_usd) }}</td>
+                    <td>{% if row.cost_per_item_usd is not none %}${{ "%.4f"|format(row.cost_per_item_usd) }}{% else %}-{% endif %}</td>
+                </tr>
+                {% endfor %}
+            </tbody>
+        </table>
+    </div>
+    {% endif %}
+    
     <div class="stats-bar">
         <div class="stat-item">
             <span>Jobs:</span>
@@ -806,6 +854,24 @@ HTML_TEMPLATE = """
             <span>Failed:</span>
             <span class="stat-value">{{ stats.api_failed }}</span>
         </div>
+        {% if workspace.quota_bytes %}
+        <div class="stat-item" title="{{ workspace.root }} • {{ workspace.evictions }} evicted">
+            <span>Workspace:</span>
+            <span class="stat-value">{{ "%.1f"|format(workspace.used_bytes / 1073741824) }} / {{ "%.0f"|format(workspace.quota_bytes / 1073741824) }} GB ({{ workspace.items }} items, {{ workspace.pinned_items }} pinned)</span>
+        </div>
+        {% endif %}
+        {% if footage_cache.enabled %}
+        <div class="stat-item" title="{{ footage_cache.cache_dir }} • {{ footage_cache.files }} clips, {{ "%.0f"|format(footage_cache.used_bytes / 1073741824) }} GB">
+            <span>SSD Cache:</span>
+            <span class="stat-value">{{ footage_cache.hit_rate_percent }}% hits, {{ footage_cache.avg_staging_seconds }}s avg stage</span>
+        </div>
+        {% endif %}
+        {% if llm_usage.totals %}
+        <div class="stat-item" title="{{ llm_usage.totals.input_tokens }} input / {{ llm_usage.totals.output_tokens }} output tokens • {{ llm_usage.totals.failures }} failed">
+            <span>LLM ({{ llm_usage.days }}d):</span>
+            <span class="stat-value">{{ llm_usage.totals.calls }} calls, {{ llm_usage.totals.cache_hits }} cached, ${{ "%.2f"|format(llm_usage.totals.cost_usd) }}</span>
+        </div>
+        {% endif %}
         <div class="stat-item" style="margin-left: auto; color: #9b9a97; display: flex; align-items: center;">
             <span>⟳ Auto-refresh: 5min • {{ timestamp }}</span>
             <button class="refresh-btn" onclick="window.location.reload()">Refresh</button>
@@ -830,6 +896,9 @@ def dashboard():
         'redis_queued': 0,
         'redis_processing': 0
     }
+    workspace = {}
+    footage_cache = {}
+    llm_usage = {}
     
     try:
         response = requests.get(f"{API_BASE_URL}/dashboard/data", timeout=2)
@@ -884,6 +953,9 @@ def dashboard():
             jobs.extend(completed_failed[:50])  # Limit to last 50 completed/failed
             
             stats = data.get('stats', stats)
+            workspace = data.get('workspace', {})
+            footage_cache = data.get('footage_cache', {})
+            llm_usage = data.get('llm_usage', {})
             
     except requests.exceptions.RequestException as e:
         # API not available
@@ -897,6 +969,9 @@ def dashboard():
         api_url=API_BASE_URL,
         jobs=jobs,
         stats=stats,
+        workspace=workspace,
+        footage_cache=footage_cache,
+        llm_usage=llm_usage,
         timestamp=datetime.now().strftime('%I:%M:%S %p')
     )
 
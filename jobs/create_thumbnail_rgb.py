@@ -18,6 +18,9 @@ from PIL import Image, ImageFile
 # Suppress urllib3 LibreSSL warning
 warnings.filterwarnings('ignore')
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from utils.thumbnail import make_thumbnail
+
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
 __ARGS__ = ["image_path", "output_path"]
@@ -66,29 +69,25 @@ def create_thumbnail(image_path, output_path, max_size=588, quality=85):
             print(f"❌ File not found: {image_path}")
             return False
         
-        # Open image
+        # Open image (header only)
         with Image.open(image_path) as img:
             original_mode = img.mode
             original_size = img.size
-            
-            print(f"  Original: {original_size[0]}x{original_size[1]}, Mode: {original_mode}")
-            
-            # Convert to RGB
-            img_rgb = convert_to_rgb(img)
-            if img_rgb.mode != original_mode:
-                print(f"  → Converted {original_mode} to RGB")
-            
-            # Create thumbnail
-            thumb = img_rgb.copy()
-            thumb.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-            
-            print(f"  → Thumbnail: {thumb.size[0]}x{thumb.size[1]}")
-            
-            # Save
-            thumb.save(output_path, 'JPEG', quality=quality)
-            
-            file_size = os.path.getsize(output_path)
-            print(f"  ✅ Saved: {output_path} ({file_size/1024:.1f} KB)")
+        
+        print(f"  Original: {original_size[0]}x{original_size[1]}, Mode: {original_mode}")
+        
+        # Create thumbnail at reduced decode resolution, then convert to RGB
+        thumb = make_thumbnail(image_path, max_size, convert=convert_to_rgb)
+        if thumb.mode != original_mode:
+            print(f"  → Converted {original_mode} to RGB")
+        
+        print(f"  → Thumbnail: {thumb.size[0]}x{thumb.size[1]}")
+        
+        # Save
+        thumb.save(output_path, 'JPEG', quality=quality)
+        
+        file_size = os.path.getsize(output_path)
+        print(f"  ✅ Saved: {output_path} ({file_size/1024:.1f} KB)")
             
         return True
         
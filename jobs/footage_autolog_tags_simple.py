@@ -14,6 +14,8 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
 from utils.openai_client import global_openai_client
+from utils.prompt_context import global_prompt_context, footage_bin_set
+from utils.llm_usage import set_usage_defaults
 
 __ARGS__ = ["footage_id"]
 
@@ -27,61 +29,6 @@ FIELD_MAPPING = {
     "frame_timecode": "FRAMES_TC_IN"
 }
 
-def load_tags():
-    """Load the approved tags list from the tags file with descriptions."""
-    tags_path = Path(__file__).resolve().parent.parent / "tags" / "footage-tags.tab"
-    try:
-        with open(tags_path, 'r') as f:
-            tags = []
-            for line in f.readlines():
-                line = line.strip()
-                if line:
-                    parts = line.split('\t')
-                    if len(parts) >= 2:
-                        tag_name = parts[0].strip()
-                        tag_description = parts[1].strip()
-                        tags.append({'name': tag_name, 'description': tag_description})
-                    elif len(parts) == 1:
-                        tag_name = parts[0].strip()
-                        tags.append({'name': tag_name, 'description': ''})
-        print(f"  -> Loaded {len(tags)} approved footage tags")
-        return tags
-    except Exception as e:
-        print(f"  -> ERROR: Failed to load footage tags file: {e}")
-        return []
-
-def load_bins(footage_id):
-    """Load the approved bins list from the bins file based on footage ID prefix."""
-    # Determine which bins file to use based on footage ID
-    if footage_id.startswith("AF"):
-        bins_filename = "archival-footage-bins.txt"
-        media_type = "archival footage"
-    elif footage_id.startswith("LF"):
-        bins_filename = "live-footage-bins.txt"
-        media_type = "live footage"
-    else:
-        print(f"  -> WARNING: Unknown footage ID prefix for {footage_id}, defaulting to live footage bins")
-        bins_filename = "live-footage-bins.txt"
-        media_type = "live footage (default)"
-    
-    bins_path = Path(__file__).resolve().parent.parent / "tags" / bins_filename
-    try:
-        with open(bins_path, 'r') as f:
-            bins = []
-            for line in f.readlines():
-                line = line.strip()
-                # Skip comments and empty lines
-                if line and not line.startswith('#'):
-                    # Support both formats: just name, or name\tdescription
-                    parts = line.split('\t')
-                    bin_name = parts[0].strip()
-                    bins.append(bin_name)
-        print(f"  -> Loaded {len(bins)} approved bins for {media_type}")
-        return bins
-    except Exception as e:
-        print(f"  -> WARNING: Failed to load bins file ({bins_filename}): {e}")
-        return []
-
 def setup_openai_client(token):
     """Set up global OpenAI client with API keys from system globals."""
     try:
@@ -136,7 +83,7 @@ def find_frames_for_footage(token, footage_id):
         print(f"  -> ERROR: Failed to find frame records: {e}")
         return []
 
-def generate_tags_from_frames(client, frames_data, tags, bins):
+def generate_tags_from_frames(client, frames_data, tags_text, bins_text):
     """Generate tags and primary bin based on frame captions and transcripts."""
     try:
         print(f"  -> Analyzing {len(frames_data)} frames for tagging...")
@@ -163,20 +110,8 @@ def generate_tags_from_frames(client, frames_data, tags, bins):
         
         frame_content = "\n".join(frame_summaries)
         
-        # Format tags for prompt
-        tags_list_items = []
-        for tag in tags:
-            if tag['description']:
-                tags_list_items.append(f"- {tag['name']}: {tag['description']}")
-            else:
-                tags_list_items.append(f"- {tag['name']}")
-        tags_list_text = "\n".join(tags_list_items)
-        
-        # Format bins for prompt
-        bins_list_items = [f"- {bin_name}" for bin_name in bins]
-        bins_list_text = "\n".join(bins_list_items)
-        
-        # Create prompt for tagging
+        # Create prompt for tagging (static instructions and lists first, so the prefix is
+        # identical across clips and can hit OpenAI prompt caching)
         prompt_text = f"""You are an expert at analyzing video footage and assigning appropriate tags.
 
 Your task is to analyze the frame-by-frame content provided and select appropriate tags and primary bin.
@@ -193,14 +128,14 @@ CRITICAL INSTRUCTIONS FOR AVID BINS:
 3. Return bins as a comma-separated string in priority order
 4. Do not invent bin names - ONLY use bins from the provided list
 
-FRAME-BY-FRAME CONTENT:
-{frame_content}
-
 APPROVED TAGS LIST:
-{tags_list_text}
+{tags_text}
 
 APPROVED BINS LIST:
-{bins_list_text}
+{bins_text}
+
+FRAME-BY-FRAME CONTENT:
+{frame_content}
 
 Return your answer as a JSON object with exactly TWO fields:
 - `tags`: [Array of exact tag names from the approved tags list. Select all relevant tags.]
@@ -216,7 +151,7 @@ Return your answer as a JSON object with exactly TWO fields:
             response_format={"type": "json_object"}
         )
         
-        response_text = response.choices[0].message.content.strip()
+        response_text = (response.choices[0].message.content or "").strip()
         
         # Parse JSON response
         try:
@@ -254,6 +189,7 @@ if __name__ == "__main__":
         sys.exit(1)
     
     footage_id = sys.argv[1]
+    set_usage_defaults(item_id=footage_id)
     
     try:
         print(f"🚀 Starting tagging for footage {footage_id}")
@@ -275,17 +211,17 @@ if __name__ == "__main__":
         # Extract frame data
         frames_data = [record['fieldData'] for record in frame_records]
         
-        # Load approved tags
-        tags = load_tags()
+        # Load approved tags (pre-rendered for the prompt)
+        tags_text = global_prompt_context.get_tags_text("footage")
         
-        if not tags:
+        if not tags_text:
             print(f"❌ No tags loaded - cannot proceed")
             sys.exit(1)
         
         # Load approved bins (based on footage ID prefix)
-        bins = load_bins(footage_id)
+        bins_text = global_prompt_context.get_bins_text(footage_bin_set(footage_id))
         
-        if not bins:
+        if not bins_text:
             print(f"❌ No bins loaded - cannot proceed")
             sys.exit(1)
         
@@ -293,7 +229,7 @@ if __name__ == "__main__":
         client = setup_openai_client(token)
         
         # Generate tags and bin
-        result = generate_tags_from_frames(client, frames_data, tags, bins)
+        result = generate_tags_from_frames(client, frames_data, tags_text, bins_text)
         
         if not result or not result.get('tags'):
             print(f"⚠️ No tags were generated")
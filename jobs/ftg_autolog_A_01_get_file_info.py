@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-import sys, os, json, subprocess, re, requests
+import sys, os, subprocess, re, requests
 import warnings
 from pathlib import Path
 
@@ -11,6 +11,7 @@ import config
 from utils.url_validator import clean_archival_id_for_url, construct_url_from_source_and_id, validate_and_test_url
 from utils.urls_cache import global_urls_cache
 from utils.archive_detector import auto_detect_and_register
+from utils.exiftool_pool import global_exiftool_pool
 
 __ARGS__ = ["footage_id"]
 
@@ -41,44 +42,21 @@ def extract_exif_metadata(file_path):
     print(f"  -> Extracting EXIF metadata from: {file_path}")
     
     try:
-        # Find exiftool
-        exiftool_paths = ['/opt/homebrew/bin/exiftool', '/usr/local/bin/exiftool', 'exiftool']
-        exiftool_cmd = None
-        
-        for path in exiftool_paths:
-            if os.path.exists(path) or path == 'exiftool':
-                exiftool_cmd = path
-                break
-        
-        if not exiftool_cmd:
-            raise RuntimeError("ExifTool not found in any expected location")
-        
-        # Run ExifTool to get QuickTime Comment, Description, and timestamps
-        cmd = [
-            exiftool_cmd,
+        # Get QuickTime Comment, Description, and timestamps from the shared exiftool pool
+        metadata_json = global_exiftool_pool.get_metadata(file_path, tags=[
             '-QuickTime:Comment',
             '-QuickTime:Description',
             '-CreateDate',
             '-CreationDate',
             '-MediaCreateDate',
             '-DateTimeOriginal',
-            '-TrackCreateDate',
-            '-json',
-            file_path
-        ]
+            '-TrackCreateDate'
+        ])
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        if result.returncode != 0:
-            print(f"  -> ExifTool warning/error: {result.stderr}")
-            return "", None
-        
-        if not result.stdout.strip():
+        if not metadata_json:
             print(f"  -> No EXIF data found")
             return "", None
         
-        metadata_json = json.loads(result.stdout)[0]
-        
         # Combine QuickTime fields
         metadata_parts = []
         
@@ -509,58 +487,6 @@ def determine_color_mode(pix_fmt, color_space=None):
     print(f"  -> Unknown pixel format '{pix_fmt}', defaulting to Color")
     return "Color"
 
-def analyze_thumbnail_for_color(thumbnail_path):
-    """Analyze a thumbnail image to determine if it's color or B&W (backup method)."""
-    try:
-        from PIL import Image
-        import numpy as np
-        
-        if not os.path.exists(thumbnail_path):
-            print(f"  -> Thumbnail not found: {thumbnail_path}")
-            return None
-        
-        # Load image
-        with Image.open(thumbnail_path) as img:
-            # Convert to RGB if needed
-            if img.mode not in ['RGB', 'RGBA']:
-                img = img.convert('RGB')
-            
-            # Convert to numpy array
-            img_array = np.array(img)
-            
-            # For RGB image, check if R, G, B channels are significantly different
-            if len(img_array.shape) == 3 and img_array.shape[2] >= 3:
-                r_channel = img_array[:, :, 0].astype(float)
-                g_channel = img_array[:, :, 1].astype(float)
-                b_channel = img_array[:, :, 2].astype(float)
-                
-                # Calculate variance between channels
-                rg_diff = np.var(r_channel - g_channel)
-                rb_diff = np.var(r_channel - b_channel)
-                gb_diff = np.var(g_channel - b_channel)
-                
-                # If channels are very similar, it's likely B&W
-                color_variance = (rg_diff + rb_diff + gb_diff) / 3
-                
-                # Threshold for determining B&W vs Color (can be tuned)
-                bw_threshold = 10.0  # Lower values = more sensitive to B&W
-                
-                if color_variance < bw_threshold:
-                    print(f"  -> Thumbnail analysis: B&W (color variance: {color_variance:.2f})")
-                    return "B/W"
-                else:
-                    print(f"  -> Thumbnail analysis: Color (color variance: {color_variance:.2f})")
-                    return "Color"
-        
-        return None
-        
-    except ImportError:
-        print(f"  -> PIL/numpy not available for thumbnail analysis")
-        return None
-    except Exception as e:
-        print(f"  -> Error analyzing thumbnail: {e}")
-        return None
-
 def find_url_from_source_and_archival_id(token, source, archival_id, record_id=None):
     """
     Find URL root from URLs cache/layout and combine with archival ID.
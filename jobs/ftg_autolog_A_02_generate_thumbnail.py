@@ -2,10 +2,13 @@
 """
 LF AutoLog Step 2: Generate Parent Thumbnail
 Creates a single thumbnail for the parent FOOTAGE record only.
+The same ffmpeg pass samples frames across the clip with signalstats so
+color vs B&W is decided from whole-clip saturation, not one frame.
 """
 
 import sys
 import os
+import re
 import subprocess
 import warnings
 from pathlib import Path
@@ -22,9 +25,19 @@ FIELD_MAPPING = {
     "footage_id": "INFO_FTG_ID",
     "filepath": "SPECS_Filepath_Server",
     "thumbnail": "SPECS_Thumbnail",
-    "status": "AutoLog_Status"
+    "status": "AutoLog_Status",
+    "duration": "SPECS_File_Duration_Timecode",
+    "framerate": "SPECS_File_Framerate",
+    "color_mode": "INFO_ColorMode"
 }
 
+# Frames sampled across the clip for saturation statistics
+COLOR_SAMPLE_COUNT = 6
+
+# signalstats SATAVG (8-bit scale) below these values means B&W footage
+BW_MEAN_SATURATION = 4.0
+BW_MAX_SATURATION = 8.0
+
 
 def find_ffmpeg():
     """Find ffmpeg executable."""
@@ -71,47 +84,156 @@ def get_video_duration(file_path):
         return None
 
 
-def calculate_optimal_timecode(duration):
-    """Calculate optimal timecode based on video duration (matches old flow)."""
+def get_duration_from_record(record_data):
+    """Get duration in seconds from the timecode step 1 already wrote (no ffprobe)."""
+    duration_tc = record_data.get(FIELD_MAPPING["duration"], "")
+    try:
+        framerate = float(record_data.get(FIELD_MAPPING["framerate"]) or 24.0)
+        hours, minutes, secs, frames = [int(x) for x in duration_tc.split(':')]
+        duration = hours * 3600 + minutes * 60 + secs + (frames / framerate)
+        if duration > 0:
+            print(f"  -> Video duration (from record): {duration:.2f} seconds")
+            return duration
+    except (ValueError, AttributeError):
+        pass
+    return None
+
+
+def calculate_optimal_seconds(duration):
+    """Calculate optimal thumbnail position in seconds based on video duration (matches old flow)."""
     if duration is None:
-        return "00:00:01"  # Default fallback
+        return 1.0  # Default fallback
     
     # For very short videos (< 3 seconds), use 25% of duration
     if duration < 3.0:
-        optimal_seconds = max(0.1, duration * 0.25)
-        return f"00:00:{optimal_seconds:.1f}"
+        return max(0.1, duration * 0.25)
     
     # For short videos (3-10 seconds), use 20% of duration
     elif duration < 10.0:
-        optimal_seconds = duration * 0.20
-        return f"00:00:{optimal_seconds:.1f}"
+        return duration * 0.20
     
     # For medium videos (10-60 seconds), use 15% of duration
     elif duration < 60.0:
-        optimal_seconds = duration * 0.15
-        return f"00:00:{optimal_seconds:.1f}"
+        return duration * 0.15
     
     # For longer videos, use 10% of duration but cap at 30 seconds
     else:
-        optimal_seconds = min(30.0, duration * 0.10)
-        return f"00:00:{optimal_seconds:.1f}"
+        return min(30.0, duration * 0.10)
 
 
-def generate_parent_thumbnail(video_path, footage_id):
-    """Generate thumbnail from optimal timecode (matches old flow logic)."""
+def calculate_optimal_timecode(duration):
+    """Calculate optimal timecode based on video duration (matches old flow)."""
+    if duration is None:
+        return "00:00:01"  # Default fallback
+    return f"00:00:{calculate_optimal_seconds(duration):.1f}"
+
+
+def build_single_pass_command(ffmpeg_cmd, video_path, thumb_path, thumb_seconds, sample_seconds):
+    """
+    Build one ffmpeg command that writes the thumbnail and prints signalstats
+    saturation for each sampled frame.
+    
+    Every sample is its own fast-seeked input limited to 1s, so only a handful
+    of frames are decoded regardless of clip length.
+    """
+    cmd = [ffmpeg_cmd, '-hide_banner', '-nostats', '-y']
+    for seconds in [thumb_seconds] + sample_seconds:
+        cmd += ['-ss', f"{seconds:.3f}", '-t', '1', '-i', video_path]
+    
+    sample_count = len(sample_seconds) + 1
+    filters = [
+        "[0:v]split=2[thumbsrc][s0src]",
+        "[thumbsrc]scale=640:360[thumb]"
+    ]
+    for i in range(sample_count):
+        source = "s0src" if i == 0 else f"{i}:v"
+        filters.append(f"[{source}]trim=end_frame=1,setpts=PTS-STARTPTS,scale=160:90,format=yuv420p,setsar=1[s{i}]")
+    concat_inputs = "".join(f"[s{i}]" for i in range(sample_count))
+    filters.append(
+        f"{concat_inputs}concat=n={sample_count}:v=1:a=0,signalstats,"
+        f"metadata=mode=print:key=lavfi.signalstats.SATAVG[stats]"
+    )
+    
+    cmd += [
+        '-filter_complex', ";".join(filters),
+        '-map', '[thumb]',
+        '-frames:v', '1',
+        '-q:v', '2',
+        '-strict', 'unofficial',
+        '-pix_fmt', 'yuv420p',
+        '-update', '1',
+        thumb_path,
+        '-map', '[stats]',
+        '-f', 'null', '-',
+        '-loglevel', 'info'
+    ]
+    return cmd
+
+
+def parse_saturation_stats(stderr_text):
+    """Extract per-frame SATAVG values printed by the metadata filter."""
+    return [float(v) for v in re.findall(r'lavfi\.signalstats\.SATAVG=([\d.]+)', stderr_text)]
+
+
+def classify_color_from_saturation(saturation_values):
+    """Decide Color vs B/W from saturation across the sampled frames."""
+    if not saturation_values:
+        return None
+    
+    mean_sat = sum(saturation_values) / len(saturation_values)
+    max_sat = max(saturation_values)
+    
+    if mean_sat < BW_MEAN_SATURATION and max_sat < BW_MAX_SATURATION:
+        print(f"  -> Saturation analysis: B/W (mean {mean_sat:.2f}, max {max_sat:.2f} over {len(saturation_values)} frames)")
+        return "B/W"
+    
+    print(f"  -> Saturation analysis: Color (mean {mean_sat:.2f}, max {max_sat:.2f} over {len(saturation_values)} frames)")
+    return "Color"
+
+
+def generate_parent_thumbnail(video_path, footage_id, duration=None):
+    """
+    Generate thumbnail from optimal timecode (matches old flow logic) and
+    classify color mode from the same ffmpeg pass.
+    
+    Returns:
+        Tuple of (thumb_path or None, color_mode or None)
+    """
     try:
         ffmpeg_cmd = find_ffmpeg()
         
-        # Calculate optimal timecode
-        duration = get_video_duration(video_path)
-        timecode = calculate_optimal_timecode(duration)
-        print(f"  -> Using calculated timecode: {timecode}")
-        
         # Create thumbnail
         temp_dir = "/private/tmp"
         os.makedirs(temp_dir, exist_ok=True)
         thumb_path = os.path.join(temp_dir, f"thumb_{footage_id}.jpg")
         
+        # Single pass: thumbnail + saturation stats (needs a known duration to place samples)
+        if duration:
+            thumb_seconds = calculate_optimal_seconds(duration)
+            last_safe = max(0.0, duration - 0.5)
+            sample_seconds = [
+                min(last_safe, duration * (i + 0.5) / COLOR_SAMPLE_COUNT)
+                for i in range(COLOR_SAMPLE_COUNT)
+            ]
+            print(f"  -> Single pass: thumbnail at {thumb_seconds:.1f}s + {len(sample_seconds)} color samples")
+            
+            cmd = build_single_pass_command(ffmpeg_cmd, video_path, thumb_path, thumb_seconds, sample_seconds)
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            
+            if result.returncode == 0 and os.path.exists(thumb_path) and os.path.getsize(thumb_path) > 0:
+                file_size = os.path.getsize(thumb_path)
+                print(f"  -> ✅ Generated parent thumbnail: {file_size/1024:.1f}KB")
+                color_mode = classify_color_from_saturation(parse_saturation_stats(result.stderr))
+                return thumb_path, color_mode
+            
+            print(f"  -> Single pass failed, falling back to thumbnail-only extraction")
+        else:
+            duration = get_video_duration(video_path)
+        
+        # Calculate optimal timecode
+        timecode = calculate_optimal_timecode(duration)
+        print(f"  -> Using calculated timecode: {timecode}")
+        
         # Generate thumbnail command (matches old flow exactly)
         cmd = [
             ffmpeg_cmd,
@@ -141,23 +263,23 @@ def generate_parent_thumbnail(video_path, footage_id):
                 
                 if result.returncode != 0:
                     print(f"  -> FFmpeg error on retry: {result.stderr}")
-                    return None
+                    return None, None
         
         # Check if thumbnail was created
         if os.path.exists(thumb_path) and os.path.getsize(thumb_path) > 0:
             file_size = os.path.getsize(thumb_path)
             print(f"  -> ✅ Generated parent thumbnail: {file_size/1024:.1f}KB")
-            return thumb_path
+            return thumb_path, None
         else:
             print(f"  -> ❌ Thumbnail file not created or empty")
-            return None
+            return None, None
             
     except subprocess.TimeoutExpired:
         print(f"  -> ❌ Thumbnail generation timed out")
-        return None
+        return None, None
     except Exception as e:
         print(f"  -> ❌ Error generating thumbnail: {e}")
-        return None
+        return None, None
 
 
 if __name__ == "__main__":
@@ -193,8 +315,9 @@ if __name__ == "__main__":
             if not config.ensure_volume_mounted(file_path):
                 raise FileNotFoundError(f"Footage file not accessible: {file_path}")
         
-        # Generate thumbnail
-        thumb_path = generate_parent_thumbnail(file_path, footage_id)
+        # Generate thumbnail (and classify color mode in the same ffmpeg pass)
+        duration = get_duration_from_record(record_data)
+        thumb_path, color_mode = generate_parent_thumbnail(file_path, footage_id, duration)
         
         if not thumb_path:
             raise RuntimeError("Failed to generate thumbnail")
@@ -219,12 +342,16 @@ if __name__ == "__main__":
             print(f"  -> ❌ Thumbnail upload failed: {upload_resp.status_code}")
             raise RuntimeError("Thumbnail upload failed")
         
-        # Update status to "2 - Thumbnail Ready"
+        # Update status to "2 - Thumbnail Ready" (whole-clip color mode overrides the pix_fmt guess from step 1)
         status_update = {FIELD_MAPPING["status"]: "2 - Thumbnail Ready"}
+        if color_mode:
+            status_update[FIELD_MAPPING["color_mode"]] = color_mode
         status_resp = config.update_record(token, "FOOTAGE", record_id, status_update)
         
         if status_resp.status_code == 200:
             print(f"  -> ✅ Status updated to: 2 - Thumbnail Ready")
+            if color_mode:
+                print(f"  -> ✅ Color mode: {color_mode}")
         else:
             print(f"  -> ⚠️ Status update failed: {status_resp.status_code}")
         
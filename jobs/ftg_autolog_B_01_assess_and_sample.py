@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 """
 Footage AutoLog B Step 1: Assess and Sample Frames
-- Detects audio and kicks off background transcription (non-blocking)
+- Detects audio and queues transcription on the resident Whisper workers (non-blocking)
 - Performs intelligent frame sampling with scene detection
 - Tracks timecodes for all sampled frames
+- Prunes perceptual near-duplicate frames before Gemini analysis
 - Saves metadata for Gemini analysis
+- Reads the local SSD copy of the source when the footage cache is enabled
 - Supports both LF (Library Footage) and AF (Archival Footage)
 """
 
@@ -20,7 +22,10 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
 from utils.frame_sampler import FrameSampler, get_video_info
-from utils.audio_detector import has_audio, transcribe_full_audio_background
+from utils.frame_dedup import prune_near_duplicates
+from utils.audio_detector import detect_audio_content
+from utils.workspace_manager import global_workspace_manager
+from utils.footage_cache import global_footage_cache
 
 __ARGS__ = ["footage_id"]
 
@@ -63,9 +68,12 @@ if __name__ == "__main__":
             if not config.ensure_volume_mounted(file_path):
                 raise FileNotFoundError(f"Footage file not accessible: {file_path}")
         
+        # Read from the local SSD copy if enabled (waits on an in-progress prefetch)
+        read_path = global_footage_cache.resolve(file_path, stage_on_miss=True)
+        
         # Get video info
         print(f"\n📹 Getting video information...")
-        duration, framerate = get_video_info(file_path)
+        duration, framerate = get_video_info(read_path)
         
         if duration is None or framerate is None:
             raise RuntimeError("Could not determine video duration and framerate")
@@ -73,33 +81,37 @@ if __name__ == "__main__":
         print(f"  -> Duration: {duration:.2f}s")
         print(f"  -> Framerate: {framerate:.2f} fps")
         
-        # Setup output directory for this footage (supports both LF and AF prefixes)
-        output_dir = f"/private/tmp/ftg_autolog_{footage_id}"
-        os.makedirs(output_dir, exist_ok=True)
+        # Allocate and pin the workspace for this footage (supports both LF and AF prefixes)
+        output_dir = global_workspace_manager.allocate(footage_id)
         print(f"  -> Output directory: {output_dir}")
         
         # STEP 1: Audio Detection and Background Transcription
         print(f"\n🎙️ Audio Detection...")
-        audio_exists = has_audio(file_path)
+        try:
+            audio_detection = detect_audio_content(read_path)
+        except Exception as e:
+            audio_detection = {"has_audio": None, "confidence": 0.0, "reason": str(e)}
+        audio_exists = audio_detection["has_audio"]
+        
+        if "max_volume_db" in audio_detection:
+            print(f"  -> Peak {audio_detection['max_volume_db']:.1f} dB, mean {audio_detection['mean_volume_db']:.1f} dB "
+                  f"(confidence {audio_detection['confidence']:.2f})")
         
         if audio_exists:
-            print(f"  -> ✅ Audio detected - starting background transcription...")
+            print(f"  -> ✅ Audio detected - queueing transcription...")
             
             transcript_path = os.path.join(output_dir, "transcript.json")
             status_path = os.path.join(output_dir, "transcription_status.json")
             
-            # Kick off transcription in background (NON-BLOCKING!)
-            transcribe_full_audio_background(
-                video_path=file_path,
-                output_path=transcript_path,
-                status_file=status_path,
-                model="base"  # Balance between speed and accuracy
-            )
+            # Hand off to the resident Whisper workers as a tracked job (NON-BLOCKING!)
+            # Step 4 is queued when both this job and Step 3 have finished
+            from jobs.ftg_autolog_B_queue_jobs import queue_transcription
+            transcription_job_id = queue_transcription(footage_id, read_path, transcript_path, status_path, token)
+            print(f"  -> 📥 Queued for Whisper workers: {transcription_job_id}")
             
-            print(f"  -> 🔄 Transcription running in background (non-blocking)")
             audio_status = "transcribing"
         elif audio_exists is False:
-            print(f"  -> 📵 No audio detected - skipping transcription")
+            print(f"  -> 📵 No audio detected ({audio_detection.get('reason')}) - skipping transcription")
             audio_status = "silent"
         else:
             print(f"  -> ⚠️ Audio detection inconclusive - assuming has audio")
@@ -107,7 +119,7 @@ if __name__ == "__main__":
         
         # STEP 2: Intelligent Frame Sampling
         print(f"\n🎬 Intelligent Frame Sampling...")
-        sampler = FrameSampler(file_path, duration, framerate)
+        sampler = FrameSampler(read_path, duration, framerate)
         
         # Perform smart sampling with scene detection
         extracted_frames = sampler.smart_sample(
@@ -121,19 +133,35 @@ if __name__ == "__main__":
         
         print(f"  -> ✅ Extracted {len(extracted_frames)} frames")
         
+        # STEP 2b: Near-duplicate pruning (static interviews, locked-off shots)
+        dropped_frames = {}
+        dedup_stats = None
+        if os.getenv("FTG_FRAME_DEDUP", "1") != "0":
+            print(f"\n🧹 Pruning near-duplicate frames...")
+            try:
+                extracted_frames, dropped_frames, dedup_stats = prune_near_duplicates(extracted_frames)
+                print(f"  -> Kept {dedup_stats['frames_kept']}/{dedup_stats['frames_in']} frames "
+                      f"({dedup_stats['bytes_kept']/1024:.1f}KB of {dedup_stats['bytes_in']/1024:.1f}KB)")
+            except Exception as e:
+                print(f"  -> ⚠️ Near-duplicate pruning failed, keeping all frames: {e}")
+        
         # STEP 3: Save Assessment Metadata
         print(f"\n💾 Saving assessment metadata...")
         
         assessment_data = {
             "footage_id": footage_id,
             "file_path": file_path,
+            "read_path": read_path,
             "duration_seconds": duration,
             "framerate": framerate,
             "audio_status": audio_status,
+            "audio_detection": audio_detection,
             "audio_transcript_path": os.path.join(output_dir, "transcript.json") if audio_exists else None,
             "transcription_status_path": os.path.join(output_dir, "transcription_status.json") if audio_exists else None,
             "frame_count": len(extracted_frames),
             "frames": extracted_frames,
+            "dropped_frames": dropped_frames,
+            "dedup_stats": dedup_stats,
             "output_directory": output_dir
         }
         
@@ -149,6 +177,8 @@ if __name__ == "__main__":
         print(f"  Duration: {duration:.2f}s @ {framerate:.2f}fps")
         print(f"  Audio: {audio_status}")
         print(f"  Frames: {len(extracted_frames)} sampled")
+        if dropped_frames:
+            print(f"  Near-duplicates dropped: {len(dropped_frames)}")
         print(f"  Output: {output_dir}")
         
         if audio_exists:
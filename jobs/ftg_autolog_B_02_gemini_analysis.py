@@ -3,7 +3,10 @@
 Footage AutoLog B Step 2: Gemini Multi-Image Analysis
 - Loads sampled frames with timecodes
 - Includes FileMaker metadata (AI_Prompt, INFO_Metadata, etc.)
-- Sends all frames to Gemini in single request
+- Sends all frames to Gemini in single request (one image per frame, or a few
+  labelled contact sheets when FTG_GEMINI_MODE=contact_sheet)
+- Long clips (more than FTG_GEMINI_SEGMENT_THRESHOLD frames) are split into time
+  segments analysed concurrently, then merged into one result
 - Returns structured JSON with per-frame captions and global metadata
 - Supports both LF (Library Footage) and AF (Archival Footage)
 """
@@ -12,6 +15,7 @@ import sys
 import os
 import json
 import warnings
+import concurrent.futures
 from pathlib import Path
 from datetime import datetime
 
@@ -21,6 +25,10 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
 from utils.gemini_client import global_gemini_client
+from utils.workspace_manager import global_workspace_manager
+from utils.contact_sheet import build_contact_sheets
+from utils.prompt_context import global_prompt_context, footage_bin_set
+from utils.llm_usage import set_usage_defaults
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -28,6 +36,20 @@ load_dotenv()
 
 __ARGS__ = ["footage_id"]
 
+# "frames" = one image per frame, "contact_sheet" = frames tiled into labelled sheets
+ANALYSIS_MODE = os.getenv("FTG_GEMINI_MODE", "frames")
+
+# Clips with more frames than the threshold are analysed in concurrent segments
+SEGMENT_THRESHOLD = int(os.getenv("FTG_GEMINI_SEGMENT_THRESHOLD", "24"))
+SEGMENT_FRAMES = int(os.getenv("FTG_GEMINI_SEGMENT_FRAMES", "12"))
+SEGMENT_WORKERS = int(os.getenv("FTG_GEMINI_SEGMENT_WORKERS", "4"))
+
+# Fresh (uncached) calls after a response that doesn't parse as JSON
+PARSE_RETRIES = int(os.getenv("FTG_GEMINI_PARSE_RETRIES", "2"))
+
+# Extra attempts for one failed segment (timeout, API error, unparseable output), bypassing the cache
+SEGMENT_RETRIES = int(os.getenv("FTG_GEMINI_SEGMENT_RETRIES", "2"))
+
 FIELD_MAPPING = {
     "footage_id": "INFO_FTG_ID",
     "ai_prompt": "AI_Prompt",
@@ -38,60 +60,16 @@ FIELD_MAPPING = {
 }
 
 
-def load_tags():
-    """Load approved footage tags list."""
-    tags_path = Path(__file__).resolve().parent.parent / "tags" / "footage-tags.tab"
-    try:
-        with open(tags_path, 'r') as f:
-            tags = []
-            for line in f.readlines():
-                line = line.strip()
-                if line:
-                    parts = line.split('\t')
-                    if len(parts) >= 2:
-                        tags.append({'name': parts[0].strip(), 'description': parts[1].strip()})
-                    elif len(parts) == 1:
-                        tags.append({'name': parts[0].strip(), 'description': ''})
-        print(f"  -> Loaded {len(tags)} approved footage tags")
-        return tags
-    except Exception as e:
-        print(f"  -> WARNING: Failed to load footage tags: {e}")
-        return []
-
-def load_bins(footage_id):
-    """Load approved bins list based on footage ID prefix."""
-    # Determine which bins file to use based on footage ID
-    if footage_id.startswith("AF"):
-        bins_filename = "archival-footage-bins.txt"
-        media_type = "archival footage"
-    elif footage_id.startswith("LF"):
-        bins_filename = "live-footage-bins.txt"
-        media_type = "live footage"
-    else:
-        print(f"  -> WARNING: Unknown footage ID prefix for {footage_id}, defaulting to live footage bins")
-        bins_filename = "live-footage-bins.txt"
-        media_type = "live footage (default)"
+def build_gemini_prompt(footage_data, frames_metadata, tags_text, bins_text, contact_sheets=None, frame_offset=0, segment=None):
+    """
+    Build structured prompt for Gemini with all context.
     
-    bins_path = Path(__file__).resolve().parent.parent / "tags" / bins_filename
-    try:
-        with open(bins_path, 'r') as f:
-            bins = []
-            for line in f.readlines():
-                line = line.strip()
-                # Skip comments and empty lines
-                if line and not line.startswith('#'):
-                    parts = line.split('\t')
-                    bin_name = parts[0].strip()
-                    bins.append(bin_name)
-        print(f"  -> Loaded {len(bins)} approved bins for {media_type}")
-        return bins
-    except Exception as e:
-        print(f"  -> WARNING: Failed to load bins file ({bins_filename}): {e}")
-        return []
-
-
-def build_gemini_prompt(footage_data, frames_metadata, tags, bins):
-    """Build structured prompt for Gemini with all context."""
+    tags_text and bins_text are the pre-rendered approved lists from
+    global_prompt_context. With contact_sheets, the image section explains the sheet layout instead of
+    one-image-per-frame; the requested JSON (one entry per frame) is the same.
+    For a segment of a long clip, frames are numbered from frame_offset + 1 and
+    segment=(index, count) tells the model it only sees part of the clip.
+    """
     
     footage_id = footage_data.get(FIELD_MAPPING["footage_id"], "")
     ai_prompt = footage_data.get(FIELD_MAPPING["ai_prompt"], "")
@@ -99,28 +77,39 @@ def build_gemini_prompt(footage_data, frames_metadata, tags, bins):
     filename = footage_data.get(FIELD_MAPPING["filename"], "")
     duration = footage_data.get(FIELD_MAPPING["duration"], "")
     
-    # Format tags list
-    tags_list_items = []
-    for tag in tags:
-        if tag['description']:
-            tags_list_items.append(f"- {tag['name']}: {tag['description']}")
-        else:
-            tags_list_items.append(f"- {tag['name']}")
-    tags_list_text = "\n".join(tags_list_items)
-    
-    # Format bins list
-    bins_list_items = [f"- {bin_name}" for bin_name in bins]
-    bins_list_text = "\n".join(bins_list_items)
-    
     # Build frame list with timecodes
     frame_list = []
-    for i, (frame_filename, frame_data) in enumerate(sorted(frames_metadata.items()), 1):
+    for i, (frame_filename, frame_data) in enumerate(sorted(frames_metadata.items()), frame_offset + 1):
         timecode = frame_data['timecode_formatted']
         timestamp = frame_data['timestamp_seconds']
         frame_list.append(f"Frame {i} at {timecode} ({timestamp:.2f}s)")
     
     frame_list_text = "\n".join(frame_list)
     
+    if contact_sheets:
+        sheet_lines = [
+            f"- Sheet {i}: frames {sheet['frame_numbers'][0]}-{sheet['frame_numbers'][-1]}"
+            for i, sheet in enumerate(contact_sheets, 1)
+        ]
+        images_text = f"""(Images will follow after this text as {len(contact_sheets)} contact sheets)
+
+CONTACT SHEET LAYOUT:
+- Each sheet is a grid of frames read left-to-right, top-to-bottom
+- Every tile is labelled above the image with "Frame N" and its timecode - use the label to match tiles to the frame list
+- Treat each tile as a separate frame and caption it individually; do not describe the sheet itself
+{chr(10).join(sheet_lines)}"""
+    else:
+        images_text = "(Images will follow in order after this text)"
+    
+    if segment:
+        segment_text = f"""
+This request covers segment {segment[0]} of {segment[1]} of the clip (frames {frame_offset + 1}-{frame_offset + len(frames_metadata)}).
+Other segments are analysed separately and merged afterwards: describe only what is visible in these frames,
+and keep the frame_number values exactly as listed.
+"""
+    else:
+        segment_text = ""
+    
     prompt = f"""You are an assistant editor creating catalog metadata for live footage.
 
 CONTEXT HIERARCHY - Use information in this priority order:
@@ -145,8 +134,8 @@ CRITICAL INSTRUCTIONS:
 
 You will analyze {len(frames_metadata)} frames from this video at the following timecodes:
 {frame_list_text}
-
-(Images will follow in order after this text)
+{segment_text}
+{images_text}
 
 SHOT TYPE GUIDANCE:
 - WIDE SHOT (WS/MWS): Full subjects with significant surrounding environment
@@ -165,7 +154,7 @@ Analyze how the view changes between frames to detect:
 - unknown: Cannot determine from available frames
 
 APPROVED TAGS - Select tags for visually significant elements:
-{tags_list_text}
+{tags_text}
 
 CRITICAL TAG SELECTION RULES:
 - ONLY tag elements that are PROMINENT, CENTRAL, or VISUALLY SIGNIFICANT in the footage
@@ -174,7 +163,7 @@ CRITICAL TAG SELECTION RULES:
 - Select as many tags as appropriate based on visual prominence (no arbitrary limits)
 
 APPROVED BINS - Select ONE primary bin for Avid organization:
-{bins_list_text}
+{bins_text}
 
 CRITICAL BIN SELECTION RULE:
 - Select 1-4 bins from the APPROVED BINS LIST above
@@ -219,6 +208,287 @@ Key difference: Clean separation with periods, no connecting phrases, proper nou
     return prompt
 
 
+# Response schema for structured output (same in every analysis mode)
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "asset_id": {"type": "string"},
+        "global": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "synopsis": {"type": "string"},
+                "date": {"type": "string"},
+                "location": {"type": "string"},
+                "audio_type": {"type": "string"},
+                "camera_summary": {
+                    "type": "array",
+                    "items": {"type": "string"}
+                },
+                "tags": {
+                    "type": "array",
+                    "items": {"type": "string"}
+                },
+                "avid_bins": {"type": "string"}
+            },
+            "required": ["title", "synopsis", "date", "location", "audio_type", "camera_summary", "tags", "avid_bins"]
+        },
+        "frames": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "frame_number": {"type": "integer"},
+                    "timestamp_sec": {"type": "number"},
+                    "timecode": {"type": "string"},
+                    "caption": {"type": "string"},
+                    "camera_motion": {
+                        "type": "array",
+                        "items": {"type": "string"}
+                    },
+                    "confidence": {"type": "number"}
+                },
+                "required": ["frame_number", "timestamp_sec", "timecode", "caption", "camera_motion", "confidence"]
+            }
+        }
+    },
+    "required": ["asset_id", "global", "frames"]
+}
+
+
+def prepare_gemini_images(assessment_data, mode=None, frames_metadata=None, frame_offset=0, sheet_dir="contact_sheets"):
+    """
+    Get the images to send for a clip's sampled frames.
+    
+    Args:
+        assessment_data: Step 1 assessment (frames + output_directory)
+        mode: "frames" or "contact_sheet" (default: FTG_GEMINI_MODE env)
+        frames_metadata: Subset of frames to send (default: all frames)
+        frame_offset: Number of frames before this subset (for frame numbering)
+        sheet_dir: Workspace subdirectory for contact sheets
+        
+    Returns:
+        Tuple of (image_paths, contact_sheets or None, image payload profile)
+    """
+    mode = mode or ANALYSIS_MODE
+    output_dir = assessment_data['output_directory']
+    frames_metadata = frames_metadata if frames_metadata is not None else assessment_data['frames']
+    
+    # Frame numbers follow the prompt's frame list (sorted by filename)
+    frames = []
+    for i, (frame_filename, frame_data) in enumerate(sorted(frames_metadata.items()), frame_offset + 1):
+        frame_path = os.path.join(output_dir, frame_filename)
+        if os.path.exists(frame_path):
+            frames.append({"frame_number": i, "timecode": frame_data['timecode_formatted'], "path": frame_path})
+    
+    if mode == "contact_sheet" and frames:
+        sheets = build_contact_sheets(frames, os.path.join(output_dir, sheet_dir))
+        return [sheet["path"] for sheet in sheets], sheets, "gemini_sheet"
+    
+    return [frame["path"] for frame in frames], None, "gemini"
+
+
+def analyze_frames(footage_data, assessment_data, frames_metadata, tags_text, bins_text, frame_offset=0, segment=None, timeout=180,
+                   use_cache=True):
+    """
+    Run one Gemini request over a set of frames (the whole clip or one segment).
+    
+    A response that isn't valid JSON is requested again (up to PARSE_RETRIES
+    times) with the response cache bypassed, so a retry never replays it.
+    
+    Returns:
+        Tuple of (parsed result, prompt)
+    """
+    sheet_dir = f"contact_sheets/segment_{segment[0]:02d}" if segment else "contact_sheets"
+    image_paths, contact_sheets, image_profile = prepare_gemini_images(
+        assessment_data, frames_metadata=frames_metadata, frame_offset=frame_offset, sheet_dir=sheet_dir
+    )
+    prompt = build_gemini_prompt(footage_data, frames_metadata, tags_text, bins_text, contact_sheets, frame_offset, segment)
+    
+    label = f"segment {segment[0]}/{segment[1]}" if segment else "clip"
+    print(f"\n🚀 Calling Gemini API for {label} with {len(image_paths)} images ({ANALYSIS_MODE} mode, {timeout}s timeout)...")
+    
+    for attempt in range(PARSE_RETRIES + 1):
+        response = global_gemini_client.generate_content(
+            prompt=prompt,
+            images=image_paths,
+            response_schema=RESPONSE_SCHEMA,
+            max_retries=3,
+            timeout=timeout,
+            use_cache=use_cache and attempt == 0,
+            image_profile=image_profile
+        )
+        
+        # Parse response
+        response_text = response.text
+        print(f"\n📊 Received Gemini response for {label} ({len(response_text)} chars)")
+        
+        try:
+            return json.loads(response_text), prompt
+        except json.JSONDecodeError as e:
+            print(f"❌ Failed to parse Gemini response as JSON: {e}")
+            print(f"Response text: {response_text[:500]}...")
+            if attempt == PARSE_RETRIES:
+                raise
+            print(f"  -> 🔄 Requesting {label} again without the response cache ({attempt + 1}/{PARSE_RETRIES})")
+
+
+def split_into_segments(frames_metadata, segment_frames=None):
+    """Split frames (sorted by filename) into contiguous, evenly sized segments."""
+    items = sorted(frames_metadata.items())
+    segment_count = max(1, -(-len(items) // (segment_frames or SEGMENT_FRAMES)))
+    size = -(-len(items) // segment_count)
+    return [
+        {"frame_offset": start, "frames": dict(items[start:start + size])}
+        for start in range(0, len(items), size)
+    ]
+
+
+def merge_globals_heuristic(segment_results):
+    """Fallback merge: longest segment's title/synopsis, tags and bins by frequency."""
+    globals_ = [result['global'] for result in segment_results]
+    longest = max(segment_results, key=lambda result: len(result.get('frames', [])))['global']
+    
+    def ranked(values):
+        counts = {}
+        for value in values:
+            value = value.strip()
+            if value:
+                counts[value] = counts.get(value, 0) + 1
+        return sorted(counts, key=lambda value: -counts[value])
+    
+    return {
+        **longest,
+        "date": next((g['date'] for g in globals_ if g.get('date')), ""),
+        "location": next((g['location'] for g in globals_ if g.get('location')), ""),
+        "camera_summary": ranked(motion for g in globals_ for motion in g.get('camera_summary', [])),
+        "tags": ranked(tag for g in globals_ for tag in g.get('tags', [])),
+        "avid_bins": ", ".join(ranked(b for g in globals_ for b in g.get('avid_bins', '').split(','))[:4])
+    }
+
+
+MERGE_SCHEMA = {
+    "type": "object",
+    "properties": {"global": RESPONSE_SCHEMA["properties"]["global"]},
+    "required": ["global"]
+}
+
+
+def merge_segment_results(footage_data, segment_results):
+    """
+    Merge per-segment results into one clip result.
+    
+    Frames are concatenated in order; the segment `global` blocks are reconciled
+    into one by a short text-only Gemini call (heuristic merge if that fails).
+    """
+    footage_id = footage_data.get(FIELD_MAPPING["footage_id"], "")
+    frames = sorted(
+        (frame for result in segment_results for frame in result.get('frames', [])),
+        key=lambda frame: frame.get('frame_number', 0)
+    )
+    
+    segment_globals = json.dumps([
+        {"segment": i, "frames": len(result.get('frames', [])), "global": result['global']}
+        for i, result in enumerate(segment_results, 1)
+    ], indent=2)
+    
+    prompt = f"""You are an assistant editor. One video clip was analysed in {len(segment_results)} consecutive segments.
+Merge the per-segment catalog metadata below into ONE "global" block describing the whole clip.
+
+General context for this footage:
+{footage_data.get(FIELD_MAPPING["ai_prompt"], "") or "(No context provided)"}
+
+Per-segment results (in clip order):
+{segment_globals}
+
+MERGE RULES:
+- title: 3-8 words covering the whole clip (NO date info)
+- synopsis: 2-4 sentences in clip order, same format as the segments: start directly with subject/action,
+  end with the proper noun location and date as separate elements ("[description]. [Location]. [Month Year].")
+- date, location, audio_type: keep the segments' values (prefer non-empty, most specific)
+- camera_summary: combined list without duplicates
+- tags: ONLY tags that appear in the segments; keep those that are prominent across the clip
+- avid_bins: 1-4 bins taken ONLY from the segments' bins, most representative first, comma-separated
+
+Return strict JSON: {{"global": {{...}}}}"""
+    
+    try:
+        print(f"\n🔗 Merging {len(segment_results)} segment results...")
+        response = global_gemini_client.generate_content(
+            prompt=prompt, response_schema=MERGE_SCHEMA, max_retries=2, timeout=60
+        )
+        merged_global = json.loads(response.text)['global']
+    except Exception as e:
+        print(f"  -> ⚠️ Merge call failed ({e}) - merging segment metadata heuristically")
+        merged_global = merge_globals_heuristic(segment_results)
+    
+    return {"asset_id": footage_id, "global": merged_global, "frames": frames}
+
+
+def analyze_segment(footage_data, assessment_data, segment, segment_index, segment_count, tags_text, bins_text):
+    """
+    Analyse one segment, retrying it alone (without the response cache) if it fails.
+    
+    Returns:
+        Tuple of (parsed result, prompt); raises once SEGMENT_RETRIES are exhausted
+    """
+    for attempt in range(SEGMENT_RETRIES + 1):
+        try:
+            return analyze_frames(
+                footage_data, assessment_data, segment["frames"], tags_text, bins_text,
+                segment["frame_offset"], (segment_index, segment_count), 120, use_cache=attempt == 0
+            )
+        except Exception as e:
+            if attempt == SEGMENT_RETRIES:
+                raise
+            print(f"  -> ⚠️ Segment {segment_index}/{segment_count} failed ({e}), "
+                  f"retrying segment alone ({attempt + 1}/{SEGMENT_RETRIES})")
+
+
+def analyze_segmented(footage_data, assessment_data, tags_text, bins_text):
+    """
+    Analyse a long clip as concurrent segments and merge the results.
+    
+    Each segment is its own request with its own retries, so a slow or failed
+    segment is retried alone instead of restarting the whole clip. The other
+    segments keep running; the step fails only if a segment still fails after
+    its retries (completed segments stay in the response cache for the re-run).
+    Concurrency stays inside the shared Gemini rate limit.
+    
+    Returns:
+        Tuple of (merged result, first segment's prompt)
+    """
+    segments = split_into_segments(assessment_data['frames'])
+    print(f"\n✂️ Splitting {len(assessment_data['frames'])} frames into {len(segments)} segments "
+          f"(up to {SEGMENT_WORKERS} concurrent)")
+    
+    results = [None] * len(segments)
+    prompts = [None] * len(segments)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(SEGMENT_WORKERS, len(segments))) as executor:
+        futures = {
+            executor.submit(
+                analyze_segment, footage_data, assessment_data, segment, i + 1, len(segments), tags_text, bins_text
+            ): i
+            for i, segment in enumerate(segments)
+        }
+        failures = {}
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            try:
+                results[i], prompts[i] = future.result()
+            except Exception as e:
+                failures[i + 1] = e
+                print(f"  -> ❌ Segment {i + 1}/{len(segments)} failed after {SEGMENT_RETRIES} retries: {e}")
+                continue
+            print(f"  -> ✅ Segment {i + 1}/{len(segments)}: {len(results[i].get('frames', []))} frames")
+    
+    if failures:
+        raise RuntimeError(f"{len(failures)} of {len(segments)} segments failed: "
+                           + "; ".join(f"segment {index}: {error}" for index, error in sorted(failures.items())))
+    
+    return merge_segment_results(footage_data, results), prompts[0]
+
+
 def write_to_dev_console(record_id, token, message):
     """Write to AI_DevConsole field."""
     try:
@@ -235,6 +505,7 @@ if __name__ == "__main__":
         sys.exit(1)
     
     footage_id = sys.argv[1]
+    set_usage_defaults(item_id=footage_id)
     
     # Flexible token handling
     if len(sys.argv) == 2:
@@ -255,7 +526,9 @@ if __name__ == "__main__":
         footage_data = config.get_record(token, "FOOTAGE", record_id)
         
         # Load assessment data from step 1 (supports both LF and AF prefixes)
-        assessment_path = f"/private/tmp/ftg_autolog_{footage_id}/assessment.json"
+        output_dir = global_workspace_manager.get_dir(footage_id)
+        global_workspace_manager.touch(footage_id)
+        assessment_path = os.path.join(output_dir, "assessment.json")
         
         if not os.path.exists(assessment_path):
             raise FileNotFoundError(f"Assessment file not found: {assessment_path}. Run step 1 first.")
@@ -274,102 +547,21 @@ if __name__ == "__main__":
         
         global_gemini_client.set_api_key(gemini_api_key, gemini_model)
         
-        # Load tags
-        tags = load_tags()
+        # Approved tags and bins (bins based on footage ID prefix), pre-rendered for the prompt
+        tags_text = global_prompt_context.get_tags_text("footage")
+        bins_text = global_prompt_context.get_bins_text(footage_bin_set(footage_id))
         
-        # Load bins (based on footage ID prefix)
-        bins = load_bins(footage_id)
+        print(f"  -> Model: {gemini_model}")
         
-        # Build prompt
-        print(f"\n📝 Building Gemini prompt...")
-        prompt = build_gemini_prompt(footage_data, assessment_data['frames'], tags, bins)
+        if len(assessment_data['frames']) > SEGMENT_THRESHOLD:
+            gemini_result, prompt = analyze_segmented(footage_data, assessment_data, tags_text, bins_text)
+        else:
+            gemini_result, prompt = analyze_frames(footage_data, assessment_data, assessment_data['frames'], tags_text, bins_text)
         
         # Log prompt to DevConsole for visibility
         print(f"  -> Logging prompt to AI_DevConsole...")
         write_to_dev_console(record_id, token, f"Gemini Analysis Prompt:\n{prompt[:500]}...")
         
-        # Prepare image list
-        output_dir = assessment_data['output_directory']
-        image_paths = []
-        
-        for frame_filename in sorted(assessment_data['frames'].keys()):
-            frame_path = os.path.join(output_dir, frame_filename)
-            if os.path.exists(frame_path):
-                image_paths.append(frame_path)
-        
-        print(f"  -> Prepared {len(image_paths)} images for Gemini")
-        
-        # Define response schema for structured output
-        response_schema = {
-            "type": "object",
-            "properties": {
-                "asset_id": {"type": "string"},
-                "global": {
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string"},
-                        "synopsis": {"type": "string"},
-                        "date": {"type": "string"},
-                        "location": {"type": "string"},
-                        "audio_type": {"type": "string"},
-                        "camera_summary": {
-                            "type": "array",
-                            "items": {"type": "string"}
-                        },
-                        "tags": {
-                            "type": "array",
-                            "items": {"type": "string"}
-                        },
-                        "avid_bins": {"type": "string"}
-                    },
-                    "required": ["title", "synopsis", "date", "location", "audio_type", "camera_summary", "tags", "avid_bins"]
-                },
-                "frames": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "frame_number": {"type": "integer"},
-                            "timestamp_sec": {"type": "number"},
-                            "timecode": {"type": "string"},
-                            "caption": {"type": "string"},
-                            "camera_motion": {
-                                "type": "array",
-                                "items": {"type": "string"}
-                            },
-                            "confidence": {"type": "number"}
-                        },
-                        "required": ["frame_number", "timestamp_sec", "timecode", "caption", "camera_motion", "confidence"]
-                    }
-                }
-            },
-            "required": ["asset_id", "global", "frames"]
-        }
-        
-        # Call Gemini
-        print(f"\n🚀 Calling Gemini API with {len(image_paths)} images...")
-        print(f"  -> Model: {gemini_model}")
-        print(f"  -> Timeout: 180s")
-        
-        response = global_gemini_client.generate_content(
-            prompt=prompt,
-            images=image_paths,
-            response_schema=response_schema,
-            max_retries=3,
-            timeout=180
-        )
-        
-        # Parse response
-        response_text = response.text
-        print(f"\n📊 Received Gemini response ({len(response_text)} chars)")
-        
-        try:
-            gemini_result = json.loads(response_text)
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse Gemini response as JSON: {e}")
-            print(f"Response text: {response_text[:500]}...")
-            raise
-        
         # Update audio_type from assessment
         if assessment_data['audio_status'] == 'silent':
             gemini_result['global']['audio_type'] = 'MOS'
@@ -24,6 +24,7 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.workspace_manager import global_workspace_manager
 
 __ARGS__ = ["footage_id"]
 
@@ -334,7 +335,8 @@ if __name__ == "__main__":
         footage_data = config.get_record(token, "FOOTAGE", record_id)
         
         # Load Gemini result from step 2 (supports both LF and AF prefixes)
-        output_dir = f"/private/tmp/ftg_autolog_{footage_id}"
+        output_dir = global_workspace_manager.get_dir(footage_id)
+        global_workspace_manager.touch(footage_id)
         gemini_result_path = os.path.join(output_dir, "gemini_result.json")
         
         if not os.path.exists(gemini_result_path):
@@ -21,6 +21,8 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
 from utils.audio_detector import check_transcription_status, load_transcript, map_transcript_to_frames
+from utils.workspace_manager import global_workspace_manager
+from utils.filemaker_bulk_writer import BulkRecordWriter
 
 __ARGS__ = ["footage_id"]
 
@@ -34,25 +36,51 @@ FIELD_MAPPING = {
 }
 
 
-def update_frame_transcript(token, record_id, frame_id, transcript_text):
-    """Update a frame record with transcript text."""
-    try:
-        field_data = {
-            FIELD_MAPPING["frame_transcript"]: transcript_text,
-            FIELD_MAPPING["frame_status"]: "4 - Audio Transcribed"
-        }
-        
-        response = config.update_record(token, "FRAMES", record_id, field_data)
+def find_frames(token, footage_id):
+    """Find all frame records for a footage item (one _find call)."""
+    query = {
+        "query": [{FIELD_MAPPING["frame_parent_id"]: footage_id}],
+        "limit": 1000
+    }
+    
+    response = requests.post(
+        config.url("layouts/FRAMES/_find"),
+        headers=config.api_headers(token),
+        json=query,
+        verify=False,
+        timeout=30
+    )
+    
+    if response.status_code != 200:
+        raise RuntimeError(f"Failed to find frames: {response.status_code}")
+    
+    return response.json()['response']['data']
+
+
+def write_frame_transcripts(token, transcripts):
+    """
+    Write transcript text to many frame records concurrently.
+    
+    Args:
+        token: FileMaker authentication token
+        transcripts: List of (record_id, frame_id, transcript_text)
         
-        if response.status_code == 200:
-            return True
-        else:
-            print(f"    -> ⚠️ Failed to update {frame_id}: {response.status_code}")
-            return False
-            
-    except Exception as e:
-        print(f"    -> ❌ Error updating {frame_id}: {e}")
-        return False
+    Returns:
+        Bulk write result with "updated" and "failed" ({frame_id: error})
+    """
+    updates = [
+        {
+            "record_id": record_id,
+            "label": frame_id,
+            "field_data": {
+                FIELD_MAPPING["frame_transcript"]: transcript_text,
+                FIELD_MAPPING["frame_status"]: "4 - Audio Transcribed"
+            }
+        }
+        for record_id, frame_id, transcript_text in transcripts
+    ]
+    
+    return BulkRecordWriter(token, "FRAMES").write(updates)
 
 
 if __name__ == "__main__":
@@ -76,7 +104,8 @@ if __name__ == "__main__":
         print(f"=== Audio Transcription Mapping for {footage_id} ===")
         
         # Load assessment data (supports both LF and AF prefixes)
-        output_dir = f"/private/tmp/ftg_autolog_{footage_id}"
+        output_dir = global_workspace_manager.get_dir(footage_id)
+        global_workspace_manager.touch(footage_id)
         assessment_path = os.path.join(output_dir, "assessment.json")
         
         if not os.path.exists(assessment_path):
@@ -94,31 +123,12 @@ if __name__ == "__main__":
             
             # Find all frames and update status (no transcript)
             try:
-                query = {
-                    "query": [{FIELD_MAPPING["frame_parent_id"]: footage_id}],
-                    "limit": 1000
-                }
-                
-                response = requests.post(
-                    config.url("layouts/FRAMES/_find"),
-                    headers=config.api_headers(token),
-                    json=query,
-                    verify=False,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    frames = response.json()['response']['data']
-                    
-                    updated = 0
-                    for frame in frames:
-                        frame_id = frame['fieldData'].get(FIELD_MAPPING["frame_id"])
-                        record_id = frame['recordId']
-                        
-                        if update_frame_transcript(token, record_id, frame_id, ""):
-                            updated += 1
-                    
-                    print(f"  -> ✅ Updated {updated}/{len(frames)} frames as silent")
+                frames = find_frames(token, footage_id)
+                result = write_frame_transcripts(token, [
+                    (frame['recordId'], frame['fieldData'].get(FIELD_MAPPING["frame_id"]), "")
+                    for frame in frames
+                ])
+                print(f"  -> ✅ Updated {len(result['updated'])}/{len(frames)} frames as silent")
                 
             except Exception as e:
                 print(f"  -> ⚠️ Error updating silent frames: {e}")
@@ -138,10 +148,10 @@ if __name__ == "__main__":
         
         print(f"  -> Transcription status: {status['status']}")
         
-        if status['status'] == 'running':
+        if status['status'] in ('queued', 'running'):
             progress = status.get('progress', 0)
             print(f"  -> Transcription still in progress ({progress}%)")
-            print(f"  -> Will check again later")
+            print(f"  -> Step 4 will be queued again when the transcription job completes")
             sys.exit(0)
         
         elif status['status'] == 'failed':
@@ -151,26 +161,11 @@ if __name__ == "__main__":
             
             # Update frames without transcripts
             try:
-                query = {
-                    "query": [{FIELD_MAPPING["frame_parent_id"]: footage_id}],
-                    "limit": 1000
-                }
-                
-                response = requests.post(
-                    config.url("layouts/FRAMES/_find"),
-                    headers=config.api_headers(token),
-                    json=query,
-                    verify=False,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    frames = response.json()['response']['data']
-                    
-                    for frame in frames:
-                        frame_id = frame['fieldData'].get(FIELD_MAPPING["frame_id"])
-                        record_id = frame['recordId']
-                        update_frame_transcript(token, record_id, frame_id, "")
+                frames = find_frames(token, footage_id)
+                write_frame_transcripts(token, [
+                    (frame['recordId'], frame['fieldData'].get(FIELD_MAPPING["frame_id"]), "")
+                    for frame in frames
+                ])
                 
             except Exception as e:
                 print(f"  -> ⚠️ Error updating frames: {e}")
@@ -193,40 +188,31 @@ if __name__ == "__main__":
             
             print(f"  -> Loaded transcript with {len(transcript.get('segments', []))} segments")
             
-            # Get frame timestamps
+            # Get frame timestamps (plus any near-duplicates each kept frame stands in for)
             frame_timestamps = []
+            merged_timestamps = {}
             for frame_data in assessment_data['frames'].values():
                 frame_timestamps.append(frame_data['timestamp_seconds'])
+                if frame_data.get('merged_timestamps'):
+                    merged_timestamps[frame_data['timestamp_seconds']] = frame_data['merged_timestamps']
             
             frame_timestamps.sort()
             
             # Map transcript to frames
             print(f"\n🔄 Mapping transcript to {len(frame_timestamps)} frames...")
-            frame_transcripts = map_transcript_to_frames(transcript, frame_timestamps)
+            frame_transcripts = map_transcript_to_frames(
+                transcript,
+                frame_timestamps,
+                merged_timestamps=merged_timestamps,
+                clip_to_words=os.getenv("FTG_TRANSCRIPT_WORD_CLIP", "0") == "1"
+            )
             
             # Update frame records
             print(f"\n📝 Updating frame records with transcripts...")
             
-            # Find all frames
-            query = {
-                "query": [{FIELD_MAPPING["frame_parent_id"]: footage_id}],
-                "limit": 1000
-            }
-            
-            response = requests.post(
-                config.url("layouts/FRAMES/_find"),
-                headers=config.api_headers(token),
-                json=query,
-                verify=False,
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise RuntimeError(f"Failed to find frames: {response.status_code}")
+            frames = find_frames(token, footage_id)
             
-            frames = response.json()['response']['data']
-            
-            updated = 0
+            transcripts = []
             for frame in frames:
                 frame_id = frame['fieldData'].get(FIELD_MAPPING["frame_id"])
                 record_id = frame['recordId']
@@ -241,19 +227,25 @@ if __name__ == "__main__":
                         timestamp = h * 3600 + m * 60 + s + (f / 30.0)  # Assume 30fps
                         
                         transcript_text = frame_transcripts.get(timestamp, "")
+                        transcripts.append((record_id, frame_id, transcript_text))
                         
-                        if update_frame_transcript(token, record_id, frame_id, transcript_text):
-                            updated += 1
-                            if transcript_text:
-                                print(f"    -> {frame_id}: {len(transcript_text)} chars")
-                            else:
-                                print(f"    -> {frame_id}: (no audio)")
+                        if transcript_text:
+                            print(f"    -> {frame_id}: {len(transcript_text)} chars")
+                        else:
+                            print(f"    -> {frame_id}: (no audio)")
                 except Exception as e:
                     print(f"    -> ⚠️ Error processing {frame_id}: {e}")
                     continue
             
+            # All frame updates go out concurrently; only failures are retried
+            result = write_frame_transcripts(token, transcripts)
+            updated = len(result['updated'])
+            
             print(f"\n  -> ✅ Updated {updated}/{len(frames)} frames with transcripts")
             
+            if result['failed']:
+                raise RuntimeError(f"{len(result['failed'])} frame updates failed: {', '.join(sorted(result['failed']))}")
+            
             print(f"\n=== Audio Transcription Complete ===")
             print(f"  Frames updated: {updated}")
             print(f"  Frames with audio: {len([t for t in frame_transcripts.values() if t])}")
@@ -15,6 +15,7 @@ Part B Workflow: 3 - Ready for AI → 7 - Avid Description
 import sys
 import os
 import subprocess
+import uuid
 import warnings
 from pathlib import Path
 from datetime import datetime
@@ -27,22 +28,34 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 # Setup paths
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.workspace_manager import global_workspace_manager
+from utils.footage_cache import global_footage_cache
 
 # Field mapping for FileMaker
 FIELD_MAPPING = {
     "status": "AutoLog_Status",
     "footage_id": "INFO_FTG_ID",
-    "description": "INFO_Description"
+    "description": "INFO_Description",
+    "filepath": "SPECS_Filepath_Server"
 }
 
 # Redis connection (localhost, default port)
 redis_conn = Redis(host='localhost', port=6379, db=0, decode_responses=False)
 
+# Pipeline events and the Step 4 gate (transcription + frame records both done)
+EVENTS_CHANNEL = "ftg_ai:events"
+EVENTS_LIST = "ftg_ai:events:recent"
+STEP4_GATE_KEY = "ftg_ai:step4_gate:{footage_id}"
+# Set when a workspace release waits for the item's transcription job (which then releases it)
+RELEASE_PENDING_KEY = "ftg_ai:release_pending:{footage_id}"
+
 # Create separate queues for each AI processing step
 q_step1 = Queue('ftg_ai_step1', connection=redis_conn, default_timeout=1800) # 30 min (sampling)
 q_step2 = Queue('ftg_ai_step2', connection=redis_conn, default_timeout=1800) # 30 min (Gemini)
 q_step3 = Queue('ftg_ai_step3', connection=redis_conn, default_timeout=1200) # 20 min (frame creation)
 q_step4 = Queue('ftg_ai_step4', connection=redis_conn, default_timeout=600)  # 10 min (transcription)
+q_prefetch = Queue('ftg_ai_prefetch', connection=redis_conn, default_timeout=3600) # 60 min (SMB → local cache copy)
+q_transcribe = Queue('ftg_ai_transcribe', connection=redis_conn, default_timeout=3600) # 60 min (resident Whisper)
 
 # Helper functions
 def tprint(message):
@@ -50,8 +63,8 @@ def tprint(message):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {message}", flush=True)
 
-def run_script(script_name, footage_id, token):
-    """Run a job script and return success status."""
+def run_script(script_name, footage_id, token, refresh_llm_cache=False):
+    """Run a job script and return success status (refresh_llm_cache: fresh LLM calls, no cached responses)."""
     try:
         script_path = Path(__file__).resolve().parent / script_name
         
@@ -64,6 +77,8 @@ def run_script(script_name, footage_id, token):
         # Set environment for scripts
         env = os.environ.copy()
         env['FM_TOKEN'] = token
+        if refresh_llm_cache:
+            env['FTG_LLM_CACHE_REFRESH'] = '1'
         
         result = subprocess.run(
             cmd,
@@ -188,33 +203,220 @@ def check_false_start(footage_id, token):
         tprint(f"  -> Warning: Could not check false start status: {e}")
         return False
 
-def check_audio_transcription_pending(footage_id, token):
-    """Check if audio transcription is pending for this footage."""
-    import os
+def get_audio_status(footage_id):
+    """
+    Get the audio status Step 1 recorded for this footage.
+    
+    "transcribing" means a transcription job is queued (Step 4 waits for it),
+    "silent" means Step 4's silent branch can finalise the frames right away.
+    """
+    import json
     
     try:
-        # Check if background transcription file exists
-        temp_dir = "/private/tmp"
-        assessment_file = os.path.join(temp_dir, f"{footage_id}_assessment.json")
+        # Step 1 records the audio status in the item's workspace
+        assessment_file = os.path.join(global_workspace_manager.get_dir(footage_id), "assessment.json")
         
         if os.path.exists(assessment_file):
-            import json
             with open(assessment_file, 'r') as f:
                 assessment_data = json.load(f)
             
-            return assessment_data.get("has_audio", False)
+            return assessment_data.get("audio_status")
         
-        return False
+        return None
         
     except Exception as e:
         tprint(f"  -> Warning: Could not check audio transcription status: {e}")
-        return False
+        return None
+
+def transcription_in_flight(footage_id):
+    """True while the item's transcription job is queued or running (it writes into the workspace)."""
+    from utils.audio_detector import check_transcription_status
+    
+    status_file = os.path.join(global_workspace_manager.get_dir(footage_id), "transcription_status.json")
+    return check_transcription_status(status_file).get("status") in ("queued", "running")
+
+def release_workspace(footage_id):
+    """
+    Unpin an item's workspace once its Part B run has finished (or failed).
+    
+    If a step fails while the transcription job is still queued or running, the
+    release is deferred: the transcription job releases the workspace when it ends.
+    """
+    try:
+        if transcription_in_flight(footage_id):
+            key = RELEASE_PENDING_KEY.format(footage_id=footage_id)
+            redis_conn.set(key, 1, ex=86400)
+            # The job may have finished between the check and the flag; then release here
+            if transcription_in_flight(footage_id) or not redis_conn.delete(key):
+                tprint(f"  -> ⏳ Workspace release for {footage_id} deferred until transcription finishes")
+                return
+        global_workspace_manager.release(footage_id)
+    except Exception as e:
+        tprint(f"  -> Warning: Could not release workspace for {footage_id}: {e}")
+
+def release_deferred_workspace(footage_id):
+    """Called when a transcription job ends: perform a workspace release that waited for it."""
+    try:
+        if redis_conn.delete(RELEASE_PENDING_KEY.format(footage_id=footage_id)):
+            global_workspace_manager.release(footage_id)
+            tprint(f"  -> 🧹 Released workspace for {footage_id} (deferred until transcription finished)")
+    except Exception as e:
+        tprint(f"  -> Warning: Could not release workspace for {footage_id}: {e}")
 
 # =============================================================================
 # JOB DEFINITIONS
 # =============================================================================
 
-def job_step1_assess(footage_id, token):
+def job_prefetch_footage(footage_id, token):
+    """
+    Read-ahead: copy the source clip to the local footage cache.
+    Status: unchanged (runs alongside Step 1, which waits on an in-progress copy)
+    """
+    tprint(f"💾 Prefetch Starting: {footage_id}")
+    
+    try:
+        record_id = config.find_record_id(token, "FOOTAGE", {FIELD_MAPPING["footage_id"]: f"=={footage_id}"})
+        file_path = config.get_record(token, "FOOTAGE", record_id)[FIELD_MAPPING["filepath"]]
+        
+        if not os.path.exists(file_path) and not config.ensure_volume_mounted(file_path):
+            tprint(f"  -> ⚠️ Prefetch skipped, file not accessible: {file_path}")
+            return {"status": "skipped"}
+        
+        if global_footage_cache.stage(file_path):
+            tprint(f"✅ Prefetch Complete: {footage_id}")
+            return {"status": "success"}
+        return {"status": "failed"}
+        
+    except Exception as e:
+        tprint(f"  -> ⚠️ Prefetch failed for {footage_id}: {e}")
+        return {"status": "failed"}
+
+def publish_event(event, footage_id, **data):
+    """Publish a Part B pipeline event (pub/sub + capped recent-events list)."""
+    import json
+    
+    payload = json.dumps({"event": event, "footage_id": footage_id, "timestamp": datetime.now().isoformat(), **data})
+    try:
+        redis_conn.publish(EVENTS_CHANNEL, payload)
+        redis_conn.lpush(EVENTS_LIST, payload)
+        redis_conn.ltrim(EVENTS_LIST, 0, 499)
+    except Exception as e:
+        tprint(f"  -> Warning: Could not publish {event} for {footage_id}: {e}")
+
+def arrive_at_step4_gate(footage_id, token, arrival):
+    """
+    Record that one prerequisite of Step 4 is done; queue Step 4 once both are.
+    
+    Step 4 needs both the frame records (Step 3) and the finished transcription.
+    Whichever finishes second queues Step 4, so nothing polls or idles.
+    """
+    key = STEP4_GATE_KEY.format(footage_id=footage_id)
+    count = redis_conn.incr(key)
+    redis_conn.expire(key, 86400)
+    
+    if count >= 2:
+        redis_conn.delete(key)
+        q_step4.enqueue(job_step4_transcribe_audio, footage_id, token)
+        tprint(f"  -> 📥 Step 4 queued for {footage_id} ({arrival} arrived last)")
+        return True
+    return False
+
+def job_transcribe_audio(footage_id, video_path, output_path, status_file, token):
+    """
+    Background: Whisper transcription of the full audio track (queued by Step 1)
+    Status: unchanged (triggers Step 4 once Step 3 has also finished)
+    
+    Runs on resident SimpleWorkers so the Whisper model stays loaded between jobs.
+    Progress and heartbeats go to the status file and the RQ job meta.
+    """
+    from rq import get_current_job
+    from utils.whisper_service import global_whisper_transcriber
+    
+    tprint(f"🎙️ Transcription Starting: {footage_id}")
+    publish_event("transcription_started", footage_id)
+    
+    current_job = get_current_job()
+    last_progress = {"value": None}
+    
+    def on_progress(status):
+        # Heartbeats land here too; only publish when progress actually moves
+        if status.get("progress") != last_progress["value"]:
+            last_progress["value"] = status.get("progress")
+            publish_event("transcription_progress", footage_id, progress=status.get("progress"))
+        if current_job:
+            current_job.meta.update({
+                "progress": status.get("progress", 0),
+                "heartbeat_at": status.get("heartbeat_at"),
+                "chunks_done": status.get("chunks_done"),
+                "chunks_total": status.get("chunks_total")
+            })
+            current_job.save_meta()
+    
+    status = global_whisper_transcriber.transcribe(
+        video_path,
+        output_path,
+        status_file,
+        job_id=current_job.id if current_job else None,
+        on_progress=on_progress
+    )
+    
+    if status["status"] == "completed":
+        tprint(f"✅ Transcription Complete: {footage_id} ({status.get('duration_seconds', 0):.1f}s)")
+        publish_event("transcription_completed", footage_id, duration_seconds=status.get("duration_seconds"),
+                      segments=status.get("segments"))
+    else:
+        tprint(f"❌ Transcription Failed: {footage_id} ({status.get('error', 'Unknown error')})")
+        publish_event("transcription_failed", footage_id, error=status.get("error"))
+    
+    # The cached clip (if Step 1 handed one over) may be evicted again
+    if current_job:
+        global_footage_cache.release(video_path, current_job.id)
+    
+    # Step 4 maps the transcript (or marks frames MOS on failure)
+    arrive_at_step4_gate(footage_id, token, "transcription")
+    release_deferred_workspace(footage_id)
+    return {"status": "success" if status["status"] == "completed" else "failed"}
+
+def on_transcription_job_failure(job, connection, exc_type, exc_value, traceback):
+    """RQ failure callback: a crashed/killed transcription still releases Step 4."""
+    from utils.whisper_service import write_status
+    
+    footage_id, video_path, _, status_file, token = job.args
+    global_footage_cache.release(video_path, job.id)
+    try:
+        write_status(status_file, {"status": "failed", "error": f"Transcription job died: {exc_value}", "job_id": job.id})
+    except Exception as e:
+        tprint(f"  -> Warning: Could not write failed status for {footage_id}: {e}")
+    publish_event("transcription_failed", footage_id, error=str(exc_value))
+    arrive_at_step4_gate(footage_id, token, "transcription")
+    release_deferred_workspace(footage_id)
+
+def queue_transcription(footage_id, video_path, output_path, status_file, token):
+    """Queue a clip for the resident Whisper workers and record it as queued."""
+    from utils.whisper_service import write_status
+    
+    # Fresh gate for this run (a re-run of Step 1 starts over)
+    redis_conn.delete(STEP4_GATE_KEY.format(footage_id=footage_id))
+    
+    # Record "queued" before enqueueing: a resident worker can start the job (and write
+    # running/completed) immediately, and a later "queued" would overwrite that for good
+    job_id = str(uuid.uuid4())
+    write_status(status_file, {"status": "queued", "progress": 0, "job_id": job_id})
+    # A cached clip must survive eviction until the job has read it (released by the job)
+    global_footage_cache.lease(video_path, job_id)
+    try:
+        q_transcribe.enqueue(
+            job_transcribe_audio, footage_id, video_path, output_path, status_file, token,
+            job_id=job_id, on_failure=on_transcription_job_failure
+        )
+    except Exception as e:
+        global_footage_cache.release(video_path, job_id)
+        write_status(status_file, {"status": "failed", "error": f"Could not queue transcription: {e}", "job_id": job_id})
+        raise
+    publish_event("transcription_queued", footage_id, job_id=job_id)
+    return job_id
+
+def job_step1_assess(footage_id, token, refresh_llm_cache=False):
     """
     Step 1: Assess and Sample Frames
     Status: 3 - Ready for AI → 4 - Frames Sampled
@@ -241,23 +443,27 @@ def job_step1_assess(footage_id, token):
         if update_status(footage_id, token, "4 - Frames Sampled"):
             tprint(f"✅ Step 1 Complete: {footage_id} (Queuing Step 2)")
             # Queue Step 2
-            q_step2.enqueue(job_step2_gemini, footage_id, token)
+            q_step2.enqueue(job_step2_gemini, footage_id, token, refresh_llm_cache)
             return {"status": "success", "next": "step2"}
         else:
             tprint(f"⚠️ Step 1 work done but status update failed: {footage_id}")
+            release_workspace(footage_id)
             return {"status": "partial", "next": None}
     else:
         tprint(f"❌ Step 1 Failed: {footage_id}")
+        release_workspace(footage_id)
         return {"status": "failed", "next": None}
 
-def job_step2_gemini(footage_id, token):
+def job_step2_gemini(footage_id, token, refresh_llm_cache=False):
     """
     Step 2: Gemini Multi-Image Analysis
     Status: 4 - Frames Sampled → 5 - AI Analysis Complete
+    
+    refresh_llm_cache (reprocessing) makes fresh Gemini calls instead of serving cached responses.
     """
     tprint(f"🔵 Step 2 Starting: {footage_id} (Gemini Analysis)")
     
-    success = run_script("ftg_autolog_B_02_gemini_analysis.py", footage_id, token)
+    success = run_script("ftg_autolog_B_02_gemini_analysis.py", footage_id, token, refresh_llm_cache)
     
     if success:
         if update_status(footage_id, token, "5 - AI Analysis Complete"):
@@ -267,9 +473,11 @@ def job_step2_gemini(footage_id, token):
             return {"status": "success", "next": "step3"}
         else:
             tprint(f"⚠️ Step 2 work done but status update failed: {footage_id}")
+            release_workspace(footage_id)
             return {"status": "partial", "next": None}
     else:
         tprint(f"❌ Step 2 Failed: {footage_id}")
+        release_workspace(footage_id)
         return {"status": "failed", "next": None}
 
 def job_step3_create_frames(footage_id, token):
@@ -278,31 +486,41 @@ def job_step3_create_frames(footage_id, token):
     Status: 5 - AI Analysis Complete → 6 - Frames Created OR 7 - Avid Description
     
     Note: Goes directly to "7 - Avid Description" if no audio.
-    If audio present, queues Step 4 but status already set to "7".
+    If audio present, Step 4 is queued once transcription has also completed
+    (status already set to "7").
     """
     tprint(f"🔵 Step 3 Starting: {footage_id} (Create Frame Records)")
     
     success = run_script("ftg_autolog_B_03_create_frames.py", footage_id, token)
     
     if success:
-        # Check if audio transcription is pending
-        has_pending_audio = check_audio_transcription_pending(footage_id, token)
+        # Check if Step 4 has audio work (transcription in flight, or silent frames to finalise)
+        audio_status = get_audio_status(footage_id)
         
         # Always set to "7 - Avid Description" (final status - triggers FM server scripts)
         if update_status(footage_id, token, "7 - Avid Description"):
-            if has_pending_audio:
-                # Queue Step 4 (audio transcription) - runs in background
-                tprint(f"✅ Step 3 Complete: {footage_id} (Queueing audio transcription)")
+            if audio_status == "transcribing":
+                # Step 4 is queued by whichever of Step 3 / transcription finishes last
+                if arrive_at_step4_gate(footage_id, token, "frames"):
+                    tprint(f"✅ Step 3 Complete: {footage_id} (Transcription done - Step 4 queued)")
+                else:
+                    tprint(f"✅ Step 3 Complete: {footage_id} (Step 4 will run when transcription completes)")
+                return {"status": "success", "next": "step4"}
+            elif audio_status == "silent":
+                tprint(f"✅ Step 3 Complete: {footage_id} (Silent - queueing Step 4)")
                 q_step4.enqueue(job_step4_transcribe_audio, footage_id, token)
                 return {"status": "success", "next": "step4"}
             else:
                 tprint(f"✅ Step 3 Complete: {footage_id} (No audio)")
+                release_workspace(footage_id)
                 return {"status": "success", "next": "complete"}
         else:
             tprint(f"⚠️ Step 3 work done but status update failed: {footage_id}")
+            release_workspace(footage_id)
             return {"status": "partial", "next": None}
     else:
         tprint(f"❌ Step 3 Failed: {footage_id}")
+        release_workspace(footage_id)
         return {"status": "failed", "next": None}
 
 def job_step4_transcribe_audio(footage_id, token):
@@ -310,7 +528,8 @@ def job_step4_transcribe_audio(footage_id, token):
     Step 4: Map Audio Transcription to Frame Records
     Status: 7 - Avid Description (no change - already set by Step 3)
     
-    Note: This step runs in background to populate audio transcription data.
+    Note: Triggered when both Step 3 and the transcription job have finished
+    (or directly by Step 3 for silent footage).
     Status remains at "7 - Avid Description" throughout.
     """
     tprint(f"🔵 Step 4 Starting: {footage_id} (Map Audio Transcription)")
@@ -319,34 +538,41 @@ def job_step4_transcribe_audio(footage_id, token):
     
     if success:
         tprint(f"✅ Step 4 Complete: {footage_id} (Audio transcription mapped)")
+        publish_event("step4_completed", footage_id)
+        release_workspace(footage_id)
         return {"status": "success", "next": "complete"}
     else:
         tprint(f"❌ Step 4 Failed: {footage_id} (Audio transcription incomplete)")
+        release_workspace(footage_id)
         return {"status": "failed", "next": None}
 
 # =============================================================================
 # BATCH QUEUEING FUNCTIONS
 # =============================================================================
 
-def queue_ftg_ai_batch(footage_ids, token=None):
-    """Queue multiple items for AI processing at Step 1."""
+def queue_ftg_ai_batch(footage_ids, token=None, refresh_llm_cache=False):
+    """Queue multiple items for AI processing at Step 1 (refresh_llm_cache to reprocess without cached LLM responses)."""
     if token is None:
         token = config.get_token()
     
     job_ids = []
     for footage_id in footage_ids:
-        job = q_step1.enqueue(job_step1_assess, footage_id, token)
+        if global_footage_cache.enabled:
+            q_prefetch.enqueue(job_prefetch_footage, footage_id, token)
+        job = q_step1.enqueue(job_step1_assess, footage_id, token, refresh_llm_cache)
         job_ids.append(job.id)
         tprint(f"📥 Queued: {footage_id} → {job.id}")
     
     return job_ids
 
-def queue_ftg_ai_item(footage_id, token=None):
-    """Queue a single item for AI processing at Step 1."""
+def queue_ftg_ai_item(footage_id, token=None, refresh_llm_cache=False):
+    """Queue a single item for AI processing at Step 1 (refresh_llm_cache to reprocess without cached LLM responses)."""
     if token is None:
         token = config.get_token()
     
-    job = q_step1.enqueue(job_step1_assess, footage_id, token)
+    if global_footage_cache.enabled:
+        q_prefetch.enqueue(job_prefetch_footage, footage_id, token)
+    job = q_step1.enqueue(job_step1_assess, footage_id, token, refresh_llm_cache)
     tprint(f"📥 Queued: {footage_id} → {job.id}")
     return job.id
 
@@ -357,4 +583,6 @@ if __name__ == "__main__":
     tprint(f"  - Step 2 (Gemini): {len(q_step2)} queued")
     tprint(f"  - Step 3 (Create Frames): {len(q_step3)} queued")
     tprint(f"  - Step 4 (Transcription): {len(q_step4)} queued")
+    tprint(f"  - Prefetch (Local Cache): {len(q_prefetch)} queued")
+    tprint(f"  - Transcribe (Whisper): {len(q_transcribe)} queued")
 
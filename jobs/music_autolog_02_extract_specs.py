@@ -12,6 +12,7 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.exiftool_pool import global_exiftool_pool
 
 __ARGS__ = ["music_id"]
 
@@ -99,16 +100,15 @@ def extract_file_specs(music_id, token):
         print(f"  -> Extracting specs with exiftool...")
         
         try:
-            result = subprocess.run(
-                ["exiftool", "-j", "-FileType", "-SampleRate", "-Duration", filepath],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            try:
+                metadata = global_exiftool_pool.get_metadata(
+                    filepath, tags=["-FileType", "-SampleRate", "-Duration"], timeout=30
+                )
+            except (RuntimeError, json.JSONDecodeError) as e:
+                print(f"  -> exiftool error: {e}")
+                metadata = {}
             
-            if result.returncode == 0:
-                metadata = json.loads(result.stdout)[0]
-                
+            if metadata:
                 file_format = metadata.get("FileType", "")
                 sample_rate = metadata.get("SampleRate", "")
                 duration_str = metadata.get("Duration", "")
@@ -12,6 +12,7 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.exiftool_pool import global_exiftool_pool
 
 __ARGS__ = ["music_id"]
 
@@ -90,18 +91,12 @@ def extract_with_exiftool(filepath):
     try:
         print(f"  -> Extracting with exiftool...")
         
-        result = subprocess.run(
-            ["exiftool", "-j", "-a", "-G1", filepath],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        data = global_exiftool_pool.get_metadata(filepath, options=["-a", "-G1"], timeout=30)
         
-        if result.returncode != 0:
-            print(f"  -> exiftool failed: {result.stderr}")
+        if not data:
+            print(f"  -> exiftool failed: no metadata returned")
             return None
         
-        data = json.loads(result.stdout)[0]
         print(f"  -> exiftool found {len(data)} fields")
         
         # Extract metadata from various tag groups
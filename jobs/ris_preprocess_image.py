@@ -23,6 +23,7 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.thumbnail import make_thumbnail
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
@@ -80,17 +81,13 @@ def convert_to_rgb_if_needed(img):
     print(f"  -> Conversion complete")
     return img
 
-def create_thumbnail(img, max_size=588, quality=85):
-    """Create thumbnail matching Stills workflow: 588x588 max, JPEG quality 85."""
+def create_thumbnail(image_path, max_size=588, quality=85):
+    """Create RGB thumbnail matching Stills workflow: 588x588 max, JPEG quality 85 (reduced-resolution decode)."""
     print(f"  -> Creating thumbnail (max {max_size}x{max_size})...")
     
-    original_size = img.size
-    thumb_img = img.copy()
+    # Shrink first (JPEG draft / reduce), then convert the small image to RGB
+    thumb_img = make_thumbnail(image_path, max_size, convert=convert_to_rgb_if_needed)
     
-    # Create thumbnail maintaining aspect ratio
-    thumb_img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-    
-    print(f"  -> Original: {original_size[0]}x{original_size[1]}")
     print(f"  -> Thumbnail: {thumb_img.size[0]}x{thumb_img.size[1]}")
     
     return thumb_img
@@ -143,26 +140,23 @@ def process_ris_record(record_id, token):
             print(f"     (Delete embedding first if you want to reprocess)")
             return True
         
-        # Open and process image
+        # Open and process image (header only here; pixels are decoded at reduced resolution)
         print(f"\n📸 Processing image...")
         with Image.open(import_path) as img:
             original_mode = img.mode
             original_size = img.size
-            
-            print(f"  Original: {original_size[0]}x{original_size[1]}, Mode: {original_mode}")
-            
-            # Step 1: Convert to RGB
-            img_rgb = convert_to_rgb_if_needed(img)
-            
-            # Step 2: Create thumbnail
-            thumb = create_thumbnail(img_rgb, max_size=588, quality=85)
-            
-            # Step 3: Save to temp file
-            temp_path = f"/tmp/ris_thumb_{record_id}.jpg"
-            thumb.save(temp_path, 'JPEG', quality=85)
-            
-            file_size = os.path.getsize(temp_path)
-            print(f"  -> Thumbnail saved: {file_size:,} bytes ({file_size/1024:.1f} KB)")
+        
+        print(f"  Original: {original_size[0]}x{original_size[1]}, Mode: {original_mode}")
+        
+        # Step 1-2: Create thumbnail and convert to RGB
+        thumb = create_thumbnail(import_path, max_size=588, quality=85)
+        
+        # Step 3: Save to temp file
+        temp_path = f"/tmp/ris_thumb_{record_id}.jpg"
+        thumb.save(temp_path, 'JPEG', quality=85)
+        
+        file_size = os.path.getsize(temp_path)
+        print(f"  -> Thumbnail saved: {file_size:,} bytes ({file_size/1024:.1f} KB)")
         
         # Step 4: Upload to FileMaker container field
         print(f"\n📤 Uploading thumbnail to FileMaker...")
@@ -90,11 +90,17 @@ WORKFLOW_STEPS = [
     }
 ]
 
-def load_prompts():
-    """Load prompts from prompts.json file."""
-    prompts_path = Path(__file__).resolve().parent.parent / "prompts" / "prompts.json"
-    with open(prompts_path, 'r') as f:
-        return json.load(f)
+# Steps 1 and 2 as one subprocess that decodes each import once (FTG_STILLS_FUSED_INGEST=0 restores the two steps)
+FUSED_INGEST_STEP = {
+    "step_num": 1,
+    "status_before": "0 - Pending File Info",
+    "status_after": "2 - Server Copy Complete",
+    "script": "stills_autolog_01_ingest.py",
+    "description": "Ingest (File Info + Copy to Server)"
+}
+
+if os.getenv("FTG_STILLS_FUSED_INGEST", "1") != "0":
+    WORKFLOW_STEPS = [FUSED_INGEST_STEP] + WORKFLOW_STEPS[2:]
 
 def combine_metadata(record_data):
     """Combine all available metadata into a single text for evaluation."""
@@ -1,5 +1,5 @@
 # jobs/stills_autolog_01_get_file_info.py
-import sys, os, json, time, requests, subprocess
+import sys, os, json, time, requests
 import warnings
 from pathlib import Path
 from PIL import Image
@@ -16,6 +16,8 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
 from utils.url_validator import clean_archival_id_for_url, construct_url_from_source_and_id, validate_and_test_url
 from utils.input_parser import parse_input_ids, format_input_summary, validate_ids
+from utils.exiftool_pool import global_exiftool_pool
+from utils.stills_ingest import get_image_dimensions_alternative
 
 __ARGS__ = ["stills_id"]
 
@@ -32,67 +34,6 @@ FIELD_MAPPING = {
     "file_format": "SPECS_File_Format"
 }
 
-def get_image_dimensions_alternative(import_path):
-    """Get image dimensions using alternative methods when PIL fails."""
-    print(f"  -> Attempting alternative dimension extraction for: {import_path}")
-    
-    # Method 1: Try using exiftool to get dimensions
-    try:
-        exiftool_paths = ['/opt/homebrew/bin/exiftool', '/usr/local/bin/exiftool', 'exiftool']
-        exiftool_cmd = None
-        
-        for path in exiftool_paths:
-            if os.path.exists(path) or path == 'exiftool':
-                exiftool_cmd = path
-                break
-        
-        if exiftool_cmd:
-            result = subprocess.run([exiftool_cmd, '-j', '-ImageWidth', '-ImageHeight', import_path], 
-                                  capture_output=True, text=True, timeout=60)
-            if result.returncode == 0:
-                metadata = json.loads(result.stdout)[0]
-                width = metadata.get('ImageWidth')
-                height = metadata.get('ImageHeight')
-                if width and height:
-                    print(f"  -> Successfully extracted dimensions via exiftool: {width}x{height}")
-                    return f"{width}x{height}"
-    except Exception as e:
-        print(f"  -> Exiftool dimension extraction failed: {e}")
-    
-    # Method 2: Try using sips (macOS built-in)
-    try:
-        result = subprocess.run(['sips', '-g', 'pixelWidth', '-g', 'pixelHeight', import_path], 
-                              capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
-            lines = result.stdout.split('\n')
-            width = None
-            height = None
-            for line in lines:
-                if 'pixelWidth:' in line:
-                    width = line.split(':')[1].strip()
-                elif 'pixelHeight:' in line:
-                    height = line.split(':')[1].strip()
-            if width and height:
-                print(f"  -> Successfully extracted dimensions via sips: {width}x{height}")
-                return f"{width}x{height}"
-    except Exception as e:
-        print(f"  -> Sips dimension extraction failed: {e}")
-    
-    # Method 3: Try using identify (ImageMagick)
-    try:
-        result = subprocess.run(['identify', '-format', '%wx%h', import_path], 
-                              capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
-            dimensions = result.stdout.strip()
-            if 'x' in dimensions:
-                print(f"  -> Successfully extracted dimensions via identify: {dimensions}")
-                return dimensions
-    except Exception as e:
-        print(f"  -> Identify dimension extraction failed: {e}")
-    
-    print(f"  -> All alternative dimension extraction methods failed")
-    return "Unknown"
-
 def find_url_from_source_and_archival_id(token, source, archival_id):
     """Find URL root from URLs layout based on source and combine with archival ID."""
     print(f"  -> Attempting to find URL root for source: {source}")
@@ -144,115 +85,112 @@ def find_url_from_source_and_archival_id(token, source, archival_id):
         return None
 
 
-def process_single_item(stills_id: str, token: str) -> bool:
-    """Process a single stills item."""
+def read_dimensions(import_path):
+    """(width, height) from the image header, or via exiftool/sips/identify; (None, None) if unknown."""
     try:
-        record_id = config.find_record_id(token, "Stills", {FIELD_MAPPING["stills_id"]: f"=={stills_id}"})
-        record_data = config.get_record(token, "Stills", record_id)
-        import_path = record_data[FIELD_MAPPING["import_path"]]
+        print(f"  -> Attempting to open image with PIL: {import_path}")
+        with Image.open(import_path) as img:
+            width, height = img.size
+        print(f"  -> Successfully extracted dimensions via PIL: {width}x{height}")
+        return width, height
+    except Exception as e:
+        print(f"  -> PIL failed to open image: {e}")
+        print(f"  -> Attempting alternative dimension extraction methods...")
+        return get_image_dimensions_alternative(import_path)
 
-        # Enhanced image dimension extraction with fallback methods
-        dimensions = "Unknown"
-        width = None
-        height = None
-        try:
-            print(f"  -> Attempting to open image with PIL: {import_path}")
-            img = Image.open(import_path)
-            width = img.width
-            height = img.height
-            dimensions = f"{width}x{height}"
-            print(f"  -> Successfully extracted dimensions via PIL: {dimensions}")
-        except Exception as e:
-            print(f"  -> PIL failed to open image: {e}")
-            print(f"  -> Attempting alternative dimension extraction methods...")
-            dimensions = get_image_dimensions_alternative(import_path)
-            # Parse width and height from the alternative method result
-            if dimensions and dimensions != "Unknown" and 'x' in dimensions:
-                try:
-                    width_str, height_str = dimensions.split('x')
-                    width = int(width_str)
-                    height = int(height_str)
-                except ValueError:
-                    print(f"  -> Warning: Could not parse dimensions from alternative method: {dimensions}")
-                    width = None
-                    height = None
-        
-        file_size_mb = f"{os.path.getsize(import_path) / (1024*1024):.2f} Mb"
-        
-        # Extract file format from extension
-        file_extension = Path(import_path).suffix.lower()
-        file_format = file_extension.lstrip('.').upper() if file_extension else "UNKNOWN"
-        
-        # Extract archive name from path after "2 By Archive/"
-        path_parts = Path(import_path).parts
-        try:
-            archive_index = path_parts.index("2 By Archive")
-            if archive_index + 1 < len(path_parts):
-                source = path_parts[archive_index + 1]
-            else:
-                source = "Unknown Archive"
-        except ValueError:
+
+def build_file_info(token: str, import_path: str, width, height) -> dict:
+    """
+    Step 01 field data for an import: dimensions, size, format, source, archival ID and URL.
+
+    Args:
+        token: FileMaker session token
+        import_path: Path to the import image
+        width: Image width (None if unknown)
+        height: Image height (None if unknown)
+
+    Returns:
+        FileMaker field data for the Stills record
+    """
+    dimensions = f"{width}x{height}" if width and height else "Unknown"
+    file_size_mb = f"{os.path.getsize(import_path) / (1024*1024):.2f} Mb"
+    
+    # Extract file format from extension
+    file_extension = Path(import_path).suffix.lower()
+    file_format = file_extension.lstrip('.').upper() if file_extension else "UNKNOWN"
+    
+    # Extract archive name from path after "2 By Archive/"
+    path_parts = Path(import_path).parts
+    try:
+        archive_index = path_parts.index("2 By Archive")
+        if archive_index + 1 < len(path_parts):
+            source = path_parts[archive_index + 1]
+        else:
             source = "Unknown Archive"
+    except ValueError:
+        source = "Unknown Archive"
 
-        # Extract archival ID from filename
-        filename = Path(import_path).stem
-        archival_id = filename  # Keep original - cleaning will be handled by utility
+    # Extract archival ID from filename
+    filename = Path(import_path).stem
+    archival_id = filename  # Keep original - cleaning will be handled by utility
 
-        # Extract XMP URL data from metadata
-        xmp_url = None
-        try:
-            # Use exiftool to extract metadata
-            exiftool_paths = ['/opt/homebrew/bin/exiftool', '/usr/local/bin/exiftool', 'exiftool']
-            exiftool_cmd = None
-            
-            for path in exiftool_paths:
-                if os.path.exists(path) or path == 'exiftool':
-                    exiftool_cmd = path
-                    break
-            
-            if exiftool_cmd:
-                result = subprocess.run([exiftool_cmd, '-j', '-g1', '-S', import_path], capture_output=True, text=True, timeout=60)
-                if result.returncode == 0:
-                    metadata = json.loads(result.stdout)[0]
-                    # Look for XMP Creator Address in the correct field
-                    xmp_url = metadata.get('XMP-iptcCore:CreatorAddress', '')
-                    if not xmp_url:
-                        # Try alternative field names
-                        xmp_url = metadata.get('XMP-iptcCore', {}).get('CreatorAddress', '')
-                    if xmp_url:
-                        print(f"  -> Found XMP URL: {xmp_url}")
-        except Exception as e:
-            print(f"  -> Warning: Could not extract XMP metadata: {e}")
+    # Extract XMP URL data from metadata
+    xmp_url = None
+    try:
+        # Use the shared exiftool pool to extract metadata
+        metadata = global_exiftool_pool.get_metadata(import_path, options=['-g1', '-S'])
+        if metadata:
+            # Look for XMP Creator Address in the correct field
+            xmp_url = metadata.get('XMP-iptcCore:CreatorAddress', '')
+            if not xmp_url:
+                # Try alternative field names
+                xmp_url = metadata.get('XMP-iptcCore', {}).get('CreatorAddress', '')
+            if xmp_url:
+                print(f"  -> Found XMP URL: {xmp_url}")
+    except Exception as e:
+        print(f"  -> Warning: Could not extract XMP metadata: {e}")
 
-        # Generate URL from source and archival ID (fallback)
-        generated_url = None
-        if source and archival_id and source != "Unknown Archive":
-            generated_url = find_url_from_source_and_archival_id(token, source, archival_id)
+    # Generate URL from source and archival ID (fallback)
+    generated_url = None
+    if source and archival_id and source != "Unknown Archive":
+        generated_url = find_url_from_source_and_archival_id(token, source, archival_id)
 
-        # Removed thumbnail creation - now handled in copy_to_server script for efficiency
-        # (thumbnail will be created from the processed server JPEG instead of the large original)
-        
-        field_data = {
-            FIELD_MAPPING["dimensions"]: dimensions,
-            FIELD_MAPPING["size"]: file_size_mb,
-            FIELD_MAPPING["source"]: source,
-            FIELD_MAPPING["archival_id"]: archival_id,
-            FIELD_MAPPING["file_format"]: file_format
-        }
-        
-        # Add separate X and Y dimensions if available
-        if width is not None and height is not None:
-            field_data[FIELD_MAPPING["dimensions_x"]] = width
-            field_data[FIELD_MAPPING["dimensions_y"]] = height
-            print(f"  -> Set dimensions: X={width}, Y={height}")
-        
-        # Set URL - prioritize XMP URL over generated URL
-        if xmp_url:
-            field_data[FIELD_MAPPING["url"]] = xmp_url
-            print(f"  -> Set XMP URL: {xmp_url}")
-        elif generated_url:
-            field_data[FIELD_MAPPING["url"]] = generated_url
-            print(f"  -> Set generated URL: {generated_url}")
+    # Thumbnail is created in copy_to_server / the fused ingest step, from the processed server JPEG
+    
+    field_data = {
+        FIELD_MAPPING["dimensions"]: dimensions,
+        FIELD_MAPPING["size"]: file_size_mb,
+        FIELD_MAPPING["source"]: source,
+        FIELD_MAPPING["archival_id"]: archival_id,
+        FIELD_MAPPING["file_format"]: file_format
+    }
+    
+    # Add separate X and Y dimensions if available
+    if width is not None and height is not None:
+        field_data[FIELD_MAPPING["dimensions_x"]] = width
+        field_data[FIELD_MAPPING["dimensions_y"]] = height
+        print(f"  -> Set dimensions: X={width}, Y={height}")
+    
+    # Set URL - prioritize XMP URL over generated URL
+    if xmp_url:
+        field_data[FIELD_MAPPING["url"]] = xmp_url
+        print(f"  -> Set XMP URL: {xmp_url}")
+    elif generated_url:
+        field_data[FIELD_MAPPING["url"]] = generated_url
+        print(f"  -> Set generated URL: {generated_url}")
+    
+    return field_data
+
+
+def process_single_item(stills_id: str, token: str) -> bool:
+    """Process a single stills item."""
+    try:
+        record_id = config.find_record_id(token, "Stills", {FIELD_MAPPING["stills_id"]: f"=={stills_id}"})
+        record_data = config.get_record(token, "Stills", record_id)
+        import_path = record_data[FIELD_MAPPING["import_path"]]
+
+        width, height = read_dimensions(import_path)
+        field_data = build_file_info(token, import_path, width, height)
         
         config.update_record(token, "Stills", record_id, field_data)
         print(f"✅ Successfully processed {stills_id}")
@@ -0,0 +1,105 @@
+# jobs/stills_autolog_01_ingest.py
+"""
+Fused stills ingest: steps 01 (Get File Info) and 02 (Copy to Server) in one pass.
+
+The import is opened and decoded once; dimensions, the RGB server copy and the
+thumbnail all come from that image (see utils/stills_ingest.py), exiftool reads
+the XMP URL, and every field is written to FileMaker in a single update.
+stills_autolog_00_run_all runs this in place of steps 01 and 02 unless
+FTG_STILLS_FUSED_INGEST=0.
+"""
+import sys, os
+import warnings
+from pathlib import Path
+
+# Suppress urllib3 LibreSSL warning
+warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.1.1+.*', category=Warning)
+
+# Set PIL's maximum image size to handle very large images (1 billion pixels)
+# This prevents the "decompression bomb DOS attack" error for legitimate large images
+from PIL import Image, ImageFile
+Image.MAX_IMAGE_PIXELS = 1000000000  # 1 billion pixels
+
+# Add the parent directory to the path to import your existing config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+from utils.stills_ingest import open_still, ingest_still, write_placeholder_thumbnail
+from jobs.stills_autolog_01_get_file_info import build_file_info
+from jobs.stills_autolog_02_copy_to_server import calculate_destination_path
+
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+__ARGS__ = ["stills_id"]
+
+FIELD_MAPPING = {
+    "stills_id": "INFO_STILLS_ID",
+    "import_path": "SPECS_Filepath_Import",
+    "server_path": "SPECS_Filepath_Server",
+    "thumbnail": "SPECS_Thumbnail",
+    "file_format": "SPECS_File_Format"
+}
+
+
+def process_single_item(stills_id: str, token: str) -> bool:
+    """Get file info, write the server copy and upload the thumbnail for one still."""
+    record_id = config.find_record_id(token, "Stills", {FIELD_MAPPING["stills_id"]: f"=={stills_id}"})
+    record_data = config.get_record(token, "Stills", record_id)
+    import_path = record_data[FIELD_MAPPING["import_path"]]
+    system_globals = config.get_system_globals(token)
+
+    # Header read: dimensions for step 01 without decoding any pixels
+    img, width, height = open_still(import_path)
+    field_data = build_file_info(token, import_path, width, height)
+
+    # The one full decode: RGB server copy and thumbnail
+    destination_path = calculate_destination_path(stills_id, system_globals)
+    thumb_path = f"/tmp/thumb_{stills_id}.jpg"
+    ingest = ingest_still(img, destination_path, thumb_path)
+    img.close()
+
+    if not ingest["thumb_path"]:
+        write_placeholder_thumbnail(thumb_path)
+    try:
+        config.upload_to_container(token, "Stills", record_id, FIELD_MAPPING['thumbnail'], thumb_path)
+        os.remove(thumb_path)
+    except Exception as thumb_error:
+        print(f"  -> Warning: Could not upload thumbnail: {thumb_error}")
+
+    # File format is the import's (server copy is always .jpg), with (upscaled) notation if upscaled
+    field_data[FIELD_MAPPING["server_path"]] = destination_path
+    if ingest["was_upscaled"]:
+        field_data[FIELD_MAPPING["file_format"]] += " (upscaled)"
+
+    config.update_record(token, "Stills", record_id, field_data)
+
+    success_message = f"SUCCESS [ingest]: {stills_id}"
+    if ingest["was_upscaled"]:
+        success_message += " (with automatic upscaling)"
+    print(success_message)
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(1)
+
+    stills_id = sys.argv[1]
+
+    # Flexible token handling - detect call mode
+    if len(sys.argv) == 2:
+        # Direct API call mode - create own token/session
+        token = config.get_token()
+        print(f"Direct mode: Created new FileMaker session for {stills_id}")
+    elif len(sys.argv) == 3:
+        # Subprocess mode - use provided token from parent process
+        token = sys.argv[2]
+        print(f"Subprocess mode: Using provided token for {stills_id}")
+    else:
+        sys.stderr.write(f"ERROR: Invalid arguments. Expected: script.py stills_id [token]\n")
+        sys.exit(1)
+
+    try:
+        process_single_item(stills_id, token)
+        sys.exit(0)
+    except Exception as e:
+        sys.stderr.write(f"ERROR [ingest] on {stills_id}: {e}\n")
+        sys.exit(1)
@@ -1,5 +1,5 @@
 # jobs/stills_autolog_03_parse_metadata.py
-import sys, os, json, time, requests, subprocess
+import sys, os, json, time, requests
 import warnings
 from pathlib import Path
 
@@ -9,6 +9,7 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 # Add the parent directory to the path to import your existing config
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.exiftool_pool import global_exiftool_pool
 
 __ARGS__ = ["stills_id"]
 
@@ -108,28 +109,11 @@ if __name__ == "__main__":
         if not os.path.exists(import_path):
             raise FileNotFoundError(f"Import file not found: {import_path}")
         
-        # Use correct exiftool path - try multiple locations
-        exiftool_paths = ['/opt/homebrew/bin/exiftool', '/usr/local/bin/exiftool', 'exiftool']
-        exiftool_cmd = None
+        # Read metadata through the shared exiftool pool (raises if exiftool is missing)
+        metadata = global_exiftool_pool.get_metadata(import_path, options=['-g1', '-S'])
+        if not metadata:
+            raise RuntimeError(f"Exiftool failed to read metadata from: {import_path}")
         
-        for path in exiftool_paths:
-            if os.path.exists(path) or path == 'exiftool':
-                exiftool_cmd = path
-                break
-        
-        if not exiftool_cmd:
-            raise RuntimeError("Exiftool not found in any expected location")
-        
-        print(f"DEBUG: Using exiftool at: {exiftool_cmd}")
-        
-        result = subprocess.run([exiftool_cmd, '-j', '-g1', '-S', import_path], capture_output=True, text=True)
-        if result.returncode != 0: 
-            print(f"DEBUG: Exiftool stderr: {result.stderr}")
-            raise RuntimeError(f"Exiftool failed: {result.stderr}")
-        
-        print(f"DEBUG: Exiftool output length: {len(result.stdout)} characters")
-        
-        metadata = json.loads(result.stdout)[0]
         print(f"DEBUG: Parsed metadata with {len(metadata)} keys")
         
         description = extract_comprehensive_description(metadata)
@@ -10,7 +10,7 @@ from datetime import datetime
 import warnings
 import json
 import openai
-import concurrent.futures
+import asyncio
 import threading
 import base64
 
@@ -20,6 +20,11 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
 from utils.openai_client import global_openai_client
+from utils.image_payload import global_image_payloads, summarize_payloads
+from utils.prompt_context import global_prompt_context
+from utils.filemaker_bulk_writer import BulkRecordWriter, AsyncRecordSink
+from utils.async_batch import gather_bounded
+from utils.llm_usage import set_usage_tags
 
 __ARGS__ = ["stills_id"]
 
@@ -42,25 +47,12 @@ FIELD_MAPPING = {
     "globals_api_key_5": "SystemGlobals_AutoLog_OpenAI_API_Key_5"
 }
 
-def optimize_image_for_openai(image_path, max_size=(1024, 1024), quality=85):
-    """Optimize image for OpenAI Vision API - balanced optimization for performance."""
+def optimize_image_for_openai(image_path, provider="openai"):
+    """Optimize image for OpenAI Vision API - resized to the token-optimal size, encoded once (cached)."""
     try:
-        with open(image_path, "rb") as image_file:
-            # Convert to RGB if necessary (handles RGBA, grayscale, etc.)
-            # This part of the original code was using Image.open, which is no longer imported.
-            # Assuming the intent was to read the image bytes directly.
-            # For now, we'll keep the original logic but acknowledge the Image import is removed.
-            # If the original Image.open logic was intended to be kept, it would need to be re-added.
-            # For now, we'll assume the user wants to read the file bytes directly.
-            image_data = image_file.read()
-            if not image_data:
-                raise ValueError("Image file is empty.")
-
-            # Encode to base64
-            base64_image = base64.b64encode(image_data).decode('utf-8')
-            
-            print(f"  -> Image optimized: {len(base64_image)} chars")
-            return base64_image
+        payload = global_image_payloads.build(image_path, provider)
+        summarize_payloads([payload])
+        return payload["base64"]
             
     except Exception as e:
         print(f"  -> Image optimization failed, using original: {e}")
@@ -68,63 +60,93 @@ def optimize_image_for_openai(image_path, max_size=(1024, 1024), quality=85):
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
 
-def load_prompts():
-    prompts_path = Path(__file__).resolve().parent.parent / "prompts" / "prompts.json"
-    with open(prompts_path, 'r') as f:
-        return json.load(f)
-
-def load_tags():
-    """Load the approved tags list from the tags file with descriptions."""
-    tags_path = Path(__file__).resolve().parent.parent / "tags" / "stills-tags.tab"
-    try:
-        with open(tags_path, 'r') as f:
-            # Read all lines and parse tab-separated format: tag_name\tdescription
-            tags = []
-            for line in f.readlines():
-                line = line.strip()
-                if line:
-                    # Split by tab to get name and description
-                    parts = line.split('\t')
-                    if len(parts) >= 2:
-                        tag_name = parts[0].strip()
-                        tag_description = parts[1].strip()
-                        tags.append({'name': tag_name, 'description': tag_description})
-                    elif len(parts) == 1:
-                        # Tag without description
-                        tag_name = parts[0].strip()
-                        tags.append({'name': tag_name, 'description': ''})
-        print(f"  -> Loaded {len(tags)} approved tags with descriptions")
-        return tags
-    except Exception as e:
-        print(f"  -> WARNING: Failed to load tags file: {e}")
-        return []
-
-def load_bins():
-    """Load the approved bins list from the bins file."""
-    bins_path = Path(__file__).resolve().parent.parent / "tags" / "stills-bins.txt"
-    try:
-        with open(bins_path, 'r') as f:
-            bins = []
-            for line in f.readlines():
-                line = line.strip()
-                # Skip comments and empty lines
-                if line and not line.startswith('#'):
-                    # Support both formats: just name, or name\tdescription
-                    parts = line.split('\t')
-                    bin_name = parts[0].strip()
-                    bins.append(bin_name)
-        print(f"  -> Loaded {len(bins)} approved bins")
-        return bins
-    except Exception as e:
-        print(f"  -> WARNING: Failed to load bins file: {e}")
-        return []
-
 def truncate_text_for_clip(text, max_chars=250):
     """Truncate text to fit CLIP token limits (roughly 77 tokens = ~250 chars safely)"""
     if not text:
         return ""
     return text[:max_chars] if len(text) > max_chars else text
 
+def build_messages(record_data, base64_image):
+    """Build the description prompt and OpenAI messages for a Stills record; returns (prompt_text, messages)."""
+    metadata_from_fm = record_data.get(FIELD_MAPPING["metadata"], '')
+    user_prompt = record_data.get(FIELD_MAPPING["user_prompt"], '')
+    existing_description = record_data.get(FIELD_MAPPING["description"], '')
+
+    # Load and format the prompt (template and approved tag/bin lists are cached per process)
+    prompt_template = global_prompt_context.get_prompt("stills_ai_description")
+    tags_list_text = global_prompt_context.get_tags_text("stills")
+    bins_list_text = global_prompt_context.get_bins_text("stills")
+    
+    # Format the prompt with dynamic fields
+    prompt_text = prompt_template.format(
+        AI_Prompt=user_prompt if user_prompt else "",
+        INFO_Metadata=metadata_from_fm if metadata_from_fm else "",
+        INFO_Description=existing_description if existing_description else "",
+        TAGS_LIST=tags_list_text,
+        BINS_LIST=bins_list_text
+    )
+
+    # Create the message with image
+    messages = [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt_text},
+                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+            ]
+        }
+    ]
+    return prompt_text, messages
+
+def build_update_data(content):
+    """FileMaker field data (description, date, tags, avid bins) from the parsed response."""
+    # Extract tags from response
+    returned_tags = content.get("tags") or content.get("Tags", [])
+    
+    # Ensure returned_tags is a list (sometimes API returns string by mistake)
+    if isinstance(returned_tags, str):
+        returned_tags = [returned_tags]
+    
+    if returned_tags:
+        print(f"🏷️  TAGS RETURNED: {', '.join(returned_tags)}")
+        print(f"🏷️  TOTAL TAG COUNT: {len(returned_tags)}")
+        # Format tags for FileMaker (comma-separated)
+        tags_for_fm = ", ".join(returned_tags)
+    else:
+        print(f"⚠️  No tags returned in response")
+        tags_for_fm = ""
+    
+    # Extract avid bins from response
+    avid_bins = content.get("avid_bins") or content.get("Avid_bins", "")
+    if avid_bins:
+        print(f"🗂️  AVID BINS: {avid_bins}")
+    else:
+        print(f"⚠️  No avid bins returned in response")
+    
+    return {
+        FIELD_MAPPING["description"]: content.get("description") or content.get("Description", "Error: No description returned."),
+        FIELD_MAPPING["date"]: content.get("date") or content.get("Date", ""),
+        FIELD_MAPPING["tags_list"]: tags_for_fm,
+        FIELD_MAPPING["avid_bins"]: avid_bins
+    }
+
+def get_api_keys(token):
+    """OpenAI API keys from SystemGlobals."""
+    system_globals = config.get_system_globals(token)
+    
+    # Collect all available API keys
+    api_keys = []
+    for i in range(1, 6):  # Keys 1 through 5
+        key = system_globals.get(FIELD_MAPPING[f"globals_api_key_{i}"])
+        if key and key.strip():
+            api_keys.append(key)
+    
+    if not api_keys:
+        raise ValueError("No OpenAI API keys found in SystemGlobals")
+    
+    print(f"🔑 Found {len(api_keys)} OpenAI API keys")
+    return api_keys
+
 def handle_openai_with_graceful_retry(client, messages, stills_id, max_retries=5):
     """Handle OpenAI API calls with graceful retry logic for various issues."""
     for attempt in range(max_retries):
@@ -135,7 +157,8 @@ def handle_openai_with_graceful_retry(client, messages, stills_id, max_retries=5
                 model="gpt-4.1",
                 messages=messages,
                 response_format={"type": "json_object"},
-                estimated_tokens=2500  # Restored from 2000 to 2500 for better accuracy
+                estimated_tokens=2500,  # Restored from 2000 to 2500 for better accuracy
+                use_cache=attempt == 0  # a retry must not be answered with the same cached response
             )
             
             print(f"✅ OpenAI response received successfully")
@@ -221,19 +244,7 @@ def process_openai_request(stills_id, messages, record_id, token, max_retries=3)
     for attempt in range(max_retries):
         try:
             # Get all API keys with retry logic
-            system_globals = config.get_system_globals(token)
-            
-            # Collect all available API keys
-            api_keys = []
-            for i in range(1, 6):  # Keys 1 through 5
-                key = system_globals.get(FIELD_MAPPING[f"globals_api_key_{i}"])
-                if key and key.strip():
-                    api_keys.append(key)
-            
-            if not api_keys:
-                raise ValueError("No OpenAI API keys found in SystemGlobals")
-            
-            print(f"🔑 Found {len(api_keys)} OpenAI API keys")
+            api_keys = get_api_keys(token)
             
             # Configure the client with all available keys
             client = global_openai_client
@@ -358,6 +369,7 @@ def update_status(record_id, token, new_status, max_retries=3):
 
 def process_single_item(stills_id, token, continue_workflow=False):
     """Process a single stills_id through step 05 and optionally continue."""
+    set_usage_tags(item_id=stills_id)
     try:
         record_id = config.find_record_id(token, "Stills", {FIELD_MAPPING["stills_id"]: f"=={stills_id}"})
         record_data = config.get_record(token, "Stills", record_id)
@@ -370,10 +382,7 @@ def process_single_item(stills_id, token, continue_workflow=False):
             else:
                 print(f"  -> Status updated successfully")
         
-        metadata_from_fm = record_data.get(FIELD_MAPPING["metadata"], '')
-        user_prompt = record_data.get(FIELD_MAPPING["user_prompt"], '')
         server_path = record_data.get(FIELD_MAPPING["server_path"], '')
-        existing_description = record_data.get(FIELD_MAPPING["description"], '')
 
         # Check if image file exists
         if not server_path or not os.path.exists(server_path):
@@ -382,50 +391,11 @@ def process_single_item(stills_id, token, continue_workflow=False):
         # Optimize and encode the image for faster OpenAI processing
         base64_image = optimize_image_for_openai(server_path)
 
-        # Load and format the prompt
-        prompts = load_prompts()
-        prompt_template = prompts["stills_ai_description"]
-        
-        # Load approved tags list
-        tags = load_tags()
-        # Format tags with descriptions for prompt
-        tags_list_items = []
-        for tag in tags:
-            if tag['description']:
-                tags_list_items.append(f"- {tag['name']}: {tag['description']}")
-            else:
-                tags_list_items.append(f"- {tag['name']}")
-        tags_list_text = "\n".join(tags_list_items)
-        
-        # Load approved bins list
-        bins = load_bins()
-        # Format bins for prompt
-        bins_list_items = [f"- {bin_name}" for bin_name in bins]
-        bins_list_text = "\n".join(bins_list_items)
-        
-        # Format the prompt with dynamic fields
-        prompt_text = prompt_template.format(
-            AI_Prompt=user_prompt if user_prompt else "",
-            INFO_Metadata=metadata_from_fm if metadata_from_fm else "",
-            INFO_Description=existing_description if existing_description else "",
-            TAGS_LIST=tags_list_text,
-            BINS_LIST=bins_list_text
-        )
+        prompt_text, messages = build_messages(record_data, base64_image)
 
         # Log the prompt to AI_DevConsole for prompt engineering visibility
         prompt_log_message = f"AI Prompt Engineering - Description Generation\n{prompt_text}"
         write_to_dev_console(record_id, token, prompt_log_message)
-
-        # Create the message with image
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt_text},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                ]
-            }
-        ]
         
         print(f"DEBUG: Making OpenAI API call for stills_id: {stills_id}")
         
@@ -434,35 +404,7 @@ def process_single_item(stills_id, token, continue_workflow=False):
         
         print(f"DEBUG: Parsed OpenAI response content: {content}")
         
-        # Extract tags from response
-        returned_tags = content.get("tags") or content.get("Tags", [])
-        
-        # Ensure returned_tags is a list (sometimes API returns string by mistake)
-        if isinstance(returned_tags, str):
-            returned_tags = [returned_tags]
-        
-        if returned_tags:
-            print(f"🏷️  TAGS RETURNED: {', '.join(returned_tags)}")
-            print(f"🏷️  TOTAL TAG COUNT: {len(returned_tags)}")
-            # Format tags for FileMaker (comma-separated)
-            tags_for_fm = ", ".join(returned_tags)
-        else:
-            print(f"⚠️  No tags returned in response")
-            tags_for_fm = ""
-        
-        # Extract avid bins from response
-        avid_bins = content.get("avid_bins") or content.get("Avid_bins", "")
-        if avid_bins:
-            print(f"🗂️  AVID BINS: {avid_bins}")
-        else:
-            print(f"⚠️  No avid bins returned in response")
-        
-        update_data = {
-            FIELD_MAPPING["description"]: content.get("description") or content.get("Description", "Error: No description returned."),
-            FIELD_MAPPING["date"]: content.get("date") or content.get("Date", ""),
-            FIELD_MAPPING["tags_list"]: tags_for_fm,
-            FIELD_MAPPING["avid_bins"]: avid_bins
-        }
+        update_data = build_update_data(content)
         
         print(f"DEBUG: Update data: {update_data}")
         
@@ -496,6 +438,100 @@ def process_single_item(stills_id, token, continue_workflow=False):
         print(f"ERROR [generate_description] on {stills_id}: {e}")
         return False
 
+async def ahandle_openai_with_graceful_retry(messages, stills_id, max_retries=5):
+    """Async handle_openai_with_graceful_retry(); rate limits and API errors are retried inside the client."""
+    for attempt in range(max_retries):
+        try:
+            response = await global_openai_client.achat_completions_create(
+                model="gpt-4.1",
+                messages=messages,
+                response_format={"type": "json_object"},
+                estimated_tokens=2500,
+                use_cache=attempt == 0  # a retry must not be answered with the same cached response
+            )
+            if not response.choices or not response.choices[0].message:
+                raise ValueError("OpenAI API returned no message in response")
+            
+            content_raw = response.choices[0].message.content
+            if content_raw is None:
+                raise ValueError("OpenAI API returned None content")
+            return json.loads(content_raw)
+            
+        except Exception as e:
+            if attempt < max_retries - 1:
+                wait_time = min(2 ** attempt, 30)
+                print(f"⚠️ OpenAI call failed for {stills_id} (attempt {attempt + 1}/{max_retries}), retrying in {wait_time:.1f}s: {e}")
+                await asyncio.sleep(wait_time)
+                continue
+            raise ValueError(f"OpenAI request failed after {max_retries} attempts: {e}")
+
+async def process_item_async(stills_id, token, continue_workflow, sink):
+    """
+    Batch-mode process_single_item: FileMaker reads and image encoding run in
+    worker threads, the OpenAI call is awaited, and the result (plus the final
+    status when continue_workflow) is queued as one write on the sink.
+    """
+    set_usage_tags(item_id=stills_id)
+    record_id = None
+    try:
+        record_id = await asyncio.to_thread(
+            config.find_record_id, token, "Stills", {FIELD_MAPPING["stills_id"]: f"=={stills_id}"}
+        )
+        record_data = await asyncio.to_thread(config.get_record, token, "Stills", record_id)
+        
+        if continue_workflow:
+            await asyncio.to_thread(update_status, record_id, token, "5 - Generating Description")
+        
+        server_path = record_data.get(FIELD_MAPPING["server_path"], '')
+        if not server_path or not os.path.exists(server_path):
+            raise ValueError(f"Image file not found at: {server_path}")
+        
+        base64_image = await asyncio.to_thread(optimize_image_for_openai, server_path)
+        prompt_text, messages = build_messages(record_data, base64_image)
+        await asyncio.to_thread(
+            write_to_dev_console, record_id, token, f"AI Prompt Engineering - Description Generation\n{prompt_text}"
+        )
+        
+        content = await ahandle_openai_with_graceful_retry(messages, stills_id)
+        
+        update_data = build_update_data(content)
+        if continue_workflow:
+            update_data[FIELD_MAPPING["status"]] = "6 - Generating Embeddings"
+        await sink.put(record_id, update_data, stills_id)
+        print(f"SUCCESS [generate_description]: {stills_id} (write queued)")
+        return True
+        
+    except Exception as e:
+        print(f"ERROR [generate_description] on {stills_id}: {e}")
+        if record_id and await asyncio.to_thread(set_awaiting_user_input, token, record_id, stills_id, f"Unexpected error: {str(e)}"):
+            print(f"HANDLED [generate_description]: {stills_id} - Set to 'Awaiting User Input' due to unexpected error")
+            return True
+        return False
+
+async def process_batch_async(stills_ids, token, continue_workflow):
+    """
+    Generate descriptions for many stills on the async OpenAI client.
+    
+    Items run as coroutines (FTG_ASYNC_BATCH_CONCURRENCY in flight) within the
+    shared per-key limits; FileMaker updates stream through a bounded writer.
+    
+    Returns:
+        {stills_id: success}, with failed FileMaker writes counted as failures
+    """
+    global_openai_client.set_api_keys(get_api_keys(token))
+    
+    sink = AsyncRecordSink(BulkRecordWriter(token, "Stills"))
+    results = await gather_bounded(
+        stills_ids,
+        lambda stills_id: process_item_async(stills_id, token, continue_workflow, sink)
+    )
+    written = await sink.close()
+    
+    for stills_id, error in written["failed"].items():
+        print(f"❌ FileMaker write failed for {stills_id}: {error}")
+        results[stills_id] = False
+    return results
+
 if __name__ == "__main__":
     if len(sys.argv) < 2: 
         sys.exit(1)
@@ -558,42 +594,13 @@ if __name__ == "__main__":
         success = process_single_item(stills_id, token, continue_workflow)
         sys.exit(0 if success else 1)
     else:
-        # Multiple items - process in parallel
-        successful = 0
-        failed = 0
-        
-        def process_item_wrapper(stills_id):
-            try:
-                return process_single_item(stills_id, token, continue_workflow)
-            except Exception as e:
-                print(f"ERROR processing {stills_id}: {e}")
-                return False
-        
-        # Use ThreadPoolExecutor for parallel processing
-        max_workers = min(8, len(stills_ids))  # Reasonable concurrency limit
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_stills_id = {
-                executor.submit(process_item_wrapper, stills_id): stills_id 
-                for stills_id in stills_ids
-            }
-            
-            for future in concurrent.futures.as_completed(future_to_stills_id):
-                stills_id = future_to_stills_id[future]
-                try:
-                    success = future.result()
-                    if success:
-                        successful += 1
-                        print(f"✅ Completed: {stills_id}")
-                    else:
-                        failed += 1
-                        print(f"❌ Failed: {stills_id}")
-                except Exception as e:
-                    failed += 1
-                    print(f"❌ Exception processing {stills_id}: {e}")
+        # Multiple items - async batch (coroutines instead of one thread per request)
+        results = asyncio.run(process_batch_async(stills_ids, token, continue_workflow))
+        successful = sum(1 for success in results.values() if success)
+        failed = len(results) - successful
         
-        # Print summary
-        total = len(stills_ids)
+        # Print summary (results are per unique ID)
+        total = len(results)
         print(f"=== Batch generate_description completed ===")
         print(f"Total: {total}, Successful: {successful}, Failed: {failed}")
         print(f"Success rate: {(successful / total * 100):.1f}%")
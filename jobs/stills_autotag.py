@@ -4,9 +4,8 @@ import warnings
 from pathlib import Path
 import requests
 import json
-import base64
 import os
-import concurrent.futures
+import asyncio
 
 # Suppress urllib3 LibreSSL warning
 warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.1.1+.*', category=Warning)
@@ -14,9 +13,17 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
 from utils.openai_client import global_openai_client
+from utils.image_payload import global_image_payloads, summarize_payloads
+from utils.prompt_context import global_prompt_context
+from utils.filemaker_bulk_writer import BulkRecordWriter, AsyncRecordSink
+from utils.async_batch import gather_bounded
+from utils.llm_usage import set_usage_tags
 
 __ARGS__ = ["stills_id"]
 
+# Calls per still when the response has no usable tags (retries bypass the response cache)
+TAG_ATTEMPTS = 2
+
 FIELD_MAPPING = {
     "stills_id": "INFO_STILLS_ID",
     "description": "INFO_Description",
@@ -31,75 +38,127 @@ FIELD_MAPPING = {
     "globals_api_key_5": "SystemGlobals_AutoLog_OpenAI_API_Key_5"
 }
 
-def load_prompts():
-    """Load prompts from prompts.json."""
-    prompts_path = Path(__file__).resolve().parent.parent / "prompts" / "prompts.json"
-    with open(prompts_path, 'r') as f:
-        return json.load(f)
-
-def load_tags():
-    """Load the approved tags list from the tags file with descriptions."""
-    tags_path = Path(__file__).resolve().parent.parent / "tags" / "stills-tags.tab"
-    try:
-        with open(tags_path, 'r') as f:
-            # Read all lines and parse tab-separated format: tag_name\tdescription
-            tags = []
-            for line in f.readlines():
-                line = line.strip()
-                if line:
-                    # Split by tab to get name and description
-                    parts = line.split('\t')
-                    if len(parts) >= 2:
-                        tag_name = parts[0].strip()
-                        tag_description = parts[1].strip()
-                        tags.append({'name': tag_name, 'description': tag_description})
-                    elif len(parts) == 1:
-                        # Tag without description
-                        tag_name = parts[0].strip()
-                        tags.append({'name': tag_name, 'description': ''})
-        print(f"  -> Loaded {len(tags)} approved tags with descriptions")
-        return tags
-    except Exception as e:
-        print(f"  -> WARNING: Failed to load tags file: {e}")
-        return []
-
-def load_bins():
-    """Load the approved bins list from the bins file."""
-    bins_path = Path(__file__).resolve().parent.parent / "tags" / "stills-bins.txt"
-    try:
-        with open(bins_path, 'r') as f:
-            bins = []
-            for line in f.readlines():
-                line = line.strip()
-                # Skip comments and empty lines
-                if line and not line.startswith('#'):
-                    # Support both formats: just name, or name\tdescription
-                    parts = line.split('\t')
-                    bin_name = parts[0].strip()
-                    bins.append(bin_name)
-        print(f"  -> Loaded {len(bins)} approved bins")
-        return bins
-    except Exception as e:
-        print(f"  -> WARNING: Failed to load bins file: {e}")
-        return []
-
 def encode_image_to_base64(image_path):
-    """Encode image to base64 for OpenAI Vision API."""
+    """Encode image to base64 for OpenAI Vision API (resized to the token-optimal size, cached)."""
     try:
-        with open(image_path, "rb") as image_file:
-            image_data = image_file.read()
-            if not image_data:
-                raise ValueError("Image file is empty.")
-            
-            base64_image = base64.b64encode(image_data).decode('utf-8')
-            print(f"  -> Image encoded: {len(base64_image)} chars")
-            return base64_image
+        payload = global_image_payloads.build(image_path, "openai")
+        summarize_payloads([payload])
+        return payload["base64"]
             
     except Exception as e:
         print(f"❌ Error encoding image: {e}")
         return None
 
-def analyze_with_openai(image_path, description, tags, bins, client, stills_id):
+def build_messages(base64_image, description, tags_text, bins_text):
+    """Build the OpenAI messages (prompt + image) for one still."""
+    # Load prompt template
+    prompt_template = global_prompt_context.get_prompt("stills_autotag")
+    
+    # Format the prompt with dynamic fields
+    prompt_text = prompt_template.format(
+        INFO_Description=description if description else "No description provided",
+        TAGS_LIST=tags_text,
+        BINS_LIST=bins_text
+    )
+
+    return [
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt_text},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{base64_image}",
+                        "detail": "high"
+                    }
+                }
+            ]
+        }
+    ]
+
+def parse_response(response):
+    """Parse the OpenAI response into the content dict (None if empty or not JSON)."""
+    # Extract response
+    if not response.choices or not response.choices[0].message:
+        print("❌ No response from OpenAI")
+        return None
+    
+    if response.choices[0].message.content is None:
+        print("❌ OpenAI returned no content")
+        return None
+    
+    content_raw = response.choices[0].message.content.strip()
+    print(f"📝 Raw content from OpenAI: {content_raw}")
+    
+    # Parse JSON
+    try:
+        content = json.loads(content_raw)
+        selected_tags = content.get('tags', [])
+        
+        if selected_tags:
+            print(f"🏷️  Selected Tags: {', '.join(selected_tags)}")
+            print(f"🏷️  Total Tag Count: {len(selected_tags)}")
+        else:
+            print(f"⚠️  No tags returned in response")
+        
+        return content  # Return full content dict instead of just tags
+        
+    except json.JSONDecodeError as e:
+        print(f"❌ Failed to parse JSON response: {e}")
+        return None
+
+def build_update_data(content):
+    """FileMaker field data for the tags and avid bins in a response."""
+    # Extract tags from response
+    selected_tags = content.get('tags', [])
+    
+    # Ensure selected_tags is a list (sometimes API returns string by mistake)
+    if isinstance(selected_tags, str):
+        selected_tags = [selected_tags]
+    
+    # Extract avid bins from response
+    avid_bins = content.get('avid_bins', '')
+    if avid_bins:
+        print(f"🗂️  AVID BINS: {avid_bins}")
+    else:
+        print(f"⚠️  No avid bins returned in response")
+    
+    # Format tags for FileMaker (comma-separated)
+    return {
+        FIELD_MAPPING["tags_list"]: ", ".join(selected_tags),
+        FIELD_MAPPING["avid_bins"]: avid_bins
+    }
+
+def get_api_keys(token):
+    """OpenAI API keys from SystemGlobals."""
+    system_globals = config.get_system_globals(token)
+    
+    api_keys = []
+    for i in range(1, 6):
+        key = system_globals.get(FIELD_MAPPING[f"globals_api_key_{i}"])
+        if key and key.strip():
+            api_keys.append(key)
+    
+    if not api_keys:
+        raise ValueError("No OpenAI API keys found in SystemGlobals")
+    
+    print(f"🔑 Found {len(api_keys)} OpenAI API key(s)")
+    return api_keys
+
+def load_tags_and_bins():
+    """Pre-rendered approved tags and bins for the prompt."""
+    tags_text = global_prompt_context.get_tags_text("stills")
+    if not tags_text:
+        raise ValueError("Failed to load tags from stills-tags.tab")
+    
+    bins_text = global_prompt_context.get_bins_text("stills")
+    if not bins_text:
+        raise ValueError("Failed to load bins from stills-bins.txt")
+    
+    return tags_text, bins_text
+
+def analyze_with_openai(image_path, description, tags_text, bins_text, client, stills_id):
     """Send image and description to OpenAI with tag list and bins list for analysis."""
     try:
         print(f"🤖 Analyzing image with OpenAI Vision API for {stills_id}...")
@@ -109,82 +168,27 @@ def analyze_with_openai(image_path, description, tags, bins, client, stills_id):
         if not base64_image:
             return None
         
-        # Load prompt template
-        prompts = load_prompts()
-        prompt_template = prompts["stills_autotag"]
-        
-        # Format tags for prompt
-        tag_list = []
-        for tag in tags:
-            if tag['description']:
-                tag_list.append(f"- {tag['name']}: {tag['description']}")
-            else:
-                tag_list.append(f"- {tag['name']}")
-        
-        tags_text = "\n".join(tag_list)
-        
-        # Format bins for prompt
-        bins_list = [f"- {bin_name}" for bin_name in bins]
-        bins_text = "\n".join(bins_list)
-        
-        # Format the prompt with dynamic fields
-        prompt_text = prompt_template.format(
-            INFO_Description=description if description else "No description provided",
-            TAGS_LIST=tags_text,
-            BINS_LIST=bins_text
-        )
-
-        # Build messages for OpenAI
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt_text},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}",
-                            "detail": "high"
-                        }
-                    }
-                ]
-            }
-        ]
+        messages = build_messages(base64_image, description, tags_text, bins_text)
         
         # Call OpenAI API
         print(f"  -> Sending request to OpenAI...")
         
-        response = client.chat_completions_create(
-            model="gpt-4.1",
-            messages=messages,
-            response_format={"type": "json_object"},
-            estimated_tokens=3000
-        )
+        content = None
+        for attempt in range(TAG_ATTEMPTS):
+            response = client.chat_completions_create(
+                model="gpt-4.1",
+                messages=messages,
+                response_format={"type": "json_object"},
+                estimated_tokens=3000,
+                use_cache=attempt == 0  # a retry must not be answered with the same cached response
+            )
+            content = parse_response(response)
+            if content and content.get('tags'):
+                break
+            if attempt < TAG_ATTEMPTS - 1:
+                print(f"  -> ⚠️ No usable tags for {stills_id}, retrying without the response cache...")
         
-        # Extract response
-        if not response.choices or not response.choices[0].message:
-            print("❌ No response from OpenAI")
-            return None
-        
-        content_raw = response.choices[0].message.content.strip()
-        print(f"📝 Raw content from OpenAI: {content_raw}")
-        
-        # Parse JSON
-        try:
-            content = json.loads(content_raw)
-            selected_tags = content.get('tags', [])
-            
-            if selected_tags:
-                print(f"🏷️  Selected Tags: {', '.join(selected_tags)}")
-                print(f"🏷️  Total Tag Count: {len(selected_tags)}")
-            else:
-                print(f"⚠️  No tags returned in response")
-            
-            return content  # Return full content dict instead of just tags
-            
-        except json.JSONDecodeError as e:
-            print(f"❌ Failed to parse JSON response: {e}")
-            return None
+        return content
         
     except Exception as e:
         print(f"❌ Error analyzing with OpenAI: {e}")
@@ -194,6 +198,7 @@ def analyze_with_openai(image_path, description, tags, bins, client, stills_id):
 
 def process_single_item(stills_id, token):
     """Process a single stills_id for auto-tagging."""
+    set_usage_tags(item_id=stills_id)
     try:
         print(f"\n{'='*60}")
         print(f"Processing: {stills_id}")
@@ -215,73 +220,32 @@ def process_single_item(stills_id, token):
         if not server_path or not os.path.exists(server_path):
             raise ValueError(f"Image file not found at: {server_path}")
         
-        # Get system globals for OpenAI API keys
-        system_globals = config.get_system_globals(token)
-        
-        api_keys = []
-        for i in range(1, 6):
-            key = system_globals.get(FIELD_MAPPING[f"globals_api_key_{i}"])
-            if key and key.strip():
-                api_keys.append(key)
-        
-        if not api_keys:
-            raise ValueError("No OpenAI API keys found in SystemGlobals")
-        
-        print(f"🔑 Found {len(api_keys)} OpenAI API key(s)")
-        
         # Configure OpenAI client
-        global_openai_client.set_api_keys(api_keys)
+        global_openai_client.set_api_keys(get_api_keys(token))
         
-        # Load tags
-        tags = load_tags()
-        if not tags:
-            raise ValueError("Failed to load tags from stills-tags.tab")
-        
-        # Load bins
-        bins = load_bins()
-        if not bins:
-            raise ValueError("Failed to load bins from stills-bins.txt")
+        # Load tags and bins (pre-rendered for the prompt)
+        tags_text, bins_text = load_tags_and_bins()
         
         # Analyze with OpenAI
         content = analyze_with_openai(
             server_path,
             description,
-            tags,
-            bins,
+            tags_text,
+            bins_text,
             global_openai_client,
             stills_id
         )
         
         if content and content.get('tags'):
-            # Extract tags from response
-            selected_tags = content.get('tags', [])
-            
-            # Ensure selected_tags is a list (sometimes API returns string by mistake)
-            if isinstance(selected_tags, str):
-                selected_tags = [selected_tags]
-            
-            # Format tags for FileMaker (comma-separated)
-            tags_for_fm = ", ".join(selected_tags)
-            
-            # Extract avid bins from response
-            avid_bins = content.get('avid_bins', '')
-            if avid_bins:
-                print(f"🗂️  AVID BINS: {avid_bins}")
-            else:
-                print(f"⚠️  No avid bins returned in response")
+            update_data = build_update_data(content)
             
             # Update FileMaker
-            update_data = {
-                FIELD_MAPPING["tags_list"]: tags_for_fm,
-                FIELD_MAPPING["avid_bins"]: avid_bins
-            }
-            
             config.update_record(token, "Stills", record_id, update_data)
             
             print(f"\n✅ SUCCESS: {stills_id}")
-            print(f"   Tags written to FileMaker: {tags_for_fm}")
-            if avid_bins:
-                print(f"   Avid bins written to FileMaker: {avid_bins}")
+            print(f"   Tags written to FileMaker: {update_data[FIELD_MAPPING['tags_list']]}")
+            if update_data[FIELD_MAPPING["avid_bins"]]:
+                print(f"   Avid bins written to FileMaker: {update_data[FIELD_MAPPING['avid_bins']]}")
             return True
         else:
             print(f"\n❌ FAILED: {stills_id} - No tags returned")
@@ -293,6 +257,69 @@ def process_single_item(stills_id, token):
         traceback.print_exc()
         return False
 
+async def process_item_async(stills_id, token, tags_text, bins_text, sink):
+    """Batch-mode process_single_item: awaits OpenAI and queues the FileMaker write on the sink."""
+    set_usage_tags(item_id=stills_id)
+    record_id = await asyncio.to_thread(
+        config.find_record_id, token, "Stills", {FIELD_MAPPING["stills_id"]: f"=={stills_id}"}
+    )
+    record_data = await asyncio.to_thread(config.get_record, token, "Stills", record_id)
+    
+    description = record_data.get(FIELD_MAPPING["description"], '')
+    server_path = record_data.get(FIELD_MAPPING["server_path"], '')
+    if not server_path or not os.path.exists(server_path):
+        raise ValueError(f"Image file not found at: {server_path}")
+    
+    # Resize/encode off the event loop
+    payload = await asyncio.to_thread(global_image_payloads.build, server_path, "openai")
+    messages = build_messages(payload["base64"], description, tags_text, bins_text)
+    
+    content = None
+    for attempt in range(TAG_ATTEMPTS):
+        response = await global_openai_client.achat_completions_create(
+            model="gpt-4.1",
+            messages=messages,
+            response_format={"type": "json_object"},
+            estimated_tokens=3000,
+            use_cache=attempt == 0  # a retry must not be answered with the same cached response
+        )
+        content = parse_response(response)
+        if content and content.get('tags'):
+            break
+    
+    if not content or not content.get('tags'):
+        print(f"❌ FAILED: {stills_id} - No tags returned")
+        return False
+    
+    await sink.put(record_id, build_update_data(content), stills_id)
+    print(f"✅ Tagged: {stills_id} (write queued)")
+    return True
+
+async def process_batch_async(stills_ids, token):
+    """
+    Tag many stills on the async OpenAI client.
+    
+    Items run as coroutines (FTG_ASYNC_BATCH_CONCURRENCY in flight) within the
+    shared per-key limits; FileMaker updates stream through a bounded writer.
+    
+    Returns:
+        {stills_id: success}, with failed FileMaker writes counted as failures
+    """
+    global_openai_client.set_api_keys(get_api_keys(token))
+    tags_text, bins_text = load_tags_and_bins()
+    
+    sink = AsyncRecordSink(BulkRecordWriter(token, "Stills"))
+    results = await gather_bounded(
+        stills_ids,
+        lambda stills_id: process_item_async(stills_id, token, tags_text, bins_text, sink)
+    )
+    written = await sink.close()
+    
+    for stills_id, error in written["failed"].items():
+        print(f"❌ FileMaker write failed for {stills_id}: {error}")
+        results[stills_id] = False
+    return results
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python stills_autotag.py <stills_id> [<stills_id2> ...]")
@@ -343,40 +370,13 @@ if __name__ == "__main__":
         success = process_single_item(stills_id, token)
         sys.exit(0 if success else 1)
     else:
-        # Multiple items - process in parallel
-        successful = 0
-        failed = 0
-        
-        def process_item_wrapper(stills_id):
-            try:
-                return process_single_item(stills_id, token)
-            except Exception as e:
-                print(f"ERROR processing {stills_id}: {e}")
-                return False
-        
-        # Use ThreadPoolExecutor for parallel processing
-        max_workers = min(5, len(stills_ids))  # Limit concurrency for API calls
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_stills_id = {
-                executor.submit(process_item_wrapper, stills_id): stills_id 
-                for stills_id in stills_ids
-            }
-            
-            for future in concurrent.futures.as_completed(future_to_stills_id):
-                stills_id = future_to_stills_id[future]
-                try:
-                    success = future.result()
-                    if success:
-                        successful += 1
-                    else:
-                        failed += 1
-                except Exception as e:
-                    failed += 1
-                    print(f"❌ Exception processing {stills_id}: {e}")
+        # Multiple items - async batch (coroutines instead of one thread per request)
+        results = asyncio.run(process_batch_async(stills_ids, token))
+        successful = sum(1 for success in results.values() if success)
+        failed = len(results) - successful
         
-        # Print summary
-        total = len(stills_ids)
+        # Print summary (results are per unique ID)
+        total = len(results)
         print(f"\n{'='*60}")
         print(f"Batch Auto-Tagging Complete")
         print(f"{'='*60}")
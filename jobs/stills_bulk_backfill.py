@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Stills Bulk Backfill - stills_autotag / stills_autolog_05 through the OpenAI Batch API
+
+For backfills of hundreds or thousands of stills. Requests are identical to
+the live jobs (same prompt, image payload and model) but go out as JSONL batch
+files, run offline at half price on a separate quota, and don't compete with
+the live pipeline for per-key rate limits. Results are applied to FileMaker
+idempotently: the run remembers which stills were written, so collect can be
+re-run at any time.
+
+Backfill runs only write the result fields (tags/bins, or description, date,
+tags and bins); AutoLog_Status and AI_DevConsole are left alone.
+
+Usage:
+    python3 jobs/stills_bulk_backfill.py submit autotag "S00001,S00002,..."
+    python3 jobs/stills_bulk_backfill.py submit description "S00001,S00002,..."
+    python3 jobs/stills_bulk_backfill.py collect <run_id>      # poll once, apply finished results
+    python3 jobs/stills_bulk_backfill.py wait <run_id>         # poll until done, apply results
+    python3 jobs/stills_bulk_backfill.py status <run_id>
+    python3 jobs/stills_bulk_backfill.py retry <run_id>        # re-send failed/expired stills as a new run
+
+If submit is interrupted partway, collect/wait first submit the request files
+that never made it to the provider.
+
+Configuration (env):
+- FTG_BULK_POLL_SECONDS: Poll interval for wait (default: 60)
+- See utils/openai_batch.py for the run directory and the local stand-in server
+"""
+
+import sys
+import json
+import os
+import warnings
+import concurrent.futures
+from pathlib import Path
+
+# Suppress urllib3 LibreSSL warning
+warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.1.1+.*', category=Warning)
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+from utils.input_parser import parse_input_ids
+from utils.openai_batch import global_openai_batch
+from utils.image_payload import global_image_payloads
+from utils.filemaker_bulk_writer import BulkRecordWriter
+from utils.llm_pricing import estimate_cost
+from utils.llm_usage import global_llm_usage
+import jobs.stills_autotag as autotag
+import jobs.stills_autolog_05_generate_description as describe
+
+__ARGS__ = ["command", "job_or_run_id", "stills_ids"]
+
+JOBS = {
+    "autotag": "stills_autotag",
+    "description": "stills_autolog_05"
+}
+
+MODEL = "gpt-4.1"
+BATCH_DISCOUNT = 0.5  # Batch API price relative to synchronous calls
+READ_WORKERS = 8
+BUILD_CHUNK = READ_WORKERS * 4  # requests (with their base64 images) built ahead of the file writer
+APPLY_CHUNK = 200
+
+
+def build_request(job, stills_id, token, tags_text=None, bins_text=None):
+    """Batch request for one still, built exactly as the live job builds its messages."""
+    record_id = config.find_record_id(token, "Stills", {autotag.FIELD_MAPPING["stills_id"]: f"=={stills_id}"})
+    record_data = config.get_record(token, "Stills", record_id)
+
+    server_path = record_data.get(autotag.FIELD_MAPPING["server_path"], '')
+    if not server_path or not os.path.exists(server_path):
+        raise ValueError(f"Image file not found at: {server_path}")
+    base64_image = global_image_payloads.build(server_path, "openai")["base64"]
+
+    if job == "autotag":
+        description = record_data.get(autotag.FIELD_MAPPING["description"], '')
+        messages = autotag.build_messages(base64_image, description, tags_text, bins_text)
+    else:
+        _, messages = describe.build_messages(record_data, base64_image)
+
+    return {
+        "custom_id": stills_id,
+        "body": {"model": MODEL, "messages": messages, "response_format": {"type": "json_object"}},
+        "item": {"stills_id": stills_id, "record_id": record_id}
+    }
+
+
+def iter_requests(job, stills_ids, token, tags_text, bins_text, skipped):
+    """
+    Build batch requests in input order, a chunk at a time, so only BUILD_CHUNK
+    images are held in memory; stills that can't be read are added to `skipped`.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        for start in range(0, len(stills_ids), BUILD_CHUNK):
+            chunk = stills_ids[start:start + BUILD_CHUNK]
+            futures = [executor.submit(build_request, job, stills_id, token, tags_text, bins_text) for stills_id in chunk]
+            for stills_id, future in zip(chunk, futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    skipped[stills_id] = str(e)
+
+
+def submit(job, stills_ids, token):
+    """Build and submit a bulk run; returns the run ID."""
+    if job not in JOBS:
+        raise ValueError(f"Unknown bulk job '{job}' (expected one of: {', '.join(JOBS)})")
+
+    stills_ids = list(dict.fromkeys(stills_ids))
+    tags_text, bins_text = autotag.load_tags_and_bins() if job == "autotag" else (None, None)
+
+    print(f"📦 Building {len(stills_ids)} {JOBS[job]} batch requests...")
+    skipped = {}
+    try:
+        # Requests stream straight into the run's JSONL files
+        run = global_openai_batch.create_run(
+            JOBS[job], iter_requests(job, stills_ids, token, tags_text, bins_text, skipped)
+        )
+    finally:
+        for stills_id, error in skipped.items():
+            print(f"  -> ⚠️ Skipped {stills_id}: {error}")
+
+    try:
+        global_openai_batch.submit(run, autotag.get_api_keys(token))
+    except Exception:
+        print(f"  -> ⚠️ Run {run.run_id} was not fully submitted; collect/wait will submit the rest")
+        raise
+    print(f"✅ Submitted run {run.run_id} ({len(run.state['items'])} requests, {len(skipped)} skipped)")
+    return run.run_id
+
+
+def apply_results(run, token, api_keys):
+    """Write finished results to FileMaker; already-applied stills are skipped."""
+    build_update_data = autotag.build_update_data if run.state["job"] == JOBS["autotag"] else describe.build_update_data
+    writer = BulkRecordWriter(token, "Stills")
+    input_tokens = output_tokens = 0
+    updates = []
+    # Results whose FileMaker write fails are yielded again by the next collect; bill them once
+    usage_recorded = set(run.state["usage_recorded"])
+
+    def flush():
+        if not updates:
+            return
+        result = writer.write(updates)
+        run.state["applied"].extend(result["updated"])
+        run.save()
+        updates.clear()
+
+    for result in global_openai_batch.iter_results(run, api_keys):
+        stills_id = result["custom_id"]
+        usage = result["usage"]
+        if stills_id not in usage_recorded:
+            input_tokens += usage.get("prompt_tokens", 0)
+            output_tokens += usage.get("completion_tokens", 0)
+            global_llm_usage.record(
+                "openai_batch", MODEL, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                success=not result["error"], error=str(result["error"]) if result["error"] else None,
+                cost_usd=estimate_cost(MODEL, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)) * BATCH_DISCOUNT,
+                step=run.state["job"], item_id=stills_id
+            )
+            usage_recorded.add(stills_id)
+            run.state["usage_recorded"].append(stills_id)
+        try:
+            if result["error"]:
+                raise ValueError(result["error"])
+            content = json.loads(result["content"])
+            if run.state["job"] == JOBS["autotag"] and not content.get('tags'):
+                raise ValueError("No tags returned")
+            updates.append({
+                "record_id": result["item"]["record_id"],
+                "field_data": build_update_data(content),
+                "label": stills_id
+            })
+        except (ValueError, TypeError) as e:
+            print(f"  -> ❌ {stills_id}: {e}")
+            run.state["failed"][stills_id] = str(e)
+        if len(updates) >= APPLY_CHUNK:
+            flush()
+    flush()
+    run.save()
+
+    if input_tokens or output_tokens:
+        cost = estimate_cost(MODEL, input_tokens, output_tokens) * BATCH_DISCOUNT
+        print(f"  -> 💰 {input_tokens} input / {output_tokens} output tokens, ~${cost:.2f} at batch pricing")
+
+
+def collect(run_id, token, wait=False):
+    """Poll a run (once, or until done) and apply whatever has finished."""
+    run = global_openai_batch.load_run(run_id)
+    api_keys = autotag.get_api_keys(token)
+
+    # Finish a submit that failed partway (otherwise those files never get a batch)
+    unsubmitted = global_openai_batch.unsubmitted(run)
+    if unsubmitted:
+        print(f"  -> 🚀 Submitting {unsubmitted} request file(s) left over from an interrupted submit...")
+        global_openai_batch.submit(run, api_keys)
+
+    if wait:
+        interval = int(os.getenv("FTG_BULK_POLL_SECONDS", "60"))
+        done = global_openai_batch.wait(run, api_keys, interval=interval)
+    else:
+        done = global_openai_batch.poll(run, api_keys)
+
+    apply_results(run, token, api_keys)
+    summary = run.summary()
+    print(f"📊 {json.dumps(summary)}")
+    return done and summary["pending"] == 0
+
+
+def retry(run_id, token):
+    """Submit the failed/expired stills of a run as a new run; returns the new run ID."""
+    run = global_openai_batch.load_run(run_id)
+    retry_run = global_openai_batch.create_retry_run(run)
+    global_openai_batch.submit(retry_run, autotag.get_api_keys(token))
+    print(f"✅ Submitted retry run {retry_run.run_id} ({len(retry_run.state['items'])} requests from {run_id})")
+    return retry_run.run_id
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    token = config.get_token()
+
+    try:
+        if command == "submit":
+            if len(sys.argv) < 4:
+                print("Usage: python3 stills_bulk_backfill.py submit <autotag|description> <stills_ids>")
+                sys.exit(1)
+            submit(sys.argv[2], parse_input_ids(sys.argv[3]), token)
+        elif command in ("collect", "wait"):
+            finished = collect(sys.argv[2], token, wait=(command == "wait"))
+            sys.exit(0 if finished else 2)
+        elif command == "retry":
+            retry(sys.argv[2], token)
+        elif command == "status":
+            print(json.dumps(global_openai_batch.load_run(sys.argv[2]).summary(), indent=2))
+        else:
+            print(f"Unknown command: {command}")
+            sys.exit(1)
+    except Exception as e:
+        print(f"❌ Bulk backfill failed: {e}")
+        sys.exit(1)
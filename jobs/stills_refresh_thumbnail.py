@@ -3,7 +3,7 @@
 import sys, os, json, time, requests
 import warnings
 from pathlib import Path
-from PIL import Image, ImageFile
+from PIL import ImageFile
 
 # Suppress urllib3 LibreSSL warning
 warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.1.1+.*', category=Warning)
@@ -11,6 +11,7 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 # Add the parent directory to the path to import your existing config
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.thumbnail import make_thumbnail
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 __ARGS__ = ["stills_id"]
@@ -66,27 +67,21 @@ if __name__ == "__main__":
         # Get the image path (prefer server path, fallback to import path)
         image_path = get_image_path(record_data)
         
-        # Open and process the image
-        with Image.open(image_path) as img:
-            # Convert to RGB if necessary
-            if img.mode not in ('RGB', 'L'):
-                img = img.convert('RGB')
-            
-            # Create thumbnail (588x588 to match existing pattern)
-            thumb_img = img.copy()
-            thumb_img.thumbnail((588, 588), Image.Resampling.LANCZOS)
-            
-            # Save to temporary file (no rotation)
-            thumb_path = f"/tmp/thumb_refresh_{stills_id}.jpg"
-            thumb_img.save(thumb_path, 'JPEG', quality=85)
-            
-            print(f"  -> Created fresh thumbnail: {thumb_img.size}")
-            
-            # Upload thumbnail using config function
-            config.upload_to_container(token, "Stills", record_id, FIELD_MAPPING['thumbnail'], thumb_path)
-            
-            # Clean up temporary file
-            os.remove(thumb_path)
+        # Create thumbnail (588x588 to match existing pattern) at reduced decode resolution,
+        # converting to RGB if necessary once it's small
+        thumb_img = make_thumbnail(image_path, convert=lambda img: img if img.mode in ('RGB', 'L') else img.convert('RGB'))
+        
+        # Save to temporary file (no rotation)
+        thumb_path = f"/tmp/thumb_refresh_{stills_id}.jpg"
+        thumb_img.save(thumb_path, 'JPEG', quality=85)
+        
+        print(f"  -> Created fresh thumbnail: {thumb_img.size}")
+        
+        # Upload thumbnail using config function
+        config.upload_to_container(token, "Stills", record_id, FIELD_MAPPING['thumbnail'], thumb_path)
+        
+        # Clean up temporary file
+        os.remove(thumb_path)
             
         print(f"✅ SUCCESS [refresh_thumbnail]: {stills_id}")
         sys.exit(0)
@@ -22,6 +22,7 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.thumbnail import make_thumbnail
 
 # Set PIL's maximum image size to handle very large images
 Image.MAX_IMAGE_PIXELS = 1000000000
@@ -51,14 +52,11 @@ def regenerate_thumbnail(record_id, stills_id, server_path, token):
             print(f"  ⚠️  {stills_id}: Server file not found")
             return 'skipped'
         
-        # Open server file (already JPEG quality 95) and create thumbnail
-        # This EXACTLY matches stills_autolog_02_copy_to_server.py line 417-422
-        with Image.open(server_path) as final_img:
-            thumb_img = final_img.copy()
-            thumb_img.thumbnail((588, 588), Image.Resampling.LANCZOS)
-            
-            temp_path = f"/tmp/thumb_{stills_id}_{int(time.time())}.jpg"
-            thumb_img.save(temp_path, 'JPEG', quality=85)
+        # Thumbnail from the server file (already JPEG quality 95), decoded at reduced
+        # resolution - the same method as the ingest step (utils/stills_ingest.py)
+        thumb_img = make_thumbnail(server_path)
+        temp_path = f"/tmp/thumb_{stills_id}_{int(time.time())}.jpg"
+        thumb_img.save(temp_path, 'JPEG', quality=85)
         
         # Upload thumbnail with retry logic
         for attempt in range(3):
@@ -28,6 +28,7 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.thumbnail import make_thumbnail
 
 # Set PIL's maximum image size to handle very large images (1 billion pixels)
 Image.MAX_IMAGE_PIXELS = 1000000000
@@ -270,18 +271,16 @@ def process_ris_record(record_id, token):
         # Step 3: Re-open the intermediate JPEG and create thumbnail from it
         # This EXACTLY matches the Stills workflow which creates thumbnails from saved JPEGs
         try:
-            with Image.open(intermediate_path) as final_img:
-                print(f"  -> Creating thumbnail from intermediate JPEG (max 588x588)...")
-                thumb_img = final_img.copy()
-                thumb_img.thumbnail((588, 588), Image.Resampling.LANCZOS)
-                print(f"  -> Thumbnail: {thumb_img.size[0]}x{thumb_img.size[1]}")
-                
-                # Step 4: Save thumbnail with JPEG quality 85
-                temp_path = f"/tmp/ris_thumb_{record_id}_{int(time.time())}.jpg"
-                thumb_img.save(temp_path, 'JPEG', quality=85)
-                
-                file_size = os.path.getsize(temp_path)
-                print(f"  -> Thumbnail saved: {file_size:,} bytes ({file_size/1024:.1f} KB)")
+            print(f"  -> Creating thumbnail from intermediate JPEG (max 588x588)...")
+            thumb_img = make_thumbnail(intermediate_path)
+            print(f"  -> Thumbnail: {thumb_img.size[0]}x{thumb_img.size[1]}")
+            
+            # Step 4: Save thumbnail with JPEG quality 85
+            temp_path = f"/tmp/ris_thumb_{record_id}_{int(time.time())}.jpg"
+            thumb_img.save(temp_path, 'JPEG', quality=85)
+            
+            file_size = os.path.getsize(temp_path)
+            print(f"  -> Thumbnail saved: {file_size:,} bytes ({file_size/1024:.1f} KB)")
         finally:
             # Clean up intermediate file
             if os.path.exists(intermediate_path):
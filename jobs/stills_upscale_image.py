@@ -13,6 +13,7 @@ warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.
 # Add the parent directory to the path to import your existing config
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from utils.thumbnail import make_thumbnail
 
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 __ARGS__ = ["stills_id"]
@@ -253,12 +254,8 @@ if __name__ == "__main__":
         else:
             raise FileNotFoundError(f"Server file was not replaced: {server_path}")
         
-        # Update file specifications and create thumbnail from the upscaled image using PIL
+        # Update file specifications (header read only) and create thumbnail from the upscaled image using PIL
         with Image.open(server_path) as img:
-            # Convert to RGB if necessary
-            if img.mode not in ('RGB', 'L'):
-                img = img.convert('RGB')
-            
             # Update file specifications to reflect the upscaled image
             new_dimensions = f"{img.width}x{img.height}"
             new_file_size_mb = f"{os.path.getsize(server_path) / (1024*1024):.2f} Mb"
@@ -288,9 +285,8 @@ if __name__ == "__main__":
             config.update_record(token, "Stills", record_id, field_data)
             print(f"  -> File specifications updated in FileMaker")
             
-            # Create thumbnail (588x588 to match existing pattern)
-            thumb_img = img.copy()
-            thumb_img.thumbnail((588, 588), Image.Resampling.LANCZOS)
+            # Create thumbnail (588x588 to match existing pattern), converting to RGB if necessary
+            thumb_img = make_thumbnail(server_path, convert=lambda im: im if im.mode in ('RGB', 'L') else im.convert('RGB'))
             
             # Save thumbnail to temporary file
             thumb_path = f"/tmp/thumb_upscaled_{stills_id}.jpg"
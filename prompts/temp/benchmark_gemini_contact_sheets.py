@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Gemini per-frame images vs contact sheets (Part B step 2)
+
+Runs the step 2 analysis on a fixed set of clips in both modes, bypassing the
+response cache, and compares:
+- latency (wall-clock per request)
+- token cost (usage_metadata, and dollars via utils/llm_pricing)
+- caption quality: frame coverage (every frame returned with the right
+  timecode), mean caption length, and word-overlap agreement of each
+  contact-sheet caption with the per-image caption for the same frame
+
+Clips are given as footage IDs whose step 1 workspace still exists.
+
+Usage:
+    python3 prompts/temp/benchmark_gemini_contact_sheets.py LF00123 LF00456 AF00789
+    python3 prompts/temp/benchmark_gemini_contact_sheets.py LF00123 --runs 3 --json results.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from jobs.ftg_autolog_B_02_gemini_analysis import (
+    FIELD_MAPPING, RESPONSE_SCHEMA, build_gemini_prompt, prepare_gemini_images
+)
+from utils.gemini_client import global_gemini_client
+from utils.workspace_manager import global_workspace_manager
+from utils.llm_pricing import estimate_cost
+from utils.prompt_context import global_prompt_context, footage_bin_set
+
+MODES = ["frames", "contact_sheet"]
+
+
+def words(text):
+    return set(re.findall(r"[a-z']+", (text or "").lower()))
+
+
+def run_mode(footage_id, assessment_data, mode, tags_text, bins_text):
+    """One uncached step 2 request; returns metrics and per-frame captions."""
+    footage_data = {
+        FIELD_MAPPING["footage_id"]: footage_id,
+        FIELD_MAPPING["filename"]: os.path.basename(assessment_data.get("file_path", "")),
+    }
+    image_paths, contact_sheets, image_profile = prepare_gemini_images(assessment_data, mode)
+    prompt = build_gemini_prompt(footage_data, assessment_data["frames"], tags_text, bins_text, contact_sheets)
+
+    start_time = time.time()
+    response = global_gemini_client.generate_content(
+        prompt=prompt, images=image_paths, response_schema=RESPONSE_SCHEMA,
+        max_retries=3, timeout=180, use_cache=False, image_profile=image_profile
+    )
+    latency = time.time() - start_time
+
+    result = json.loads(response.text)
+    usage = response.usage_metadata
+    expected = {
+        i: frame["timecode_formatted"]
+        for i, (_, frame) in enumerate(sorted(assessment_data["frames"].items()), 1)
+    }
+    captions = {frame.get("frame_number"): frame.get("caption", "") for frame in result.get("frames", [])}
+    matched = sum(
+        1 for frame in result.get("frames", [])
+        if expected.get(frame.get("frame_number")) == frame.get("timecode")
+    )
+
+    return {
+        "images": len(image_paths),
+        "latency_seconds": round(latency, 1),
+        "input_tokens": usage.prompt_token_count,
+        "output_tokens": usage.candidates_token_count,
+        "cost_usd": estimate_cost(global_gemini_client.model_name, usage.prompt_token_count, usage.candidates_token_count),
+        "frames_expected": len(expected),
+        "frames_returned": len(captions),
+        "timecodes_matched": matched,
+        "mean_caption_words": round(sum(len(c.split()) for c in captions.values()) / max(1, len(captions)), 1),
+        "captions": captions
+    }
+
+
+def agreement(reference, candidate):
+    """Mean word-overlap (Jaccard) between captions of the same frame."""
+    scores = []
+    for frame_number, caption in reference.items():
+        a, b = words(caption), words(candidate.get(frame_number))
+        if a or b:
+            scores.append(len(a & b) / len(a | b))
+    return round(sum(scores) / len(scores), 3) if scores else 0.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Gemini per-frame vs contact-sheet analysis")
+    parser.add_argument("footage_ids", nargs="+", help="Footage IDs with an existing step 1 workspace")
+    parser.add_argument("--runs", type=int, default=1, help="Requests per clip and mode")
+    parser.add_argument("--json", help="Write full results (including captions) to this file")
+    args = parser.parse_args()
+
+    global_gemini_client.set_api_key(os.environ["GEMINI_API_KEY"], os.getenv("GEMINI_MODEL", "gemini-2.0-pro-exp"))
+    tags_text = global_prompt_context.get_tags_text("footage")
+
+    results = []
+    for footage_id in args.footage_ids:
+        assessment_path = os.path.join(global_workspace_manager.get_dir(footage_id), "assessment.json")
+        with open(assessment_path, "r") as f:
+            assessment_data = json.load(f)
+        bins_text = global_prompt_context.get_bins_text(footage_bin_set(footage_id))
+
+        for run in range(args.runs):
+            runs = {mode: run_mode(footage_id, assessment_data, mode, tags_text, bins_text) for mode in MODES}
+            runs["contact_sheet"]["agreement_with_frames"] = agreement(
+                runs["frames"]["captions"], runs["contact_sheet"]["captions"]
+            )
+            results.append({"footage_id": footage_id, "run": run + 1, **runs})
+
+    print(f"\n{'clip':<10} {'mode':<14} {'imgs':>4} {'secs':>6} {'in tok':>7} {'out tok':>7} {'$':>8} "
+          f"{'frames':>9} {'tc ok':>5} {'words':>6} {'agree':>6}")
+    for row in results:
+        for mode in MODES:
+            m = row[mode]
+            print(f"{row['footage_id']:<10} {mode:<14} {m['images']:>4} {m['latency_seconds']:>6.1f} "
+                  f"{m['input_tokens']:>7} {m['output_tokens']:>7} {m['cost_usd']:>8.4f} "
+                  f"{m['frames_returned']:>4}/{m['frames_expected']:<4} {m['timecodes_matched']:>5} "
+                  f"{m['mean_caption_words']:>6} {m.get('agreement_with_frames', ''):>6}")
+
+    for mode in MODES:
+        rows = [row[mode] for row in results]
+        print(f"\n{mode}: mean {sum(r['latency_seconds'] for r in rows) / len(rows):.1f}s, "
+              f"{sum(r['input_tokens'] for r in rows) / len(rows):.0f} input tokens, "
+              f"${sum(r['cost_usd'] for r in rows) / len(rows):.4f} per clip")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Full results written to {args.json}")
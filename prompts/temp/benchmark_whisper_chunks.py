@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: parallel chunked Whisper transcription
+
+Decodes one clip's audio once, then transcribes it with increasing process
+pool sizes and prints wall-clock time, speedup and realtime factor for each.
+Model loading is excluded: every pool is warmed up on a short clip first.
+
+Usage:
+    python3 prompts/temp/benchmark_whisper_chunks.py /path/to/long_clip.mov
+    python3 prompts/temp/benchmark_whisper_chunks.py clip.mov --processes 1 2 4 8 --chunk-seconds 120
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+# One benchmark "worker" owns all cores (sets torch threads per pool process)
+os.environ["FTG_WHISPER_WORKERS"] = "1"
+
+from utils.whisper_service import WhisperTranscriber, CHUNK_SECONDS, _pool_transcribe
+from utils.audio_detector import decode_audio_pcm, WHISPER_SAMPLE_RATE
+
+
+def run(audio, duration, processes, chunk_seconds):
+    """Transcribe audio[0:duration] with a given pool size; return (seconds, segments)."""
+    transcriber = WhisperTranscriber()
+
+    # Warm-up so model loading isn't counted
+    warm_up = {"start": 0.0}
+    if processes > 1:
+        pool = transcriber._get_pool(processes)
+        list(pool.map(_pool_transcribe, [[(warm_up, audio[:5 * WHISPER_SAMPLE_RATE])]] * processes))
+    else:
+        transcriber.get_model()
+
+    start_time = time.time()
+    result = transcriber.transcribe_regions(audio, [(0.0, duration)], processes=processes,
+                                            chunk_seconds=chunk_seconds, parallel_min_seconds=0)
+    elapsed = time.time() - start_time
+    transcriber.close()
+    return elapsed, len(result["segments"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parallel chunked Whisper transcription")
+    parser.add_argument("media_path", help="Video or audio file (ideally 20+ minutes of speech)")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 4])
+    parser.add_argument("--chunk-seconds", type=float, default=CHUNK_SECONDS)
+    parser.add_argument("--minutes", type=float, default=20.0, help="Audio to transcribe per run")
+    args = parser.parse_args()
+
+    print(f"🎙️ Decoding {args.media_path}...")
+    audio = decode_audio_pcm(args.media_path)
+    duration = min(len(audio) / WHISPER_SAMPLE_RATE, args.minutes * 60)
+    print(f"  -> {duration:.0f}s of audio, model '{WhisperTranscriber().model_name}', "
+          f"{os.cpu_count()} cores, {args.chunk_seconds:.0f}s chunks\n")
+
+    baseline = None
+    rows = []
+    for processes in sorted(set(args.processes)):
+        elapsed, segments = run(audio, duration, processes, args.chunk_seconds)
+        baseline = baseline or elapsed
+        rows.append((processes, elapsed, baseline / elapsed, duration / elapsed, segments))
+
+    print(f"\n{'processes':>9}  {'wall (s)':>9}  {'speedup':>8}  {'x realtime':>10}  {'segments':>8}")
+    for processes, elapsed, speedup, realtime, segments in rows:
+        print(f"{processes:>9}  {elapsed:>9.1f}  {speedup:>7.2f}x  {realtime:>10.1f}  {segments:>8}")
@@ -14,7 +14,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from jobs.ftg_autolog_B_queue_jobs import (
-    q_step1, q_step2, q_step3, q_step4
+    q_step1, q_step2, q_step3, q_step4, q_prefetch, q_transcribe
 )
 
 def clear_all_queues():
@@ -26,7 +26,9 @@ def clear_all_queues():
         (q_step1, "Step 1: Assess & Sample"),
         (q_step2, "Step 2: Gemini Analysis"),
         (q_step3, "Step 3: Create Frames"),
-        (q_step4, "Step 4: Transcription")
+        (q_step4, "Step 4: Transcription"),
+        (q_prefetch, "Prefetch: Local Footage Cache"),
+        (q_transcribe, "Transcribe: Whisper")
     ]
     
     total_cleared = 0
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Async Batch - Bounded-concurrency runner for asyncio batch jobs
+
+Batch jobs that spend most of each item waiting on an LLM (stills autotag,
+stills descriptions) run every item as a coroutine instead of a thread. A
+semaphore caps how many items are in flight; API rate limits still apply per
+key through the shared limiter, so the cap only bounds memory (each in-flight
+item holds its encoded image) and open connections.
+
+Configuration (env):
+- FTG_ASYNC_BATCH_CONCURRENCY: Items in flight at once (default: 200)
+"""
+
+import os
+import time
+import asyncio
+import traceback
+from typing import Awaitable, Callable, Dict, List
+
+
+async def gather_bounded(items: List, handler: Callable[..., Awaitable[bool]], concurrency: int = None) -> Dict:
+    """
+    Run handler(item) for every item with at most `concurrency` in flight.
+
+    Args:
+        items: Items to process (e.g. stills IDs)
+        handler: Coroutine function returning True on success
+        concurrency: Items in flight (default: FTG_ASYNC_BATCH_CONCURRENCY env or 200)
+
+    Returns:
+        {item: success} in input order (an exception counts as a failure)
+    """
+    concurrency = concurrency or int(os.getenv("FTG_ASYNC_BATCH_CONCURRENCY", "200"))
+    semaphore = asyncio.Semaphore(concurrency)
+    start_time = time.time()
+    done = 0
+
+    async def run(item):
+        nonlocal done
+        async with semaphore:
+            try:
+                success = bool(await handler(item))
+            except Exception as e:
+                print(f"❌ Exception processing {item}: {e}")
+                traceback.print_exc()
+                success = False
+        done += 1
+        if done % 25 == 0 or done == len(items):
+            print(f"📈 Batch progress: {done}/{len(items)} items ({time.time() - start_time:.0f}s)")
+        return success
+
+    print(f"⚡ Async batch: {len(items)} items, up to {min(concurrency, len(items))} in flight")
+    results = await asyncio.gather(*(run(item) for item in items))
+    return dict(zip(items, results))
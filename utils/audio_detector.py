@@ -5,52 +5,383 @@ Handles background audio transcription and transcript-to-frame mapping.
 """
 
 import os
+import re
+import bisect
+import time
 import subprocess
 import json
+import tempfile
 import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 
-def has_audio(video_path: str) -> Optional[bool]:
+from utils.media_probe import global_probe_cache
+
+WHISPER_SAMPLE_RATE = 16000
+
+# Decoded audio longer than this is kept in an unlinked memory-mapped file instead of RAM
+AUDIO_MEMMAP_MINUTES = float(os.getenv("FTG_AUDIO_MEMMAP_MINUTES", "30"))
+
+
+# Sampled level check: a track whose peak never exceeds this is treated as silent
+AUDIO_SILENCE_PEAK_DB = float(os.getenv("FTG_AUDIO_SILENCE_PEAK_DB", "-50"))
+AUDIO_DETECT_WINDOWS = 5
+AUDIO_DETECT_WINDOW_SECONDS = 3.0
+
+# Running transcriptions with no heartbeat for this long are treated as dead (4x whisper_service.HEARTBEAT_SECONDS)
+TRANSCRIPTION_STALE_SECONDS = 60
+
+# Voice-activity pre-pass (energy + zero-crossing gate over 30ms frames)
+VAD_FRAME_SECONDS = 0.03
+VAD_MIN_SPEECH_SECONDS = 0.3
+VAD_MERGE_GAP_SECONDS = 1.0
+VAD_PAD_SECONDS = 0.5
+VAD_FLOOR_MARGIN_DB = 12.0
+VAD_ABSOLUTE_FLOOR_DB = -50.0
+
+
+def find_ffmpeg() -> Optional[str]:
+    """Find the ffmpeg executable in the usual install locations."""
+    for path in ['/opt/homebrew/bin/ffmpeg', '/usr/local/bin/ffmpeg', 'ffmpeg']:
+        if os.path.exists(path) or path == 'ffmpeg':
+            return path
+    return None
+
+
+def decode_audio_pcm(
+    video_path: str,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+    memmap_dir: Optional[str] = None,
+    memmap_minutes: float = AUDIO_MEMMAP_MINUTES,
+    timeout: int = 600
+) -> np.ndarray:
     """
-    Check if video has actual audio content using ffmpeg (matches old flow method).
+    Decode a clip's audio track straight from an ffmpeg pipe into a float32 buffer.
     
-    Uses the same approach as frames_transcribe_audio.py: checks for "Audio:" in
-    ffmpeg stderr output, which confirms actual audio content, not just empty streams.
+    Nothing is written to disk for normal clips. Once the decoded audio passes
+    memmap_minutes it is spilled to a memory-mapped file in memmap_dir, which is
+    unlinked immediately so it disappears when the array is released.
     
     Args:
         video_path: Path to video file
+        sample_rate: Output sample rate (Whisper expects 16kHz mono)
+        memmap_dir: Directory for the spill file (None = always keep in RAM)
+        memmap_minutes: Audio length at which to spill to a memory-mapped file
+        timeout: Seconds to wait for ffmpeg
         
     Returns:
-        True if audio content exists, False if no audio, None if detection failed
+        Mono float32 samples in [-1, 1] (np.ndarray or np.memmap)
     """
+    ffmpeg_cmd = find_ffmpeg()
+    if not ffmpeg_cmd:
+        raise RuntimeError("FFmpeg not found")
+    
+    cmd = [
+        ffmpeg_cmd, '-nostdin',
+        '-i', video_path,
+        '-vn',  # No video
+        '-f', 's16le', '-acodec', 'pcm_s16le',  # Raw PCM 16-bit
+        '-ar', str(sample_rate),
+        '-ac', '1',  # Mono
+        '-loglevel', 'error',
+        '-'
+    ]
+    
+    spill_bytes = int(memmap_minutes * 60 * sample_rate * 2)
+    chunks = []
+    spill_file = None
+    total_samples = 0
+    carry = b""
+    
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
     try:
-        # Find ffmpeg (same method as old flow - checks for actual audio content)
-        ffmpeg_paths = ['/opt/homebrew/bin/ffmpeg', '/usr/local/bin/ffmpeg', 'ffmpeg']
-        ffmpeg_cmd = None
-        
-        for path in ffmpeg_paths:
-            if os.path.exists(path) or path == 'ffmpeg':
-                ffmpeg_cmd = path
+        while True:
+            data = process.stdout.read(1 << 20)
+            if not data:
                 break
+            data = carry + data
+            usable = len(data) - (len(data) % 2)
+            carry = data[usable:]
+            samples = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+            total_samples += len(samples)
+            
+            if spill_file is None and memmap_dir and total_samples * 2 > spill_bytes:
+                spill_file = tempfile.NamedTemporaryFile(dir=memmap_dir, suffix='.f32', delete=False)
+                for chunk in chunks:
+                    spill_file.write(chunk.tobytes())
+                chunks = []
+            
+            if spill_file is not None:
+                spill_file.write(samples.tobytes())
+            else:
+                chunks.append(samples)
         
-        if not ffmpeg_cmd:
-            print(f"  -> Warning: ffmpeg not found, cannot detect audio")
-            return None
+        stderr = process.stderr.read().decode('utf-8', errors='replace')
+        process.wait()
+    finally:
+        timer.cancel()
+    
+    if process.returncode != 0:
+        if spill_file is not None:
+            spill_file.close()
+            os.remove(spill_file.name)
+        raise RuntimeError(f"Audio decode failed: {stderr.strip()[:500] or f'ffmpeg exit {process.returncode}'}")
+    
+    if spill_file is None:
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    
+    spill_file.close()
+    try:
+        if total_samples == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(spill_file.name, dtype=np.float32, mode='r', shape=(total_samples,))
+    finally:
+        os.remove(spill_file.name)  # Mapping stays valid until the array is released
+
+
+def detect_speech_regions(
+    audio: np.ndarray,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+    frame_seconds: float = VAD_FRAME_SECONDS,
+    min_speech_seconds: float = VAD_MIN_SPEECH_SECONDS,
+    merge_gap_seconds: float = VAD_MERGE_GAP_SECONDS,
+    pad_seconds: float = VAD_PAD_SECONDS
+) -> List[Tuple[float, float]]:
+    """
+    Find likely speech regions with a vectorised energy/zero-crossing pass.
+    
+    A frame counts as voiced when its RMS level is VAD_FLOOR_MARGIN_DB above the
+    clip's own noise floor (10th percentile, so room tone sets the floor) and above
+    an absolute floor, and its zero-crossing rate isn't hiss-like. Voiced runs
+    closer than merge_gap_seconds are joined, runs shorter than min_speech_seconds
+    are dropped, and the rest are padded.
+    
+    Args:
+        audio: Mono float32 samples (as from decode_audio_pcm)
+        sample_rate: Sample rate of audio
+        frame_seconds: Analysis frame length
+        min_speech_seconds: Shortest voiced run to keep
+        merge_gap_seconds: Join voiced runs separated by less than this
+        pad_seconds: Padding added on both sides of each region
+        
+    Returns:
+        Sorted, non-overlapping (start, end) regions in seconds
+    """
+    frame_length = int(sample_rate * frame_seconds)
+    frame_count = len(audio) // frame_length
+    if frame_count == 0:
+        return []
+    
+    duration = len(audio) / sample_rate
+    frames = np.asarray(audio[:frame_count * frame_length], dtype=np.float32).reshape(frame_count, frame_length)
+    
+    rms_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_length
+    
+    noise_floor = np.percentile(rms_db, 10)
+    threshold = max(noise_floor + VAD_FLOOR_MARGIN_DB, VAD_ABSOLUTE_FLOOR_DB)
+    voiced = (rms_db > threshold) & (zero_crossing_rate < 0.4)
+    
+    if not voiced.any():
+        return []
+    
+    # Run boundaries of the voiced mask
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * frame_seconds
+    ends = np.flatnonzero(edges == -1) * frame_seconds
+    
+    regions = []
+    for start, end in zip(starts, ends):
+        if regions and start - regions[-1][1] < merge_gap_seconds:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+    
+    padded = []
+    for start, end in regions:
+        if end - start < min_speech_seconds:
+            continue
+        start = max(0.0, start - pad_seconds)
+        end = min(duration, end + pad_seconds)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((float(start), float(end)))
+    
+    return padded
+
+
+def summarize_speech_regions(regions: List[Tuple[float, float]], duration: float) -> Dict:
+    """
+    Summarise VAD output for status records and extract_audio_type.
+    
+    Args:
+        regions: Speech regions from detect_speech_regions
+        duration: Total audio duration in seconds
+        
+    Returns:
+        Dictionary with speech_seconds, speech_ratio and the rounded regions
+    """
+    speech_seconds = sum(end - start for start, end in regions)
+    return {
+        "speech_seconds": round(speech_seconds, 2),
+        "duration_seconds": round(duration, 2),
+        "speech_ratio": round(speech_seconds / duration, 3) if duration else 0.0,
+        "regions": [[round(start, 2), round(end, 2)] for start, end in regions]
+    }
+
+
+def measure_audio_windows(
+    ffmpeg_cmd: str,
+    video_path: str,
+    starts: List[float],
+    window_seconds: float,
+    timeout: int = 60
+) -> List[Dict]:
+    """
+    Measure mean/peak level of a few short windows in a single ffmpeg pass.
+    
+    Each window is a separately fast-seeked input (-ss/-t), so only those few
+    seconds are decoded. Every window gets its own volumedetect instance, and
+    instance N (Parsed_volumedetect_N) is the N-th chain, i.e. input N, so each
+    level is tied to its own window start even if another window printed nothing.
+    
+    Args:
+        ffmpeg_cmd: ffmpeg executable
+        video_path: Path to video file
+        starts: Window start times in seconds
+        window_seconds: Length of each window
+        timeout: Seconds to wait for ffmpeg
+        
+    Returns:
+        List of {"start", "mean_volume_db", "max_volume_db"} per window that decoded
+    """
+    cmd = [ffmpeg_cmd, '-nostdin', '-hide_banner']
+    for start in starts:
+        cmd += ['-ss', f"{start:.3f}", '-t', f"{window_seconds:.3f}", '-i', video_path]
+    
+    chains = [f"[{i}:a:0]volumedetect[a{i}]" for i in range(len(starts))]
+    concat_inputs = ''.join(f"[a{i}]" for i in range(len(starts)))
+    filter_complex = ';'.join(chains) + f";{concat_inputs}concat=n={len(starts)}:v=0:a=1[out]"
+    cmd += ['-filter_complex', filter_complex, '-map', '[out]', '-f', 'null', '-']
+    
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    
+    levels = {}
+    for line in result.stderr.splitlines():
+        match = re.search(r'Parsed_volumedetect_(\d+).*?(mean|max)_volume:\s*(-?[\d.]+|-inf) dB', line)
+        if match:
+            value = float(match.group(3)) if match.group(3) != '-inf' else -91.0
+            levels.setdefault(int(match.group(1)), {})[f"{match.group(2)}_volume_db"] = value
+    
+    # One volumedetect per chain, so the instance number is the input (window) index
+    windows = []
+    for index, start in enumerate(starts):
+        if index in levels:
+            windows.append({"start": round(start, 2), **levels[index]})
+    return windows
+
+
+def detect_audio_content(
+    video_path: str,
+    windows: int = AUDIO_DETECT_WINDOWS,
+    window_seconds: float = AUDIO_DETECT_WINDOW_SECONDS,
+    use_cache: bool = True
+) -> Dict:
+    """
+    Measure real signal on a clip's audio track from a few sampled windows.
+    
+    Stream presence comes from the cached ffprobe data; levels come from one
+    sampled volumedetect pass. The result is cached with the probe data.
+    
+    Args:
+        video_path: Path to video file
+        windows: Number of evenly spaced windows to sample
+        window_seconds: Length of each window
+        use_cache: Reuse a cached result for this file version
         
-        # Use ffmpeg to check for actual audio content (not just streams)
-        # This matches the old flow's methodology from frames_transcribe_audio.py
-        probe_cmd = [ffmpeg_cmd, "-i", video_path]
-        probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
+    Returns:
+        Dictionary with has_audio (True/False/None), confidence (0-1),
+        audio_streams, max_volume_db, mean_volume_db and per-window levels
+    """
+    if use_cache:
+        cached = global_probe_cache.get(video_path, "audio_detection")
+        if cached:
+            return cached
+    
+    probe = global_probe_cache.probe(video_path)
+    if not probe:
+        return {"has_audio": None, "confidence": 0.0, "reason": "ffprobe failed"}
+    
+    audio_streams = [s for s in probe.get('streams', []) if s.get('codec_type') == 'audio']
+    if not audio_streams:
+        detection = {"has_audio": False, "confidence": 1.0, "audio_streams": 0, "reason": "no audio stream"}
+        global_probe_cache.set(video_path, "audio_detection", detection)
+        return detection
+    
+    ffmpeg_cmd = find_ffmpeg()
+    if not ffmpeg_cmd:
+        return {"has_audio": None, "confidence": 0.0, "audio_streams": len(audio_streams), "reason": "ffmpeg not found"}
+    
+    duration = float(probe.get('format', {}).get('duration') or 0)
+    window_seconds = min(window_seconds, duration) if duration > 0 else window_seconds
+    if duration > window_seconds:
+        starts = [(i + 0.5) * duration / windows - window_seconds / 2 for i in range(windows)]
+        starts = [max(0.0, min(start, duration - window_seconds)) for start in starts]
+    else:
+        starts = [0.0]
+    
+    levels = measure_audio_windows(ffmpeg_cmd, video_path, starts, window_seconds)
+    if not levels:
+        return {"has_audio": None, "confidence": 0.0, "audio_streams": len(audio_streams),
+                "reason": "audio could not be decoded"}
+    
+    max_volume = max(w.get("max_volume_db", -91.0) for w in levels)
+    mean_volume = max(w.get("mean_volume_db", -91.0) for w in levels)
+    
+    # Confidence grows from 0.5 at the silence threshold to 1.0 at 20dB either side
+    has_content = max_volume > AUDIO_SILENCE_PEAK_DB
+    margin = abs(max_volume - AUDIO_SILENCE_PEAK_DB)
+    confidence = round(min(1.0, 0.5 + margin / 40.0), 2)
+    
+    detection = {
+        "has_audio": has_content,
+        "confidence": confidence,
+        "audio_streams": len(audio_streams),
+        "max_volume_db": max_volume,
+        "mean_volume_db": mean_volume,
+        "windows": levels,
+        "reason": "signal above threshold" if has_content else "silent track"
+    }
+    global_probe_cache.set(video_path, "audio_detection", detection)
+    return detection
+
+
+def has_audio(video_path: str) -> Optional[bool]:
+    """
+    Check if video has actual audio content (measured signal, not just a stream).
+    
+    Args:
+        video_path: Path to video file
         
-        # Check stderr for "Audio:" which indicates actual audio content
-        has_audio_content = "Audio:" in probe_result.stderr
+    Returns:
+        True if audio content exists, False if no audio, None if detection failed
+    """
+    try:
+        detection = detect_audio_content(video_path)
+        has_audio_content = detection["has_audio"]
         
         if has_audio_content:
-            print(f"  -> ✅ Video has audio content")
+            print(f"  -> ✅ Video has audio content (peak {detection['max_volume_db']:.1f} dB)")
+        elif has_audio_content is False:
+            print(f"  -> 📵 No audio content detected ({detection['reason']})")
         else:
-            print(f"  -> 📵 No audio content detected")
+            print(f"  -> Warning: Audio detection inconclusive ({detection.get('reason')})")
         
         return has_audio_content
         
@@ -62,144 +393,12 @@ def has_audio(video_path: str) -> Optional[bool]:
         return None
 
 
-def transcribe_full_audio_background(
-    video_path: str,
-    output_path: str,
-    status_file: str,
-    model: str = "base"
-):
-    """
-    Transcribe full audio track in background thread.
-    Writes status updates to status_file.
-    
-    Args:
-        video_path: Path to video file
-        output_path: Path to write transcript JSON
-        status_file: Path to write status updates
-        model: Whisper model size (tiny, base, small, medium, large)
-    """
-    def _transcribe():
-        try:
-            # Write initial status
-            with open(status_file, 'w') as f:
-                json.dump({"status": "running", "progress": 0}, f)
-            
-            print(f"  -> 🎙️ Starting background audio transcription...")
-            print(f"  -> Model: {model}, Output: {output_path}")
-            
-            # Use whisper command-line tool for transcription
-            # First check if whisper is available
-            try:
-                subprocess.run(['whisper', '--help'], capture_output=True, timeout=5)
-                whisper_cmd = 'whisper'
-            except (FileNotFoundError, subprocess.TimeoutExpired):
-                print(f"  -> Warning: whisper CLI not found, trying openai-whisper")
-                whisper_cmd = 'whisper'  # Will fail below if not found
-            
-            # Extract audio to temp WAV file first (faster for Whisper)
-            temp_audio = output_path.replace('.json', '_audio.wav')
-            
-            # Find ffmpeg
-            ffmpeg_paths = ['/opt/homebrew/bin/ffmpeg', '/usr/local/bin/ffmpeg', 'ffmpeg']
-            ffmpeg_cmd = None
-            for path in ffmpeg_paths:
-                if os.path.exists(path) or path == 'ffmpeg':
-                    ffmpeg_cmd = path
-                    break
-            
-            if not ffmpeg_cmd:
-                raise RuntimeError("FFmpeg not found")
-            
-            # Extract audio
-            extract_cmd = [
-                ffmpeg_cmd,
-                '-i', video_path,
-                '-vn',  # No video
-                '-acodec', 'pcm_s16le',  # PCM 16-bit
-                '-ar', '16000',  # 16kHz sample rate
-                '-ac', '1',  # Mono
-                '-y',  # Overwrite
-                temp_audio,
-                '-loglevel', 'error'
-            ]
-            
-            print(f"  -> Extracting audio track...")
-            result = subprocess.run(extract_cmd, capture_output=True, text=True, timeout=120)
-            
-            if result.returncode != 0:
-                raise RuntimeError(f"Audio extraction failed: {result.stderr}")
-            
-            # Update status
-            with open(status_file, 'w') as f:
-                json.dump({"status": "running", "progress": 50}, f)
-            
-            # Transcribe with Whisper
-            print(f"  -> Transcribing audio with Whisper ({model} model)...")
-            
-            whisper_cmd_list = [
-                whisper_cmd,
-                temp_audio,
-                '--model', model,
-                '--output_format', 'json',
-                '--output_dir', os.path.dirname(output_path),
-                '--language', 'en',  # Assume English
-                '--word_timestamps', 'True'  # Get word-level timestamps
-            ]
-            
-            result = subprocess.run(
-                whisper_cmd_list,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minute timeout for transcription
-            )
-            
-            if result.returncode != 0:
-                raise RuntimeError(f"Whisper transcription failed: {result.stderr}")
-            
-            # Whisper outputs to filename.json, rename if needed
-            whisper_output = temp_audio.replace('.wav', '.json')
-            if os.path.exists(whisper_output) and whisper_output != output_path:
-                os.rename(whisper_output, output_path)
-            
-            # Clean up temp audio
-            if os.path.exists(temp_audio):
-                os.remove(temp_audio)
-            
-            # Write success status
-            with open(status_file, 'w') as f:
-                json.dump({
-                    "status": "completed",
-                    "progress": 100,
-                    "output_file": output_path
-                }, f)
-            
-            print(f"  -> ✅ Background transcription completed: {output_path}")
-            
-        except subprocess.TimeoutExpired:
-            with open(status_file, 'w') as f:
-                json.dump({
-                    "status": "failed",
-                    "error": "Transcription timed out"
-                }, f)
-            print(f"  -> ❌ Background transcription timed out")
-            
-        except Exception as e:
-            with open(status_file, 'w') as f:
-                json.dump({
-                    "status": "failed",
-                    "error": str(e)
-                }, f)
-            print(f"  -> ❌ Background transcription error: {e}")
-    
-    # Start transcription in background thread
-    thread = threading.Thread(target=_transcribe, daemon=True)
-    thread.start()
-    print(f"  -> 🔄 Audio transcription running in background...")
-
-
 def check_transcription_status(status_file: str) -> Dict:
     """
-    Check status of background transcription.
+    Check status of a transcription job.
+    
+    A running job whose heartbeat has stopped (worker killed mid-clip) is
+    reported as failed rather than left running forever.
     
     Args:
         status_file: Path to status file
@@ -212,9 +411,17 @@ def check_transcription_status(status_file: str) -> Dict:
     
     try:
         with open(status_file, 'r') as f:
-            return json.load(f)
+            status = json.load(f)
     except Exception as e:
         return {"status": "error", "error": str(e)}
+    
+    heartbeat_at = status.get("heartbeat_at")
+    if status.get("status") == "running" and heartbeat_at:
+        silence = time.time() - heartbeat_at
+        if silence > TRANSCRIPTION_STALE_SECONDS:
+            return {**status, "status": "failed", "error": f"No heartbeat for {silence:.0f}s (worker lost)"}
+    
+    return status
 
 
 def load_transcript(transcript_path: str) -> Optional[Dict]:
@@ -238,10 +445,38 @@ def load_transcript(transcript_path: str) -> Optional[Dict]:
         return None
 
 
+class TranscriptIndex:
+    """
+    Sorted-interval index over transcript segments (and words) for window queries.
+    
+    Items are sorted by start with a running maximum of their end times, so the
+    items overlapping [window_start, window_end] are found with two bisects:
+    everything starting after window_end is excluded by one, everything whose
+    (running max) end is before window_start by the other.
+    """
+    
+    def __init__(self, items: List[Dict]):
+        self.items = sorted(items, key=lambda item: item.get('start', 0))
+        self.starts = [item.get('start', 0) for item in self.items]
+        self.max_ends = []
+        running_max = float('-inf')
+        for item in self.items:
+            running_max = max(running_max, item.get('end', 0))
+            self.max_ends.append(running_max)
+    
+    def query(self, window_start: float, window_end: float) -> List[Dict]:
+        """Items overlapping [window_start, window_end], in start order."""
+        lo = bisect.bisect_left(self.max_ends, window_start)
+        hi = bisect.bisect_right(self.starts, window_end)
+        return [item for item in self.items[lo:hi] if item.get('end', 0) >= window_start]
+
+
 def map_transcript_to_frames(
     transcript: Dict,
     frame_timestamps: List[float],
-    window_seconds: float = 2.5
+    window_seconds: float = 2.5,
+    merged_timestamps: Optional[Dict[float, List[float]]] = None,
+    clip_to_words: bool = False
 ) -> Dict[float, str]:
     """
     Map transcript segments to nearest frame timestamps.
@@ -250,6 +485,11 @@ def map_transcript_to_frames(
         transcript: Whisper transcript JSON with segments/words
         frame_timestamps: List of frame timestamps in seconds
         window_seconds: Time window around each frame (default: ±2.5s)
+        merged_timestamps: Optional frame timestamp -> timestamps of near-duplicate
+            frames it stands in for; the window is widened to cover them
+        clip_to_words: Use word-level timestamps so each frame gets only the words
+            centred in its window, rather than every overlapping segment
+            (falls back to segments when the transcript has no words)
         
     Returns:
         Dictionary mapping frame timestamps to transcript text
@@ -262,46 +502,56 @@ def map_transcript_to_frames(
         print(f"  -> No transcript segments found")
         return frame_transcripts
     
-    print(f"  -> Mapping {len(segments)} transcript segments to {len(frame_timestamps)} frames...")
+    words = [word for segment in segments for word in segment.get('words', [])] if clip_to_words else []
+    index = TranscriptIndex(words or segments)
+    
+    print(f"  -> Mapping {len(segments)} transcript segments to {len(frame_timestamps)} frames"
+          f"{' (word-level)' if words else ''}...")
     
-    # For each frame, find transcript segments within time window
+    # For each frame, query the index for items within its time window
     for frame_time in frame_timestamps:
-        window_start = frame_time - window_seconds
-        window_end = frame_time + window_seconds
+        covered = [frame_time] + list((merged_timestamps or {}).get(frame_time, []))
+        window_start = min(covered) - window_seconds
+        window_end = max(covered) + window_seconds
         
-        matching_text = []
-        
-        for segment in segments:
-            segment_start = segment.get('start', 0)
-            segment_end = segment.get('end', 0)
-            
-            # Check if segment overlaps with frame window
-            if segment_start <= window_end and segment_end >= window_start:
-                text = segment.get('text', '').strip()
-                if text:
-                    matching_text.append(text)
+        if words:
+            matching = [
+                word for word in index.query(window_start, window_end)
+                if window_start <= (word.get('start', 0) + word.get('end', 0)) / 2 <= window_end
+            ]
+            text = ''.join(word.get('word', '') for word in matching).strip()
+        else:
+            matching = index.query(window_start, window_end)
+            text = ' '.join(t for t in (segment.get('text', '').strip() for segment in matching) if t)
         
-        # Combine matching segments
-        if matching_text:
-            frame_transcripts[frame_time] = ' '.join(matching_text)
+        # Combine matching text
+        if text:
+            frame_transcripts[frame_time] = text
     
     print(f"  -> Mapped transcripts to {len(frame_transcripts)} frames")
     return frame_transcripts
 
 
-def extract_audio_type(transcript: Dict) -> str:
+def extract_audio_type(transcript: Optional[Dict] = None, vad: Optional[Dict] = None) -> str:
     """
-    Determine if video has sound or is MOS based on transcript.
+    Determine if video has sound or is MOS based on transcript and/or VAD result.
     
     Args:
-        transcript: Whisper transcript JSON
+        transcript: Whisper transcript JSON (may carry its own "vad" summary)
+        vad: VAD summary from summarize_speech_regions (used alone if no transcript)
         
     Returns:
         "Sound" if audio detected, "MOS" if silent
     """
-    if not transcript:
+    vad = vad or (transcript or {}).get('vad')
+    
+    # No speech found by the VAD pre-pass - MOS without needing a transcript
+    if vad is not None and vad.get('speech_seconds', 0) < VAD_MIN_SPEECH_SECONDS:
         return "MOS"
     
+    if not transcript:
+        return "Sound" if vad is not None else "MOS"
+    
     segments = transcript.get('segments', [])
     
     # Check if there's any meaningful text
@@ -311,4 +561,3 @@ def extract_audio_type(transcript: Dict) -> str:
         return "Sound"
     else:
         return "MOS"
-
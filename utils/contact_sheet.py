@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Contact sheets for sampled video frames.
+Tiles frames into labelled grids (frame number and timecode burned in) so a
+clip's frames can go to Gemini as a few images instead of one image each.
+Gemini bills per 768px tile of an image, so a 3x3 sheet of 512px frames
+costs about as much as four single frames.
+
+Configuration (env):
+- FTG_CONTACT_SHEET_GRID: Columns x rows per sheet (default: 3x3)
+- FTG_CONTACT_SHEET_TILE_WIDTH: Width of each frame on the sheet (default: 512)
+"""
+
+import os
+from typing import Dict, List
+
+from PIL import Image, ImageDraw, ImageFont
+
+LABEL_HEIGHT = 28
+TILE_GAP = 4
+BACKGROUND = (16, 16, 16)
+
+
+def get_grid() -> tuple:
+    """(columns, rows) from FTG_CONTACT_SHEET_GRID, e.g. '3x3'."""
+    columns, rows = os.getenv("FTG_CONTACT_SHEET_GRID", "3x3").lower().split("x")
+    return int(columns), int(rows)
+
+
+def _load_font(size: int):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 has only the fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+def build_contact_sheets(frames: List[Dict], output_dir: str, columns: int = None, rows: int = None,
+                         tile_width: int = None, quality: int = 90) -> List[Dict]:
+    """
+    Tile frames into labelled contact sheets.
+
+    Args:
+        frames: Ordered list of {"frame_number", "timecode", "path"}
+        output_dir: Directory to write sheet_NN.jpg files to
+        columns: Frames per row (default: from FTG_CONTACT_SHEET_GRID)
+        rows: Rows per sheet (default: from FTG_CONTACT_SHEET_GRID)
+        tile_width: Width of each frame on the sheet (default: FTG_CONTACT_SHEET_TILE_WIDTH or 512)
+        quality: JPEG quality of the sheets
+
+    Returns:
+        List of {"path", "frame_numbers", "width", "height"}, one per sheet
+    """
+    default_columns, default_rows = get_grid()
+    columns = columns or default_columns
+    rows = rows or default_rows
+    tile_width = tile_width or int(os.getenv("FTG_CONTACT_SHEET_TILE_WIDTH", "512"))
+    per_sheet = columns * rows
+    font = _load_font(LABEL_HEIGHT - 8)
+
+    os.makedirs(output_dir, exist_ok=True)
+    sheets = []
+
+    for sheet_index in range(0, len(frames), per_sheet):
+        batch = frames[sheet_index:sheet_index + per_sheet]
+
+        # Scale every frame to the tile width; tile height follows the first frame's aspect
+        tiles = []
+        for frame in batch:
+            with Image.open(frame["path"]) as img:
+                img = img.convert("RGB")
+                height = max(1, round(img.height * tile_width / img.width))
+                tiles.append(img.resize((tile_width, height), Image.LANCZOS))
+        tile_height = tiles[0].height
+
+        used_rows = (len(batch) + columns - 1) // columns
+        used_columns = min(columns, len(batch))
+        sheet = Image.new("RGB", (
+            used_columns * tile_width + (used_columns - 1) * TILE_GAP,
+            used_rows * (tile_height + LABEL_HEIGHT) + (used_rows - 1) * TILE_GAP
+        ), BACKGROUND)
+        draw = ImageDraw.Draw(sheet)
+
+        for position, (frame, tile) in enumerate(zip(batch, tiles)):
+            x = (position % columns) * (tile_width + TILE_GAP)
+            y = (position // columns) * (tile_height + LABEL_HEIGHT + TILE_GAP)
+            draw.text((x + 6, y + 4), f"Frame {frame['frame_number']}  {frame['timecode']}",
+                      fill=(255, 255, 255), font=font)
+            sheet.paste(tile.crop((0, 0, tile_width, tile_height)), (x, y + LABEL_HEIGHT))
+
+        sheet_path = os.path.join(output_dir, f"sheet_{len(sheets) + 1:02d}.jpg")
+        sheet.save(sheet_path, format="JPEG", quality=quality)
+        sheets.append({
+            "path": sheet_path,
+            "frame_numbers": [frame["frame_number"] for frame in batch],
+            "width": sheet.width,
+            "height": sheet.height
+        })
+
+    print(f"  -> 🗂️ Built {len(sheets)} contact sheets ({columns}x{rows}) from {len(frames)} frames")
+    return sheets
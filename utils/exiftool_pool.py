@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+ExifTool Pool - Persistent exiftool processes for metadata extraction
+
+Starting exiftool costs 200-400 ms per call (Perl startup plus module loading).
+This utility keeps a small pool of long-lived `exiftool -stay_open True -@ -`
+processes and sends requests to them over stdin, so a job only pays the
+startup cost once per pool slot.
+
+Key benefits:
+- One Perl startup per pool slot instead of one per file
+- Batched multi-file requests (one round trip for many files)
+- Thread-safe: batch jobs with ThreadPoolExecutor share the same pool
+"""
+
+import os
+import json
+import queue
+import select
+import atexit
+import threading
+import subprocess
+import concurrent.futures
+from typing import Dict, List, Optional
+
+EXIFTOOL_PATHS = ['/opt/homebrew/bin/exiftool', '/usr/local/bin/exiftool', 'exiftool']
+
+
+def find_exiftool() -> Optional[str]:
+    """Find the exiftool executable in the usual install locations."""
+    for path in EXIFTOOL_PATHS:
+        if os.path.exists(path) or path == 'exiftool':
+            return path
+    return None
+
+
+class ExifToolProcess:
+    """A single long-lived exiftool process in -stay_open mode."""
+
+    def __init__(self, exiftool_cmd: str):
+        self.exiftool_cmd = exiftool_cmd
+        self.process = None
+        self.request_count = 0
+
+    def start(self):
+        """Start the exiftool process."""
+        self.process = subprocess.Popen(
+            [self.exiftool_cmd, '-stay_open', 'True', '-@', '-', '-common_args', '-charset', 'filename=utf8'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self.request_count = 0
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def execute(self, args: List[str], timeout: int = 60) -> str:
+        """
+        Run one exiftool command and return its stdout.
+
+        Args:
+            args: exiftool arguments (options followed by file paths)
+            timeout: Seconds to wait for the {ready} marker
+
+        Returns:
+            Raw stdout text for this command
+        """
+        if not self.is_alive():
+            self.start()
+
+        self.request_count += 1
+        sentinel = f"{{ready{self.request_count}}}".encode()
+        command = "\n".join(args) + f"\n-execute{self.request_count}\n"
+
+        self.process.stdin.write(command.encode('utf-8'))
+        self.process.stdin.flush()
+
+        fd = self.process.stdout.fileno()
+        output = b""
+        while not output.rstrip().endswith(sentinel):
+            ready, _, _ = select.select([fd], [], [], timeout)
+            if not ready:
+                self.terminate()
+                raise subprocess.TimeoutExpired(self.exiftool_cmd, timeout)
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                self.terminate()
+                raise RuntimeError("ExifTool process exited unexpectedly")
+            output += chunk
+
+        return output.rstrip()[:-len(sentinel)].decode('utf-8', errors='replace')
+
+    def terminate(self):
+        """Ask exiftool to exit, killing it if it does not."""
+        if self.process is None:
+            return
+        try:
+            if self.process.poll() is None:
+                self.process.stdin.write(b"-stay_open\nFalse\n")
+                self.process.stdin.flush()
+                self.process.wait(timeout=5)
+        except Exception:
+            self.process.kill()
+        self.process = None
+
+
+class ExifToolPool:
+    """Thread-safe pool of persistent exiftool processes."""
+
+    def __init__(self, size: int = None):
+        """
+        Initialize exiftool pool.
+
+        Args:
+            size: Number of exiftool processes (default: EXIFTOOL_POOL_SIZE env or 4)
+        """
+        self.size = size or int(os.getenv("EXIFTOOL_POOL_SIZE", "4"))
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._exiftool_cmd = None
+        self.stats = {"requests": 0, "files": 0, "processes_started": 0}
+
+    def _acquire(self) -> ExifToolProcess:
+        """Get an idle process, starting a new one if the pool is not full."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                if not self._exiftool_cmd:
+                    self._exiftool_cmd = find_exiftool()
+                    if not self._exiftool_cmd:
+                        raise RuntimeError("ExifTool not found in any expected location")
+                self._created += 1
+                self.stats["processes_started"] += 1
+                return ExifToolProcess(self._exiftool_cmd)
+
+        return self._idle.get()
+
+    def _release(self, proc: ExifToolProcess):
+        self._idle.put(proc)
+
+    def execute(self, args: List[str], timeout: int = 60) -> str:
+        """Run a raw exiftool command on a pooled process and return stdout."""
+        proc = self._acquire()
+        try:
+            return proc.execute(args, timeout=timeout)
+        finally:
+            self._release(proc)
+
+    def get_metadata_batch(self, file_paths: List[str], tags: List[str] = None, options: List[str] = None,
+                           timeout: int = 60) -> List[Dict]:
+        """
+        Extract metadata for several files in one exiftool request.
+
+        Args:
+            file_paths: Files to read
+            tags: Tag arguments such as '-ImageWidth' (default: all tags)
+            options: Extra options such as '-g1', '-S', '-a', '-G1'
+            timeout: Seconds to wait for exiftool
+
+        Returns:
+            List of metadata dicts in the same order as file_paths ({} if a file could not be read)
+        """
+        if not file_paths:
+            return []
+
+        args = ['-j'] + (options or []) + (tags or []) + [str(p) for p in file_paths]
+        output = self.execute(args, timeout=timeout)
+
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["files"] += len(file_paths)
+
+        results = json.loads(output) if output.strip() else []
+        if len(results) == len(file_paths):
+            return results
+
+        # Some files failed - match the rest back by SourceFile
+        by_source = {item.get('SourceFile'): item for item in results}
+        return [by_source.get(str(p), {}) for p in file_paths]
+
+    def get_metadata(self, file_path: str, tags: List[str] = None, options: List[str] = None,
+                     timeout: int = 60) -> Dict:
+        """Extract metadata for a single file ({} if it could not be read)."""
+        return self.get_metadata_batch([file_path], tags=tags, options=options, timeout=timeout)[0]
+
+    def get_metadata_parallel(self, file_paths: List[str], tags: List[str] = None, options: List[str] = None,
+                              chunk_size: int = 25, timeout: int = 120) -> List[Dict]:
+        """Split a large file list into chunks and spread them over the pool."""
+        chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+        if len(chunks) <= 1:
+            return self.get_metadata_batch(file_paths, tags=tags, options=options, timeout=timeout)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.size, len(chunks))) as executor:
+            chunk_results = executor.map(
+                lambda chunk: self.get_metadata_batch(chunk, tags=tags, options=options, timeout=timeout),
+                chunks
+            )
+            return [item for chunk in chunk_results for item in chunk]
+
+    def get_stats(self) -> Dict:
+        """Get pool usage statistics."""
+        with self._lock:
+            return {**self.stats, "pool_size": self.size, "processes_alive": self._created}
+
+    def close(self):
+        """Shut down all idle exiftool processes."""
+        while True:
+            try:
+                proc = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            proc.terminate()
+        with self._lock:
+            self._created = 0
+
+
+# Global pool instance
+global_exiftool_pool = ExifToolPool()
+atexit.register(global_exiftool_pool.close)
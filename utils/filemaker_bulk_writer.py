@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+FileMaker Bulk Writer - Concurrent record updates with per-record retries
+
+The Data API has no multi-record PATCH, so jobs that touch every child record
+(e.g. writing transcripts to all of a clip's frames) used to issue one
+blocking request per record. This utility sends the updates concurrently over
+a pooled keep-alive session with a bounded number of workers, reports which
+records failed and why, and retries only those.
+
+AsyncRecordSink streams updates from asyncio batch jobs into a writer through
+a bounded queue: results are written as they arrive, and producers wait when
+FileMaker falls behind instead of piling up results in memory.
+
+Configuration (env):
+- FM_BULK_WRITE_WORKERS: Concurrent updates per writer (default: 8)
+- FM_ASYNC_SINK_QUEUE: Updates queued ahead of the writers before producers wait (default: 4 x workers)
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import concurrent.futures
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+# Add parent directory to path for config import
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+
+# Statuses worth retrying (server busy / transient); anything else fails straight away
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class BulkRecordWriter:
+    """Updates many records on one layout concurrently."""
+
+    def __init__(self, token: str, layout: str, max_workers: int = None, max_retries: int = 2):
+        """
+        Initialize bulk writer.
+
+        Args:
+            token: FileMaker authentication token
+            layout: Layout the records are updated through
+            max_workers: Concurrent requests (default: FM_BULK_WRITE_WORKERS env or 8)
+            max_retries: Extra attempts for records that failed with a retryable error
+        """
+        self.token = token
+        self.layout = layout
+        self.max_workers = max_workers or int(os.getenv("FM_BULK_WRITE_WORKERS", "8"))
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "updated": 0, "failed": 0, "retried": 0}
+
+        # One keep-alive connection per worker instead of a new TLS handshake per record
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+
+    def _update(self, record_id: str, field_data: Dict) -> Dict:
+        """PATCH one record; returns {"ok", "retryable", "error"}."""
+        with self._lock:
+            self.stats["requests"] += 1
+        try:
+            response = self.session.patch(
+                config.url(f"layouts/{self.layout}/records/{record_id}"),
+                headers=config.api_headers(self.token),
+                json={"fieldData": field_data},
+                verify=False,
+                timeout=30
+            )
+            if response.status_code == 200:
+                return {"ok": True}
+            return {
+                "ok": False,
+                "retryable": response.status_code in RETRYABLE_STATUS_CODES,
+                "error": f"HTTP {response.status_code}"
+            }
+        except requests.exceptions.RequestException as e:
+            return {"ok": False, "retryable": True, "error": str(e)}
+
+    def update(self, record_id: str, field_data: Dict, label: str = None) -> Dict:
+        """
+        Update one record, retrying retryable failures with backoff.
+
+        Args:
+            record_id: Record to update
+            field_data: Fields to write
+            label: Name used in the failure message (default: record_id)
+
+        Returns:
+            {"ok": True} or {"ok": False, "error": ...}
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._lock:
+                    self.stats["retried"] += 1
+                time.sleep(2 ** attempt)
+            result = self._update(record_id, field_data)
+            if result["ok"] or not result["retryable"]:
+                break
+
+        with self._lock:
+            self.stats["updated" if result["ok"] else "failed"] += 1
+        if not result["ok"]:
+            print(f"    -> ⚠️ Failed to update {label or record_id}: {result['error']}")
+        return result
+
+    def write(self, updates: List[Dict]) -> Dict:
+        """
+        Apply a set of record updates concurrently.
+
+        Args:
+            updates: List of {"record_id": ..., "field_data": {...}, "label": ...}
+                     (label is only used for reporting, e.g. the frame ID)
+
+        Returns:
+            Dict with "updated" (labels), "failed" ({label: error}) and "attempts"
+        """
+        pending = {update["record_id"]: update for update in updates}
+        updated = []
+        failed = {}
+        attempt = 0
+
+        while pending and attempt <= self.max_retries:
+            if attempt:
+                with self._lock:
+                    self.stats["retried"] += len(pending)
+                print(f"    -> 🔄 Retrying {len(pending)} failed updates (attempt {attempt + 1})...")
+                time.sleep(2 ** attempt)
+
+            retry = {}
+            workers = min(self.max_workers, len(pending))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self._update, record_id, update["field_data"]): record_id
+                    for record_id, update in pending.items()
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    update = pending[futures[future]]
+                    label = update.get("label") or update["record_id"]
+                    result = future.result()
+                    if result["ok"]:
+                        updated.append(label)
+                        failed.pop(label, None)
+                    else:
+                        failed[label] = result["error"]
+                        if result["retryable"]:
+                            retry[update["record_id"]] = update
+
+            pending = retry
+            attempt += 1
+
+        with self._lock:
+            self.stats["updated"] += len(updated)
+            self.stats["failed"] += len(failed)
+
+        for label, error in failed.items():
+            print(f"    -> ⚠️ Failed to update {label}: {error}")
+
+        return {"updated": updated, "failed": failed, "attempts": attempt}
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return self.stats.copy()
+
+
+class AsyncRecordSink:
+    """Bounded queue from asyncio producers to a BulkRecordWriter's worker threads."""
+
+    def __init__(self, writer: BulkRecordWriter, max_pending: int = None):
+        """
+        Initialize sink (create it inside the running event loop).
+
+        Args:
+            writer: Writer whose session and retry policy are used
+            max_pending: Queued updates before put() waits (default: FM_ASYNC_SINK_QUEUE env or 4 x workers)
+        """
+        self.writer = writer
+        max_pending = max_pending or int(os.getenv("FM_ASYNC_SINK_QUEUE", str(writer.max_workers * 4)))
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.updated = []
+        self.failed = {}
+        self._workers = [asyncio.create_task(self._drain()) for _ in range(writer.max_workers)]
+
+    async def _drain(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                if update is None:
+                    return
+                label = update["label"] or update["record_id"]
+                result = await asyncio.to_thread(
+                    self.writer.update, update["record_id"], update["field_data"], label
+                )
+                if result["ok"]:
+                    self.updated.append(label)
+                else:
+                    self.failed[label] = result["error"]
+            finally:
+                self.queue.task_done()
+
+    async def put(self, record_id: str, field_data: Dict, label: str = None):
+        """Queue an update; waits while the queue is full."""
+        await self.queue.put({"record_id": record_id, "field_data": field_data, "label": label})
+
+    async def close(self) -> Dict:
+        """
+        Finish all queued updates and stop the workers.
+
+        Returns:
+            Dict with "updated" (labels) and "failed" ({label: error})
+        """
+        for _ in self._workers:
+            await self.queue.put(None)
+        await asyncio.gather(*self._workers)
+        return {"updated": self.updated, "failed": self.failed}
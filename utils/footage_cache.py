@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Footage Cache - Local SSD read-ahead cache for footage on SMB volumes
+
+Part B step 1 reads the source clip several times (probe, audio detection,
+scene detection, frame extraction, transcription), and each pass went back
+over SMB. This utility copies a clip to a local directory once, ideally ahead
+of time when the item enters "3 - Ready for AI", and hands out the local path
+to the steps that read it.
+
+Entries are keyed by source path, size and mtime, so a changed source is never
+served stale. Total size is capped and the least recently used clips are
+evicted first. A clip that a queued job will still read (e.g. the
+transcription job Step 1 hands the local path to) holds a lease in its meta
+file and is never evicted until the job releases it or the lease expires.
+Copies still in progress count towards the cap. Hit rate and staging latency
+are kept in a stats file next to the cache so the API process can report
+numbers from the worker processes.
+
+Configuration (env):
+- FTG_FOOTAGE_CACHE_DIR: Local cache directory (unset = cache disabled)
+- FTG_FOOTAGE_CACHE_GB: Size cap (default: 200)
+- FTG_FOOTAGE_CACHE_MIN_AGE_MINUTES: Clips used more recently are never evicted (default: 60)
+- FTG_FOOTAGE_CACHE_LEASE_HOURS: Leases not released within this time are treated as abandoned (default: 24)
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+META_SUFFIX = ".meta.json"
+PARTIAL_SUFFIX = ".partial"
+LOCK_FILE = ".footage_cache.lock"
+STATS_FILE = ".footage_cache_stats.json"
+
+
+class FootageCache:
+    """Size-capped LRU cache of footage files on local disk."""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None, min_age_seconds: int = None):
+        """
+        Initialize footage cache.
+
+        Args:
+            cache_dir: Local cache directory (default: FTG_FOOTAGE_CACHE_DIR env; disabled if unset)
+            max_bytes: Size cap (default: FTG_FOOTAGE_CACHE_GB env or 200 GB)
+            min_age_seconds: Protect clips used within this many seconds from eviction
+        """
+        self.cache_dir = cache_dir or os.getenv("FTG_FOOTAGE_CACHE_DIR", "")
+        self.max_bytes = max_bytes or int(float(os.getenv("FTG_FOOTAGE_CACHE_GB", "200")) * 1024 ** 3)
+        self.min_age_seconds = min_age_seconds or int(float(os.getenv("FTG_FOOTAGE_CACHE_MIN_AGE_MINUTES", "60")) * 60)
+        self.lease_seconds = int(float(os.getenv("FTG_FOOTAGE_CACHE_LEASE_HOURS", "24")) * 3600)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache_dir)
+
+    def _key(self, source_path: str, size: int, mtime: float) -> str:
+        digest = hashlib.sha1(f"{source_path}|{size}|{int(mtime)}".encode('utf-8')).hexdigest()[:20]
+        return digest + os.path.splitext(source_path)[1].lower()
+
+    @contextmanager
+    def _file_lock(self, name: str):
+        """Cross-process lock on a file in the cache directory."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, name), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_json(self, path: str) -> Dict:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_json(self, path: str, data: Dict):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _record(self, **increments):
+        """Add to the shared stats counters."""
+        with self._lock, self._file_lock(LOCK_FILE):
+            stats_path = os.path.join(self.cache_dir, STATS_FILE)
+            stats = self._read_json(stats_path)
+            for name, value in increments.items():
+                stats[name] = stats.get(name, 0) + value
+            self._write_json(stats_path, stats)
+
+    def _lookup(self, source_path: str) -> Optional[str]:
+        """Local path for a valid cached copy of source_path, or None."""
+        stat = os.stat(source_path)
+        local_path = os.path.join(self.cache_dir, self._key(source_path, stat.st_size, stat.st_mtime))
+        if os.path.exists(local_path) and os.path.getsize(local_path) == stat.st_size:
+            return local_path
+        return None
+
+    def _touch(self, local_path: str):
+        # Under the cache lock: meta also holds leases, which a concurrent read-modify-write could drop
+        with self._file_lock(LOCK_FILE):
+            meta_path = local_path + META_SUFFIX
+            meta = self._read_json(meta_path)
+            meta["last_access"] = time.time()
+            self._write_json(meta_path, meta)
+
+    def _is_cached_path(self, path: str) -> bool:
+        return self.enabled and os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.cache_dir)
+
+    def lease(self, local_path: str, holder: str) -> bool:
+        """
+        Protect a cached clip from eviction until release() (e.g. while a queued job still has to read it).
+
+        Args:
+            local_path: Path returned by resolve()/stage() (non-cache paths are ignored)
+            holder: Unique lease holder, e.g. the RQ job ID
+
+        Returns:
+            True if a lease was taken
+        """
+        if not self._is_cached_path(local_path):
+            return False
+        with self._file_lock(LOCK_FILE):
+            if not os.path.exists(local_path):
+                return False
+            meta_path = local_path + META_SUFFIX
+            meta = self._read_json(meta_path)
+            meta.setdefault("leases", {})[holder] = time.time() + self.lease_seconds
+            meta["last_access"] = time.time()
+            self._write_json(meta_path, meta)
+        return True
+
+    def release(self, local_path: str, holder: str):
+        """Drop a lease taken with lease() (no-op if there is none)."""
+        if not self._is_cached_path(local_path):
+            return
+        with self._file_lock(LOCK_FILE):
+            meta_path = local_path + META_SUFFIX
+            meta = self._read_json(meta_path)
+            if meta.get("leases", {}).pop(holder, None) is not None:
+                meta["last_access"] = time.time()
+                self._write_json(meta_path, meta)
+
+    def stage(self, source_path: str) -> Optional[str]:
+        """
+        Copy a source clip into the cache (no-op if already cached).
+
+        Concurrent callers for the same clip wait for the first copy to finish
+        instead of reading the source twice.
+
+        Args:
+            source_path: Footage path on the SMB volume
+
+        Returns:
+            Local path of the cached copy, or None if the cache is disabled or staging failed
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            stat = os.stat(source_path)
+            key = self._key(source_path, stat.st_size, stat.st_mtime)
+            local_path = os.path.join(self.cache_dir, key)
+
+            with self._file_lock(key + ".lock"):
+                if os.path.exists(local_path) and os.path.getsize(local_path) == stat.st_size:
+                    self._touch(local_path)
+                    return local_path
+
+                self._make_room(stat.st_size)
+
+                start_time = time.time()
+                partial_path = local_path + PARTIAL_SUFFIX
+                try:
+                    with open(source_path, 'rb') as src, open(partial_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, 8 * 1024 * 1024)
+                    os.replace(partial_path, local_path)
+                except BaseException:
+                    # _entries() skips partials, so a leftover one would never be counted or evicted
+                    try:
+                        os.remove(partial_path)
+                    except OSError:
+                        pass
+                    raise
+                staging_seconds = time.time() - start_time
+
+                self._write_json(local_path + META_SUFFIX, {
+                    "source_path": source_path,
+                    "bytes": stat.st_size,
+                    "staged_at": time.time(),
+                    "staging_seconds": round(staging_seconds, 2),
+                    "last_access": time.time()
+                })
+
+            self._record(staged=1, bytes_staged=stat.st_size, staging_seconds=staging_seconds)
+            mb_per_second = stat.st_size / 1024 / 1024 / staging_seconds if staging_seconds > 0 else 0
+            print(f"  -> 💾 Staged {os.path.basename(source_path)} to local cache "
+                  f"({stat.st_size / 1024 / 1024:.0f}MB in {staging_seconds:.1f}s, {mb_per_second:.0f}MB/s)")
+            return local_path
+
+        except Exception as e:
+            print(f"  -> ⚠️ Could not stage {source_path} to local cache: {e}")
+            self._record(staging_failures=1)
+            return None
+
+    def resolve(self, source_path: str, stage_on_miss: bool = False) -> str:
+        """
+        Get the path a step should read: the local copy if cached, otherwise the source.
+
+        Args:
+            source_path: Footage path on the SMB volume
+            stage_on_miss: Copy the clip locally first if it isn't cached yet
+
+        Returns:
+            Local cached path on a hit, else the original source path
+        """
+        if not self.enabled:
+            return source_path
+
+        try:
+            local_path = self._lookup(source_path)
+        except OSError:
+            return source_path
+
+        if local_path:
+            self._touch(local_path)
+            self._record(hits=1)
+            print(f"  -> ⚡ Reading from local cache: {local_path}")
+            return local_path
+
+        self._record(misses=1)
+        if stage_on_miss:
+            return self.stage(source_path) or source_path
+        return source_path
+
+    def _entries(self):
+        """Cached clips with their size, last access time and whether a lease is held."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            if name.startswith('.') or name.endswith((META_SUFFIX, PARTIAL_SUFFIX, ".lock", ".tmp")):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            meta = self._read_json(path + META_SUFFIX)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            entries.append({
+                "path": path,
+                "bytes": size,
+                "last_access": meta.get("last_access") or os.path.getmtime(path),
+                "leased": any(expires_at > now for expires_at in meta.get("leases", {}).values())
+            })
+        return entries
+
+    def _staging_bytes(self) -> int:
+        """Bytes already written by copies still in progress (.partial files)."""
+        total = 0
+        if not os.path.isdir(self.cache_dir):
+            return total
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(PARTIAL_SUFFIX):
+                try:
+                    total += os.path.getsize(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+        return total
+
+    def _make_room(self, incoming_bytes: int):
+        """Evict least recently used clips so incoming_bytes fits under the cap."""
+        with self._file_lock(LOCK_FILE):
+            entries = self._entries()
+            # Concurrent stagings count too, or together they could overshoot the cap
+            used = sum(e["bytes"] for e in entries) + self._staging_bytes()
+            now = time.time()
+            evicted = 0
+            evicted_bytes = 0
+
+            for entry in sorted(entries, key=lambda e: e["last_access"]):
+                if used + incoming_bytes <= self.max_bytes:
+                    break
+                if entry["leased"] or now - entry["last_access"] < self.min_age_seconds:
+                    continue
+                for path in (entry["path"], entry["path"] + META_SUFFIX):
+                    if os.path.exists(path):
+                        os.remove(path)
+                used -= entry["bytes"]
+                evicted += 1
+                evicted_bytes += entry["bytes"]
+
+        if evicted:
+            self._record(evictions=evicted, bytes_evicted=evicted_bytes)
+            print(f"  -> 🧹 Evicted {evicted} clips ({evicted_bytes / 1024 ** 3:.2f}GB) from local cache")
+
+    def get_usage(self) -> Dict:
+        """Get cache size, hit rate and staging latency for monitoring."""
+        if not self.enabled:
+            return {"enabled": False}
+
+        entries = self._entries()
+        stats = self._read_json(os.path.join(self.cache_dir, STATS_FILE))
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        staged = stats.get("staged", 0)
+
+        return {
+            "enabled": True,
+            "cache_dir": self.cache_dir,
+            "max_bytes": self.max_bytes,
+            "used_bytes": sum(e["bytes"] for e in entries),
+            "staging_bytes": self._staging_bytes(),
+            "files": len(entries),
+            "leased_files": sum(1 for e in entries if e["leased"]),
+            "hits": stats.get("hits", 0),
+            "misses": stats.get("misses", 0),
+            "hit_rate_percent": round(stats.get("hits", 0) / lookups * 100, 1) if lookups else 0,
+            "staged": staged,
+            "staging_failures": stats.get("staging_failures", 0),
+            "avg_staging_seconds": round(stats.get("staging_seconds", 0) / staged, 1) if staged else 0,
+            "avg_staging_mb_per_second": round(stats.get("bytes_staged", 0) / 1024 / 1024 / stats["staging_seconds"], 1)
+                if stats.get("staging_seconds") else 0,
+            "evictions": stats.get("evictions", 0)
+        }
+
+
+# Global footage cache instance
+global_footage_cache = FootageCache()
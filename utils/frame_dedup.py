@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Perceptual near-duplicate pruning for sampled video frames.
+Collapses runs of visually identical frames (static interviews, locked-off shots)
+before they are sent to Gemini, while keeping a record of every dropped timestamp.
+"""
+
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis matrix (size x size)."""
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0, :] *= 1 / np.sqrt(2)
+    return (matrix * np.sqrt(2 / size)).astype(np.float32)
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def load_frame_arrays(image_paths: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Load frames once at the small resolutions needed for hashing.
+
+    Args:
+        image_paths: Frame JPEG paths
+
+    Returns:
+        Tuple of (dhash_input (N,8,9), phash_input (N,32,32), histograms (N,48))
+    """
+    dhash_input = np.empty((len(image_paths), 8, 9), dtype=np.int16)
+    phash_input = np.empty((len(image_paths), 32, 32), dtype=np.float32)
+    histograms = np.empty((len(image_paths), 48), dtype=np.float32)
+
+    for i, path in enumerate(image_paths):
+        with Image.open(path) as img:
+            img.draft('RGB', (64, 64))  # JPEG DCT scaling - no full decode needed
+            rgb = img.convert('RGB').resize((64, 64), Image.BILINEAR)
+
+        gray = rgb.convert('L')
+        dhash_input[i] = np.asarray(gray.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+        phash_input[i] = np.asarray(gray.resize((32, 32), Image.BILINEAR), dtype=np.float32)
+
+        # 16-bin histogram per RGB channel, normalised to sum to 1 per channel
+        channels = np.asarray(rgb, dtype=np.uint8).reshape(-1, 3) >> 4
+        counts = np.stack([np.bincount(channels[:, c], minlength=16) for c in range(3)])
+        histograms[i] = (counts / channels.shape[0]).ravel()
+
+    return dhash_input, phash_input, histograms
+
+
+def dhash_bits(dhash_input: np.ndarray) -> np.ndarray:
+    """Difference hash for a stack of (N,8,9) grayscale images -> (N,64) bool."""
+    return (dhash_input[:, :, 1:] > dhash_input[:, :, :-1]).reshape(len(dhash_input), -1)
+
+
+def phash_bits(phash_input: np.ndarray) -> np.ndarray:
+    """DCT perceptual hash for a stack of (N,32,32) grayscale images -> (N,64) bool."""
+    dct = np.einsum('ij,njk,lk->nil', _DCT_32, phash_input, _DCT_32)
+    low = dct[:, :8, :8].reshape(len(phash_input), -1)
+    # Median excludes the DC term so overall brightness doesn't dominate
+    medians = np.median(low[:, 1:], axis=1, keepdims=True)
+    return low > medians
+
+
+def hamming_matrix(bits: np.ndarray) -> np.ndarray:
+    """Pairwise Hamming distances between (N,64) bool hashes -> (N,N) int."""
+    return np.count_nonzero(bits[:, None, :] != bits[None, :, :], axis=2)
+
+
+def histogram_distance_matrix(histograms: np.ndarray) -> np.ndarray:
+    """Pairwise total-variation distance between colour histograms -> (N,N) in [0,1]."""
+    return np.abs(histograms[:, None, :] - histograms[None, :, :]).sum(axis=2) / 6.0
+
+
+def prune_near_duplicates(
+    frames: Dict[str, Dict],
+    dhash_threshold: int = 6,
+    phash_threshold: int = 8,
+    histogram_threshold: float = 0.08,
+    max_gap_seconds: float = 30.0,
+    delete_dropped: bool = True
+) -> Tuple[Dict[str, Dict], Dict[str, Dict], Dict]:
+    """
+    Collapse consecutive near-duplicate frames into the first frame of each run.
+
+    A frame is dropped when dHash, pHash AND histogram distance to the last kept
+    frame are all under threshold. A frame is always kept once max_gap_seconds
+    have passed since the last kept frame, so long static shots still get
+    periodic coverage.
+
+    Args:
+        frames: Frame metadata from FrameSampler.extract_frames
+        dhash_threshold: Max dHash Hamming distance (of 64 bits) for a duplicate
+        phash_threshold: Max pHash Hamming distance (of 64 bits) for a duplicate
+        histogram_threshold: Max colour histogram distance (0-1) for a duplicate
+        max_gap_seconds: Force a kept frame at least this often
+        delete_dropped: Remove dropped frame JPEGs from disk
+
+    Returns:
+        Tuple of (kept_frames, dropped_frames, stats). Kept frames are renumbered
+        1..N and carry "merged_timestamps" for every dropped frame they stand in for.
+        Dropped frames record their timestamp and the "kept_frame" they map to.
+    """
+    ordered = sorted(frames.items(), key=lambda item: item[1]['timestamp_seconds'])
+    stats = {
+        "frames_in": len(ordered),
+        "frames_kept": len(ordered),
+        "frames_dropped": 0,
+        "bytes_in": sum(data.get('file_size_bytes', 0) for _, data in ordered),
+        "bytes_kept": sum(data.get('file_size_bytes', 0) for _, data in ordered)
+    }
+
+    if len(ordered) < 2:
+        return dict(ordered), {}, stats
+
+    dhash_input, phash_input, histograms = load_frame_arrays([data['file_path'] for _, data in ordered])
+    dhash_dist = hamming_matrix(dhash_bits(dhash_input))
+    phash_dist = hamming_matrix(phash_bits(phash_input))
+    hist_dist = histogram_distance_matrix(histograms)
+
+    kept_indices = [0]
+    dropped_to = {}  # dropped index -> kept index
+
+    for i in range(1, len(ordered)):
+        last = kept_indices[-1]
+        gap = ordered[i][1]['timestamp_seconds'] - ordered[last][1]['timestamp_seconds']
+        is_duplicate = (
+            dhash_dist[i, last] <= dhash_threshold and
+            phash_dist[i, last] <= phash_threshold and
+            hist_dist[i, last] <= histogram_threshold
+        )
+
+        if is_duplicate and gap < max_gap_seconds:
+            dropped_to[i] = last
+        else:
+            kept_indices.append(i)
+
+    kept_frames = {}
+    for new_number, index in enumerate(kept_indices, 1):
+        filename, data = ordered[index]
+        kept_frames[filename] = {**data, "frame_number": new_number, "merged_timestamps": []}
+
+    dropped_frames = {}
+    for index, kept_index in dropped_to.items():
+        filename, data = ordered[index]
+        kept_filename = ordered[kept_index][0]
+        kept_frames[kept_filename]["merged_timestamps"].append(data['timestamp_seconds'])
+        dropped_frames[filename] = {
+            "timestamp_seconds": data['timestamp_seconds'],
+            "timecode_formatted": data['timecode_formatted'],
+            "kept_frame": kept_filename,
+            "dhash_distance": int(dhash_dist[index, kept_index]),
+            "phash_distance": int(phash_dist[index, kept_index]),
+            "histogram_distance": round(float(hist_dist[index, kept_index]), 4)
+        }
+
+        if delete_dropped and os.path.exists(data['file_path']):
+            os.remove(data['file_path'])
+
+    stats["frames_kept"] = len(kept_frames)
+    stats["frames_dropped"] = len(dropped_frames)
+    stats["bytes_kept"] = sum(data.get('file_size_bytes', 0) for data in kept_frames.values())
+
+    return kept_frames, dropped_frames, stats
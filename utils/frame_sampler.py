@@ -6,11 +6,12 @@ Uses ffmpeg scene detection and adaptive sampling to extract representative fram
 
 import os
 import subprocess
-import json
 import math
 from pathlib import Path
 from typing import List, Dict, Tuple
 
+from utils.media_probe import global_probe_cache
+
 
 class FrameSampler:
     """Extract frames from video using intelligent sampling strategies."""
@@ -339,35 +340,12 @@ def get_video_info(video_path: str) -> Tuple[float, float]:
         Tuple of (duration, framerate)
     """
     try:
-        # Find ffprobe
-        ffprobe_paths = ['/opt/homebrew/bin/ffprobe', '/usr/local/bin/ffprobe', 'ffprobe']
-        ffprobe_cmd = None
-        
-        for path in ffprobe_paths:
-            if os.path.exists(path) or path == 'ffprobe':
-                ffprobe_cmd = path
-                break
-        
-        if not ffprobe_cmd:
-            raise RuntimeError("FFprobe not found")
-        
-        # Get duration and streams info
-        cmd = [
-            ffprobe_cmd,
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            video_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        # Cached ffprobe format/streams (shared with audio detection)
+        data = global_probe_cache.probe(video_path)
         
-        if result.returncode != 0:
+        if not data:
             return None, None
         
-        # Parse JSON output
-        data = json.loads(result.stdout)
         duration = float(data['format']['duration'])
         
         # Find video stream and get framerate
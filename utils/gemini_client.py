@@ -2,6 +2,13 @@
 """
 Global Gemini client with rate limiting and retry logic.
 Designed for multi-image video frame analysis with structured JSON output.
+
+Rate limits are shared across processes through Redis (see utils/rate_limiter.py),
+per API key and model.
+
+Configuration (env):
+- GEMINI_RPM: Requests per minute per key/model (default: 15)
+- GEMINI_TPM: Tokens per minute per key/model (default: 1000000, 0 = unlimited)
 """
 
 import time
@@ -10,8 +17,11 @@ import warnings
 import os
 import base64
 from datetime import datetime
-from pathlib import Path
-from collections import deque
+from types import SimpleNamespace
+
+from utils.rate_limiter import SharedRateLimiter
+from utils.llm_response_cache import global_llm_cache, is_cacheable_response
+from utils.llm_usage import global_llm_usage
 
 # Suppress urllib3 LibreSSL warning
 warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.1.1+.*', category=Warning)
@@ -24,13 +34,36 @@ except ImportError:
     genai = None
 
 
+class CachedGeminiResponse:
+    """Stand-in for a Gemini response served from the response cache (.text and .usage_metadata)."""
+    
+    def __init__(self, text: str, usage: dict):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=usage.get("input_tokens", 0),
+            candidates_token_count=usage.get("output_tokens", 0),
+            total_token_count=usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+        )
+        self.from_cache = True
+
+
+def finish_reason_name(response) -> str:
+    """Finish reason of the first candidate as a name ("STOP", "MAX_TOKENS", "SAFETY", ...); "" if unknown."""
+    try:
+        finish_reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return ""
+    return getattr(finish_reason, "name", None) or str(finish_reason)
+
+
 class GlobalGeminiClient:
     """Global Gemini client with built-in rate limiting and retry logic."""
     
     def __init__(self):
         # Gemini 2.0 rate limits (adjust based on your tier)
-        self.requests_per_minute = 15  # Free tier: 15 RPM, adjust for paid tier
-        self.request_window = deque()
+        self.requests_per_minute = int(os.getenv("GEMINI_RPM", "15"))  # Free tier: 15 RPM
+        self.tokens_per_minute = int(os.getenv("GEMINI_TPM", "1000000"))
+        self.rate_limiter = None
         self.lock = threading.Lock()
         self.api_key = None
         self.model_name = "gemini-2.0-pro-exp"  # Default to Pro for quality
@@ -45,43 +78,21 @@ class GlobalGeminiClient:
             self.api_key = api_key
             self.model_name = model_name
             genai.configure(api_key=api_key)
+            self.rate_limiter = SharedRateLimiter(
+                "gemini", api_key, model_name, self.requests_per_minute, self.tokens_per_minute
+            )
             self.configured = True
             print(f"🔑 Configured Gemini API with model: {model_name}")
     
-    def _clean_window(self):
-        """Remove entries older than 1 minute from tracking window."""
-        cutoff = time.time() - 60
-        while self.request_window and self.request_window[0] < cutoff:
-            self.request_window.popleft()
-    
-    def _current_usage(self):
-        """Get current request count in the last minute."""
-        self._clean_window()
-        return len(self.request_window)
-    
-    def _can_make_request(self) -> bool:
-        """Check if we can make a request without exceeding rate limits."""
-        current_requests = self._current_usage()
-        return current_requests < self.requests_per_minute
-    
-    def _record_usage(self):
-        """Record a request timestamp."""
-        self.request_window.append(time.time())
-    
-    def _wait_for_capacity(self):
-        """Wait until we have capacity to make a request."""
-        while not self._can_make_request():
-            current_requests = self._current_usage()
-            print(f"⏳ Rate limit: {current_requests}/{self.requests_per_minute} requests/min, waiting...")
-            time.sleep(5)
-    
     def generate_content(
         self,
         prompt: str,
         images: list = None,
         response_schema: dict = None,
         max_retries: int = 3,
-        timeout: int = 120
+        timeout: int = 120,
+        use_cache: bool = True,
+        image_profile: str = "gemini"
     ):
         """
         Generate content with Gemini, supporting multi-image input and structured output.
@@ -92,38 +103,32 @@ class GlobalGeminiClient:
             response_schema: Optional JSON schema for structured output
             max_retries: Maximum number of retry attempts
             timeout: Request timeout in seconds
+            use_cache: Serve identical requests from the response cache (False forces a fresh call;
+                pass it when retrying because the previous response was unusable)
+            image_profile: Image payload profile ("gemini", or "gemini_sheet" for contact sheets)
             
         Returns:
-            Response object from Gemini API
+            Response object from Gemini API (CachedGeminiResponse on a cache hit)
         """
         if not self.configured:
             raise RuntimeError("Gemini client not configured. Call set_api_key() first.")
         
-        # Wait for rate limit capacity
-        with self.lock:
-            self._wait_for_capacity()
-            self._record_usage()
-        
         # Prepare content parts
         content_parts = [prompt]
         
-        # Add images if provided
+        image_hashes = []
+        image_tokens = 0
+        
+        # Add images if provided (paths or PIL Images), sized and JPEG-encoded once for Gemini
         if images:
             print(f"📸 Preparing {len(images)} images for Gemini...")
-            for img_path in images:
-                if isinstance(img_path, (str, Path)):
-                    # Load image from file
-                    with open(img_path, 'rb') as f:
-                        img_data = f.read()
-                    
-                    # Gemini expects images as PIL Image or inline data
-                    from PIL import Image
-                    import io
-                    img = Image.open(io.BytesIO(img_data))
-                    content_parts.append(img)
-                else:
-                    # Assume it's already a PIL Image
-                    content_parts.append(img_path)
+            from utils.image_payload import global_image_payloads
+            
+            for payload in global_image_payloads.build_many(images, image_profile):
+                # Inline data goes to the API as-is (no SDK re-encode)
+                content_parts.append({"mime_type": payload["mime_type"], "data": payload["data"]})
+                image_hashes.append(payload["sha256"])
+                image_tokens += payload["estimated_tokens"]
         
         # Configure model
         generation_config = {
@@ -145,9 +150,32 @@ class GlobalGeminiClient:
             HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
         }
         
+        # Identical request already answered? (same model, prompt, schema, images, temperature)
+        cache_key = global_llm_cache.make_key(
+            "gemini", self.model_name, prompt, response_schema, image_hashes, generation_config["temperature"]
+        )
+        if use_cache:
+            cached = global_llm_cache.get(cache_key)
+            if cached and not is_cacheable_response(cached["response"].get("text"), "stop", bool(response_schema)):
+                print(f"  -> ⚠️ Ignoring incomplete cached response ({cache_key[:12]})")
+                cached = None
+            if cached:
+                global_llm_usage.record(
+                    "gemini", self.model_name, cached["usage"].get("input_tokens", 0),
+                    cached["usage"].get("output_tokens", 0), image_tokens, cache_hit=True
+                )
+                return CachedGeminiResponse(cached["response"]["text"], cached["usage"])
+        
+        estimated_tokens = len(prompt) // 4 + image_tokens
+        start_time = time.time()
+        
         # Retry logic
         for attempt in range(max_retries):
+            # Every attempt (including retries) goes through the shared limiter
+            reservation = self.rate_limiter.acquire(estimated_tokens)
+            
             try:
+                attempt_start = time.time()
                 print(f"🔄 Gemini API call attempt {attempt + 1}/{max_retries}")
                 
                 model = genai.GenerativeModel(
@@ -161,16 +189,44 @@ class GlobalGeminiClient:
                     request_options={"timeout": timeout}
                 )
                 
+                latency = time.time() - attempt_start
                 print(f"✅ Gemini response received successfully")
                 
-                # Log usage if available
+                # Log usage if available (and replace the estimate in the shared window)
                 if hasattr(response, 'usage_metadata'):
-                    print(f"📊 Tokens: {response.usage_metadata.total_token_count}")
+                    print(f"📊 Tokens: {response.usage_metadata.total_token_count} (estimated: {estimated_tokens})")
+                    self.rate_limiter.reconcile(reservation, response.usage_metadata.total_token_count)
                 
+                usage = getattr(response, 'usage_metadata', None)
+                input_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+                output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+                try:
+                    response_text = response.text
+                except ValueError:
+                    response_text = None  # Blocked / empty candidates - never cache those
+                # Only complete responses are cached (not truncated at MAX_TOKENS, valid JSON for a schema)
+                if is_cacheable_response(response_text, finish_reason_name(response), bool(response_schema)):
+                    global_llm_cache.set(
+                        cache_key, self.model_name, {"text": response_text},
+                        input_tokens=input_tokens, output_tokens=output_tokens
+                    )
+                
+                global_llm_usage.record(
+                    "gemini", self.model_name, input_tokens, output_tokens, image_tokens,
+                    latency_seconds=latency, total_seconds=time.time() - start_time, retries=attempt,
+                    success=bool(response_text), error=None if response_text else "Empty or blocked response"
+                )
                 return response
                 
             except Exception as e:
+                # A failed call used no tokens; free the estimate before retrying or raising
+                self.rate_limiter.reconcile(reservation, 0)
                 error_str = str(e).lower()
+                if attempt == max_retries - 1:
+                    global_llm_usage.record(
+                        "gemini", self.model_name, image_tokens=image_tokens,
+                        total_seconds=time.time() - start_time, retries=attempt, success=False, error=str(e)
+                    )
                 
                 # Handle rate limiting
                 if "429" in error_str or "quota" in error_str or "rate" in error_str:
@@ -202,16 +258,24 @@ class GlobalGeminiClient:
         raise Exception(f"Gemini API call failed after {max_retries} attempts")
     
     def get_usage_stats(self):
-        """Get current usage statistics."""
-        with self.lock:
-            current_requests = self._current_usage()
-            
-            return {
-                "requests_per_minute": self.requests_per_minute,
-                "current_requests": current_requests,
-                "requests_remaining": max(0, self.requests_per_minute - current_requests),
-                "utilization_percent": (current_requests / self.requests_per_minute) * 100
-            }
+        """Get current usage statistics (shared across all processes using this key/model)."""
+        if not self.rate_limiter:
+            return {"requests_per_minute": self.requests_per_minute, "current_requests": 0,
+                    "requests_remaining": self.requests_per_minute, "utilization_percent": 0}
+        
+        usage = self.rate_limiter.get_usage()
+        current_requests = usage["requests"]
+        
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "current_requests": current_requests,
+            "requests_remaining": max(0, self.requests_per_minute - current_requests),
+            "utilization_percent": (current_requests / self.requests_per_minute) * 100 if self.requests_per_minute else 0,
+            "tokens_per_minute": self.tokens_per_minute,
+            "current_tokens": usage["tokens"],
+            "shared": usage["shared"],
+            **self.rate_limiter.get_stats()
+        }
 
 
 # Global client instance
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Image Payload - Provider-sized, pre-encoded images for LLM vision calls
+
+Frames and stills used to go to the LLMs at full size: Gemini got PIL images
+that the SDK re-encoded, OpenAI got whole files base64-encoded. Both providers
+bill images by resolution and downscale server-side anyway, so the extra
+pixels only cost upload time and tokens.
+
+This utility downsizes each image to the provider's token-optimal resolution,
+encodes it once as JPEG (upright: EXIF orientation is applied, since the
+re-encoded JPEG carries no orientation tag), and caches the encoded bytes by source content hash
+(in memory and on disk) so retries and re-runs skip the work. Every payload
+reports its size and estimated image tokens.
+
+Configuration (env):
+- FTG_IMAGE_PAYLOAD_CACHE_DIR: On-disk cache of encoded payloads (default: /private/tmp/ftg_image_payloads)
+- FTG_IMAGE_PAYLOAD_QUALITY: JPEG quality for re-encoded images (default: 85)
+"""
+
+import io
+import os
+import math
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Union
+
+from PIL import Image, ImageOps
+
+# Token-optimal sizes per provider
+# - openai: "high" detail scales to fit 2048x2048, then the short side to 768, and bills
+#   85 + 170 per 512px tile; a long edge of 1024 keeps typical 4:3 / 3:2 images at 4 tiles.
+#   "low" detail is a flat 85 tokens at 512x512.
+# - gemini: 2.0 models bill 258 tokens per 768x768 tile (or one 258 block when both sides <= 384).
+#   "gemini_sheet" allows 2x2 tiles for contact sheets, which carry several frames each.
+PROVIDER_PROFILES = {
+    "openai": {"max_long_edge": 1024, "max_short_edge": 768},
+    "openai_low": {"max_long_edge": 512, "max_short_edge": 512},
+    "gemini": {"max_long_edge": 768, "max_short_edge": 768},
+    "gemini_sheet": {"max_long_edge": 1536, "max_short_edge": 1536},
+}
+
+MEMORY_CACHE_ITEMS = 256
+EXIF_ORIENTATION = 0x0112
+PAYLOAD_VERSION = 2  # Part of the cache key; bumped when encoding changes (2: EXIF orientation applied)
+
+
+def estimate_image_tokens(provider: str, width: int, height: int) -> int:
+    """
+    Estimate the tokens a provider bills for an image of this size.
+
+    Args:
+        provider: Profile name (see PROVIDER_PROFILES)
+        width: Image width in pixels
+        height: Image height in pixels
+
+    Returns:
+        Estimated image tokens
+    """
+    if provider == "openai_low":
+        return 85
+
+    if provider == "openai":
+        # Fit in 2048x2048, then short side to 768
+        scale = min(1.0, 2048 / max(width, height))
+        width, height = width * scale, height * scale
+        scale = min(1.0, 768 / min(width, height))
+        width, height = width * scale, height * scale
+        return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+    if provider.startswith("gemini"):
+        if width <= 384 and height <= 384:
+            return 258
+        return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+
+    raise ValueError(f"Unknown image payload provider: {provider}")
+
+
+def target_size(provider: str, width: int, height: int):
+    """Size an image is scaled down to for a provider (never scaled up)."""
+    profile = PROVIDER_PROFILES[provider]
+    long_edge, short_edge = max(width, height), min(width, height)
+    scale = min(1.0, profile["max_long_edge"] / long_edge, profile["max_short_edge"] / short_edge)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class ImagePayloadBuilder:
+    """Builds and caches provider-sized JPEG payloads."""
+
+    def __init__(self, cache_dir: str = None, quality: int = None):
+        """
+        Initialize payload builder.
+
+        Args:
+            cache_dir: On-disk payload cache (default: FTG_IMAGE_PAYLOAD_CACHE_DIR env)
+            quality: JPEG quality for re-encoded images (default: FTG_IMAGE_PAYLOAD_QUALITY env or 85)
+        """
+        self.cache_dir = cache_dir or os.getenv("FTG_IMAGE_PAYLOAD_CACHE_DIR", "/private/tmp/ftg_image_payloads")
+        self.quality = quality or int(os.getenv("FTG_IMAGE_PAYLOAD_QUALITY", "85"))
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "payloads": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "encoded": 0,
+            "passthrough": 0,
+            "source_bytes": 0,
+            "payload_bytes": 0,
+            "estimated_tokens": 0
+        }
+
+    def _encode(self, img: Image.Image, provider: str, source_data: bytes = None) -> Dict:
+        """Rotate upright, resize and JPEG-encode one image (or pass a right-sized, upright JPEG through untouched)."""
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+        if orientation != 1:
+            # The encoded payload has no EXIF, so bake the camera rotation into the pixels
+            img = ImageOps.exif_transpose(img)
+        width, height = target_size(provider, *img.size)
+
+        if source_data and img.format == "JPEG" and orientation == 1 and (width, height) == img.size:
+            # Already small enough: don't re-encode (saves time and a generation of JPEG loss)
+            data, passthrough = source_data, True
+        else:
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            if (width, height) != img.size:
+                img = img.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+            data, passthrough = buffer.getvalue(), False
+
+        return {
+            "data": data,
+            "width": width,
+            "height": height,
+            "passthrough": passthrough
+        }
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.jpg")
+
+    def build(self, source: Union[str, Path, Image.Image], provider: str) -> Dict:
+        """
+        Get a provider-sized JPEG payload for an image.
+
+        Args:
+            source: Image file path or PIL Image
+            provider: Profile name (see PROVIDER_PROFILES)
+
+        Returns:
+            Dict with data (JPEG bytes), base64, mime_type, width, height,
+            sha256 (of the source), source_bytes, payload_bytes, estimated_tokens
+        """
+        if provider not in PROVIDER_PROFILES:
+            raise ValueError(f"Unknown image payload provider: {provider}")
+
+        if isinstance(source, (str, Path)):
+            with open(source, 'rb') as f:
+                source_data = f.read()
+            if not source_data:
+                raise ValueError(f"Image file is empty: {source}")
+            source_hash = hashlib.sha256(source_data).hexdigest()
+        else:
+            source_data = None
+            source_hash = hashlib.sha256(source.tobytes() + repr((source.mode, source.size)).encode()).hexdigest()
+
+        key = hashlib.sha256(f"{source_hash}|{provider}|{self.quality}|{PAYLOAD_VERSION}".encode()).hexdigest()[:32]
+        source_bytes = len(source_data) if source_data is not None else 0
+
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+
+        if payload is None:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    data = f.read()
+                with Image.open(io.BytesIO(data)) as cached:
+                    width, height = cached.size
+                payload = {"data": data, "width": width, "height": height, "passthrough": False}
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+            except OSError:
+                if source_data is not None:
+                    with Image.open(io.BytesIO(source_data)) as img:
+                        img.load()
+                        payload = self._encode(img, provider, source_data)
+                else:
+                    payload = self._encode(source, provider)
+
+                with self._lock:
+                    self.stats["passthrough" if payload["passthrough"] else "encoded"] += 1
+
+                try:
+                    os.makedirs(os.path.dirname(self._disk_path(key)), exist_ok=True)
+                    tmp_path = self._disk_path(key) + f".{os.getpid()}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(payload["data"])
+                    os.replace(tmp_path, self._disk_path(key))
+                except OSError as e:
+                    print(f"  -> Warning: Could not write image payload cache: {e}")
+
+            with self._lock:
+                self._memory[key] = payload
+                while len(self._memory) > MEMORY_CACHE_ITEMS:
+                    self._memory.popitem(last=False)
+
+        estimated_tokens = estimate_image_tokens(provider, payload["width"], payload["height"])
+        with self._lock:
+            self.stats["payloads"] += 1
+            self.stats["source_bytes"] += source_bytes
+            self.stats["payload_bytes"] += len(payload["data"])
+            self.stats["estimated_tokens"] += estimated_tokens
+
+        return {
+            "data": payload["data"],
+            "base64": base64.b64encode(payload["data"]).decode('utf-8'),
+            "mime_type": "image/jpeg",
+            "width": payload["width"],
+            "height": payload["height"],
+            "sha256": source_hash,
+            "source_bytes": source_bytes,
+            "payload_bytes": len(payload["data"]),
+            "estimated_tokens": estimated_tokens
+        }
+
+    def build_many(self, sources: List, provider: str) -> List[Dict]:
+        """Build payloads for several images and print one summary line."""
+        payloads = [self.build(source, provider) for source in sources]
+        summarize_payloads(payloads)
+        return payloads
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return self.stats.copy()
+
+
+def summarize_payloads(payloads: List[Dict]):
+    """Print bytes sent (vs source) and estimated image tokens for a request."""
+    source_bytes = sum(p["source_bytes"] for p in payloads)
+    payload_bytes = sum(p["payload_bytes"] for p in payloads)
+    tokens = sum(p["estimated_tokens"] for p in payloads)
+    source_note = f" (from {source_bytes / 1024:.0f}KB)" if source_bytes else ""
+    print(f"  -> 🖼️ {len(payloads)} image(s): {payload_bytes / 1024:.0f}KB{source_note}, ~{tokens} image tokens")
+
+
+# Global payload builder instance
+global_image_payloads = ImagePayloadBuilder()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+LLM Pricing - Approximate list prices for cost reporting
+
+Used to turn token counts into dollar figures for monitoring (cache savings,
+per-step spend). Prices are USD per million tokens and only need to be close
+enough for dashboards; override them with FTG_LLM_PRICES_JSON, e.g.
+'{"gpt-4o": [2.5, 10.0]}'.
+"""
+
+import os
+import json
+from typing import Tuple
+
+# model prefix -> (input $/1M tokens, output $/1M tokens); longest matching prefix wins
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-pro": (1.25, 10.00),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-pro": (1.25, 5.00),
+}
+
+try:
+    MODEL_PRICES.update({model: tuple(prices) for model, prices in json.loads(os.getenv("FTG_LLM_PRICES_JSON", "{}")).items()})
+except ValueError:
+    print("⚠️ FTG_LLM_PRICES_JSON is not valid JSON - using default prices")
+
+
+def get_model_prices(model: str) -> Tuple[float, float]:
+    """(input, output) USD per million tokens for a model, (0, 0) if unknown."""
+    model = (model or "").lower().replace("models/", "")
+    matches = [prefix for prefix in MODEL_PRICES if model.startswith(prefix)]
+    if not matches:
+        return 0.0, 0.0
+    return MODEL_PRICES[max(matches, key=len)]
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """
+    Approximate USD cost of one call.
+
+    Args:
+        model: Model name
+        input_tokens: Prompt tokens (text + images)
+        output_tokens: Completion tokens
+
+    Returns:
+        Cost in USD (0 for unknown models)
+    """
+    input_price, output_price = get_model_prices(model)
+    return ((input_tokens or 0) * input_price + (output_tokens or 0) * output_price) / 1_000_000
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache - Content-addressed cache of Gemini/OpenAI responses
+
+Retries, force-resumes and reprocessing scripts send the same prompt with the
+same images again and pay for it again. Responses are stored on local disk
+under a hash of everything that determines the output (provider, model,
+prompt/messages, response schema, image content and temperature), so an
+identical request is answered from disk. Total size is capped and the least
+recently used entries are evicted first.
+
+Only complete, usable responses are stored (and served): content present,
+generation finished normally (not truncated at the token limit) and, when JSON
+was requested, valid JSON. Otherwise a caller's retry would just get the same
+bad response back.
+
+Hit counts and the tokens/dollars saved are kept in a stats file next to the
+cache so the API process can report numbers from the worker processes.
+
+Configuration (env):
+- FTG_LLM_CACHE: Set to 0 to disable the cache entirely (default: 1)
+- FTG_LLM_CACHE_DIR: Cache directory (default: /private/tmp/ftg_llm_cache)
+- FTG_LLM_CACHE_MB: Size cap (default: 1024)
+- FTG_LLM_CACHE_REFRESH: Set to 1 to skip lookups (fresh calls, results still stored) for
+  forced regeneration, e.g. a reprocess run (default: 0)
+"""
+
+import os
+import json
+import time
+import fcntl
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from utils.llm_pricing import estimate_cost
+
+LOCK_FILE = ".llm_cache.lock"
+STATS_FILE = ".llm_cache_stats.json"
+EVICT_EVERY_STORES = 50  # the size check walks the whole cache, so only run it every N writes (across processes)
+
+
+def content_hash(data: bytes) -> str:
+    """sha256 of raw content (used for images in cache keys)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_cacheable_response(text: Optional[str], finish_reason: Optional[str], expect_json: bool = False) -> bool:
+    """
+    Whether a response is complete and usable enough to cache.
+
+    Args:
+        text: Response text (None for null content / blocked responses)
+        finish_reason: Provider finish reason ("stop" / "STOP"); anything else
+            (length / MAX_TOKENS, content filter, safety) is not cached
+        expect_json: JSON output was requested, so the text must parse
+
+    Returns:
+        True if the response may be stored and served from the cache
+    """
+    if not text or str(finish_reason or "").lower() != "stop":
+        return False
+    if expect_json:
+        try:
+            json.loads(text)
+        except ValueError:
+            return False
+    return True
+
+
+class LLMResponseCache:
+    """Size-capped LRU cache of LLM responses on local disk."""
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        """
+        Initialize response cache.
+
+        Args:
+            cache_dir: Cache directory (default: FTG_LLM_CACHE_DIR env or /private/tmp/ftg_llm_cache)
+            max_bytes: Size cap (default: FTG_LLM_CACHE_MB env or 1024 MB)
+        """
+        self.enabled = os.getenv("FTG_LLM_CACHE", "1") != "0"
+        self.cache_dir = cache_dir or os.getenv("FTG_LLM_CACHE_DIR", "/private/tmp/ftg_llm_cache")
+        self.max_bytes = max_bytes or int(float(os.getenv("FTG_LLM_CACHE_MB", "1024")) * 1024 * 1024)
+        self.refresh = os.getenv("FTG_LLM_CACHE_REFRESH", "0") == "1"
+        self._lock = threading.Lock()
+
+    def make_key(self, provider: str, model: str, prompt: Any, response_schema: Any = None,
+                 image_hashes: list = None, temperature: float = None, params: dict = None) -> str:
+        """
+        Build the cache key for a request.
+
+        Args:
+            provider: "gemini" or "openai"
+            model: Model name
+            prompt: Prompt text or chat messages (JSON-serializable)
+            response_schema: Response schema / response_format
+            image_hashes: Content hashes of attached images, in order
+            temperature: Sampling temperature
+            params: Other sampling parameters that change the output (top_p, max_tokens, seed, ...)
+
+        Returns:
+            Hex digest identifying the request
+        """
+        material = json.dumps({
+            "provider": provider,
+            "model": model,
+            "prompt": prompt,
+            "response_schema": response_schema,
+            "image_hashes": image_hashes or [],
+            "temperature": temperature,
+            **({"params": params} if params else {})
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    @contextmanager
+    def _file_lock(self):
+        """Cross-process lock on the cache directory."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._lock, open(os.path.join(self.cache_dir, LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_stats(self) -> Dict:
+        try:
+            with open(os.path.join(self.cache_dir, STATS_FILE), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record(self, **increments) -> Dict:
+        """Add to the shared stats counters; returns the updated counters."""
+        stats = {}
+        try:
+            with self._file_lock():
+                stats = self._read_stats()
+                for name, value in increments.items():
+                    stats[name] = stats.get(name, 0) + value
+                stats_path = os.path.join(self.cache_dir, STATS_FILE)
+                with open(stats_path + ".tmp", 'w') as f:
+                    json.dump(stats, f)
+                os.replace(stats_path + ".tmp", stats_path)
+        except OSError as e:
+            print(f"  -> Warning: Could not update LLM cache stats: {e}")
+        return stats
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached response.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Stored entry ({"model", "usage", "response"}) or None on a miss
+        """
+        if not self.enabled or self.refresh:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            os.utime(path)  # LRU order follows mtime
+        except (OSError, ValueError):
+            self._record(misses=1)
+            return None
+
+        usage = entry.get("usage", {})
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        self._record(
+            hits=1,
+            tokens_saved=input_tokens + output_tokens,
+            dollars_saved=estimate_cost(entry.get("model"), input_tokens, output_tokens)
+        )
+        print(f"  -> ⚡ LLM response cache hit ({key[:12]}, {input_tokens + output_tokens} tokens saved)")
+        return entry
+
+    def set(self, key: str, model: str, response: Any, input_tokens: int = 0, output_tokens: int = 0):
+        """
+        Store a response.
+
+        Args:
+            key: Key from make_key()
+            model: Model that produced the response
+            response: JSON-serializable response payload
+            input_tokens: Prompt tokens the call used
+            output_tokens: Completion tokens the call used
+        """
+        if not self.enabled:
+            return
+
+        entry = {
+            "model": model,
+            "created_at": time.time(),
+            "usage": {"input_tokens": input_tokens or 0, "output_tokens": output_tokens or 0},
+            "response": response
+        }
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + f".{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            stats = self._record(stores=1)
+            if stats.get("stores", 0) % EVICT_EVERY_STORES == 0:
+                self._evict()
+        except (OSError, TypeError) as e:
+            print(f"  -> Warning: Could not write LLM response cache: {e}")
+
+    def _entries(self):
+        """Cached responses with size and last access (mtime)."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if shard.startswith('.') or not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is under its size cap."""
+        with self._file_lock():
+            entries = self._entries()
+            used = sum(size for _, size, _ in entries)
+            evicted = 0
+            for _, size, path in sorted(entries):
+                if used <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                used -= size
+                evicted += 1
+
+        if evicted:
+            self._record(evictions=evicted)
+
+    def get_usage(self) -> Dict:
+        """Get cache size, hit rate and savings for monitoring."""
+        if not self.enabled:
+            return {"enabled": False}
+
+        entries = self._entries()
+        stats = self._read_stats()
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+
+        return {
+            "enabled": True,
+            "cache_dir": self.cache_dir,
+            "max_bytes": self.max_bytes,
+            "used_bytes": sum(size for _, size, _ in entries),
+            "entries": len(entries),
+            "hits": stats.get("hits", 0),
+            "misses": stats.get("misses", 0),
+            "hit_rate_percent": round(stats.get("hits", 0) / lookups * 100, 1) if lookups else 0,
+            "stores": stats.get("stores", 0),
+            "evictions": stats.get("evictions", 0),
+            "tokens_saved": stats.get("tokens_saved", 0),
+            "dollars_saved": round(stats.get("dollars_saved", 0), 4)
+        }
+
+
+# Global response cache instance
+global_llm_cache = LLMResponseCache()
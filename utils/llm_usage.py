@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+LLM Usage - Per-call token, latency and cost records in a local time-series store
+
+The clients' get_usage_stats() only describe the current process, and every
+job step runs in its own subprocess, so the numbers vanish when it exits.
+Each Gemini/OpenAI call (including cache hits, failures and Batch API
+results) is appended to a small SQLite table instead, along with:
+
+- model, prompt/completion tokens and estimated image tokens
+- latency of the successful attempt and total time including retries/waits
+- retries, cache hit, success/error and estimated cost (utils/llm_pricing)
+- media type, step script and item ID
+
+Step defaults to the running script's name and media type is derived from it.
+Jobs set the item ID with set_usage_tags() (per thread / asyncio task) or
+set_usage_defaults() (whole process, e.g. a Part B step handling one clip).
+
+Configuration (env):
+- FTG_LLM_USAGE: Set to 0 to stop recording (default: 1)
+- FTG_LLM_USAGE_DB: SQLite file (default: logs/llm_usage.sqlite3)
+"""
+
+import io
+import os
+import sys
+import time
+import base64
+import sqlite3
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from utils.llm_pricing import estimate_cost
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "logs" / "llm_usage.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT,
+    media_type TEXT,
+    step TEXT,
+    item_id TEXT,
+    input_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    image_tokens INTEGER DEFAULT 0,
+    latency_seconds REAL DEFAULT 0,
+    total_seconds REAL DEFAULT 0,
+    retries INTEGER DEFAULT 0,
+    cache_hit INTEGER DEFAULT 0,
+    success INTEGER DEFAULT 1,
+    error TEXT,
+    cost_usd REAL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS llm_calls_day_step ON llm_calls (day, step);
+CREATE INDEX IF NOT EXISTS llm_calls_item ON llm_calls (item_id);
+"""
+
+_tags = ContextVar("llm_usage_tags", default={})
+_defaults = {}
+
+
+def media_type_for_step(step: str) -> str:
+    """Media type from a step script name (same buckets as the dashboard)."""
+    step = (step or "").lower()
+    if step.startswith("stills"):
+        return "stills"
+    if step.startswith(("ftg_", "footage_", "lf_", "af_")):
+        return "footage"
+    if step.startswith("music"):
+        return "music"
+    return "other"
+
+
+def estimate_message_image_tokens(messages: list) -> int:
+    """
+    Estimated image tokens in OpenAI chat messages (data-URL images only).
+
+    Only the start of each image is decoded: PIL reads the size from the header.
+    """
+    from PIL import Image
+    from utils.image_payload import estimate_image_tokens
+
+    tokens = 0
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, list):
+            continue
+        for part in content:
+            if not isinstance(part, dict) or part.get("type") != "image_url":
+                continue
+            image_url = part.get("image_url") or {}
+            url = image_url.get("url", "")
+            if not url.startswith("data:") or "," not in url:
+                continue
+            try:
+                header = base64.b64decode(url.split(",", 1)[1][:65536])
+                with Image.open(io.BytesIO(header)) as image:
+                    width, height = image.size
+            except Exception:
+                continue
+            profile = "openai_low" if image_url.get("detail") == "low" else "openai"
+            tokens += estimate_image_tokens(profile, width, height)
+    return tokens
+
+
+def set_usage_defaults(**tags):
+    """Tag every call in this process (e.g. item_id for a one-clip step)."""
+    _defaults.update(tags)
+
+
+def set_usage_tags(**tags):
+    """Tag calls made from the current thread / asyncio task (e.g. item_id per still in a batch)."""
+    _tags.set({**_tags.get(), **tags})
+
+
+def current_tags() -> Dict:
+    """media_type, step and item_id for a call made now."""
+    tags = {"step": Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else None, "item_id": None}
+    tags.update(_defaults)
+    tags.update(_tags.get())
+    tags.setdefault("media_type", None)
+    tags["media_type"] = tags["media_type"] or media_type_for_step(tags["step"])
+    return tags
+
+
+class LLMUsageLog:
+    """Append-only SQLite log of LLM calls with per-step/per-day rollups."""
+
+    def __init__(self, db_path: str = None):
+        """
+        Initialize usage log.
+
+        Args:
+            db_path: SQLite file (default: FTG_LLM_USAGE_DB env or logs/llm_usage.sqlite3)
+        """
+        self.enabled = os.getenv("FTG_LLM_USAGE", "1") != "0"
+        self.db_path = str(db_path or os.getenv("FTG_LLM_USAGE_DB", DEFAULT_DB_PATH))
+        self._conn = None
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "errors": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        """Shared connection (created on first use); call with the lock held."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")  # many job processes write concurrently
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def record(self, provider: str, model: str, input_tokens: int = 0, output_tokens: int = 0,
+               image_tokens: int = 0, latency_seconds: float = 0, total_seconds: float = None,
+               retries: int = 0, cache_hit: bool = False, success: bool = True, error: str = None,
+               cost_usd: float = None, **tags):
+        """
+        Record one LLM call. Never raises: accounting must not fail a job.
+
+        Args:
+            provider: "gemini", "openai" or "openai_batch"
+            model: Model name
+            input_tokens: Prompt tokens (text + images) as billed
+            output_tokens: Completion tokens
+            image_tokens: Estimated image share of input_tokens
+            latency_seconds: Duration of the successful attempt
+            total_seconds: Wall time including retries and rate-limit waits (default: latency_seconds)
+            retries: Attempts beyond the first
+            cache_hit: Served from the local response cache (cost 0)
+            success: False if the call ultimately failed
+            error: Error message for failed calls
+            cost_usd: Override the estimated cost (e.g. batch discount)
+            **tags: media_type / step / item_id overrides
+        """
+        if not self.enabled:
+            return
+
+        call_tags = {**current_tags(), **tags}
+        if cost_usd is None:
+            cost_usd = 0.0 if cache_hit else estimate_cost(model, input_tokens, output_tokens)
+        now = time.time()
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT INTO llm_calls (ts, day, provider, model, media_type, step, item_id, input_tokens, "
+                    "output_tokens, image_tokens, latency_seconds, total_seconds, retries, cache_hit, success, "
+                    "error, cost_usd) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (now, datetime.fromtimestamp(now).strftime("%Y-%m-%d"), provider, model,
+                     call_tags["media_type"], call_tags["step"], call_tags["item_id"],
+                     input_tokens or 0, output_tokens or 0, image_tokens or 0,
+                     round(latency_seconds or 0, 3),
+                     round(total_seconds if total_seconds is not None else latency_seconds or 0, 3),
+                     retries or 0, int(bool(cache_hit)), int(bool(success)),
+                     (error or "")[:500] or None, cost_usd)
+                )
+                conn.commit()
+                self.stats["recorded"] += 1
+        except sqlite3.Error as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            print(f"  -> Warning: Could not record LLM usage: {e}")
+
+    def summarize(self, days: int = 7, group_by: tuple = ("day", "step")) -> List[Dict]:
+        """
+        Roll up calls from the last `days` days.
+
+        Args:
+            days: How far back to look (today counts as day 1)
+            group_by: Columns to group by (any of day, step, media_type, provider, model)
+
+        Returns:
+            One dict per group: calls, failures, cache_hits, retries, tokens, cost and latency
+        """
+        allowed = {"day", "step", "media_type", "provider", "model"}
+        if not set(group_by) <= allowed:
+            raise ValueError(f"group_by must be drawn from {sorted(allowed)}")
+
+        since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        columns = ", ".join(group_by)
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                f"SELECT {columns}, COUNT(*), SUM(success = 0), SUM(cache_hit), SUM(retries), "
+                f"SUM(input_tokens), SUM(output_tokens), SUM(image_tokens), SUM(cost_usd), "
+                f"AVG(CASE WHEN cache_hit = 0 AND success = 1 THEN latency_seconds END), "
+                f"MAX(CASE WHEN cache_hit = 0 AND success = 1 THEN latency_seconds END), "
+                f"AVG(CASE WHEN cache_hit = 0 AND success = 1 THEN total_seconds END), "
+                f"COUNT(DISTINCT item_id) "
+                f"FROM llm_calls WHERE day >= ? GROUP BY {columns} ORDER BY {columns}",
+                (since,)
+            ).fetchall()
+
+        summary = []
+        for row in rows:
+            group = dict(zip(group_by, row[:len(group_by)]))
+            (calls, failures, cache_hits, retries, input_tokens, output_tokens, image_tokens, cost,
+             avg_latency, max_latency, avg_total, items) = row[len(group_by):]
+            summary.append({
+                **group,
+                "calls": calls,
+                "items": items,
+                "failures": failures or 0,
+                "cache_hits": cache_hits or 0,
+                "retries": retries or 0,
+                "input_tokens": input_tokens or 0,
+                "output_tokens": output_tokens or 0,
+                "image_tokens": image_tokens or 0,
+                "cost_usd": round(cost or 0, 4),
+                "cost_per_item_usd": round((cost or 0) / items, 4) if items else None,
+                "avg_latency_seconds": round(avg_latency, 2) if avg_latency is not None else None,
+                "max_latency_seconds": round(max_latency, 2) if max_latency is not None else None,
+                "avg_total_seconds": round(avg_total, 2) if avg_total is not None else None
+            })
+        return summary
+
+    def get_usage(self, days: int = 7) -> Dict:
+        """Per step per day, per step, and overall rollups for monitoring."""
+        if not self.enabled:
+            return {"enabled": False}
+
+        by_step = self.summarize(days, ("step",))
+        return {
+            "enabled": True,
+            "db_path": self.db_path,
+            "days": days,
+            "by_step_day": self.summarize(days, ("day", "step")),
+            "by_step": by_step,
+            "totals": {
+                "calls": sum(row["calls"] for row in by_step),
+                "cache_hits": sum(row["cache_hits"] for row in by_step),
+                "failures": sum(row["failures"] for row in by_step),
+                "input_tokens": sum(row["input_tokens"] for row in by_step),
+                "output_tokens": sum(row["output_tokens"] for row in by_step),
+                "cost_usd": round(sum(row["cost_usd"] for row in by_step), 4)
+            }
+        }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return self.stats.copy()
+
+
+# Global usage log instance
+global_llm_usage = LLMUsageLog()
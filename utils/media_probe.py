@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Media Probe - Cached ffprobe data per source file
+
+Several Part B helpers need the same ffprobe output (duration, framerate,
+audio streams) and derived measurements such as audio levels. This utility
+probes each file once and caches the result, plus any extra analysis stored
+against it, in memory and in a small JSON file on disk. Entries are keyed by
+path, size and mtime, so a changed file is re-probed.
+
+Configuration (env):
+- FTG_PROBE_CACHE_DIR: On-disk cache directory (default: /private/tmp/ftg_probe_cache)
+"""
+
+import os
+import json
+import hashlib
+import threading
+import subprocess
+from typing import Any, Dict, Optional
+
+FFPROBE_PATHS = ['/opt/homebrew/bin/ffprobe', '/usr/local/bin/ffprobe', 'ffprobe']
+
+
+def find_ffprobe() -> Optional[str]:
+    """Find the ffprobe executable in the usual install locations."""
+    for path in FFPROBE_PATHS:
+        if os.path.exists(path) or path == 'ffprobe':
+            return path
+    return None
+
+
+class MediaProbeCache:
+    """ffprobe results and derived analysis, cached per file version."""
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or os.getenv("FTG_PROBE_CACHE_DIR", "/private/tmp/ftg_probe_cache")
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {"probes": 0, "memory_hits": 0, "disk_hits": 0}
+
+    def _key(self, media_path: str) -> str:
+        stat = os.stat(media_path)
+        return hashlib.sha1(f"{media_path}|{stat.st_size}|{int(stat.st_mtime)}".encode('utf-8')).hexdigest()[:20]
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            if key in self._entries:
+                self.stats["memory_hits"] += 1
+                return self._entries[key]
+        try:
+            with open(self._cache_path(key), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._entries[key] = entry
+            self.stats["disk_hits"] += 1
+        return entry
+
+    def _save(self, key: str, entry: Dict):
+        with self._lock:
+            self._entries[key] = entry
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self._cache_path(key) + f".{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._cache_path(key))
+        except OSError as e:
+            print(f"  -> Warning: Could not write probe cache: {e}")
+
+    def probe(self, media_path: str, timeout: int = 60) -> Optional[Dict]:
+        """
+        Get ffprobe format/streams JSON for a file (cached).
+
+        Args:
+            media_path: Path to media file
+            timeout: Seconds to wait for ffprobe
+
+        Returns:
+            ffprobe JSON with "format" and "streams", or None if probing failed
+        """
+        key = self._key(media_path)
+        entry = self._load(key)
+        if entry and entry.get("probe"):
+            return entry["probe"]
+
+        ffprobe_cmd = find_ffprobe()
+        if not ffprobe_cmd:
+            raise RuntimeError("FFprobe not found")
+
+        cmd = [ffprobe_cmd, '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', media_path]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            return None
+
+        with self._lock:
+            self.stats["probes"] += 1
+        probe = json.loads(result.stdout)
+        self._save(key, {**(entry or {}), "media_path": media_path, "probe": probe})
+        return probe
+
+    def get(self, media_path: str, name: str) -> Any:
+        """Get a derived analysis result stored against a file (None if absent)."""
+        entry = self._load(self._key(media_path))
+        return (entry or {}).get(name)
+
+    def set(self, media_path: str, name: str, value: Any):
+        """Store a derived analysis result against a file."""
+        key = self._key(media_path)
+        entry = self._load(key) or {"media_path": media_path}
+        self._save(key, {**entry, name: value})
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return self.stats.copy()
+
+
+# Global probe cache instance
+global_probe_cache = MediaProbeCache()
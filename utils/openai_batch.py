@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+OpenAI Batch - Offline bulk requests through the provider's Batch API
+
+Backfills that push thousands of stills through the synchronous chat path
+pay full price and eat the same per-key rate limits as the live pipeline.
+The Batch API takes a JSONL file of requests, runs it within 24 hours at
+half price against a separate quota, and returns a JSONL file of results.
+
+A run is a directory holding the request JSONL files, the output files once
+downloaded, and state.json with the provider batch IDs and which results
+have already been applied to FileMaker. Every step (submit, poll, apply)
+saves state before moving on, so an interrupted run can be resumed and
+re-applying results never writes a record twice. Request files a previous
+submit never got to are simply submitted again by the next submit(), and items
+that failed or expired can be sent again as a new run (create_retry_run), built
+from the request lines already on disk.
+
+Configuration (env):
+- FTG_OPENAI_BATCH_DIR: Directory for run state and JSONL files (default: /private/tmp/ftg_openai_batches)
+- FTG_OPENAI_BATCH_MAX_MB: Size cap per request file; the provider limit is 200MB (default: 180)
+- OPENAI_BATCH_BASE_URL: Alternative API base URL, e.g. the local stand-in (utils/openai_batch_standin.py)
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from openai import OpenAI
+
+ENDPOINT = "/v1/chat/completions"
+MAX_REQUESTS_PER_FILE = 50000  # provider limit
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Short hash identifying the API key a run was submitted with (the key itself is not stored)."""
+    return hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:12]
+
+
+class BatchRun:
+    """One bulk run: request files, provider batches and applied results, persisted in state.json."""
+
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+        self._lock = threading.Lock()
+        with open(os.path.join(run_dir, "state.json"), 'r') as f:
+            self.state = json.load(f)
+        self.state.setdefault("usage_recorded", [])  # runs created before usage was tracked per item
+
+    @property
+    def run_id(self) -> str:
+        return self.state["run_id"]
+
+    def save(self):
+        """Write state.json atomically."""
+        with self._lock:
+            path = os.path.join(self.run_dir, "state.json")
+            with open(path + ".tmp", 'w') as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(path + ".tmp", path)
+
+    def pending_items(self) -> Dict[str, Dict]:
+        """Items (custom_id -> item) with no result applied or recorded as failed yet."""
+        done = set(self.state["applied"]) | set(self.state["failed"])
+        return {custom_id: item for custom_id, item in self.state["items"].items() if custom_id not in done}
+
+    def summary(self) -> Dict:
+        statuses = [batch.get("status", "not_submitted") for batch in self.state["batches"]]
+        return {
+            "run_id": self.run_id,
+            "job": self.state["job"],
+            "items": len(self.state["items"]),
+            "batches": len(statuses),
+            "batch_statuses": {status: statuses.count(status) for status in set(statuses)},
+            "applied": len(self.state["applied"]),
+            "failed": len(self.state["failed"]),
+            "pending": len(self.pending_items())
+        }
+
+
+class OpenAIBatchClient:
+    """Builds, submits, polls and reads OpenAI Batch API runs."""
+
+    def __init__(self, base_dir: str = None, max_file_bytes: int = None):
+        """
+        Initialize batch client.
+
+        Args:
+            base_dir: Run directory root (default: FTG_OPENAI_BATCH_DIR env or /private/tmp/ftg_openai_batches)
+            max_file_bytes: Size cap per request file (default: FTG_OPENAI_BATCH_MAX_MB env or 180 MB)
+        """
+        self.base_dir = base_dir or os.getenv("FTG_OPENAI_BATCH_DIR", "/private/tmp/ftg_openai_batches")
+        self.max_file_bytes = max_file_bytes or int(float(os.getenv("FTG_OPENAI_BATCH_MAX_MB", "180")) * 1024 * 1024)
+        self.base_url = os.getenv("OPENAI_BATCH_BASE_URL") or None
+        self.clients = {}  # fingerprint -> OpenAI client
+
+    def _client(self, api_keys: List[str], fingerprint: str = None) -> OpenAI:
+        """OpenAI client for the key with this fingerprint (or the first key)."""
+        for key in api_keys:
+            if fingerprint is None or key_fingerprint(key) == fingerprint:
+                fingerprint = key_fingerprint(key)
+                if fingerprint not in self.clients:
+                    self.clients[fingerprint] = OpenAI(api_key=key, base_url=self.base_url)
+                return self.clients[fingerprint]
+        raise ValueError("None of the configured OpenAI API keys matches the key this run was submitted with")
+
+    def create_run(self, job: str, requests: Iterable[Dict], retry_of: str = None) -> BatchRun:
+        """
+        Write a run's request files and initial state.
+
+        Requests are written out as they arrive, so a generator keeps only one
+        request (with its image) in memory at a time.
+
+        Args:
+            job: Job name recorded with the run (e.g. "stills_autotag")
+            requests: Iterable of {"custom_id", "body" (chat completion params), "item" (data needed to apply the result)}
+            retry_of: Run ID this run re-sends failed items of (recorded in state)
+
+        Returns:
+            The new BatchRun (not yet submitted)
+        """
+        run_id = f"{job}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        run_dir = os.path.join(self.base_dir, run_id)
+        os.makedirs(run_dir, exist_ok=True)
+
+        batches, items = [], {}
+        current, current_bytes, current_count = None, 0, 0
+        for request in requests:
+            items[request["custom_id"]] = request.get("item", {})
+            line = json.dumps({
+                "custom_id": request["custom_id"],
+                "method": "POST",
+                "url": ENDPOINT,
+                "body": request["body"]
+            }) + "\n"
+            size = len(line.encode('utf-8'))
+            if current is None or current_bytes + size > self.max_file_bytes or current_count >= MAX_REQUESTS_PER_FILE:
+                if current:
+                    current.close()
+                filename = f"requests_{len(batches) + 1:03d}.jsonl"
+                current = open(os.path.join(run_dir, filename), 'w')
+                current_bytes, current_count = 0, 0
+                batches.append({"file": filename, "request_count": 0})
+            current.write(line)
+            current_bytes += size
+            current_count += 1
+            batches[-1]["request_count"] += 1
+        if current:
+            current.close()
+        if not items:
+            os.rmdir(run_dir)
+            raise ValueError("No requests to submit")
+
+        state = {
+            "run_id": run_id,
+            "job": job,
+            "created_at": time.time(),
+            "key_fingerprint": None,
+            "items": items,
+            "batches": batches,
+            "applied": [],
+            "failed": {},
+            "usage_recorded": [],
+            "retry_of": retry_of
+        }
+        with open(os.path.join(run_dir, "state.json"), 'w') as f:
+            json.dump(state, f, indent=2)
+
+        total_mb = sum(os.path.getsize(os.path.join(run_dir, batch["file"])) for batch in batches) / 1024 / 1024
+        print(f"  -> 📦 Created batch run {run_id}: {len(items)} requests in {len(batches)} file(s), {total_mb:.1f}MB")
+        return BatchRun(run_dir)
+
+    def load_run(self, run_id: str) -> BatchRun:
+        """Open an existing run by ID."""
+        return BatchRun(os.path.join(self.base_dir, run_id))
+
+    def create_retry_run(self, run: BatchRun) -> BatchRun:
+        """
+        New run re-sending the requests of every failed item of a run (errors, expired or cancelled batches).
+
+        Request lines are copied from the original run's files, so nothing is rebuilt.
+
+        Args:
+            run: Finished (or partly finished) run
+
+        Returns:
+            The new BatchRun (not yet submitted)
+        """
+        failed = set(run.state["failed"])
+        if not failed:
+            raise ValueError(f"Run {run.run_id} has no failed items to retry")
+
+        def iter_failed_requests():
+            for batch in run.state["batches"]:
+                with open(os.path.join(run.run_dir, batch["file"]), 'r') as f:
+                    for line in f:
+                        request = json.loads(line)
+                        if request["custom_id"] in failed:
+                            yield {
+                                "custom_id": request["custom_id"],
+                                "body": request["body"],
+                                "item": run.state["items"][request["custom_id"]]
+                            }
+
+        retry_run = self.create_run(run.state["job"], iter_failed_requests(), retry_of=run.run_id)
+        run.state.setdefault("retried_as", []).append(retry_run.run_id)
+        run.save()
+        return retry_run
+
+    def submit(self, run: BatchRun, api_keys: List[str]):
+        """
+        Upload and submit every request file that has no provider batch yet.
+
+        Safe to call again after a partial failure: files already uploaded or
+        submitted are skipped.
+
+        Args:
+            run: Run from create_run()/load_run()
+            api_keys: OpenAI API keys (the run sticks to the first key it was submitted with)
+        """
+        client = self._client(api_keys, run.state["key_fingerprint"])
+        if run.state["key_fingerprint"] is None:
+            run.state["key_fingerprint"] = key_fingerprint(api_keys[0])
+            run.save()
+
+        for batch in run.state["batches"]:
+            if batch.get("batch_id"):
+                continue
+            if not batch.get("input_file_id"):
+                with open(os.path.join(run.run_dir, batch["file"]), 'rb') as f:
+                    batch["input_file_id"] = client.files.create(file=f, purpose="batch").id
+                run.save()
+
+            submitted = client.batches.create(
+                input_file_id=batch["input_file_id"],
+                endpoint=ENDPOINT,
+                completion_window="24h",
+                metadata={"ftg_run_id": run.run_id, "file": batch["file"]}
+            )
+            batch["batch_id"] = submitted.id
+            batch["status"] = submitted.status
+            run.save()
+            print(f"  -> 🚀 Submitted {batch['file']} ({batch['request_count']} requests) as {submitted.id}")
+
+    def poll(self, run: BatchRun, api_keys: List[str]) -> bool:
+        """
+        Refresh the status of every submitted batch.
+
+        Returns:
+            True when every batch has reached a terminal status
+        """
+        client = self._client(api_keys, run.state["key_fingerprint"])
+        for batch in run.state["batches"]:
+            if not batch.get("batch_id") or batch.get("status") in TERMINAL_STATUSES:
+                continue
+            remote = client.batches.retrieve(batch["batch_id"])
+            batch["status"] = remote.status
+            batch["output_file_id"] = remote.output_file_id
+            batch["error_file_id"] = remote.error_file_id
+            if remote.request_counts:
+                batch["completed"] = remote.request_counts.completed
+                batch["failed"] = remote.request_counts.failed
+            print(f"  -> {batch['batch_id']}: {remote.status}"
+                  f" ({batch.get('completed', 0)}/{batch['request_count']} done, {batch.get('failed', 0)} failed)")
+        run.save()
+        return all(batch.get("status") in TERMINAL_STATUSES for batch in run.state["batches"])
+
+    def unsubmitted(self, run: BatchRun) -> int:
+        """Number of request files with no provider batch yet (e.g. submit was interrupted)."""
+        return sum(1 for batch in run.state["batches"] if not batch.get("batch_id"))
+
+    def wait(self, run: BatchRun, api_keys: List[str], interval: int = 60, timeout: int = 26 * 3600) -> bool:
+        """Poll until every batch is terminal or the timeout passes; returns True if finished."""
+        if self.unsubmitted(run):
+            raise ValueError(f"Run {run.run_id} has request files that were never submitted; submit it first")
+        deadline = time.time() + timeout
+        while not self.poll(run, api_keys):
+            if time.time() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def _download(self, run: BatchRun, client: OpenAI, file_id: Optional[str], filename: str) -> Optional[str]:
+        """Download a provider file into the run directory once; returns the local path."""
+        if not file_id:
+            return None
+        path = os.path.join(run.run_dir, filename)
+        if not os.path.exists(path):
+            content = client.files.content(file_id).text
+            with open(path + ".tmp", 'w') as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+        return path
+
+    def iter_results(self, run: BatchRun, api_keys: List[str]) -> Iterator[Dict]:
+        """
+        Results of finished batches, skipping items already applied or failed.
+
+        Yields:
+            {"custom_id", "item", "content" (message text) or None, "usage", "error"}
+        """
+        client = self._client(api_keys, run.state["key_fingerprint"])
+        pending = run.pending_items()
+
+        for batch in run.state["batches"]:
+            if batch.get("status") not in TERMINAL_STATUSES:
+                continue
+            stem = batch["file"].replace("requests_", "").replace(".jsonl", "")
+            paths = [
+                self._download(run, client, batch.get("output_file_id"), f"output_{stem}.jsonl"),
+                self._download(run, client, batch.get("error_file_id"), f"errors_{stem}.jsonl")
+            ]
+            for path in filter(None, paths):
+                with open(path, 'r') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        result = json.loads(line)
+                        custom_id = result.get("custom_id")
+                        if custom_id not in pending:
+                            continue
+
+                        response = result.get("response") or {}
+                        body = response.get("body") or {}
+                        error = result.get("error")
+                        content = None
+                        if response.get("status_code") == 200 and body.get("choices"):
+                            content = body["choices"][0].get("message", {}).get("content")
+                        elif not error:
+                            error = body.get("error") or f"HTTP {response.get('status_code')}"
+
+                        yield {
+                            "custom_id": custom_id,
+                            "item": pending.pop(custom_id),
+                            "content": content,
+                            "usage": body.get("usage") or {},
+                            "error": error
+                        }
+
+            # Requests in a finished batch with no result line at all (e.g. expired batch)
+            if batch.get("status") in {"failed", "expired", "cancelled"}:
+                with open(os.path.join(run.run_dir, batch["file"]), 'r') as f:
+                    for line in f:
+                        custom_id = json.loads(line)["custom_id"]
+                        if custom_id in pending:
+                            yield {
+                                "custom_id": custom_id,
+                                "item": pending.pop(custom_id),
+                                "content": None,
+                                "usage": {},
+                                "error": f"batch {batch['status']}"
+                            }
+
+
+# Global batch client instance
+global_openai_batch = OpenAIBatchClient()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+OpenAI Batch Stand-in - Local server that replays canned Batch API results
+
+Implements the handful of endpoints the bulk mode uses (file upload, batch
+create/retrieve, file content) so a bulk run can be exercised end to end
+without an API key or cost. Point the bulk mode at it with
+OPENAI_BATCH_BASE_URL=http://127.0.0.1:8765/v1.
+
+Each request in an uploaded file is answered from the canned responses:
+- a .jsonl file of real batch output lines (replayed by custom_id), or
+- a .json object mapping custom_id (or "*" for everything else) to the
+  message content, or to {"error": "..."} to simulate a failed request.
+Without canned responses every request gets DEFAULT_CONTENT.
+
+Batches report "in_progress" until --delay seconds after creation, then
+"completed".
+
+Usage:
+    python3 utils/openai_batch_standin.py --port 8765 --responses canned.json --delay 5
+"""
+
+import re
+import json
+import time
+import uuid
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONTENT = json.dumps({
+    "tags": ["Stand-in"],
+    "avid_bins": "Stand-in",
+    "description": "Stand-in description.",
+    "date": ""
+})
+
+
+class StandInState:
+    """Uploaded files and batches, in memory."""
+
+    def __init__(self, responses: dict = None, replay: dict = None, delay: float = 0):
+        self.responses = responses or {}
+        self.replay = replay or {}
+        self.delay = delay
+        self.files = {}    # file_id -> {"meta", "content"}
+        self.batches = {}  # batch_id -> batch object
+        self.lock = threading.Lock()
+
+    def add_file(self, content: bytes, filename: str, purpose: str) -> dict:
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        meta = {
+            "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed"
+        }
+        with self.lock:
+            self.files[file_id] = {"meta": meta, "content": content}
+        return meta
+
+    def _answer(self, request: dict) -> tuple:
+        """(output line, is_error) for one batch request line."""
+        custom_id = request["custom_id"]
+        if custom_id in self.replay:
+            line = dict(self.replay[custom_id])
+            return line, bool(line.get("error"))
+
+        canned = self.responses.get(custom_id, self.responses.get("*", DEFAULT_CONTENT))
+        if isinstance(canned, dict) and "error" in canned:
+            return {
+                "id": f"batch_req_{uuid.uuid4().hex[:16]}", "custom_id": custom_id, "response": None,
+                "error": {"code": "stand_in_error", "message": canned["error"]}
+            }, True
+
+        content = canned if isinstance(canned, str) else json.dumps(canned)
+        body = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:16]}", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get("body", {}).get("model", "stand-in"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+        return {
+            "id": f"batch_req_{uuid.uuid4().hex[:16]}", "custom_id": custom_id,
+            "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": body}, "error": None
+        }, False
+
+    def create_batch(self, params: dict) -> dict:
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        with self.lock:
+            if params["input_file_id"] not in self.files:
+                raise KeyError(params["input_file_id"])
+            lines = self.files[params["input_file_id"]]["content"].decode('utf-8').splitlines()
+        total = sum(1 for line in lines if line.strip())
+        batch = {
+            "id": batch_id, "object": "batch", "endpoint": params["endpoint"],
+            "input_file_id": params["input_file_id"], "completion_window": params.get("completion_window", "24h"),
+            "status": "in_progress", "created_at": int(time.time()), "output_file_id": None, "error_file_id": None,
+            "errors": None, "metadata": params.get("metadata"),
+            "request_counts": {"total": total, "completed": 0, "failed": 0}
+        }
+        with self.lock:
+            self.batches[batch_id] = batch
+        return batch
+
+    def get_batch(self, batch_id: str) -> dict:
+        with self.lock:
+            batch = self.batches[batch_id]
+            if batch["status"] == "in_progress" and time.time() - batch["created_at"] >= self.delay:
+                self._complete(batch)
+            return dict(batch)
+
+    def _complete(self, batch: dict):
+        """Answer every request in the batch's input file (called with the lock held)."""
+        outputs, errors = [], []
+        for line in self.files[batch["input_file_id"]]["content"].decode('utf-8').splitlines():
+            if line.strip():
+                result, is_error = self._answer(json.loads(line))
+                (errors if is_error else outputs).append(json.dumps(result))
+
+        for name, lines in (("output_file_id", outputs), ("error_file_id", errors)):
+            if lines:
+                file_id = f"file-{uuid.uuid4().hex[:24]}"
+                content = ("\n".join(lines) + "\n").encode('utf-8')
+                self.files[file_id] = {"meta": {"id": file_id, "object": "file", "bytes": len(content),
+                                                "created_at": int(time.time()), "filename": f"{name}.jsonl",
+                                                "purpose": "batch_output", "status": "processed"},
+                                       "content": content}
+                batch[name] = file_id
+
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+        batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+
+
+def make_handler(state: StandInState):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload, content_type: str = "application/json"):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_POST(self):
+            if self.path.rstrip('/') == "/v1/files":
+                # multipart/form-data: parse with the email parser (stdlib, no cgi module)
+                raw = b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + self._body()
+                message = BytesParser(policy=HTTP).parsebytes(raw)
+                fields = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+                upload = fields["file"]
+                purpose = fields["purpose"].get_content().strip() if "purpose" in fields else "batch"
+                self._send(200, state.add_file(upload.get_payload(decode=True), upload.get_filename() or "upload.jsonl", purpose))
+            elif self.path.rstrip('/') == "/v1/batches":
+                try:
+                    self._send(200, state.create_batch(json.loads(self._body())))
+                except KeyError as e:
+                    self._send(404, {"error": {"message": f"No such file: {e}"}})
+            else:
+                self._send(404, {"error": {"message": f"Not found: {self.path}"}})
+
+        def do_GET(self):
+            match = re.fullmatch(r"/v1/batches/([\w-]+)", self.path)
+            if match and match.group(1) in state.batches:
+                return self._send(200, state.get_batch(match.group(1)))
+            match = re.fullmatch(r"/v1/files/([\w-]+)/content", self.path)
+            if match and match.group(1) in state.files:
+                return self._send(200, state.files[match.group(1)]["content"], "application/octet-stream")
+            self._send(404, {"error": {"message": f"Not found: {self.path}"}})
+
+        def log_message(self, format, *args):
+            print(f"  -> [stand-in] {self.command} {self.path}")
+
+    return Handler
+
+
+def load_responses(path: str):
+    """(responses, replay) from a .json mapping or a .jsonl of recorded batch output."""
+    if not path:
+        return {}, {}
+    with open(path, 'r') as f:
+        if path.endswith(".jsonl"):
+            replay = {}
+            for line in f:
+                if line.strip():
+                    result = json.loads(line)
+                    replay[result["custom_id"]] = result
+            return {}, replay
+        return json.load(f), {}
+
+
+def serve(port: int = 8765, responses_path: str = None, delay: float = 0) -> ThreadingHTTPServer:
+    """Start the stand-in in a background thread; returns the server (call shutdown() to stop)."""
+    responses, replay = load_responses(responses_path)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(StandInState(responses, replay, delay)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🧪 OpenAI batch stand-in listening on http://127.0.0.1:{server.server_port}/v1")
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI Batch API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--responses", help="Canned responses (.json mapping or recorded .jsonl batch output)")
+    parser.add_argument("--delay", type=float, default=0, help="Seconds before a batch completes")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.responses, args.delay)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,15 +1,36 @@
 #!/usr/bin/env python3
+"""
+Global OpenAI client with API key rotation and rate limiting.
+
+Per-key request and token windows are shared across processes through Redis
+(see utils/rate_limiter.py), so every stills subprocess and thread pool sees
+the same usage. Each call goes to the least-loaded key that has room, with
+the token estimate reserved up front and reconciled against actual usage.
+
+achat_completions_create() is the asyncio counterpart for batch jobs: same
+keys, limits, cache and retries, but a waiting request is a suspended
+coroutine instead of a blocked thread, so hundreds can be in flight at once.
+
+Configuration (env):
+- OPENAI_TPM_PER_KEY: Tokens per minute per key (default: 30000)
+- OPENAI_RPM_PER_KEY: Requests per minute per key (default: 500)
+"""
+import os
 import time
+import asyncio
 import threading
-from collections import deque
 from datetime import datetime
 import openai
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import json
 import warnings
 import re
 import random
 
+from utils.rate_limiter import SharedRateLimiter
+from utils.llm_response_cache import global_llm_cache, is_cacheable_response
+from utils.llm_usage import global_llm_usage, estimate_message_image_tokens
+
 # Suppress urllib3 LibreSSL warning
 warnings.filterwarnings('ignore', message='.*urllib3 v2 only supports OpenSSL 1.1.1+.*', category=Warning)
 
@@ -17,13 +38,14 @@ class GlobalOpenAIClient:
     """Global OpenAI client with built-in rate limiting and API key rotation."""
     
     def __init__(self):
-        self.tokens_per_minute = 30000  # GPT-4o limit per key
-        self.requests_per_minute = 500  # GPT-4o limit per key
-        self.token_windows = {}  # key -> deque of (timestamp, tokens) pairs
-        self.request_windows = {}  # key -> deque of timestamps
+        self.tokens_per_minute = int(os.getenv("OPENAI_TPM_PER_KEY", "30000"))  # GPT-4o limit per key
+        self.requests_per_minute = int(os.getenv("OPENAI_RPM_PER_KEY", "500"))  # GPT-4o limit per key
+        self.limiters = {}  # key -> SharedRateLimiter (window lives in Redis)
         self.lock = threading.Lock()
         self.clients = {}  # key -> OpenAI client instance
+        self.async_clients = {}  # key -> AsyncOpenAI client instance (created on first async call)
         self.api_keys = []  # List of API keys
+        self.disabled_keys = set()  # Keys that failed authentication in this process
         self.current_key_index = 0
         self.current_key = None
         
@@ -32,13 +54,15 @@ class GlobalOpenAIClient:
         with self.lock:
             self.api_keys = [key for key in api_keys if key and key.strip()]
             self.clients = {}
-            self.token_windows = {}
-            self.request_windows = {}
+            self.async_clients = {}
+            self.limiters = {}
+            self.disabled_keys = set()
             
             for key in self.api_keys:
                 self.clients[key] = OpenAI(api_key=key)
-                self.token_windows[key] = deque()
-                self.request_windows[key] = deque()
+                self.limiters[key] = SharedRateLimiter(
+                    "openai", key, "chat", self.requests_per_minute, self.tokens_per_minute
+                )
             
             if self.api_keys:
                 self.current_key = self.api_keys[0]
@@ -51,215 +75,358 @@ class GlobalOpenAIClient:
         """Set a single API key (backward compatibility)."""
         self.set_api_keys([api_key])
     
-    def _clean_windows(self, api_key: str):
-        """Remove entries older than 1 minute from tracking windows for specific key."""
-        cutoff = time.time() - 60
-        
-        if api_key in self.token_windows:
-            while self.token_windows[api_key] and self.token_windows[api_key][0][0] < cutoff:
-                self.token_windows[api_key].popleft()
-                
-        if api_key in self.request_windows:
-            while self.request_windows[api_key] and self.request_windows[api_key][0] < cutoff:
-                self.request_windows[api_key].popleft()
-    
     def _current_usage(self, api_key: str):
-        """Get current token and request usage in the last minute for specific key."""
-        self._clean_windows(api_key)
-        
-        total_tokens = 0
-        if api_key in self.token_windows:
-            total_tokens = sum(tokens for _, tokens in self.token_windows[api_key])
-        
-        total_requests = 0
-        if api_key in self.request_windows:
-            total_requests = len(self.request_windows[api_key])
-            
-        return total_tokens, total_requests
+        """Get current token and request usage in the last minute for specific key (all processes)."""
+        usage = self.limiters[api_key].get_usage()
+        return usage["tokens"], usage["requests"]
     
-    def _can_make_request(self, api_key: str, estimated_tokens: int) -> bool:
-        """Check if we can make a request with specific key without exceeding rate limits."""
+    def _load(self, api_key: str) -> float:
+        """Fraction of a key's per-minute budget in use (tokens and requests combined)."""
         current_tokens, current_requests = self._current_usage(api_key)
+        # A limit of 0 means unlimited (as in SharedRateLimiter) and adds no load
+        token_load = current_tokens / self.tokens_per_minute if self.tokens_per_minute else 0.0
+        request_load = current_requests / self.requests_per_minute if self.requests_per_minute else 0.0
+        return token_load + request_load
+    
+    def _try_acquire_key(self, estimated_tokens: int, exclude: set = None):
+        """
+        One pass over the keys, least loaded first.
         
-        # Check if adding this request would exceed limits
-        would_exceed_tokens = (current_tokens + estimated_tokens) > self.tokens_per_minute
-        would_exceed_requests = (current_requests + 1) > self.requests_per_minute
+        Args:
+            estimated_tokens: Tokens to reserve
+            exclude: Keys not to use for this attempt
+            
+        Returns:
+            (key, reservation, 0) on success, else (None, None, seconds until the first key frees up)
+        """
+        candidates = [key for key in self.api_keys if key not in self.disabled_keys and key not in (exclude or set())]
+        if not candidates:
+            candidates = [key for key in self.api_keys if key not in self.disabled_keys] or list(self.api_keys)
         
-        return not (would_exceed_tokens or would_exceed_requests)
+        shortest_wait = None
+        for key in sorted(candidates, key=self._load):
+            reservation, key_wait = self.limiters[key].try_acquire(estimated_tokens)
+            if reservation:
+                with self.lock:
+                    if key != self.current_key:
+                        print(f"🔄 Using API key #{self.api_keys.index(key)+1} (least loaded)")
+                    self.current_key = key
+                    self.current_key_index = self.api_keys.index(key)
+                return key, reservation, 0
+            shortest_wait = key_wait if shortest_wait is None else min(shortest_wait, key_wait)
+        return None, None, shortest_wait
     
-    def _record_usage(self, api_key: str, tokens_used: int):
-        """Record actual token and request usage for specific key."""
-        timestamp = time.time()
+    def _all_keys_limited_wait(self, shortest_wait: float) -> float:
+        """Log per-key usage and return how long to wait for the first key to free up."""
+        usage_info = []
+        for i, key in enumerate(self.api_keys):
+            current_tokens, current_requests = self._current_usage(key)
+            usage_info.append(f"Key #{i+1}: {current_tokens}/{self.tokens_per_minute} tokens, {current_requests}/{self.requests_per_minute} requests")
         
-        if api_key in self.token_windows:
-            self.token_windows[api_key].append((timestamp, tokens_used))
-        if api_key in self.request_windows:
-            self.request_windows[api_key].append(timestamp)
+        sleep_time = shortest_wait + random.uniform(0, 0.25)
+        print(f"⏳ All keys rate limited, waiting {sleep_time:.1f}s... ({'; '.join(usage_info)})")
+        return sleep_time
     
-    def _get_next_available_key(self, estimated_tokens: int) -> str:
-        """Find the next available API key that can handle the request."""
-        if not self.api_keys:
-            raise ValueError("No API keys configured")
-        
-        # First, try the current key
-        if self.current_key and self._can_make_request(self.current_key, estimated_tokens):
-            return self.current_key
+    def _acquire_key(self, estimated_tokens: int, exclude: set = None, wait: bool = True):
+        """
+        Reserve capacity on the least-loaded key that has room.
         
-        # If current key is rate limited, try all other keys
-        for i in range(len(self.api_keys)):
-            key = self.api_keys[i]
-            if self._can_make_request(key, estimated_tokens):
-                # Switch to this key
-                self.current_key = key
-                self.current_key_index = i
-                if key != self.api_keys[0]:  # Only log if we switched
-                    print(f"🔄 Switched to API key #{i+1} due to rate limits")
-                return key
+        Args:
+            estimated_tokens: Tokens to reserve
+            exclude: Keys not to use for this attempt
+            wait: Sleep until a key frees up if none has room (else return None)
+            
+        Returns:
+            (key, reservation), or None if wait=False and every key is full
+        """
+        while True:
+            key, reservation, shortest_wait = self._try_acquire_key(estimated_tokens, exclude)
+            if key:
+                return key, reservation
+            if not wait:
+                return None
+            
+            # Every key is full: sleep until the first one frees up, not a fixed poll interval
+            time.sleep(self._all_keys_limited_wait(shortest_wait))
+    
+    async def _acquire_key_async(self, estimated_tokens: int):
+        """_acquire_key() for coroutines: waits with asyncio.sleep instead of blocking the thread."""
+        while True:
+            key, reservation, shortest_wait = self._try_acquire_key(estimated_tokens)
+            if key:
+                return key, reservation
+            await asyncio.sleep(self._all_keys_limited_wait(shortest_wait))
+    
+    def _async_client(self, api_key: str):
+        """AsyncOpenAI client for a key, created inside the running event loop on first use."""
+        with self.lock:
+            client = self.async_clients.get(api_key)
+            if client is None:
+                client = self.async_clients[api_key] = AsyncOpenAI(api_key=api_key)
+            return client
+    
+    @staticmethod
+    def _request_params(temperature, sampling_params: dict) -> dict:
+        """Sampling parameters actually sent (unset ones are left to the API defaults)."""
+        return {name: value for name, value in {"temperature": temperature, **sampling_params}.items() if value is not None}
+    
+    @staticmethod
+    def _is_cacheable(response, response_format) -> bool:
+        """Complete, usable response: content present, finish_reason stop, valid JSON if JSON was requested."""
+        if not getattr(response, 'choices', None):
+            return False
+        choice = response.choices[0]
+        expect_json = isinstance(response_format, dict) and response_format.get("type") in ("json_object", "json_schema")
+        content = choice.message.content if choice.message else None
+        return is_cacheable_response(content, choice.finish_reason, expect_json)
+    
+    def _cached_response(self, cache_key: str, model: str, messages: list, response_format):
+        """Valid cached ChatCompletion for the request, or None (entries that fail validation are ignored)."""
+        cached = global_llm_cache.get(cache_key)
+        if not cached:
+            return None
+        from openai.types.chat import ChatCompletion
+        response = ChatCompletion.model_validate(cached["response"])
+        if not self._is_cacheable(response, response_format):
+            print(f"  -> ⚠️ Ignoring incomplete cached response ({cache_key[:12]})")
+            return None
+        self._record_usage(model, messages, response, cache_hit=True)
+        return response
+    
+    def _record_response(self, api_key: str, reservation, response, estimated_tokens: int, cache_key: str, model: str,
+                         response_format=None):
+        """Reconcile the reservation with actual usage and cache the response if it is complete and valid."""
+        if hasattr(response, 'usage') and response.usage:
+            actual_tokens = response.usage.total_tokens
+            print(f"📊 Tokens used: {actual_tokens} (estimated: {estimated_tokens}) on Key #{self.api_keys.index(api_key)+1}")
+            self.limiters[api_key].reconcile(reservation, actual_tokens)
+        if self._is_cacheable(response, response_format):
+            usage = getattr(response, 'usage', None)
+            global_llm_cache.set(
+                cache_key, model, response.model_dump(),
+                input_tokens=getattr(usage, 'prompt_tokens', 0),
+                output_tokens=getattr(usage, 'completion_tokens', 0)
+            )
+    
+    def _record_usage(self, model: str, messages: list, response=None, attempt_start: float = None,
+                      start_time: float = None, retries: int = 0, cache_hit: bool = False, error=None):
+        """Record one call (success, cache hit or final failure) in the LLM usage log."""
+        usage = getattr(response, 'usage', None) if response is not None else None
+        now = time.time()
+        global_llm_usage.record(
+            "openai", model,
+            input_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+            output_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+            image_tokens=estimate_message_image_tokens(messages),
+            latency_seconds=now - attempt_start if attempt_start and error is None else 0,
+            total_seconds=now - start_time if start_time else 0,
+            retries=retries,
+            cache_hit=cache_hit,
+            success=error is None,
+            error=str(error) if error is not None else None
+        )
+    
+    def _reject_key(self, api_key: str, reservation, error):
+        """Release a rejected request's reservation; disable the key on authentication errors."""
+        # Rejected requests don't consume tokens
+        self.limiters[api_key].reconcile(reservation, 0)
         
-        # If no key is available, return the "least loaded" key
-        best_key = self.api_keys[0]
-        best_usage = float('inf')
+        key_number = self.api_keys.index(api_key) + 1
+        if isinstance(error, openai.AuthenticationError):
+            print(f"🚫 Authentication error on Key #{key_number} (invalid/archived key)")
+            with self.lock:
+                self.disabled_keys.add(api_key)
+        else:
+            print(f"🚫 Rate limit hit on Key #{key_number}")
+    
+    def _switch_key(self, api_key: str, estimated_tokens: int):
+        """Another key with room right now, as (key, reservation), or None."""
+        switched = self._acquire_key(estimated_tokens, exclude={api_key}, wait=False)
+        if switched and switched[0] != api_key:
+            print(f"🔄 Switched to Key #{self.api_keys.index(switched[0])+1} for retry")
+            return switched
+        if switched:
+            self.limiters[switched[0]].reconcile(switched[1], 0)
+        return None
+    
+    def _rate_limit_wait(self, error, attempt: int) -> float:
+        """Backoff after a 429: exponential, at least the server's suggested wait, with jitter."""
+        # Extract wait time from error message if available
+        error_msg = str(error)
+        wait_time = 2.0 * (1.5 ** attempt)  # Base exponential backoff
         
-        for key in self.api_keys:
-            current_tokens, current_requests = self._current_usage(key)
-            usage_ratio = (current_tokens / self.tokens_per_minute) + (current_requests / self.requests_per_minute)
-            if usage_ratio < best_usage:
-                best_usage = usage_ratio
-                best_key = key
+        # Try to parse the suggested wait time from the error message
+        if "Please try again in" in error_msg:
+            try:
+                match = re.search(r'Please try again in (\d+\.?\d*)([ms])', error_msg)
+                if match:
+                    suggested_wait = float(match.group(1))
+                    unit = match.group(2)
+                    if unit == 'ms':
+                        suggested_wait = suggested_wait / 1000
+                    wait_time = max(wait_time, suggested_wait + 2.0)
+            except:
+                pass
         
-        self.current_key = best_key
-        self.current_key_index = self.api_keys.index(best_key)
-        print(f"🚫 All keys rate limited, using least loaded key #{self.current_key_index+1}")
-        return best_key
-    
-    def _wait_for_any_key_capacity(self, estimated_tokens: int):
-        """Wait until any key has capacity to make the request."""
-        while True:
-            for key in self.api_keys:
-                if self._can_make_request(key, estimated_tokens):
-                    return key
-            
-            # Show current usage for all keys
-            usage_info = []
-            for i, key in enumerate(self.api_keys):
-                current_tokens, current_requests = self._current_usage(key)
-                usage_info.append(f"Key #{i+1}: {current_tokens}/{self.tokens_per_minute} tokens, {current_requests}/{self.requests_per_minute} requests")
-            
-            print(f"⏳ All keys rate limited, waiting... ({'; '.join(usage_info)})")
-            time.sleep(5)  # Check every 5 seconds
+        # Add random jitter
+        jitter = random.uniform(0.5, 1.5)
+        return wait_time * jitter
     
-    def chat_completions_create(self, model="gpt-4o", messages=None, response_format=None, max_retries=5, estimated_tokens=2500):
+    def chat_completions_create(self, model="gpt-4o", messages=None, response_format=None, max_retries=5, estimated_tokens=2500,
+                                use_cache=True, temperature=None, **sampling_params):
         """
         Create a chat completion with automatic key rotation and rate limiting.
+        
+        Identical requests (model, messages incl. images, response_format, temperature and other
+        sampling parameters such as top_p / max_tokens / seed) are served from the response cache
+        unless use_cache=False. Only complete responses (finish_reason stop, valid JSON when a JSON
+        response_format is requested) are cached, so callers retrying a bad response should pass
+        use_cache=False.
         """
         if not self.api_keys:
             raise ValueError("No API keys configured. Call set_api_keys() first.")
         
-        with self.lock:
-            # Get the best available key
-            try:
-                selected_key = self._get_next_available_key(estimated_tokens)
-            except ValueError:
-                # Wait for any key to become available
-                selected_key = self._wait_for_any_key_capacity(estimated_tokens)
-            
-            # Record the estimated usage upfront
-            self._record_usage(selected_key, estimated_tokens)
+        request_params = self._request_params(temperature, sampling_params)
+        cache_key = global_llm_cache.make_key(
+            "openai", model, messages, response_format,
+            temperature=request_params.get("temperature"),
+            params={k: v for k, v in request_params.items() if k != "temperature"} or None
+        )
+        if use_cache:
+            response = self._cached_response(cache_key, model, messages, response_format)
+            if response is not None:
+                return response
+        
+        # Reserve the estimated usage upfront on the least-loaded key
+        start_time = time.time()
+        selected_key, reservation = self._acquire_key(estimated_tokens)
         
         # Now make the actual API call with retries
         for attempt in range(max_retries):
+            key_number = self.api_keys.index(selected_key) + 1
             try:
-                print(f"🔄 OpenAI API call attempt {attempt + 1}/{max_retries} (Key #{self.current_key_index+1})")
+                print(f"🔄 OpenAI API call attempt {attempt + 1}/{max_retries} (Key #{key_number})")
+                attempt_start = time.time()
                 
                 response = self.clients[selected_key].chat.completions.create(
                     model=model,
                     messages=messages,
-                    response_format=response_format
+                    response_format=response_format,
+                    **request_params
                 )
                 
                 print(f"✅ OpenAI response received successfully")
                 
-                # Update actual token usage if available
-                if hasattr(response, 'usage') and response.usage:
-                    actual_tokens = response.usage.total_tokens
-                    print(f"📊 Tokens used: {actual_tokens} (estimated: {estimated_tokens}) on Key #{self.current_key_index+1}")
-                    
-                    # Update our tracking with actual usage
-                    with self.lock:
-                        # Remove the estimated usage and add actual usage
-                        if selected_key in self.token_windows and self.token_windows[selected_key]:
-                            self.token_windows[selected_key].pop()  # Remove last entry (our estimate)
-                            self._record_usage(selected_key, actual_tokens)
-                
+                # Replace the reserved estimate with actual usage in the shared window
+                self._record_response(selected_key, reservation, response, estimated_tokens, cache_key, model, response_format)
+                self._record_usage(model, messages, response, attempt_start, start_time, retries=attempt)
                 return response
                 
-            except openai.RateLimitError as e:
-                print(f"🚫 Rate limit hit on Key #{self.current_key_index+1}")
-                
-                # Try to switch to another key immediately
-                with self.lock:
-                    try:
-                        selected_key = self._get_next_available_key(estimated_tokens)
-                        print(f"🔄 Switched to Key #{self.current_key_index+1} for retry")
-                        continue  # Try again with new key
-                    except ValueError:
-                        pass  # No keys available, use normal retry logic
-                        
-            except openai.AuthenticationError as e:
-                print(f"🚫 Authentication error on Key #{self.current_key_index+1} (invalid/archived key)")
+            except (openai.RateLimitError, openai.AuthenticationError) as e:
+                self._reject_key(selected_key, reservation, e)
                 
-                # Try to switch to another key immediately
-                with self.lock:
-                    try:
-                        selected_key = self._get_next_available_key(estimated_tokens)
-                        print(f"🔄 Switched to Key #{self.current_key_index+1} for retry")
-                        continue  # Try again with new key
-                    except ValueError:
-                        pass  # No keys available, use normal retry logic
+                # Try to switch to another key with room right now
+                switched = self._switch_key(selected_key, estimated_tokens)
+                if switched:
+                    selected_key, reservation = switched
+                    continue
                 
                 if attempt < max_retries - 1:
-                    # Extract wait time from error message if available
-                    error_msg = str(e)
-                    wait_time = 2.0 * (1.5 ** attempt)  # Base exponential backoff
-                    
-                    # Try to parse the suggested wait time from the error message
-                    if "Please try again in" in error_msg:
-                        try:
-                            match = re.search(r'Please try again in (\d+\.?\d*)([ms])', error_msg)
-                            if match:
-                                suggested_wait = float(match.group(1))
-                                unit = match.group(2)
-                                if unit == 'ms':
-                                    suggested_wait = suggested_wait / 1000
-                                wait_time = max(wait_time, suggested_wait + 2.0)
-                        except:
-                            pass
-                    
-                    # Add random jitter
-                    jitter = random.uniform(0.5, 1.5)
-                    wait_time = wait_time * jitter
-                    
+                    wait_time = self._rate_limit_wait(e, attempt)
                     print(f"⏱️ Rate limit hit, waiting {wait_time:.1f} seconds before retry...")
                     time.sleep(wait_time)
+                    selected_key, reservation = self._acquire_key(estimated_tokens)
                     continue
                 else:
                     print(f"❌ Rate limit exceeded after {max_retries} attempts on all keys")
+                    self._record_usage(model, messages, start_time=start_time, retries=attempt, error=e)
                     raise e
                     
             except openai.APIError as e:
                 if attempt < max_retries - 1:
                     wait_time = 2.0 * (1.5 ** attempt)
-                    print(f"🔧 API error on Key #{self.current_key_index+1}, waiting {wait_time:.1f} seconds before retry: {e}")
+                    print(f"🔧 API error on Key #{key_number}, waiting {wait_time:.1f} seconds before retry: {e}")
                     time.sleep(wait_time)
                     continue
                 else:
+                    self._record_usage(model, messages, start_time=start_time, retries=attempt, error=e)
                     raise e
                     
             except Exception as e:
+                self._record_usage(model, messages, start_time=start_time, retries=attempt, error=e)
                 raise e
         
         raise Exception("OpenAI API call failed after all retries")
     
+    async def achat_completions_create(self, model="gpt-4o", messages=None, response_format=None, max_retries=5,
+                                       estimated_tokens=2500, use_cache=True, temperature=None, **sampling_params):
+        """
+        Async chat_completions_create() for batch jobs.
+        
+        Same least-loaded key selection, shared rate limits, response cache and
+        retries; waits (for rate limits or backoff) suspend the coroutine instead
+        of blocking a thread.
+        """
+        if not self.api_keys:
+            raise ValueError("No API keys configured. Call set_api_keys() first.")
+        
+        request_params = self._request_params(temperature, sampling_params)
+        cache_key = global_llm_cache.make_key(
+            "openai", model, messages, response_format,
+            temperature=request_params.get("temperature"),
+            params={k: v for k, v in request_params.items() if k != "temperature"} or None
+        )
+        if use_cache:
+            response = self._cached_response(cache_key, model, messages, response_format)
+            if response is not None:
+                return response
+        
+        start_time = time.time()
+        selected_key, reservation = await self._acquire_key_async(estimated_tokens)
+        
+        for attempt in range(max_retries):
+            key_number = self.api_keys.index(selected_key) + 1
+            try:
+                attempt_start = time.time()
+                response = await self._async_client(selected_key).chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    response_format=response_format,
+                    **request_params
+                )
+                self._record_response(selected_key, reservation, response, estimated_tokens, cache_key, model, response_format)
+                self._record_usage(model, messages, response, attempt_start, start_time, retries=attempt)
+                return response
+                
+            except (openai.RateLimitError, openai.AuthenticationError) as e:
+                self._reject_key(selected_key, reservation, e)
+                
+                switched = self._switch_key(selected_key, estimated_tokens)
+                if switched:
+                    selected_key, reservation = switched
+                    continue
+                
+                if attempt < max_retries - 1:
+                    wait_time = self._rate_limit_wait(e, attempt)
+                    print(f"⏱️ Rate limit hit, waiting {wait_time:.1f} seconds before retry...")
+                    await asyncio.sleep(wait_time)
+                    selected_key, reservation = await self._acquire_key_async(estimated_tokens)
+                    continue
+                print(f"❌ Rate limit exceeded after {max_retries} attempts on all keys")
+                self._record_usage(model, messages, start_time=start_time, retries=attempt, error=e)
+                raise
+                
+            except openai.APIError as e:
+                if attempt < max_retries - 1:
+                    wait_time = 2.0 * (1.5 ** attempt)
+                    print(f"🔧 API error on Key #{key_number}, waiting {wait_time:.1f} seconds before retry: {e}")
+                    await asyncio.sleep(wait_time)
+                    continue
+                self._record_usage(model, messages, start_time=start_time, retries=attempt, error=e)
+                raise
+        
+        raise Exception("OpenAI API call failed after all retries")
+    
     def get_usage_stats(self):
         """Get current usage statistics for all keys."""
         with self.lock:
@@ -280,7 +447,8 @@ class GlobalOpenAIClient:
                     "current_requests_per_minute": current_requests,
                     "tokens_remaining": max(0, self.tokens_per_minute - current_tokens),
                     "requests_remaining": max(0, self.requests_per_minute - current_requests),
-                    "utilization_percent": (current_tokens / self.tokens_per_minute) * 100
+                    "utilization_percent": (current_tokens / self.tokens_per_minute) * 100 if self.tokens_per_minute else 0,
+                    "disabled": key in self.disabled_keys
                 }
                 stats["keys"].append(key_stats)
                 
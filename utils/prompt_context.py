@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Prompt Context - Parsed tags, bins and prompt templates, cached per process
+
+The tagging and description jobs used to re-read and re-parse the tag lists,
+bin lists and prompts/prompts.json for every item, and rebuild the tag and
+bin text for every prompt. This utility parses each file once per process,
+re-parses it only when its mtime or size changes, and keeps the rendered
+"- name: description" / "- bin" blocks alongside the parsed data.
+
+The rendered blocks are byte-identical from call to call, so prompts built
+from them share the same text and provider-side prompt caching can match it.
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+TAG_FILES = {
+    "stills": BASE_DIR / "tags" / "stills-tags.tab",
+    "footage": BASE_DIR / "tags" / "footage-tags.tab",
+}
+
+BIN_FILES = {
+    "stills": BASE_DIR / "tags" / "stills-bins.txt",
+    "live_footage": BASE_DIR / "tags" / "live-footage-bins.txt",
+    "archival_footage": BASE_DIR / "tags" / "archival-footage-bins.txt",
+}
+
+PROMPTS_FILE = BASE_DIR / "prompts" / "prompts.json"
+
+
+def parse_tags(text: str) -> List[Dict]:
+    """Parse a tags .tab file: one tag per line, 'name<TAB>description' (description optional)."""
+    tags = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            parts = line.split('\t')
+            tags.append({'name': parts[0].strip(), 'description': parts[1].strip() if len(parts) >= 2 else ''})
+    return tags
+
+
+def parse_bins(text: str) -> List[str]:
+    """Parse a bins file: one bin per line (first tab column), skipping comments and blank lines."""
+    bins = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('#'):
+            bins.append(line.split('\t')[0].strip())
+    return bins
+
+
+def render_tags(tags: List[Dict]) -> str:
+    """Tags as prompt text: '- name: description' (or '- name') per line."""
+    return "\n".join(
+        f"- {tag['name']}: {tag['description']}" if tag['description'] else f"- {tag['name']}"
+        for tag in tags
+    )
+
+
+def render_bins(bins: List[str]) -> str:
+    """Bins as prompt text: '- bin' per line."""
+    return "\n".join(f"- {bin_name}" for bin_name in bins)
+
+
+def footage_bin_set(footage_id: str) -> str:
+    """Bin set for a footage ID: AF -> archival_footage, LF (or unknown) -> live_footage."""
+    if footage_id.startswith("AF"):
+        return "archival_footage"
+    if not footage_id.startswith("LF"):
+        print(f"  -> WARNING: Unknown footage ID prefix for {footage_id}, defaulting to live footage bins")
+    return "live_footage"
+
+
+class PromptContext:
+    """Per-process cache of parsed tag/bin lists and prompt templates, invalidated by file mtime."""
+
+    def __init__(self):
+        self._entries = {}  # path -> {"signature", "data", "text"}
+        self._lock = threading.Lock()
+        self.stats = {
+            "loads": 0,
+            "hits": 0,
+            "errors": 0
+        }
+
+    def _load(self, path: Path, parse, render=None) -> Dict:
+        """
+        Get the parsed (and rendered) contents of a file, re-parsing only if it changed.
+
+        Args:
+            path: File to load
+            parse: Function turning the file text into data
+            render: Optional function turning the data into prompt text
+
+        Returns:
+            Cache entry with "data", "text" and "loaded" (True if parsed on this call)
+        """
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry["signature"] == signature:
+                self.stats["hits"] += 1
+                return {**entry, "loaded": False}
+
+        with open(path, 'r') as f:
+            data = parse(f.read())
+        entry = {
+            "signature": signature,
+            "data": data,
+            "text": render(data) if render else None
+        }
+
+        with self._lock:
+            self._entries[path] = entry
+            self.stats["loads"] += 1
+        return {**entry, "loaded": True}
+
+    def _load_tags(self, tag_set: str) -> Dict:
+        try:
+            entry = self._load(TAG_FILES[tag_set], parse_tags, render_tags)
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            print(f"  -> WARNING: Failed to load {tag_set} tags: {e}")
+            return {"data": [], "text": ""}
+        if entry["loaded"]:
+            print(f"  -> Loaded {len(entry['data'])} approved {tag_set} tags")
+        return entry
+
+    def _load_bins(self, bin_set: str) -> Dict:
+        try:
+            entry = self._load(BIN_FILES[bin_set], parse_bins, render_bins)
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            print(f"  -> WARNING: Failed to load {bin_set.replace('_', ' ')} bins: {e}")
+            return {"data": [], "text": ""}
+        if entry["loaded"]:
+            print(f"  -> Loaded {len(entry['data'])} approved bins for {bin_set.replace('_', ' ')}")
+        return entry
+
+    def get_tags(self, tag_set: str) -> List[Dict]:
+        """
+        Approved tags for a tag set.
+
+        Args:
+            tag_set: "stills" or "footage"
+
+        Returns:
+            List of {'name', 'description'} (empty if the file can't be read)
+        """
+        return list(self._load_tags(tag_set)["data"])
+
+    def get_tags_text(self, tag_set: str) -> str:
+        """Pre-rendered tag list for prompts ('- name: description' lines)."""
+        return self._load_tags(tag_set)["text"]
+
+    def get_bins(self, bin_set: str) -> List[str]:
+        """
+        Approved bins for a bin set.
+
+        Args:
+            bin_set: "stills", "live_footage" or "archival_footage" (see footage_bin_set())
+
+        Returns:
+            List of bin names (empty if the file can't be read)
+        """
+        return list(self._load_bins(bin_set)["data"])
+
+    def get_bins_text(self, bin_set: str) -> str:
+        """Pre-rendered bin list for prompts ('- bin' lines)."""
+        return self._load_bins(bin_set)["text"]
+
+    def get_prompts(self) -> Dict[str, str]:
+        """All prompt templates from prompts/prompts.json (raises if the file is missing or invalid)."""
+        return dict(self._load(PROMPTS_FILE, json.loads)["data"])
+
+    def get_prompt(self, name: str) -> str:
+        """One prompt template from prompts/prompts.json."""
+        return self._load(PROMPTS_FILE, json.loads)["data"][name]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "files_cached": len(self._entries)}
+
+
+# Global prompt context instance
+global_prompt_context = PromptContext()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Shared Rate Limiter - Sliding-window request/token limits shared through Redis
+
+Every job step runs in its own subprocess, so per-process rate limiting lets
+each worker believe it owns the whole budget; together they overshoot into
+429s. This limiter keeps one sliding one-minute window per (provider, API key,
+model) in Redis, counting requests and tokens, and admits or rejects a call
+atomically in a Lua script. A rejected caller is told exactly how long until
+enough of the window expires and sleeps that long instead of polling.
+
+Token counts are reserved up front from an estimate and reconciled against
+the real usage once the response arrives.
+
+If Redis is unreachable the limiter falls back to an in-process window, which
+is no worse than the old per-process behaviour.
+"""
+
+import time
+import uuid
+import random
+import hashlib
+import threading
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+try:
+    from redis import Redis
+    from redis.exceptions import RedisError
+except ImportError:
+    Redis = None
+    RedisError = Exception
+
+WINDOW_SECONDS = 60
+KEY_PREFIX = "ftg_ratelimit"
+
+# KEYS: requests zset, tokens zset
+# ARGV: now_ms, window_ms, rpm, tpm, tokens, reservation_id
+# Returns {admitted (1/0), wait_ms}
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local rpm = tonumber(ARGV[3])
+local tpm = tonumber(ARGV[4])
+local tokens = tonumber(ARGV[5])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - window)
+
+local requests = redis.call('ZCARD', KEYS[1])
+local entries = redis.call('ZRANGE', KEYS[2], 0, -1, 'WITHSCORES')
+local used = 0
+for i = 1, #entries, 2 do
+    used = used + tonumber(string.match(entries[i], ':(%d+)$'))
+end
+
+local over_requests = rpm > 0 and requests >= rpm
+local over_tokens = tpm > 0 and used > 0 and used + tokens > tpm
+
+if not over_requests and not over_tokens then
+    redis.call('ZADD', KEYS[1], now, ARGV[6])
+    redis.call('ZADD', KEYS[2], now, ARGV[6] .. ':' .. tokens)
+    redis.call('PEXPIRE', KEYS[1], window)
+    redis.call('PEXPIRE', KEYS[2], window)
+    return {1, 0}
+end
+
+local wait = 0
+if over_requests then
+    local oldest = redis.call('ZRANGE', KEYS[1], requests - rpm, requests - rpm, 'WITHSCORES')
+    wait = tonumber(oldest[2]) + window - now
+end
+if over_tokens then
+    local freed = 0
+    for i = 1, #entries, 2 do
+        freed = freed + tonumber(string.match(entries[i], ':(%d+)$'))
+        if used - freed + tokens <= tpm or used - freed == 0 then
+            wait = math.max(wait, tonumber(entries[i + 1]) + window - now)
+            break
+        end
+    end
+end
+return {0, math.max(wait, 1)}
+"""
+
+# KEYS: tokens zset; ARGV: reservation_id, reserved_tokens, actual_tokens
+RECONCILE_SCRIPT = """
+local old = ARGV[1] .. ':' .. ARGV[2]
+local score = redis.call('ZSCORE', KEYS[1], old)
+if not score then
+    return 0
+end
+redis.call('ZREM', KEYS[1], old)
+redis.call('ZADD', KEYS[1], score, ARGV[1] .. ':' .. ARGV[3])
+return 1
+"""
+
+
+class SharedRateLimiter:
+    """Requests- and tokens-per-minute limit for one API key + model, shared across processes."""
+
+    def __init__(self, provider: str, api_key: str, model: str,
+                 requests_per_minute: int, tokens_per_minute: int = 0, redis_conn=None):
+        """
+        Initialize limiter.
+
+        Args:
+            provider: Provider name used in the Redis key (e.g. "gemini")
+            api_key: API key the limit applies to (only a hash of it is stored)
+            model: Model name (limits are per key and model)
+            requests_per_minute: Request budget (0 = unlimited)
+            tokens_per_minute: Token budget (0 = unlimited)
+            redis_conn: Redis connection (default: localhost:6379 db 0)
+        """
+        key_hash = hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:12]
+        self.name = f"{provider}:{key_hash}:{model}"
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests_key = f"{KEY_PREFIX}:{self.name}:requests"
+        self._tokens_key = f"{KEY_PREFIX}:{self.name}:tokens"
+
+        self._redis = redis_conn
+        if self._redis is None and Redis is not None:
+            self._redis = Redis(host='localhost', port=6379, db=0, socket_timeout=5)
+        self._acquire_script = self._redis.register_script(ACQUIRE_SCRIPT) if self._redis else None
+        self._reconcile_script = self._redis.register_script(RECONCILE_SCRIPT) if self._redis else None
+        self._redis_ok = self._redis is not None
+
+        # In-process fallback window: deque of (timestamp, reservation_id, tokens)
+        self._lock = threading.Lock()
+        self._local_window = deque()
+        self.stats = {"acquired": 0, "waits": 0, "wait_seconds": 0.0, "redis_fallbacks": 0}
+
+    def _redis_failed(self, error: Exception):
+        if self._redis_ok:
+            print(f"  -> ⚠️ Rate limiter Redis unavailable ({error}) - limiting per process only")
+        self._redis_ok = False
+        with self._lock:
+            self.stats["redis_fallbacks"] += 1
+
+    def _local_try_acquire(self, tokens: int, reservation_id: str) -> Tuple[bool, float]:
+        """Same admission rule as ACQUIRE_SCRIPT against the in-process window."""
+        with self._lock:
+            now = time.time()
+            while self._local_window and self._local_window[0][0] <= now - WINDOW_SECONDS:
+                self._local_window.popleft()
+
+            requests = len(self._local_window)
+            used = sum(entry[2] for entry in self._local_window)
+            over_requests = self.requests_per_minute > 0 and requests >= self.requests_per_minute
+            over_tokens = self.tokens_per_minute > 0 and used > 0 and used + tokens > self.tokens_per_minute
+
+            if not over_requests and not over_tokens:
+                self._local_window.append((now, reservation_id, tokens))
+                return True, 0.0
+
+            wait = 0.0
+            if over_requests:
+                wait = self._local_window[requests - self.requests_per_minute][0] + WINDOW_SECONDS - now
+            if over_tokens:
+                freed = 0
+                for timestamp, _, entry_tokens in self._local_window:
+                    freed += entry_tokens
+                    if used - freed + tokens <= self.tokens_per_minute or used - freed == 0:
+                        wait = max(wait, timestamp + WINDOW_SECONDS - now)
+                        break
+            return False, max(wait, 0.001)
+
+    def try_acquire(self, tokens: int = 0) -> Tuple[Optional[Dict], float]:
+        """
+        Reserve one request and `tokens` tokens if the window allows it.
+
+        Args:
+            tokens: Estimated tokens for the request
+
+        Returns:
+            (reservation, 0) when admitted, else (None, seconds until it would fit)
+        """
+        reservation = {"id": uuid.uuid4().hex[:16], "tokens": max(0, int(tokens))}
+
+        if self._redis_ok:
+            try:
+                admitted, wait_ms = self._acquire_script(
+                    keys=[self._requests_key, self._tokens_key],
+                    args=[int(time.time() * 1000), WINDOW_SECONDS * 1000, self.requests_per_minute,
+                          self.tokens_per_minute, reservation["tokens"], reservation["id"]]
+                )
+                if admitted:
+                    return reservation, 0.0
+                return None, int(wait_ms) / 1000.0
+            except RedisError as e:
+                self._redis_failed(e)
+
+        admitted, wait = self._local_try_acquire(reservation["tokens"], reservation["id"])
+        return (reservation, 0.0) if admitted else (None, wait)
+
+    def acquire(self, tokens: int = 0) -> Dict:
+        """
+        Reserve capacity, sleeping until the shared window has room.
+
+        Args:
+            tokens: Estimated tokens for the request
+
+        Returns:
+            Reservation to pass to reconcile() once actual usage is known
+        """
+        while True:
+            reservation, wait = self.try_acquire(tokens)
+            if reservation:
+                with self._lock:
+                    self.stats["acquired"] += 1
+                return reservation
+
+            # Sleep until the window frees up; jitter so waiting processes don't stampede
+            wait += random.uniform(0, 0.25)
+            usage = self.get_usage()
+            print(f"⏳ Rate limit ({self.name}): {usage['requests']}/{self.requests_per_minute} requests, "
+                  f"{usage['tokens']}/{self.tokens_per_minute or '∞'} tokens this minute - waiting {wait:.1f}s")
+            with self._lock:
+                self.stats["waits"] += 1
+                self.stats["wait_seconds"] += wait
+            time.sleep(wait)
+
+    def reconcile(self, reservation: Dict, actual_tokens: int):
+        """Replace a reservation's estimated tokens with the actual count."""
+        actual_tokens = max(0, int(actual_tokens))
+        if actual_tokens == reservation["tokens"]:
+            return
+
+        if self._redis_ok:
+            try:
+                self._reconcile_script(keys=[self._tokens_key],
+                                       args=[reservation["id"], reservation["tokens"], actual_tokens])
+                reservation["tokens"] = actual_tokens
+                return
+            except RedisError as e:
+                self._redis_failed(e)
+
+        with self._lock:
+            for i, (timestamp, reservation_id, _) in enumerate(self._local_window):
+                if reservation_id == reservation["id"]:
+                    self._local_window[i] = (timestamp, reservation_id, actual_tokens)
+                    break
+        reservation["tokens"] = actual_tokens
+
+    def get_usage(self) -> Dict:
+        """Requests and tokens used in the current window (across all processes)."""
+        if self._redis_ok:
+            try:
+                cutoff = int((time.time() - WINDOW_SECONDS) * 1000)
+                requests = self._redis.zcount(self._requests_key, cutoff + 1, '+inf')
+                members = self._redis.zrangebyscore(self._tokens_key, cutoff + 1, '+inf')
+                tokens = sum(int(member.rsplit(b':', 1)[1]) for member in members)
+                return {"requests": requests, "tokens": tokens, "shared": True}
+            except RedisError as e:
+                self._redis_failed(e)
+
+        with self._lock:
+            cutoff = time.time() - WINDOW_SECONDS
+            window = [entry for entry in self._local_window if entry[0] > cutoff]
+            return {"requests": len(window), "tokens": sum(entry[2] for entry in window), "shared": False}
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return self.stats.copy()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Stills Ingest - Single-decode server copy and thumbnail for stills AutoLog
+
+Step 01 opened the import image for its dimensions, step 02 decoded it again
+to flatten it, then reopened the written server JPEG (on the server volume)
+just to make the thumbnail, so large TIFF and PSD scans were read and decoded
+two or three times. ingest_still() works from one decoded image instead:
+
+- dimensions and format come from the header of the opened import
+- the import is decoded once to flatten it and normalise it to RGB
+- the server JPEG is encoded in memory and written to the server once
+- the thumbnail is made from those in-memory JPEG bytes (same pixels as
+  reopening the server file, so thumbnails and reverse-search embeddings
+  stay consistent)
+
+Images under UPSCALE_MIN_DIMENSION are still upscaled on disk with OpenCV and
+their thumbnail is made from the upscaled file, as before.
+"""
+
+import io
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+from utils.exiftool_pool import global_exiftool_pool
+from utils.thumbnail import make_thumbnail
+
+AVID_MAX_DIMENSION = 15000
+UPSCALE_MIN_DIMENSION = 1000
+SERVER_JPEG_QUALITY = 95
+THUMBNAIL_SIZE = 588
+THUMBNAIL_QUALITY = 85
+FALLBACK_SIZE = (1920, 1080)
+
+
+def flatten_and_convert_to_rgb(img):
+    """
+    Comprehensive image processing to ensure flattened RGB output.
+    Handles: PSDs, layered TIFs, CMYK, LAB, grayscale, 16-bit, RGBA, etc.
+    """
+    print(f"  -> Image mode: {img.mode}, Format: {img.format}, Size: {img.size}")
+    
+    # Handle multi-layered images (PSD, layered TIFF)
+    layers = getattr(img, 'layers', [])
+    # Ensure layers is a list/tuple before calling len()
+    if hasattr(layers, '__len__') and not isinstance(layers, (str, bytes)) and len(layers) > 1:
+        print(f"  -> Detected multi-layered image with {len(layers)} layers - flattening")
+        # Flatten by converting to RGB which automatically composites layers
+        img = img.convert('RGB')
+        print(f"  -> Layers flattened successfully")
+        return img
+    
+    # If image has seek method, try to composite all frames/layers
+    if hasattr(img, 'seek'):
+        try:
+            # Check if there are multiple frames/layers
+            img.seek(1)
+            print(f"  -> Multiple frames/layers detected - compositing")
+            img.seek(0)
+            # Create composite by converting to RGB
+            img = img.convert('RGB')
+            print(f"  -> Frames composited successfully")
+            return img
+        except EOFError:
+            # Only one frame/layer, continue normal processing
+            img.seek(0)
+    
+    # Handle 16-bit images (both grayscale and color)
+    if img.mode in ('I;16', 'I;16L', 'I;16B'):
+        print(f"  -> Detected 16-bit image - converting to 8-bit RGB")
+        # Convert 16-bit to 8-bit by scaling
+        img_array = np.array(img)
+        img_8bit = (img_array / 256).astype(np.uint8)
+        # Convert to RGB
+        img = Image.fromarray(img_8bit, mode='L').convert('RGB')
+        print(f"  -> 16-bit conversion complete")
+        return img
+    
+    # Handle CMYK images (common in print-ready files)
+    if img.mode == 'CMYK':
+        print(f"  -> Converting CMYK to RGB")
+        img = img.convert('RGB')
+        print(f"  -> CMYK conversion complete")
+        return img
+    
+    # Handle LAB color space
+    if img.mode == 'LAB':
+        print(f"  -> Converting LAB to RGB")
+        img = img.convert('RGB')
+        print(f"  -> LAB conversion complete")
+        return img
+    
+    # Handle RGBA (with alpha channel) - flatten alpha
+    if img.mode == 'RGBA':
+        print(f"  -> Converting RGBA to RGB (removing alpha channel)")
+        # Create white background
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        # Paste image on white background using alpha channel as mask
+        background.paste(img, mask=img.split()[3])  # 3 is the alpha channel
+        img = background
+        print(f"  -> Alpha channel removed, image flattened on white background")
+        return img
+    
+    # Handle palette mode images
+    if img.mode == 'P':
+        print(f"  -> Converting palette mode to RGB")
+        img = img.convert('RGB')
+        print(f"  -> Palette conversion complete")
+        return img
+    
+    # Handle grayscale images
+    if img.mode in ('L', '1'):
+        print(f"  -> Converting grayscale to RGB")
+        img = img.convert('RGB')
+        print(f"  -> Grayscale conversion complete")
+        return img
+    
+    # Handle any other exotic modes
+    if img.mode != 'RGB':
+        print(f"  -> Converting {img.mode} to RGB")
+        try:
+            img = img.convert('RGB')
+            print(f"  -> Conversion to RGB complete")
+        except Exception as e:
+            print(f"  -> Warning: Standard conversion failed ({e}), attempting forced conversion")
+            # Force conversion by going through numpy array
+            img_array = np.array(img)
+            if len(img_array.shape) == 2:
+                # Single channel - convert to RGB by repeating
+                img_rgb = np.stack([img_array, img_array, img_array], axis=2)
+                img = Image.fromarray(img_rgb.astype(np.uint8), mode='RGB')
+            else:
+                # Multi-channel - take first 3 channels or pad to 3
+                if img_array.shape[2] >= 3:
+                    img = Image.fromarray(img_array[:,:,:3].astype(np.uint8), mode='RGB')
+                else:
+                    # Pad to 3 channels
+                    img_rgb = np.zeros((*img_array.shape[:2], 3), dtype=np.uint8)
+                    img_rgb[:,:,:img_array.shape[2]] = img_array
+                    img = Image.fromarray(img_rgb, mode='RGB')
+            print(f"  -> Forced conversion successful")
+        return img
+    
+    print(f"  -> Image already in RGB mode")
+    return img
+
+
+def get_image_dimensions_alternative(import_path):
+    """Get image dimensions using alternative methods when PIL fails."""
+    print(f"  -> Attempting alternative dimension extraction for: {import_path}")
+    
+    # Method 1: Try using exiftool to get dimensions
+    try:
+        metadata = global_exiftool_pool.get_metadata(import_path, tags=['-ImageWidth', '-ImageHeight'])
+        width = metadata.get('ImageWidth')
+        height = metadata.get('ImageHeight')
+        if width and height:
+            print(f"  -> Successfully extracted dimensions via exiftool: {width}x{height}")
+            return int(width), int(height)
+    except Exception as e:
+        print(f"  -> Exiftool dimension extraction failed: {e}")
+    
+    # Method 2: Try using sips (macOS built-in)
+    try:
+        result = subprocess.run(['sips', '-g', 'pixelWidth', '-g', 'pixelHeight', import_path], 
+                              capture_output=True, text=True, timeout=30)
+        if result.returncode == 0:
+            lines = result.stdout.split('\n')
+            width = None
+            height = None
+            for line in lines:
+                if 'pixelWidth:' in line:
+                    width = line.split(':')[1].strip()
+                elif 'pixelHeight:' in line:
+                    height = line.split(':')[1].strip()
+            if width and height:
+                print(f"  -> Successfully extracted dimensions via sips: {width}x{height}")
+                return int(width), int(height)
+    except Exception as e:
+        print(f"  -> Sips dimension extraction failed: {e}")
+    
+    # Method 3: Try using identify (ImageMagick)
+    try:
+        result = subprocess.run(['identify', '-format', '%wx%h', import_path], 
+                              capture_output=True, text=True, timeout=30)
+        if result.returncode == 0:
+            dimensions = result.stdout.strip()
+            if 'x' in dimensions:
+                width, height = dimensions.split('x')
+                print(f"  -> Successfully extracted dimensions via identify: {width}x{height}")
+                return int(width), int(height)
+    except Exception as e:
+        print(f"  -> Identify dimension extraction failed: {e}")
+    
+    print(f"  -> All alternative dimension extraction methods failed")
+    return None, None
+
+
+def upscale_small_image(image_path, target_min_dimension=1000):
+    """Upscale image using OpenCV to reach target minimum dimension."""
+    import cv2  # Only small images are upscaled; keeps OpenCV out of step 01
+    
+    try:
+        print(f"  -> Upscaling small image to minimum {target_min_dimension}px")
+        
+        # Load the image with enhanced decompression
+        img = cv2.imread(image_path, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            raise ValueError(f"Could not load image: {image_path}")
+        
+        original_height, original_width = img.shape[:2]
+        channels = img.shape[2] if len(img.shape) > 2 else 1
+        print(f"  -> Original image size: {original_width}x{original_height} ({channels} channels)")
+        
+        # Calculate required scale factor to reach target minimum dimension
+        current_min_dimension = min(original_width, original_height)
+        required_scale = max(2, target_min_dimension / current_min_dimension)
+        scale_factor = int(required_scale) if required_scale == int(required_scale) else int(required_scale) + 1
+        
+        print(f"  -> Target minimum dimension: {target_min_dimension}px")
+        print(f"  -> Required scale factor: {scale_factor}x")
+        
+        # Convert grayscale to RGB if needed
+        if channels == 1:
+            print(f"  -> Converting grayscale to RGB")
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        elif channels == 4:  # RGBA
+            print(f"  -> Converting RGBA to RGB")
+            img = cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
+        
+        # Simple, safe artifact removal
+        print(f"  -> Applying light artifact removal...")
+        img = cv2.bilateralFilter(img, 5, 20, 20)
+        
+        # Enhanced fallback with multiple passes for better quality
+        print(f"  -> Upscaling with multi-pass bicubic interpolation x{scale_factor}...")
+        current_img = img.copy()
+        remaining_scale = scale_factor
+        
+        while remaining_scale > 1:
+            # Use smaller steps to avoid quality loss
+            step_scale = min(2, remaining_scale)
+            new_width = int(current_img.shape[1] * step_scale)
+            new_height = int(current_img.shape[0] * step_scale)
+            
+            current_img = cv2.resize(current_img, (new_width, new_height), 
+                                   interpolation=cv2.INTER_CUBIC)
+            remaining_scale /= step_scale
+        
+        upscaled = current_img
+        
+        # Simple post-processing to avoid color artifacts
+        print(f"  -> Applying minimal post-processing...")
+        upscaled = cv2.bilateralFilter(upscaled, 3, 15, 15)
+        
+        # Add adaptive film grain
+        print(f"  -> Adding adaptive film grain...")
+        
+        # Convert to float32 for grain processing
+        upscaled_float = upscaled.astype(np.float32) / 255.0
+        
+        # Generate film grain noise
+        height, width, channels = upscaled_float.shape
+        
+        # Analyze image to determine if it's monochromatic (grayscale/sepia)
+        b_channel, g_channel, r_channel = cv2.split(upscaled_float)
+        color_variance = np.var([np.mean(r_channel), np.mean(g_channel), np.mean(b_channel)])
+        
+        grain_intensity = 0.02
+        
+        # If image is essentially monochromatic, use monochromatic grain
+        if color_variance < 0.001:
+            print(f"  -> Detected monochromatic image, applying luminance-based grain")
+            noise_pattern = np.random.normal(0, grain_intensity, (height, width))
+            noise = np.stack([noise_pattern, noise_pattern, noise_pattern], axis=2)
+        else:
+            print(f"  -> Detected color image, applying multi-channel grain")
+            noise_r = np.random.normal(0, grain_intensity * 1.0, (height, width))
+            noise_g = np.random.normal(0, grain_intensity * 0.8, (height, width))
+            noise_b = np.random.normal(0, grain_intensity * 1.2, (height, width))
+            noise = np.stack([noise_b, noise_g, noise_r], axis=2)
+        
+        # Apply grain to the image
+        upscaled_with_grain = upscaled_float + noise
+        upscaled_with_grain = np.clip(upscaled_with_grain, 0, 1)
+        upscaled = (upscaled_with_grain * 255).astype(np.uint8)
+        
+        # Get new dimensions
+        new_height, new_width = upscaled.shape[:2]
+        print(f"  -> Upscaled image size: {new_width}x{new_height}")
+        
+        # Save the upscaled image
+        cv2.imwrite(image_path, upscaled, [cv2.IMWRITE_JPEG_QUALITY, 97])
+        print(f"  -> Upscaled image saved with film grain")
+        
+        return True
+        
+    except Exception as e:
+        print(f"  -> Error during upscaling: {e}")
+        return False
+
+
+def open_still(import_path):
+    """
+    Open an import image (header only; pixels are decoded later, once).
+
+    Falls back to exiftool/sips/identify for the dimensions when PIL can't open
+    the file, and then stands in a white image of that size (as step 02 always has).
+
+    Args:
+        import_path: Path to the import image
+
+    Returns:
+        (image, width, height); width and height are None if no method could read them
+    """
+    try:
+        print(f"  -> Attempting to open image with PIL: {import_path}")
+        img = Image.open(import_path)
+        print(f"  -> Successfully extracted dimensions via PIL: {img.width}x{img.height}")
+        return img, img.width, img.height
+    except Exception as e:
+        print(f"  -> PIL failed to open image: {e}")
+        print(f"  -> Attempting alternative dimension extraction methods...")
+
+    width, height = get_image_dimensions_alternative(import_path)
+    if width and height:
+        print(f"  -> Using alternative dimensions: {width}x{height}")
+        return Image.new('RGB', (width, height), (255, 255, 255)), width, height
+
+    print(f"  -> All dimension extraction methods failed, using default size")
+    return Image.new('RGB', FALLBACK_SIZE, (255, 255, 255)), None, None
+
+
+def write_placeholder_thumbnail(thumb_path):
+    """Grey placeholder thumbnail for stills whose thumbnail couldn't be made."""
+    Image.new('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE), (200, 200, 200)).save(thumb_path, 'JPEG', quality=THUMBNAIL_QUALITY)
+    return thumb_path
+
+
+def ingest_still(img, destination_path, thumb_path):
+    """
+    Write the RGB server JPEG and the thumbnail from one decode of the import.
+
+    Args:
+        img: Image from open_still() (not yet decoded)
+        destination_path: Server JPEG path
+        thumb_path: Where to write the thumbnail JPEG
+
+    Returns:
+        Dict with source width/height/mode/format, server_size, was_upscaled and
+        thumb_path (None if the thumbnail failed; see write_placeholder_thumbnail)
+    """
+    info = {
+        "width": img.width,
+        "height": img.height,
+        "mode": img.mode,
+        "format": img.format,
+        "was_upscaled": False,
+        "thumb_path": None
+    }
+
+    # Comprehensive image processing: flatten layers and convert to RGB (the one full decode)
+    print(f"🔄 Processing image: flattening and converting to RGB")
+    rgb = flatten_and_convert_to_rgb(img)
+    print(f"✅ Image processing complete: {rgb.mode} mode, {rgb.size[0]}x{rgb.size[1]}")
+
+    if max(rgb.size) > AVID_MAX_DIMENSION:
+        rgb.thumbnail((AVID_MAX_DIMENSION, AVID_MAX_DIMENSION), Image.Resampling.LANCZOS)
+    info["server_size"] = rgb.size
+
+    # Encode once in memory: the same bytes go to the server and into the thumbnail
+    server_jpeg = io.BytesIO()
+    rgb.save(server_jpeg, 'JPEG', quality=SERVER_JPEG_QUALITY)
+    del rgb
+    with open(destination_path, 'wb') as f:
+        f.write(server_jpeg.getbuffer())
+    print(f"  -> Wrote server JPEG ({server_jpeg.tell() / 1024 / 1024:.1f}MB): {destination_path}")
+
+    # Check if image needs upscaling (under 1000px in any dimension)
+    if min(info["width"], info["height"]) < UPSCALE_MIN_DIMENSION:
+        print(f"🔄 Image under {UPSCALE_MIN_DIMENSION}px detected - triggering automatic upscaling")
+        if upscale_small_image(destination_path, target_min_dimension=UPSCALE_MIN_DIMENSION):
+            info["was_upscaled"] = True
+            print(f"✅ Automatic upscaling completed successfully")
+        else:
+            print(f"⚠️ Automatic upscaling failed, continuing with original image")
+
+    # Thumbnail from the final server image (the small upscaled file, or the in-memory JPEG)
+    try:
+        source = destination_path if info["was_upscaled"] else io.BytesIO(server_jpeg.getbuffer())
+        make_thumbnail(source, THUMBNAIL_SIZE).save(thumb_path, 'JPEG', quality=THUMBNAIL_QUALITY)
+        info["thumb_path"] = thumb_path
+    except Exception as e:
+        print(f"  -> Warning: Could not create thumbnail: {e}")
+
+    return info
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Thumbnail - Reduced-resolution decode for thumbnails
+
+Every thumbnail path used to open the source, copy() or convert() it (which
+decodes every pixel) and only then shrink it to 588px, so a 100 MP scan cost a
+full-resolution decode and several hundred MB of RAM for a 588px JPEG. That
+copy also defeats the reduced decoding Image.thumbnail() does on an image
+that isn't loaded yet.
+
+make_thumbnail() shrinks before anything forces a full decode:
+- JPEG: DCT scaling via Image.draft() decodes at 1/2, 1/4 or 1/8 size
+- other formats: decoded, then reduce() by an integer factor before LANCZOS
+- very large uncompressed TIFFs: decoded and reduced band by band (strips are
+  split by row), so only BAND_ROWS rows are ever held at full resolution
+- mode conversion (RGB, flattening alpha) runs on the small image
+
+Dimensions should be read with Image.open() alone, which only parses the
+header; nothing in this module is needed for that.
+
+Configuration (env):
+- FTG_THUMB_REDUCING_GAP: Keep at least this multiple of the target size before the
+  final LANCZOS pass; 3.0 is indistinguishable from a full-size resample (default: 3.0)
+- FTG_THUMB_BANDED_MIN_MP: Uncompressed TIFFs above this many megapixels are decoded
+  band by band (default: 64)
+"""
+
+import os
+import math
+from typing import Callable, Optional
+
+from PIL import Image
+
+THUMBNAIL_SIZE = 588
+BAND_ROWS = 1024  # Full-resolution rows decoded at once in banded mode
+
+# Modes thumbnail() can't resample properly (palette / 1-bit fall back to NEAREST, reduce() rejects 16-bit)
+UNRESAMPLABLE_MODES = {"1", "P", "PA", "I;16", "I;16L", "I;16B", "I;16N"}
+
+
+def _reducing_gap() -> float:
+    return float(os.getenv("FTG_THUMB_REDUCING_GAP", "3.0"))
+
+
+def _fit(size: tuple, max_size: int) -> tuple:
+    """Aspect-preserving size that fits in max_size x max_size (never enlarges)."""
+    width, height = size
+    scale = min(1.0, max_size / width, max_size / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _raw_tiff_tiles(img: Image.Image) -> Optional[list]:
+    """
+    Tile descriptors of an uncompressed TIFF, with full-width strips split into BAND_ROWS-row pieces.
+
+    Compressed TIFFs are decoded by libtiff as one tile covering the whole image,
+    so they (and anything else that can't be addressed by row) return None.
+    """
+    if img.format != "TIFF" or getattr(img, "use_load_libtiff", True) or img.mode in UNRESAMPLABLE_MODES:
+        return None
+    if img.tag_v2.get(284, 1) != 1:  # PlanarConfiguration: separate planes can't be split by row
+        return None
+    bits_per_pixel = sum(img.tag_v2.get(258, (8,)))
+    if (img.width * bits_per_pixel) % 8:
+        return None
+    row_bytes = img.width * bits_per_pixel // 8
+
+    tiles = []
+    for tile in img.tile:
+        x0, y0, x1, y1 = tile.extents
+        if tile.codec_name != "raw" or x0 != 0 or x1 != img.width or tile.args[1] not in (0, row_bytes):
+            tiles.append(tile)
+            continue
+        for top in range(y0, y1, BAND_ROWS):
+            tiles.append(tile._replace(extents=(0, top, x1, min(top + BAND_ROWS, y1)),
+                                       offset=tile.offset + (top - y0) * row_bytes))
+    return tiles
+
+
+def _reduce_raw_tiff_in_bands(path: str, factor: int) -> Optional[Image.Image]:
+    """Decode an uncompressed TIFF a band of rows at a time, reducing each band by `factor`; None if not possible."""
+    with Image.open(path) as img:
+        tiles = _raw_tiff_tiles(img)
+        (width, height), mode = img.size, img.mode
+    if not tiles or len(tiles) < 2:
+        return None
+
+    reduced = Image.new(mode, (math.ceil(width / factor), math.ceil(height / factor)))
+    band_top = 0
+    for band_bottom in sorted({tile.extents[3] for tile in tiles}):
+        # Bands end on tile boundaries that are multiples of the factor, so each band reduces exactly
+        if band_bottom < height and (band_bottom - band_top < BAND_ROWS or band_bottom % factor):
+            continue
+        band_tiles = [
+            tile._replace(extents=(tile.extents[0], tile.extents[1] - band_top, tile.extents[2], tile.extents[3] - band_top))
+            for tile in tiles if band_top <= tile.extents[1] and tile.extents[3] <= band_bottom
+        ]
+        with Image.open(path) as band:
+            band._size = (width, band_bottom - band_top)
+            band.tile = band_tiles
+            band.load()
+            reduced.paste(band.reduce(factor), (0, band_top // factor))
+        band_top = band_bottom
+
+    return reduced
+
+
+def make_thumbnail(source, max_size: int = THUMBNAIL_SIZE,
+                   convert: Callable[[Image.Image], Image.Image] = None) -> Image.Image:
+    """
+    Thumbnail of an image file without decoding it at full resolution where the format allows.
+
+    Args:
+        source: Image path or file object (e.g. BytesIO of an encoded JPEG)
+        max_size: Longest edge of the thumbnail
+        convert: Mode conversion (e.g. to RGB) applied to the reduced image
+
+    Returns:
+        Loaded thumbnail image (the source file is closed)
+    """
+    gap = _reducing_gap()
+    with Image.open(source) as img:
+        target = _fit(img.size, max_size)
+        factor = min(img.width // (target[0] * gap), img.height // (target[1] * gap))
+        banded_min_pixels = float(os.getenv("FTG_THUMB_BANDED_MIN_MP", "64")) * 1_000_000
+
+        reduced, converted = None, False
+        if factor >= 2 and isinstance(source, str) and img.width * img.height >= banded_min_pixels:
+            reduced = _reduce_raw_tiff_in_bands(source, int(factor))
+
+        if reduced is None:
+            reduced = img
+            if img.mode in UNRESAMPLABLE_MODES:
+                # Normalise first so the resample isn't nearest-neighbour (these are rarely large)
+                reduced = convert(img) if convert else img.convert("RGBA" if "A" in img.mode else "RGB")
+                converted = convert is not None
+
+        # draft() (JPEG) / reduce() then LANCZOS; a no-op draft once already loaded or reduced
+        reduced.thumbnail((max_size, max_size), Image.Resampling.LANCZOS, reducing_gap=gap)
+        thumb = reduced.copy()
+
+    return convert(thumb) if convert and not converted else thumb
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Whisper Service - Resident Whisper model for audio transcription
+
+The whisper CLI reloads the model for every clip, which is most of the
+runtime on short footage. This utility loads the openai-whisper model once
+per process and reuses it for every transcription that process handles.
+
+It is driven by the ftg_ai_transcribe RQ queue (see
+jobs/ftg_autolog_B_queue_jobs.py). Those workers run as rq SimpleWorkers, so
+jobs execute in the worker process itself and the model stays loaded between
+jobs. Audio is decoded from an ffmpeg pipe into memory (see
+audio_detector.decode_audio_pcm), so no temp WAV is written. Several CPU
+workers can run side by side; each one limits torch to its share of the cores.
+
+Configuration (env):
+- FTG_WHISPER_MODEL: Model size (default: base)
+- FTG_WHISPER_THREADS: torch threads per worker (default: cores / FTG_WHISPER_WORKERS)
+- FTG_WHISPER_WORKERS: Number of transcription workers started (default: 2)
+- FTG_VAD: Set to 0 to transcribe the whole track without the speech pre-pass
+- FTG_VAD_FULL_TRACK_RATIO: Speech ratio above which the whole track is transcribed (default: 0.8)
+- FTG_WHISPER_PROCESSES: Process pool size for long clips (default: cores / workers / 2)
+- FTG_WHISPER_CHUNK_SECONDS: Target chunk length for parallel transcription (default: 300)
+- FTG_WHISPER_PARALLEL_MIN_SECONDS: Speech needed before chunks go to the pool (default: 600)
+
+Long clips are split into chunks at the quietest point near each chunk
+boundary, transcribed in a process pool (one model per pool process), and
+merged back with source-time offsets. Chunks overlap slightly so no word is
+cut; each chunk only keeps segments centred in the span it owns.
+
+Whisper pads every call to a 30 s window, so short speech regions are packed
+back to back (with a short silence between them) into buffers of up to 30 s.
+Each buffer keeps an offset map, and segment/word timestamps are shifted back
+to source time per region when the results are merged.
+"""
+
+import os
+import json
+import atexit
+import time
+import socket
+import threading
+import multiprocessing
+import concurrent.futures
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.audio_detector import (
+    decode_audio_pcm, detect_speech_regions, summarize_speech_regions, WHISPER_SAMPLE_RATE
+)
+
+# Transcribe the whole track instead of per region once speech covers this much of it
+VAD_FULL_TRACK_RATIO = float(os.getenv("FTG_VAD_FULL_TRACK_RATIO", "0.8"))
+
+# Parallel chunked transcription for long-form footage
+CHUNK_SECONDS = float(os.getenv("FTG_WHISPER_CHUNK_SECONDS", "300"))
+CHUNK_OVERLAP_SECONDS = 1.0
+CHUNK_SEARCH_SECONDS = 15.0
+PARALLEL_MIN_SECONDS = float(os.getenv("FTG_WHISPER_PARALLEL_MIN_SECONDS", "600"))
+
+# Whisper decodes 30 s windows; short regions share one call up to this length
+PACK_SECONDS = 30.0
+PACK_GAP_SECONDS = 0.5
+
+# Running jobs refresh heartbeat_at this often; readers treat 4x this as dead
+HEARTBEAT_SECONDS = 15
+
+
+def quietest_point(audio: np.ndarray, start: float, end: float, frame_seconds: float = 0.03) -> float:
+    """Time (seconds) of the lowest-energy frame between start and end."""
+    frame_length = int(WHISPER_SAMPLE_RATE * frame_seconds)
+    window = np.asarray(audio[int(start * WHISPER_SAMPLE_RATE):int(end * WHISPER_SAMPLE_RATE)], dtype=np.float32)
+    frame_count = len(window) // frame_length
+    if frame_count == 0:
+        return (start + end) / 2
+    energy = np.mean(window[:frame_count * frame_length].reshape(frame_count, frame_length) ** 2, axis=1)
+    return start + (int(np.argmin(energy)) + 0.5) * frame_seconds
+
+
+def plan_chunks(
+    audio: np.ndarray,
+    regions: List[Tuple[float, float]],
+    chunk_seconds: float = CHUNK_SECONDS,
+    overlap_seconds: float = CHUNK_OVERLAP_SECONDS,
+    search_seconds: float = CHUNK_SEARCH_SECONDS
+) -> List[List[Dict]]:
+    """
+    Split regions into transcription pieces and group them into pool tasks.
+
+    Regions longer than 1.5x chunk_seconds are cut at the quietest point within
+    search_seconds of each chunk boundary. Each piece records the span it owns
+    (own_start/own_end) and the slightly wider span it transcribes. Short
+    consecutive pieces are grouped so every task carries about chunk_seconds.
+
+    Args:
+        audio: Full-track samples
+        regions: (start, end) seconds to transcribe
+        chunk_seconds: Target audio per task
+        overlap_seconds: Extra audio on each side of an interior cut
+        search_seconds: How far from the target boundary to look for a quiet cut
+
+    Returns:
+        List of tasks, each a list of piece dicts (start, end, own_start, own_end, last)
+    """
+    pieces = []
+    for region_start, region_end in regions:
+        cuts = [region_start]
+        while region_end - cuts[-1] > chunk_seconds * 1.5:
+            target = cuts[-1] + chunk_seconds
+            cuts.append(quietest_point(audio, target - search_seconds, target + search_seconds))
+        cuts.append(region_end)
+
+        for own_start, own_end in zip(cuts, cuts[1:]):
+            pieces.append({
+                "start": max(region_start, own_start - overlap_seconds),
+                "end": min(region_end, own_end + overlap_seconds),
+                "own_start": own_start,
+                "own_end": own_end,
+                "last": own_end == region_end
+            })
+
+    tasks = []
+    for piece in pieces:
+        if tasks and sum(p["end"] - p["start"] for p in tasks[-1]) + piece["end"] - piece["start"] <= chunk_seconds:
+            tasks[-1].append(piece)
+        else:
+            tasks.append([piece])
+    return tasks
+
+
+def pack_pieces(task: List[Dict], pack_seconds: float = PACK_SECONDS,
+                gap_seconds: float = PACK_GAP_SECONDS) -> List[List[Dict]]:
+    """
+    Group consecutive pieces of a task into buffers of up to pack_seconds.
+
+    Pieces longer than pack_seconds (e.g. chunks of a long region) stay on
+    their own; everything else shares a Whisper call with its neighbours.
+
+    Args:
+        task: Pieces from plan_chunks(), in source order
+        pack_seconds: Maximum buffer length including the gaps
+        gap_seconds: Silence inserted between packed pieces
+
+    Returns:
+        List of packs, each a list of pieces
+    """
+    packs = []
+    for piece in task:
+        length = piece["end"] - piece["start"]
+        if packs and pack_layout(packs[-1], gap_seconds)[-1][1] + gap_seconds + length <= pack_seconds:
+            packs[-1].append(piece)
+        else:
+            packs.append([piece])
+    return packs
+
+
+def pack_layout(pack: List[Dict], gap_seconds: float = PACK_GAP_SECONDS) -> List[Tuple[float, float]]:
+    """Offset map of a pack: (buffer_start, buffer_end) seconds of each piece in the packed buffer."""
+    layout = []
+    position = 0.0
+    for piece in pack:
+        length = piece["end"] - piece["start"]
+        layout.append((position, position + length))
+        position += length + gap_seconds
+    return layout
+
+
+def pack_audio(audio: np.ndarray, pack: List[Dict], gap_seconds: float = PACK_GAP_SECONDS) -> np.ndarray:
+    """Contiguous float32 buffer of the pack's pieces separated by gap_seconds of silence."""
+    if len(pack) == 1:
+        return slice_audio(audio, pack[0]["start"], pack[0]["end"])
+    gap = np.zeros(int(gap_seconds * WHISPER_SAMPLE_RATE), dtype=np.float32)
+    parts = []
+    for index, piece in enumerate(pack):
+        if index:
+            parts.append(gap)
+        parts.append(slice_audio(audio, piece["start"], piece["end"]))
+    return np.concatenate(parts)
+
+
+def split_pack_result(pack: List[Dict], result: Dict,
+                      gap_seconds: float = PACK_GAP_SECONDS) -> List[Tuple[Dict, Dict]]:
+    """
+    Split a packed buffer's Whisper result back into per-piece results.
+
+    Each segment goes to the piece its midpoint falls in (or the nearest one
+    if it lands in a gap). Words are mapped through the piece they fall in,
+    so a segment spanning a gap still gets source-correct word times.
+    Times come back relative to the piece start, as merge_piece_results()
+    expects.
+
+    Args:
+        pack: Pieces transcribed together
+        result: Whisper result for pack_audio(pack)
+        gap_seconds: Gap used when the buffer was built
+
+    Returns:
+        (piece, result) pairs, one per piece
+    """
+    layout = pack_layout(pack, gap_seconds)
+
+    def locate(t):
+        # Piece whose span holds t, or the nearest one when t falls in a gap
+        return min(range(len(layout)), key=lambda i: max(layout[i][0] - t, t - layout[i][1], 0))
+
+    def to_source(t, index):
+        buffer_start, buffer_end = layout[index]
+        return pack[index]["start"] + min(max(t, buffer_start), buffer_end) - buffer_start
+
+    segments_by_piece = [[] for _ in pack]
+    for segment in result.get('segments', []):
+        index = locate((segment['start'] + segment['end']) / 2)
+        piece_start = pack[index]["start"]
+        words = segment.get('words', [])
+        for word in words:
+            word_index = locate((word['start'] + word['end']) / 2)
+            word['start'] = to_source(word['start'], word_index) - piece_start
+            word['end'] = to_source(word['end'], word_index) - piece_start
+        if words:
+            segment['start'] = min(word['start'] for word in words)
+            segment['end'] = max(word['end'] for word in words)
+        else:
+            segment['start'] = to_source(segment['start'], index) - piece_start
+            segment['end'] = to_source(segment['end'], index) - piece_start
+        segments_by_piece[index].append(segment)
+
+    return [(piece, {"segments": segments}) for piece, segments in zip(pack, segments_by_piece)]
+
+
+def merge_piece_results(piece_results: List[Tuple[Dict, Dict]]) -> Dict:
+    """
+    Merge per-piece Whisper results into one transcript in source-clip time.
+
+    Segments are shifted by their piece start; a segment is kept only if its
+    midpoint falls in the span the piece owns, which drops the duplicate copy
+    from the neighbouring piece's overlap.
+
+    Args:
+        piece_results: (piece, whisper result) pairs
+
+    Returns:
+        Whisper-style result with segments/words in source-clip time
+    """
+    segments = []
+    for piece, result in piece_results:
+        offset = piece["start"]
+        for segment in result.get('segments', []):
+            midpoint = offset + (segment['start'] + segment['end']) / 2
+            if midpoint < piece["own_start"] or (midpoint >= piece["own_end"] and not piece["last"]):
+                continue
+            segment['start'] = round(segment['start'] + offset, 3)
+            segment['end'] = round(segment['end'] + offset, 3)
+            segment['seek'] = segment.get('seek', 0) + int(offset * 100)  # mel frames (10ms)
+            for word in segment.get('words', []):
+                word['start'] = round(word['start'] + offset, 3)
+                word['end'] = round(word['end'] + offset, 3)
+            segments.append(segment)
+
+    segments.sort(key=lambda segment: segment['start'])
+    for index, segment in enumerate(segments):
+        segment['id'] = index
+
+    return {
+        "text": ''.join(segment.get('text', '') for segment in segments),
+        "segments": segments,
+        "language": 'en'
+    }
+
+
+def slice_audio(audio: np.ndarray, start: float, end: float) -> np.ndarray:
+    """Contiguous float32 copy of audio between start and end seconds."""
+    return np.ascontiguousarray(audio[int(start * WHISPER_SAMPLE_RATE):int(end * WHISPER_SAMPLE_RATE)], dtype=np.float32)
+
+
+# Pool process state (one model per pool process)
+_pool_transcriber = None
+
+
+def _pool_init(model_name: str, threads: int):
+    global _pool_transcriber
+    os.environ["FTG_WHISPER_THREADS"] = str(threads)
+    _pool_transcriber = WhisperTranscriber(model_name)
+    _pool_transcriber.get_model()
+
+
+def _pool_transcribe(task: List[Tuple[List[Dict], np.ndarray]]) -> List[Tuple[List[Dict], Dict]]:
+    model = _pool_transcriber.get_model()
+    return [(pack, _pool_transcriber._transcribe_audio(model, buffer)) for pack, buffer in task]
+
+
+def write_status(status_file: str, status: Dict):
+    """Atomically write a transcription status record."""
+    tmp_path = status_file + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp_path, status_file)
+
+
+class WhisperTranscriber:
+    """Keeps one Whisper model in memory per process."""
+
+    def __init__(self, model_name: str = None):
+        """
+        Initialize transcriber (the model is loaded on first use).
+
+        Args:
+            model_name: Whisper model size (default: FTG_WHISPER_MODEL env or base)
+        """
+        self.model_name = model_name or os.getenv("FTG_WHISPER_MODEL", "base")
+        workers = max(1, int(os.getenv("FTG_WHISPER_WORKERS", "2")))
+        self.processes = int(os.getenv("FTG_WHISPER_PROCESSES", "0")) or max(1, (os.cpu_count() or 1) // workers // 2)
+        self._model = None
+        self._pool = None
+        self._lock = threading.Lock()
+        self.stats = {"transcriptions": 0, "failures": 0, "model_loads": 0,
+                      "model_load_seconds": 0.0, "audio_seconds": 0.0, "speech_seconds": 0.0,
+                      "transcribe_seconds": 0.0}
+
+    def _configure_threads(self):
+        import torch
+
+        workers = max(1, int(os.getenv("FTG_WHISPER_WORKERS", "2")))
+        threads = int(os.getenv("FTG_WHISPER_THREADS", "0")) or max(1, (os.cpu_count() or 1) // workers)
+        torch.set_num_threads(threads)
+
+    def get_model(self):
+        """Load the model once and return it."""
+        with self._lock:
+            if self._model is None:
+                import whisper
+
+                self._configure_threads()
+                start_time = time.time()
+                print(f"  -> 🧠 Loading Whisper model '{self.model_name}'...")
+                self._model = whisper.load_model(self.model_name, device="cpu")
+                load_seconds = time.time() - start_time
+                self.stats["model_loads"] += 1
+                self.stats["model_load_seconds"] += load_seconds
+                print(f"  -> ✅ Whisper model loaded in {load_seconds:.1f}s")
+            return self._model
+
+    def _transcribe_audio(self, model, audio: np.ndarray) -> Dict:
+        return model.transcribe(
+            np.ascontiguousarray(audio, dtype=np.float32),
+            language='en',  # Assume English
+            word_timestamps=True,  # Get word-level timestamps
+            fp16=False,
+            verbose=None
+        )
+
+    def _get_pool(self, processes: int) -> concurrent.futures.ProcessPoolExecutor:
+        """Start (once) the process pool used for long clips."""
+        with self._lock:
+            if self._pool is None:
+                workers = max(1, int(os.getenv("FTG_WHISPER_WORKERS", "2")))
+                threads = max(1, (os.cpu_count() or 1) // workers // processes)
+                self._pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_pool_init,
+                    initargs=(self.model_name, threads)
+                )
+                print(f"  -> 🧠 Started Whisper process pool ({processes} x {threads} threads)")
+            return self._pool
+
+    def transcribe_regions(self, audio: np.ndarray, regions: List[Tuple[float, float]],
+                           processes: Optional[int] = None, chunk_seconds: float = CHUNK_SECONDS,
+                           parallel_min_seconds: float = PARALLEL_MIN_SECONDS,
+                           on_task_done: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """
+        Transcribe the given regions, in parallel chunks for long audio, in source time.
+
+        Short pieces within a task are packed into shared 30 s buffers (see
+        pack_pieces), so a clip with many brief utterances costs a few Whisper
+        calls instead of one padded 30 s window per utterance.
+
+        Args:
+            audio: Full-track samples
+            regions: (start, end) seconds to transcribe
+            processes: Pool size (default: FTG_WHISPER_PROCESSES env); 1 = in-process
+            chunk_seconds: Target audio per pool task
+            parallel_min_seconds: Minimum audio before the pool is used
+            on_task_done: Called with (tasks_done, tasks_total) as chunks finish
+
+        Returns:
+            Whisper-style result with segments/words in source-clip time
+        """
+        tasks = [pack_pieces(task) for task in plan_chunks(audio, regions, chunk_seconds=chunk_seconds)]
+        speech_seconds = sum(end - start for start, end in regions)
+        processes = processes or self.processes
+        piece_results = []
+
+        if len(regions) > 1:
+            print(f"  -> 📦 Packed {len(regions)} regions into {sum(len(task) for task in tasks)} Whisper calls")
+
+        if processes > 1 and len(tasks) > 1 and speech_seconds >= parallel_min_seconds:
+            print(f"  -> ⚡ Transcribing {len(tasks)} chunks across {min(processes, len(tasks))} processes...")
+            pool = self._get_pool(processes)
+            futures = [
+                pool.submit(_pool_transcribe, [(pack, pack_audio(audio, pack)) for pack in task])
+                for task in tasks
+            ]
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                for pack, result in future.result():
+                    piece_results.extend(split_pack_result(pack, result))
+                if on_task_done:
+                    on_task_done(done, len(tasks))
+        else:
+            model = self.get_model()
+            for done, task in enumerate(tasks, 1):
+                for pack in task:
+                    piece_results.extend(split_pack_result(pack, self._transcribe_audio(model, pack_audio(audio, pack))))
+                if on_task_done:
+                    on_task_done(done, len(tasks))
+
+        return merge_piece_results(piece_results)
+
+    def close(self):
+        """Shut down the process pool."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def transcribe(self, video_path: str, output_path: str, status_file: str,
+                   job_id: Optional[str] = None,
+                   on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Transcribe a clip's audio track and write transcript.json plus status records.
+
+        While running, the status record gets a heartbeat_at timestamp every
+        HEARTBEAT_SECONDS, so a reader can tell a live job from a dead one.
+
+        Args:
+            video_path: Path to video file
+            output_path: Path to write transcript JSON
+            status_file: Path to write status updates
+            job_id: Queue job ID to record in the status file
+            on_progress: Called with the status record after each update
+
+        Returns:
+            Final status record
+        """
+        started_at = time.time()
+        status = {
+            "status": "running",
+            "progress": 0,
+            "model": self.model_name,
+            "worker": f"{socket.gethostname()}:{os.getpid()}",
+            "job_id": job_id,
+            "started_at": started_at,
+            "heartbeat_at": started_at
+        }
+        status_lock = threading.Lock()
+        stop_heartbeat = threading.Event()
+
+        def update(**changes):
+            with status_lock:
+                status.update(changes)
+                status["heartbeat_at"] = time.time()
+                write_status(status_file, status)
+                snapshot = dict(status)
+            if on_progress:
+                try:
+                    on_progress(snapshot)
+                except Exception as e:
+                    print(f"  -> Warning: Progress callback failed: {e}")
+
+        def heartbeat():
+            while not stop_heartbeat.wait(HEARTBEAT_SECONDS):
+                update()
+
+        update()
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+
+        try:
+            # Decode straight from an ffmpeg pipe - no temp WAV on disk
+            decode_start = time.time()
+            audio = decode_audio_pcm(video_path, memmap_dir=os.path.dirname(output_path) or None)
+            audio_duration = len(audio) / WHISPER_SAMPLE_RATE
+            update(
+                progress=10,
+                model_reused=self._model is not None or self._pool is not None,
+                audio_duration_seconds=round(audio_duration, 2),
+                decode_seconds=round(time.time() - decode_start, 2)
+            )
+            print(f"  -> Decoded {audio_duration:.1f}s of audio in {status['decode_seconds']:.1f}s"
+                  f"{' (memory-mapped)' if isinstance(audio, np.memmap) else ''}")
+
+            # Voice-activity pre-pass - only speech (padded) goes to Whisper
+            vad = None
+            if os.getenv("FTG_VAD", "1") != "0":
+                regions = detect_speech_regions(audio)
+                vad = summarize_speech_regions(regions, audio_duration)
+                update(progress=15, vad={k: v for k, v in vad.items() if k != "regions"})
+                print(f"  -> 🗣️ VAD: {vad['speech_seconds']:.1f}s speech in {len(regions)} regions "
+                      f"({vad['speech_ratio'] * 100:.0f}% of track)")
+
+            # Chunks completed move progress from 15% to 95%
+            def on_task_done(done, total):
+                update(progress=15 + int(80 * done / total), chunks_done=done, chunks_total=total)
+
+            print(f"  -> 🎙️ Transcribing {os.path.basename(video_path)} ({self.model_name} model)...")
+            if vad is None or vad["speech_ratio"] >= VAD_FULL_TRACK_RATIO:
+                result = self.transcribe_regions(audio, [(0.0, audio_duration)], on_task_done=on_task_done)
+            elif not regions:
+                print(f"  -> 📵 No speech found - skipping Whisper")
+                result = {"text": "", "segments": [], "language": 'en'}
+            else:
+                result = self.transcribe_regions(audio, regions, on_task_done=on_task_done)
+
+            if vad is not None:
+                result["vad"] = vad
+
+            with open(output_path, 'w') as f:
+                json.dump(result, f)
+
+            segments = result.get('segments', [])
+            elapsed = time.time() - started_at
+
+            with self._lock:
+                self.stats["transcriptions"] += 1
+                self.stats["audio_seconds"] += audio_duration
+                self.stats["speech_seconds"] += vad["speech_seconds"] if vad else audio_duration
+                self.stats["transcribe_seconds"] += elapsed
+
+            stop_heartbeat.set()
+            update(
+                status="completed",
+                progress=100,
+                output_file=output_path,
+                segments=len(segments),
+                completed_at=time.time(),
+                duration_seconds=round(elapsed, 2)
+            )
+            print(f"  -> ✅ Transcription completed in {elapsed:.1f}s: {output_path}")
+            return dict(status)
+
+        except Exception as e:
+            with self._lock:
+                self.stats["failures"] += 1
+            stop_heartbeat.set()
+            update(status="failed", error=str(e), completed_at=time.time())
+            print(f"  -> ❌ Transcription error: {e}")
+            return dict(status)
+
+        finally:
+            stop_heartbeat.set()
+
+    def get_stats(self) -> Dict:
+        """Get per-process transcription statistics."""
+        with self._lock:
+            return {**self.stats, "model": self.model_name, "model_loaded": self._model is not None,
+                    "pool_processes": self.processes if self._pool is not None else 0}
+
+
+# Global transcriber instance (one model per process)
+global_whisper_transcriber = WhisperTranscriber()
+atexit.register(global_whisper_transcriber.close)
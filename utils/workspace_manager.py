@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Workspace Manager - Per-item temp directories with a byte quota
+
+Footage AutoLog Part B writes frames, audio and JSON into one directory per
+item (ftg_autolog_{footage_id}). Nothing used to remove them, so long ingests
+filled the disk. This utility allocates those directories under a
+configurable root (which can be a RAM disk), pins items that are still in
+flight, and evicts completed items in least-recently-used order whenever the
+total goes over quota.
+
+State lives on disk (a small marker file per directory, plus a lock file and a
+stats file on the root) because every Part B step runs in its own process and
+the API process that reports usage never allocates or evicts anything itself.
+
+Configuration (env):
+- FTG_WORKSPACE_ROOT: Root directory (default: /private/tmp)
+- FTG_WORKSPACE_QUOTA_GB: Total byte quota across all items (default: 20)
+- FTG_WORKSPACE_PIN_TTL_HOURS: Pins older than this are treated as abandoned (default: 24)
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+WORKSPACE_PREFIX = "ftg_autolog_"
+MARKER_FILE = ".workspace.json"
+LOCK_FILE = ".ftg_workspace.lock"
+STATS_FILE = ".ftg_workspace_stats.json"
+
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of all files under a directory."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class WorkspaceManager:
+    """Allocates, pins and evicts per-item Part B workspace directories."""
+
+    def __init__(self, root: str = None, quota_bytes: int = None, pin_ttl_seconds: int = None):
+        """
+        Initialize workspace manager.
+
+        Args:
+            root: Root directory for item workspaces (default: FTG_WORKSPACE_ROOT env or /private/tmp)
+            quota_bytes: Byte quota (default: FTG_WORKSPACE_QUOTA_GB env or 20 GB)
+            pin_ttl_seconds: Age after which a pin is considered abandoned (default: 24h)
+        """
+        self.root = root or os.getenv("FTG_WORKSPACE_ROOT", "/private/tmp")
+        self.quota_bytes = quota_bytes or int(float(os.getenv("FTG_WORKSPACE_QUOTA_GB", "20")) * 1024 ** 3)
+        self.pin_ttl_seconds = pin_ttl_seconds or int(float(os.getenv("FTG_WORKSPACE_PIN_TTL_HOURS", "24")) * 3600)
+        self._lock = threading.Lock()
+        self.stats = {"allocations": 0, "evictions": 0, "bytes_evicted": 0}
+
+    def get_dir(self, footage_id: str) -> str:
+        """Workspace path for an item (not created)."""
+        return os.path.join(self.root, f"{WORKSPACE_PREFIX}{footage_id}")
+
+    @contextmanager
+    def _root_lock(self):
+        """Cross-process lock on the workspace root."""
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock, open(os.path.join(self.root, LOCK_FILE), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_marker(self, workspace_dir: str) -> Dict:
+        try:
+            with open(os.path.join(workspace_dir, MARKER_FILE), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_marker(self, workspace_dir: str, marker: Dict):
+        tmp_path = os.path.join(workspace_dir, MARKER_FILE + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(marker, f)
+        os.replace(tmp_path, os.path.join(workspace_dir, MARKER_FILE))
+
+    def _record_locked(self, **increments):
+        """Add to the per-process and shared stats counters; call with the root lock held."""
+        stats_path = os.path.join(self.root, STATS_FILE)
+        try:
+            with open(stats_path, 'r') as f:
+                shared = json.load(f)
+        except (OSError, ValueError):
+            shared = {}
+        for name, value in increments.items():
+            self.stats[name] += value
+            shared[name] = shared.get(name, 0) + value
+        tmp_path = stats_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(shared, f)
+        os.replace(tmp_path, stats_path)
+
+    def _read_shared_stats(self) -> Dict:
+        """Counters accumulated by every process using this root."""
+        try:
+            with open(os.path.join(self.root, STATS_FILE), 'r') as f:
+                shared = json.load(f)
+        except (OSError, ValueError):
+            shared = {}
+        return {name: shared.get(name, 0) for name in self.stats}
+
+    def _update_marker(self, footage_id: str, **changes) -> bool:
+        workspace_dir = self.get_dir(footage_id)
+        if not os.path.isdir(workspace_dir):
+            return False
+        marker = self._read_marker(workspace_dir)
+        marker.update(changes)
+        self._write_marker(workspace_dir, marker)
+        return True
+
+    def allocate(self, footage_id: str) -> str:
+        """
+        Create (or reuse) an item's workspace, pin it, and make room under the quota.
+
+        Args:
+            footage_id: Footage ID (LF or AF)
+
+        Returns:
+            Path to the pinned workspace directory
+        """
+        workspace_dir = self.get_dir(footage_id)
+        now = time.time()
+
+        with self._root_lock():
+            os.makedirs(workspace_dir, exist_ok=True)
+            marker = self._read_marker(workspace_dir)
+            marker.update({"footage_id": footage_id, "pinned": True, "pinned_at": now, "last_access": now})
+            marker.setdefault("created_at", now)
+            self._write_marker(workspace_dir, marker)
+            self._record_locked(allocations=1)
+            self._enforce_quota_locked()
+
+        return workspace_dir
+
+    def touch(self, footage_id: str):
+        """Record an access so the item moves to the back of the LRU order."""
+        with self._root_lock():
+            self._update_marker(footage_id, last_access=time.time())
+
+    def pin(self, footage_id: str):
+        """Mark an item as in flight so it can't be evicted."""
+        now = time.time()
+        with self._root_lock():
+            self._update_marker(footage_id, pinned=True, pinned_at=now, last_access=now)
+
+    def release(self, footage_id: str):
+        """Mark an item as finished; its artifacts become eligible for eviction."""
+        with self._root_lock():
+            self._update_marker(footage_id, pinned=False, completed_at=time.time())
+
+    def _list_items(self) -> List[Dict]:
+        """Scan the root for item workspaces with their size and marker state."""
+        items = []
+        if not os.path.isdir(self.root):
+            return items
+
+        now = time.time()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not name.startswith(WORKSPACE_PREFIX) or not os.path.isdir(path):
+                continue
+
+            marker = self._read_marker(path)
+            last_access = marker.get("last_access") or os.path.getmtime(path)
+            pinned = bool(marker.get("pinned")) and (now - marker.get("pinned_at", 0)) < self.pin_ttl_seconds
+            items.append({
+                "footage_id": name[len(WORKSPACE_PREFIX):],
+                "path": path,
+                "bytes": directory_size(path),
+                "pinned": pinned,
+                "last_access": last_access
+            })
+        return items
+
+    def _enforce_quota_locked(self) -> List[str]:
+        """Evict unpinned items, oldest access first, until usage is under quota."""
+        items = self._list_items()
+        used = sum(item["bytes"] for item in items)
+        evicted = []
+
+        for item in sorted((i for i in items if not i["pinned"]), key=lambda i: i["last_access"]):
+            if used <= self.quota_bytes:
+                break
+            shutil.rmtree(item["path"], ignore_errors=True)
+            used -= item["bytes"]
+            evicted.append(item["footage_id"])
+            self._record_locked(evictions=1, bytes_evicted=item["bytes"])
+            print(f"  -> 🧹 Evicted workspace {item['footage_id']} ({item['bytes'] / 1024 / 1024:.1f}MB)")
+
+        if used > self.quota_bytes:
+            print(f"  -> ⚠️ Workspace over quota with only pinned items "
+                  f"({used / 1024 ** 3:.2f}GB of {self.quota_bytes / 1024 ** 3:.2f}GB)")
+
+        return evicted
+
+    def enforce_quota(self) -> List[str]:
+        """
+        Evict completed items until usage is under quota.
+
+        Returns:
+            List of evicted footage IDs
+        """
+        with self._root_lock():
+            return self._enforce_quota_locked()
+
+    def get_usage(self) -> Dict:
+        """Get workspace usage for monitoring."""
+        items = self._list_items()
+        used = sum(item["bytes"] for item in items)
+        pinned = [item for item in items if item["pinned"]]
+
+        return {
+            "root": self.root,
+            "quota_bytes": self.quota_bytes,
+            "used_bytes": used,
+            "utilization_percent": round(used / self.quota_bytes * 100, 1) if self.quota_bytes else 0,
+            "items": len(items),
+            "pinned_items": len(pinned),
+            "pinned_bytes": sum(item["bytes"] for item in pinned),
+            **self._read_shared_stats()
+        }
+
+    def get_stats(self) -> Dict:
+        """Get per-process allocation and eviction statistics."""
+        with self._lock:
+            return self.stats.copy()
+
+
+# Global workspace manager instance
+global_workspace_manager = WorkspaceManager()
@@ -44,8 +44,22 @@ start_workers() {
         nohup rq worker ftg_ai_step4 --path "$PROJECT_ROOT" > /tmp/ftg_autolog_B_worker_step4_$i.log 2>&1 &
     done
     
+    # Prefetch: SMB → local footage cache (2 workers - I/O bound, only used if FTG_FOOTAGE_CACHE_DIR is set)
+    echo -e "${GREEN}Starting Prefetch workers (Local Footage Cache)...${NC}"
+    for i in {1..2}; do
+        nohup rq worker ftg_ai_prefetch --path "$PROJECT_ROOT" > /tmp/ftg_autolog_B_worker_prefetch_$i.log 2>&1 &
+    done
+    
+    # Transcribe: resident Whisper (SimpleWorker keeps the model loaded between jobs)
+    WHISPER_WORKERS=${FTG_WHISPER_WORKERS:-2}
+    export FTG_WHISPER_WORKERS=$WHISPER_WORKERS
+    echo -e "${GREEN}Starting Transcribe workers (Whisper x$WHISPER_WORKERS)...${NC}"
+    for i in $(seq 1 $WHISPER_WORKERS); do
+        nohup rq worker ftg_ai_transcribe --worker-class rq.worker.SimpleWorker --path "$PROJECT_ROOT" > /tmp/ftg_autolog_B_worker_transcribe_$i.log 2>&1 &
+    done
+    
     sleep 2
-    echo -e "${BLUE}✅ Workers started! Total: 11 workers${NC}"
+    echo -e "${BLUE}✅ Workers started! Total: $((13 + WHISPER_WORKERS)) workers${NC}"
     echo ""
     status_workers
 }
@@ -53,6 +67,8 @@ start_workers() {
 stop_workers() {
     echo -e "${RED}🛑 Stopping all Footage AutoLog Part B (AI) RQ Workers...${NC}"
     pkill -f "rq worker ftg_ai_step"
+    pkill -f "rq worker ftg_ai_prefetch"
+    pkill -f "rq worker ftg_ai_transcribe"
     sleep 1
     echo -e "${GREEN}✅ All workers stopped${NC}"
 }
@@ -69,8 +85,22 @@ status_workers() {
         fi
     done
     
+    count=$(pgrep -f "rq worker ftg_ai_prefetch" | wc -l | xargs)
+    if [ "$count" -gt 0 ]; then
+        echo -e "  ${GREEN}✓${NC} Prefetch: $count workers running"
+    else
+        echo -e "  ${RED}✗${NC} Prefetch: No workers"
+    fi
+    
+    count=$(pgrep -f "rq worker ftg_ai_transcribe" | wc -l | xargs)
+    if [ "$count" -gt 0 ]; then
+        echo -e "  ${GREEN}✓${NC} Transcribe: $count workers running"
+    else
+        echo -e "  ${RED}✗${NC} Transcribe: No workers"
+    fi
+    
     echo ""
-    total=$(pgrep -f "rq worker ftg_ai_step" | wc -l | xargs)
+    total=$(pgrep -f "rq worker ftg_ai_" | wc -l | xargs)
     echo -e "${BLUE}Total workers: $total${NC}"
     
     # Show queue sizes
@@ -79,12 +109,14 @@ status_workers() {
     python3 << 'EOF'
 import sys
 sys.path.append('/Users/admin/Documents/Github/Filemaker-Backend')
-from jobs.ftg_autolog_B_queue_jobs import q_step1, q_step2, q_step3, q_step4
+from jobs.ftg_autolog_B_queue_jobs import q_step1, q_step2, q_step3, q_step4, q_prefetch, q_transcribe
 
 print(f"  Step 1 (Assess):        {len(q_step1)} queued")
 print(f"  Step 2 (Gemini):        {len(q_step2)} queued")
 print(f"  Step 3 (Create Frames): {len(q_step3)} queued")
 print(f"  Step 4 (Transcription): {len(q_step4)} queued")
+print(f"  Prefetch (Local Cache): {len(q_prefetch)} queued")
+print(f"  Transcribe (Whisper):   {len(q_transcribe)} queued")
 EOF
 }
 